@@ -0,0 +1,155 @@
+"""
+Unit Tests for Alert Coalescing
+Tests repeat-detection digests per criminal and camera
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+
+@pytest.fixture
+def detect(db_session, sample_criminal):
+    """Record a detection and run it through send_detection_alert."""
+    from app.models.detection_log import DetectionLog
+    from app.services.alert_service import send_detection_alert
+    
+    def _detect(confidence=0.9, camera_id='CAM-1', location='Gate', criminal=sample_criminal):
+        detection = DetectionLog(
+            criminal_id=criminal.id,
+            confidence_score=confidence,
+            camera_id=camera_id,
+            location=location,
+            status='pending'
+        )
+        db_session.session.add(detection)
+        db_session.session.flush()
+        send_detection_alert(criminal, detection, confidence)
+        db_session.session.commit()
+        return detection
+    
+    return _detect
+
+
+@pytest.fixture
+def dispatcher_sinks(app):
+    """Empty the in-memory alert sinks."""
+    from app.services.alert_dispatcher import alert_dispatcher
+    
+    for sink in alert_dispatcher.sinks.values():
+        sink.clear()
+    yield alert_dispatcher.sinks
+    for sink in alert_dispatcher.sinks.values():
+        sink.clear()
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestAlertCoalescing:
+    """Test detection alert coalescing."""
+    
+    def test_repeat_hits_become_one_digest(self, db_session, detect):
+        """Repeat hits in the window produce one alert plus one digest."""
+        from app.models.alert import Alert
+        
+        for confidence in (0.8, 0.95, 0.85, 0.9):
+            detect(confidence)
+        
+        alerts = Alert.query.order_by(Alert.id).all()
+        assert [a.alert_type for a in alerts] == ['criminal_detected', 'detection_digest']
+        
+        digest = alerts[1]
+        params = digest.data['params']
+        assert digest.data['template'] == 'detection_digest'
+        assert params['hit_count'] == 3
+        assert params['peak_confidence'] == 0.95
+        assert params['first_seen'] <= params['last_seen']
+        assert '3 more time(s)' in digest.subject
+    
+    def test_digest_waits_for_window_end(self, app, db_session, detect, dispatcher_sinks):
+        """Digests are delivered when the suppression window closes."""
+        from app.models.alert import Alert
+        from app.services.alert_dispatcher import alert_dispatcher
+        
+        detect()
+        detect()
+        alert_dispatcher.dispatch_pending()
+        
+        digest = Alert.query.filter_by(alert_type='detection_digest').one()
+        assert digest.status == 'pending'
+        window = app.config['ALERT_COALESCE_WINDOW_SECONDS']
+        assert digest.next_attempt_at > datetime.utcnow() + timedelta(seconds=window - 10)
+    
+    def test_keys_are_per_camera(self, db_session, detect):
+        """Different cameras are coalesced separately."""
+        from app.models.alert import Alert
+        
+        detect(camera_id='CAM-1')
+        detect(camera_id='CAM-2')
+        
+        assert Alert.query.filter_by(alert_type='criminal_detected').count() == 2
+        assert Alert.query.filter_by(alert_type='detection_digest').count() == 0
+    
+    def test_new_alert_after_window(self, db_session, detect):
+        """A sighting after the window sends a fresh alert."""
+        from app.models.alert import Alert
+        
+        detect()
+        first = Alert.query.one()
+        first.created_at = datetime.utcnow() - timedelta(hours=1)
+        db_session.session.commit()
+        
+        detect()
+        
+        assert Alert.query.filter_by(alert_type='criminal_detected').count() == 2
+    
+    def test_window_zero_disables(self, app, db_session, detect):
+        """Coalescing can be turned off."""
+        from app.models.alert import Alert
+        
+        original = app.config['ALERT_COALESCE_WINDOW_SECONDS']
+        app.config['ALERT_COALESCE_WINDOW_SECONDS'] = 0
+        try:
+            detect()
+            detect()
+        finally:
+            app.config['ALERT_COALESCE_WINDOW_SECONDS'] = original
+        
+        assert Alert.query.filter_by(alert_type='criminal_detected').count() == 2
+
+    
+    def test_racing_digest_insert_folds_in(self, db_session, detect, monkeypatch):
+        """A detection that loses the race to open the digest is folded into it."""
+        from app.models.alert import Alert
+        from app.services import alert_coalescer
+        
+        detect()
+        detect()
+        lock_open_digest = alert_coalescer._lock_open_digest
+        calls = []
+        
+        def miss_first(key):
+            # The first lookup runs before the other detection's insert commits
+            calls.append(key)
+            return None if len(calls) == 1 else lock_open_digest(key)
+        
+        monkeypatch.setattr(alert_coalescer, '_lock_open_digest', miss_first)
+        detect()
+        
+        digest = Alert.query.filter_by(alert_type='detection_digest').one()
+        assert digest.data['params']['hit_count'] == 2
+        assert len(calls) == 2
+    
+    def test_retrying_digest_not_reused(self, db_session, detect):
+        """A digest whose delivery is being retried stops collecting hits."""
+        from app.models.alert import Alert
+        
+        detect()
+        detect()
+        digest = Alert.query.filter_by(alert_type='detection_digest').one()
+        digest.retry_count = 1
+        db_session.session.commit()
+        
+        detect()
+        
+        digests = Alert.query.filter_by(alert_type='detection_digest').order_by(Alert.id).all()
+        assert [d.data['params']['hit_count'] for d in digests] == [1, 1]
@@ -0,0 +1,169 @@
+"""
+Unit Tests for Alert Dispatcher
+Tests the outbound alert outbox, retries and backoff
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+
+@pytest.fixture
+def dispatcher(app, db_session):
+    """Alert dispatcher with empty in-memory sinks."""
+    from app.services.alert_dispatcher import alert_dispatcher
+    
+    for sink in alert_dispatcher.sinks.values():
+        sink.clear()
+    yield alert_dispatcher
+    for sink in alert_dispatcher.sinks.values():
+        sink.clear()
+
+
+def queue_email(db_session, **fields):
+    """Queue and commit one email alert."""
+    from app.services.alert_dispatcher import queue_alert
+    
+    values = {
+        'alert_type': 'criminal_detected',
+        'category': 'detection',
+        'message': '<p>Alert</p>',
+        'subject': 'Alert',
+        'recipient_email': 'ops@test.com',
+        'delivery_method': 'email'
+    }
+    values.update(fields)
+    alert = queue_alert(**values)
+    db_session.session.commit()
+    return alert
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestAlertDispatcher:
+    """Test outbox delivery."""
+    
+    def test_delivers_pending_alert(self, db_session, dispatcher):
+        """Pending alerts are delivered and marked sent."""
+        alert = queue_email(db_session)
+        
+        counts = dispatcher.dispatch_pending()
+        
+        assert counts == {'sent': 1, 'retried': 0, 'failed': 0}
+        assert dispatcher.sinks['email'].sent[0]['recipients'] == ['ops@test.com']
+        assert db_session.session.get(type(alert), alert.id).status == 'sent'
+    
+    def test_identical_emails_batched(self, db_session, dispatcher):
+        """One message goes to every recipient of an identical alert."""
+        for email in ('a@test.com', 'b@test.com', 'c@test.com'):
+            queue_email(db_session, recipient_email=email)
+        queue_email(db_session, subject='Other')
+        
+        assert dispatcher.dispatch_pending()['sent'] == 4
+        
+        sent = dispatcher.sinks['email'].sent
+        assert len(sent) == 2
+        assert sorted(sent[0]['recipients']) == ['a@test.com', 'b@test.com', 'c@test.com']
+    
+    def test_run_once(self, db_session, dispatcher):
+        """run(once=True) delivers a single batch, as `flask dispatch-alerts --once` does."""
+        queue_email(db_session)
+        queue_email(db_session, recipient_email='chief@test.com')
+        
+        assert dispatcher.run(once=True)['sent'] == 2
+    
+    def test_failure_backs_off(self, db_session, dispatcher):
+        """Failed deliveries are retried later with exponential backoff."""
+        alert = queue_email(db_session)
+        dispatcher.sinks['email'].failures = 2
+        
+        assert dispatcher.dispatch_pending()['retried'] == 1
+        alert = db_session.session.get(type(alert), alert.id)
+        assert alert.status == 'pending'
+        assert alert.retry_count == 1
+        assert alert.last_error == 'Simulated delivery failure'
+        assert alert.next_attempt_at > datetime.utcnow() + timedelta(seconds=dispatcher.retry_base_seconds - 5)
+        
+        # Not due yet
+        assert dispatcher.dispatch_pending() == {'sent': 0, 'retried': 0, 'failed': 0}
+        
+        alert.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.session.commit()
+        dispatcher.dispatch_pending()
+        alert = db_session.session.get(type(alert), alert.id)
+        assert alert.retry_count == 2
+        assert alert.next_attempt_at > datetime.utcnow() + timedelta(seconds=2 * dispatcher.retry_base_seconds - 5)
+    
+    def test_backoff_is_capped(self, dispatcher):
+        """Backoff doubles per retry up to the maximum."""
+        assert dispatcher.backoff(1) == dispatcher.retry_base_seconds
+        assert dispatcher.backoff(3) == dispatcher.retry_base_seconds * 4
+        assert dispatcher.backoff(50) == dispatcher.retry_max_seconds
+    
+    def test_gives_up_after_max_retries(self, db_session, dispatcher):
+        """Alerts are marked failed once retries are exhausted."""
+        alert = queue_email(db_session, retry_count=dispatcher.max_retries - 1)
+        dispatcher.sinks['email'].failures = 1
+        
+        assert dispatcher.dispatch_pending()['failed'] == 1
+        assert db_session.session.get(type(alert), alert.id).status == 'failed'
+    
+    def test_missing_recipient_not_retried(self, db_session, dispatcher):
+        """Alerts without a recipient fail permanently."""
+        alert = queue_email(db_session, delivery_method='sms', recipient_phone=None)
+        
+        assert dispatcher.dispatch_pending()['failed'] == 1
+        assert db_session.session.get(type(alert), alert.id).retry_count == 1
+    
+    def test_expired_lease_is_reclaimed(self, db_session, dispatcher):
+        """Alerts left 'sending' by a dead dispatcher are retried after the lease."""
+        alert = queue_email(db_session)
+        alert.status = 'sending'
+        alert.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.session.commit()
+        
+        assert dispatcher.dispatch_pending()['sent'] == 1
+    
+    def test_in_app_alerts_ignored(self, db_session, dispatcher):
+        """In-app notifications are not outbound deliveries."""
+        queue_email(db_session, delivery_method='in_app')
+        
+        assert dispatcher.dispatch_pending() == {'sent': 0, 'retried': 0, 'failed': 0}
+    
+    def test_detection_alert_is_queued_not_sent(self, db_session, dispatcher, sample_criminal):
+        """Detection alerts join the caller's transaction and send nothing inline."""
+        from app.models.alert import Alert
+        from app.models.detection_log import DetectionLog
+        from app.services.alert_service import send_detection_alert
+        
+        detection = DetectionLog(criminal_id=sample_criminal.id, confidence_score=0.9, status='pending')
+        db_session.session.add(detection)
+        db_session.session.flush()
+        
+        assert send_detection_alert(sample_criminal, detection, 0.9) is True
+        assert dispatcher.sinks['email'].sent == []
+        
+        db_session.session.rollback()
+        assert Alert.query.count() == 0
+    
+    def test_commit_wakes_dispatcher(self, db_session, dispatcher):
+        """Committing an outbound alert wakes the dispatcher."""
+        dispatcher._wake.clear()
+        
+        queue_email(db_session)
+        
+        assert dispatcher._wake.is_set()
+    
+    def test_thread_started_only_by_servers(self, app, dispatcher, monkeypatch):
+        """Building the app (e.g. for a CLI command) never starts the dispatcher thread."""
+        from app import start_alert_dispatcher
+        
+        started = []
+        monkeypatch.setattr(dispatcher, 'start', lambda: started.append(True))
+        monkeypatch.setitem(app.config, 'ALERT_DISPATCHER_ENABLED', True)
+        monkeypatch.setitem(app.config, 'TESTING', False)
+        
+        dispatcher.init_app(app)
+        assert started == []
+        
+        start_alert_dispatcher(app)
+        assert started == [True]
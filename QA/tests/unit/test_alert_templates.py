@@ -0,0 +1,112 @@
+"""
+Unit Tests for Alert Templates
+Tests precompiled email templates and lazy rendering of stored alerts
+"""
+
+import pytest
+
+
+@pytest.mark.unit
+class TestAlertTemplates:
+    """Test template rendering."""
+    
+    def test_every_template_renders(self):
+        """Each registered template renders with minimal parameters."""
+        from app.services.alert_templates import render_html, template_ids
+        
+        params = {
+            'criminal_id': 1, 'name': 'John Doe', 'criminal_name': 'John Doe',
+            'video_id': 7, 'hit_count': 2, 'generated_at': '2026-01-01T10:00:00'
+        }
+        for template_id in template_ids():
+            html = render_html(template_id, params)
+            assert html.startswith('<html>')
+            assert 'Generated at 2026-01-01' in html
+    
+    def test_values_are_escaped(self):
+        """Parameter values cannot inject markup."""
+        from app.services.alert_templates import render_html
+        
+        html = render_html('criminal_detected', {'name': '<script>x</script>', 'confidence': 0.5})
+        
+        assert '<script>' not in html
+        assert '&lt;script&gt;' in html
+    
+    def test_legacy_alert_renders_stored_message(self):
+        """Alerts without a template id fall back to their stored body."""
+        from app.models.alert import Alert
+        from app.services.alert_templates import render_alert
+        
+        assert render_alert(Alert(message='<p>Old</p>')) == '<p>Old</p>'
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestTemplatedAlerts:
+    """Test alerts stored as template id plus parameters."""
+    
+    def test_detection_alert_stores_params(self, db_session, sample_criminal):
+        """Detection alerts store compact parameters and a short summary."""
+        from app.models.alert import Alert
+        from app.models.detection_log import DetectionLog
+        from app.services.alert_service import send_detection_alert
+        from app.services.alert_templates import render_alert
+        
+        detection = DetectionLog(criminal_id=sample_criminal.id, confidence_score=0.9, camera_id='CAM-9', status='pending')
+        db_session.session.add(detection)
+        db_session.session.flush()
+        send_detection_alert(sample_criminal, detection, 0.9)
+        db_session.session.commit()
+        
+        alert = Alert.query.one()
+        assert alert.data['template'] == 'criminal_detected'
+        assert alert.data['params']['camera_id'] == 'CAM-9'
+        assert '<html>' not in alert.message
+        assert sample_criminal.name in alert.subject
+        assert 'CAM-9' in render_alert(alert)
+    
+    def test_dispatcher_sends_rendered_body(self, db_session):
+        """The rendered HTML is what gets delivered."""
+        from app.services.alert_dispatcher import alert_dispatcher, queue_alert
+        from app.services.alert_templates import template_fields
+        
+        sink = alert_dispatcher.sinks['email']
+        sink.clear()
+        fields = template_fields('criminal_added', {'criminal_id': 4, 'name': 'Jane Roe', 'actor': 'admin'})
+        for email in ('a@test.com', 'b@test.com'):
+            queue_alert(alert_type='criminal_added', category='criminal_mgmt', recipient_email=email,
+                        delivery_method='email', **fields)
+        db_session.session.commit()
+        
+        alert_dispatcher.dispatch_pending()
+        
+        assert len(sink.sent) == 1
+        assert 'NEW CRIMINAL RECORD ADDED' in sink.sent[0]['html']
+        assert 'Jane Roe' in sink.sent[0]['html']
+        sink.clear()
+    
+    def test_render_endpoint(self, client, admin_token, db_session):
+        """Stored alerts are rendered on view."""
+        from app.services.alert_dispatcher import queue_alert
+        from app.services.alert_templates import template_fields
+        
+        alert = queue_alert(
+            alert_type='criminal_deleted',
+            category='criminal_mgmt',
+            recipient_email='ops@test.com',
+            delivery_method='email',
+            **template_fields('criminal_deleted', {'criminal_id': 3, 'name': 'Jane Roe', 'actor': 'admin'})
+        )
+        db_session.session.commit()
+        
+        response = client.get(
+            f'/api/notifications/{alert.id}/render',
+            headers={'Authorization': f'Bearer {admin_token}'}
+        )
+        
+        assert response.status_code == 200
+        assert 'Jane Roe' in response.get_json()['html']
+        assert client.get(
+            '/api/notifications/999999/render',
+            headers={'Authorization': f'Bearer {admin_token}'}
+        ).status_code == 404
@@ -0,0 +1,157 @@
+"""
+Unit Tests for Hourly Detection Rollups
+Tests incremental rollup maintenance, backfill and rollup-backed analytics
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+
+@pytest.fixture
+def rollup_logs(db_session, sample_criminal, operator_user):
+    """Create detection logs spread over two hours and two locations."""
+    from app.models.detection_log import DetectionLog
+    
+    base = datetime.utcnow().replace(minute=10, second=0, microsecond=0) - timedelta(hours=2)
+    specs = [
+        (base, 'Main Street', 'CAM-001', 0.90, 'verified'),
+        (base + timedelta(minutes=20), 'Main Street', 'CAM-001', 0.70, 'verified'),
+        (base + timedelta(minutes=30), 'Main Street', 'CAM-001', 0.60, 'pending'),
+        (base + timedelta(hours=1), 'Station', 'CAM-002', 0.80, 'false_positive'),
+    ]
+    logs = []
+    for detected_at, location, camera_id, confidence, status in specs:
+        log = DetectionLog(
+            criminal_id=sample_criminal.id,
+            detected_at=detected_at,
+            confidence_score=confidence,
+            location=location,
+            camera_id=camera_id,
+            status=status,
+            detected_by=operator_user.id
+        )
+        db_session.session.add(log)
+        logs.append(log)
+    db_session.session.commit()
+    return logs
+
+
+def _rollup_snapshot():
+    from app.models.detection_rollup import DetectionRollup
+    
+    return sorted(
+        (r.bucket_hour, r.location, r.camera_id, r.criminal_id, r.status, r.detection_count, round(r.confidence_sum, 6))
+        for r in DetectionRollup.query.filter(DetectionRollup.detection_count != 0).all()
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestDetectionRollupMaintenance:
+    """Test that rollups follow detection log writes."""
+    
+    def test_insert_creates_hourly_buckets(self, rollup_logs):
+        """Logs in the same hour/key share one rollup row."""
+        from app.models.detection_rollup import DetectionRollup
+        
+        verified = DetectionRollup.query.filter_by(status='verified').one()
+        assert verified.detection_count == 2
+        assert verified.confidence_sum == pytest.approx(1.6)
+        assert verified.bucket_hour.minute == 0
+        assert DetectionRollup.query.count() == 3
+    
+    def test_status_change_moves_count(self, db_session, rollup_logs):
+        """Verifying a pending detection moves it to the verified bucket."""
+        from app.models.detection_rollup import DetectionRollup
+        
+        pending_log = rollup_logs[2]
+        pending_log.status = 'verified'
+        db_session.session.commit()
+        
+        pending = DetectionRollup.query.filter_by(status='pending').one()
+        verified = DetectionRollup.query.filter_by(status='verified').one()
+        assert pending.detection_count == 0
+        assert verified.detection_count == 3
+        assert verified.confidence_sum == pytest.approx(2.2)
+    
+    def test_backfill_matches_incremental(self, db_session, rollup_logs):
+        """Rebuilding from raw logs yields the same rollups."""
+        from app.services.analytics_service import AnalyticsService
+        
+        rollup_logs[2].status = 'false_positive'
+        db_session.session.commit()
+        incremental = _rollup_snapshot()
+        
+        result = AnalyticsService.backfill_detection_rollups(batch_size=2)
+        
+        assert result['logs_scanned'] == 4
+        assert _rollup_snapshot() == incremental
+    
+    def test_apply_delta_upserts_null_keys(self, db_session):
+        """Writers of the same new key (with NULL columns) share one row."""
+        from sqlalchemy.exc import IntegrityError
+        from app.models.detection_rollup import DetectionRollup
+        
+        key = DetectionRollup.key_for(datetime(2026, 1, 1, 10), '', None, None, 'pending')
+        with db_session.engine.begin() as connection:
+            DetectionRollup.apply_delta(connection, key, 1, 0.5)
+            DetectionRollup.apply_delta(connection, key, 2, 0.25)
+        
+        row = DetectionRollup.query.one()
+        assert (row.location, row.detection_count, row.confidence_sum) == (None, 3, 0.75)
+        
+        with pytest.raises(IntegrityError):
+            with db_session.engine.begin() as connection:
+                connection.execute(
+                    DetectionRollup.__table__.insert().values(detection_count=1, confidence_sum=0.1, **key)
+                )
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestRollupAnalytics:
+    """Test analytics computed from rollups."""
+    
+    def test_detection_trends(self, rollup_logs):
+        """Daily trends sum the hourly buckets."""
+        from app.services.analytics_service import AnalyticsService
+        
+        trends = AnalyticsService.get_detection_trends(days=7)
+        
+        assert sum(day['total'] for day in trends) == 4
+        assert sum(day['verified'] for day in trends) == 2
+        assert sum(day['pending'] for day in trends) == 1
+    
+    def test_location_heatmap(self, rollup_logs):
+        """Heatmap averages confidence across buckets."""
+        from app.services.analytics_service import AnalyticsService
+        
+        data = AnalyticsService.get_location_heatmap_data()
+        
+        assert data[0]['location'] == 'Main Street'
+        assert data[0]['total_detections'] == 3
+        assert data[0]['unique_criminals'] == 1
+        assert data[0]['avg_confidence'] == pytest.approx(0.733, abs=1e-3)
+    
+    def test_time_patterns(self, rollup_logs):
+        """Hourly and weekday patterns come from bucket timestamps."""
+        from app.services.analytics_service import AnalyticsService
+        
+        patterns = AnalyticsService.get_time_based_patterns()
+        first_hour = rollup_logs[0].detected_at
+        
+        hourly = {p['hour']: p['count'] for p in patterns['hourly_pattern']}
+        assert hourly[first_hour.hour] == 3
+        assert sum(p['count'] for p in patterns['daily_pattern']) == 4
+    
+    def test_summary_report(self, rollup_logs):
+        """Summary report counts detections in the period."""
+        from app.services.analytics_service import AnalyticsService
+        
+        report = AnalyticsService.generate_summary_report(days=1)
+        
+        assert report['summary']['total_detections'] == 4
+        assert report['summary']['unique_criminals'] == 1
+        assert report['performance']['verified_detections'] == 2
+        assert report['performance']['false_positives'] == 1
+        assert report['top_locations'][0] == {'location': 'Main Street', 'count': 3}
@@ -0,0 +1,230 @@
+"""
+Unit Tests for Embedding Backends
+Tests backend selection, DeepFace-compatible preprocessing, batching and
+parity of the exported Facenet512 with DeepFace (when the models are installed)
+"""
+
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'backend'))
+ONNX_MODEL = os.getenv('EMBEDDING_MODEL_PATH', os.path.join(BACKEND_DIR, 'models', 'facenet512.onnx'))
+# Photo with one clear frontal face (none is committed for licensing reasons)
+PARITY_FACE = os.getenv('EMBEDDING_PARITY_FACE', '')
+
+
+def have(*modules):
+    return all(importlib.util.find_spec(module) for module in modules)
+
+
+class MeanBackend:
+    """EmbeddingBackend with a fake network: the mean of each input channel."""
+    
+    @staticmethod
+    def make(faces_by_width):
+        from app.services.embedding_backends import EmbeddingBackend
+        
+        class Backend(EmbeddingBackend):
+            name = 'mean'
+            batches = []
+            
+            def load(self):
+                pass
+            
+            def forward(self, batch):
+                self.batches.append(len(batch))
+                return batch.mean(axis=(1, 2))
+            
+            def detect_faces(self, image):
+                return faces_by_width.get(image.shape[1], [])
+            
+            def align_face(self, image, box):
+                x, y, w, h = box
+                return image[y:y + h, x:x + w]
+        
+        return Backend('unused.onnx')
+
+
+@pytest.mark.unit
+class TestEmbeddingBackends:
+    """Test the pluggable embedding backends."""
+    
+    def test_backend_selection(self):
+        """EMBEDDING_BACKEND picks the backend; deepface keeps the built-in path."""
+        from app.services.embedding_backends import (
+            OnnxRuntimeBackend, OpenCVDnnBackend, create_embedding_backend
+        )
+        
+        assert create_embedding_backend({'EMBEDDING_BACKEND': 'deepface'}) is None
+        backend = create_embedding_backend({'EMBEDDING_BACKEND': 'onnxruntime', 'EMBEDDING_MODEL_PATH': 'm.onnx',
+                                            'EMBEDDING_THREADS': 2})
+        assert isinstance(backend, OnnxRuntimeBackend)
+        assert (backend.model_path, backend.threads) == ('m.onnx', 2)
+        assert isinstance(create_embedding_backend({'EMBEDDING_BACKEND': 'opencv-dnn'}), OpenCVDnnBackend)
+        with pytest.raises(ValueError):
+            create_embedding_backend({'EMBEDDING_BACKEND': 'tensorrt'})
+    
+    def test_preprocess_keeps_aspect_ratio(self):
+        """Crops are scaled to [0, 1] and padded to 160x160 like DeepFace does."""
+        from app.services.embedding_backends import preprocess_face
+        
+        face = np.full((100, 50, 3), 255, dtype=np.uint8)
+        
+        tensor = preprocess_face(face)
+        
+        assert tensor.shape == (160, 160, 3)
+        assert tensor.dtype == np.float32
+        assert tensor.max() == pytest.approx(1.0)
+        assert tensor[:, :40].max() == 0 and tensor[:, 120:].max() == 0
+        assert tensor[:, 40:120].min() == pytest.approx(1.0)
+    
+    def test_represent_batches_faces(self):
+        """All readable images go through one forward pass."""
+        backend = MeanBackend.make({80: [(0, 0, 40, 40)], 90: [(10, 10, 50, 50)]})
+        images = [np.full((100, 80, 3), 51, np.uint8), '/nonexistent/face.jpg',
+                  np.full((100, 90, 3), 102, np.uint8)]
+        
+        encodings = backend.represent(images)
+        
+        assert backend.batches == [2]
+        assert np.allclose(encodings[0], 0.2, atol=1e-4)
+        assert encodings[1] is None
+        assert np.allclose(encodings[2], 0.4, atol=1e-4)
+    
+    def test_represent_embeds_whole_image_without_face(self):
+        """A crop the detector misses is embedded whole, as DeepFace does."""
+        backend = MeanBackend.make({})
+        crop = np.full((60, 50, 3), 153, np.uint8)
+        
+        encoding = backend.represent([crop])[0]
+        
+        # preprocess_face scales 50x60 to 160x133 and pads: 5/6 of the rows are face
+        assert np.allclose(encoding, 0.6 * 5 / 6, atol=1e-2)
+    
+    def test_face_service_uses_backend(self):
+        """With a backend configured DeepFace is never touched."""
+        from unittest.mock import patch
+        from app.services.face_service_deepface import FaceServiceDeepFace
+        
+        service = FaceServiceDeepFace()
+        service.use_embedding_backend(MeanBackend.make({80: [(0, 0, 40, 40)]}))
+        
+        with patch('app.services.face_service_deepface.DeepFace') as mock_deepface:
+            assert service.warm_up() is True
+            assert service.status['backend'] == 'mean'
+            assert service.detect_faces(np.zeros((100, 80, 3), np.uint8)) == [(0, 0, 40, 40)]
+            encodings = service.extract_face_encodings([np.zeros((100, 80, 3), np.uint8),
+                                                        '/nonexistent/face.jpg'])
+            assert mock_deepface.mock_calls == []
+        assert encodings[0] is not None
+        assert encodings[1] is None
+
+
+@pytest.mark.unit
+@pytest.mark.slow
+@pytest.mark.requires_models
+@pytest.mark.skipif(not (have('deepface', 'tensorflow') and os.path.exists(ONNX_MODEL)),
+                    reason='needs DeepFace/TensorFlow and an exported facenet512.onnx')
+class TestEmbeddingParity:
+    """The exported model must embed like DeepFace's Facenet512."""
+    
+    @pytest.fixture(scope='class')
+    def reference(self):
+        from deepface import DeepFace
+        
+        client = DeepFace.build_model('Facenet512')
+        model = getattr(client, 'model', client)
+        batch = np.random.default_rng(7).random((8, 160, 160, 3), dtype=np.float32)
+        return batch, model.predict(batch, verbose=0)
+    
+    @staticmethod
+    def assert_parity(actual, expected):
+        cosine = np.sum(actual * expected, axis=1) / (
+            np.linalg.norm(actual, axis=1) * np.linalg.norm(expected, axis=1)
+        )
+        assert cosine.min() > 0.9999
+        assert np.abs(actual - expected).max() < 1e-3 * np.abs(expected).max()
+    
+    @pytest.mark.skipif(not have('onnxruntime'), reason='onnxruntime not installed')
+    def test_onnxruntime_parity(self, reference):
+        from app.services.embedding_backends import OnnxRuntimeBackend
+        
+        batch, expected = reference
+        backend = OnnxRuntimeBackend(ONNX_MODEL, threads=2)
+        backend.load()
+        
+        self.assert_parity(backend.forward(batch), expected)
+    
+    def test_opencv_dnn_parity(self, reference):
+        from app.services.embedding_backends import OpenCVDnnBackend
+        
+        batch, expected = reference
+        backend = OpenCVDnnBackend(ONNX_MODEL, threads=2)
+        backend.load()
+        
+        self.assert_parity(backend.forward(batch), expected)
+    
+    def test_preprocessing_matches_deepface(self):
+        from deepface.modules import preprocessing
+        from app.services.embedding_backends import preprocess_face
+        
+        face = np.random.default_rng(3).integers(0, 256, size=(120, 90, 3), dtype=np.uint8)
+        
+        expected = preprocessing.resize_image(face.astype(np.float32) / 255, (160, 160))[0]
+        
+        assert np.abs(preprocess_face(face) - expected).max() < 1e-2
+
+
+def cosine(a, b):
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+@pytest.mark.unit
+@pytest.mark.slow
+@pytest.mark.requires_models
+@pytest.mark.skipif(not (have('deepface', 'tensorflow') and os.path.exists(ONNX_MODEL) and os.path.isfile(PARITY_FACE)),
+                    reason='needs DeepFace/TensorFlow, an exported facenet512.onnx and EMBEDDING_PARITY_FACE')
+class TestPipelineParity:
+    """represent() (detect, align, preprocess, embed) must match DeepFace.represent."""
+    
+    @pytest.fixture(scope='class', params=['onnxruntime', 'opencv-dnn'])
+    def backend(self, request):
+        from app.services.embedding_backends import BACKENDS
+        
+        if request.param == 'onnxruntime' and not have('onnxruntime'):
+            pytest.skip('onnxruntime not installed')
+        backend = BACKENDS[request.param](ONNX_MODEL, threads=2)
+        backend.load()
+        return backend
+    
+    @pytest.fixture(scope='class')
+    def images(self):
+        """The photo, and the tight padded crop DetectionService passes to the embedder."""
+        import cv2
+        from app.services.embedding_backends import OpenCVDnnBackend
+        
+        photo = cv2.imread(PARITY_FACE)
+        faces = OpenCVDnnBackend(ONNX_MODEL).detect_faces(photo)
+        assert faces, 'EMBEDDING_PARITY_FACE must contain a face the Haar detector finds'
+        x, y, w, h = faces[0]
+        padding = int(0.05 * w)
+        crop = photo[max(0, y - padding):y + h + padding, max(0, x - padding):x + w + padding]
+        return {'photo': photo, 'crop': crop.copy()}
+    
+    @staticmethod
+    def deepface_embedding(image):
+        from deepface import DeepFace
+        
+        return np.asarray(DeepFace.represent(img_path=image, model_name='Facenet512', enforce_detection=False,
+                                             detector_backend='opencv', align=True)[0]['embedding'])
+    
+    @pytest.mark.parametrize('name', ['photo', 'crop'])
+    def test_represent_matches_deepface(self, backend, images, name):
+        actual = backend.represent([images[name]])[0]
+        
+        assert actual is not None
+        assert cosine(actual, self.deepface_embedding(images[name])) > 0.99
@@ -0,0 +1,105 @@
+"""
+Unit Tests for Enhanced Alert Service
+Tests multi-channel alert fan-out
+"""
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def admins(db_session):
+    """Fifty admin users with email and phone."""
+    from app.models.user import User
+    
+    # Password hashing is irrelevant here and slow for 50 users
+    users = [
+        User(username=f'admin{i}', email=f'admin{i}@test.com', role='admin',
+             phone=f'+1555{i:07d}', password_hash='unused')
+        for i in range(50)
+    ]
+    db_session.session.add_all(users)
+    db_session.session.commit()
+    return users
+
+
+@pytest.fixture
+def sinks(app):
+    """Empty the in-memory alert sinks."""
+    from app.services.alert_dispatcher import alert_dispatcher
+    
+    for sink in alert_dispatcher.sinks.values():
+        sink.clear()
+    yield alert_dispatcher.sinks
+    for sink in alert_dispatcher.sinks.values():
+        sink.clear()
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestAlertFanOut:
+    """Test bulk fan-out of alerts to recipients and channels."""
+    
+    def test_fan_out_is_bulk(self, db_session, admins, sinks):
+        """50 admins over 3 channels take a handful of statements and one commit."""
+        from app.models.alert import Alert
+        from app.services.enhanced_alert_service import EnhancedAlertService
+        
+        statements = []
+        commits = []
+        engine = db_session.engine
+        
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        def count_commit(conn):
+            commits.append(conn)
+        
+        event.listen(engine, 'before_cursor_execute', count)
+        event.listen(engine, 'commit', count_commit)
+        try:
+            alert = EnhancedAlertService.send_alert(
+                'Disk almost full', severity='critical', category='system',
+                channels=['email', 'sms', 'in_app']
+            )
+        finally:
+            event.remove(engine, 'before_cursor_execute', count)
+            event.remove(engine, 'commit', count_commit)
+        
+        assert alert is not None
+        # Recipients, one executemany INSERT (paged by SQLite's bound
+        # parameter limit), counter upsert and the returned alert
+        assert len(statements) <= 7
+        assert len(commits) == 1
+        assert Alert.query.count() == 150
+        assert Alert.query.filter_by(delivery_method='in_app', status='delivered').count() == 50
+        assert Alert.query.filter_by(delivery_method='email', status='pending').count() == 50
+    
+    def test_emails_sent_as_one_message(self, db_session, admins, sinks):
+        """Queued emails are batched by the dispatcher into one message."""
+        from app.services.alert_dispatcher import alert_dispatcher
+        from app.services.enhanced_alert_service import EnhancedAlertService
+        
+        EnhancedAlertService.send_alert('Backup finished', channels=['email'])
+        
+        assert alert_dispatcher.dispatch_pending(limit=100)['sent'] == 50
+        assert len(sinks['email'].sent) == 1
+        assert len(sinks['email'].sent[0]['recipients']) == 50
+        assert 'Backup finished' in sinks['email'].sent[0]['html']
+    
+    def test_missing_phone_fails_without_retry(self, db_session, sinks):
+        """Recipients without a phone number are recorded as failed."""
+        from app.models.alert import Alert
+        from app.models.user import User
+        from app.services.enhanced_alert_service import EnhancedAlertService
+        
+        user = User(username='nophone', email='nophone@test.com', role='admin')
+        user.set_password('Admin@123')
+        db_session.session.add(user)
+        db_session.session.commit()
+        
+        EnhancedAlertService.send_alert('Test', user_id=user.id, channels=['sms'])
+        
+        alert = Alert.query.one()
+        assert alert.status == 'failed'
+        assert 'no phone' in alert.last_error
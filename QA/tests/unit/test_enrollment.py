@@ -0,0 +1,100 @@
+"""
+Unit Tests for Enrollment Service
+Tests batched photo enrollment and in-memory primary selection
+"""
+
+import pickle
+
+import cv2
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+
+class FakeFaceService:
+    """Embeds every image in one call; images narrower than 50px have no face."""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def extract_face_encodings(self, images):
+        self.calls.append(len(images))
+        return [np.ones(4) if image.shape[1] >= 50 else None for image in images]
+    
+    def save_encoding(self, encoding):
+        return pickle.dumps(encoding)
+
+
+def jpeg(width, value=128):
+    rng = np.random.default_rng(width)
+    image = rng.integers(value - 40, value + 40, size=(120, width, 3), dtype=np.uint8)
+    return cv2.imencode('.jpg', image)[1].tobytes()
+
+
+@pytest.fixture
+def enrollment(tmp_path):
+    """Enrollment service writing under a temp folder."""
+    from app.services.enrollment_service import EnrollmentService
+    
+    return EnrollmentService(FakeFaceService(), max_workers=4, encodings_folder=str(tmp_path))
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestEnrollment:
+    """Test batch enrollment."""
+    
+    def test_batch_enrolled_with_one_insert(self, db_session, sample_criminal, enrollment):
+        """Twenty photos take one model call and one INSERT."""
+        from app.models.face_encoding import FaceEncoding
+        
+        photos = [(f'photo{i}.jpg', jpeg(100 + i)) for i in range(20)]
+        inserts = []
+        
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('INSERT INTO face_encodings'):
+                inserts.append(statement)
+        
+        engine = db_session.engine
+        event.listen(engine, 'before_cursor_execute', count)
+        try:
+            outcome = enrollment.enroll(sample_criminal.id, photos)
+        finally:
+            event.remove(engine, 'before_cursor_execute', count)
+        
+        assert outcome['success_count'] == 20
+        assert enrollment.face_service.calls == [20]
+        assert len(inserts) == 1
+        assert [r['filename'] for r in outcome['results']] == [name for name, _ in photos]
+        
+        stored = FaceEncoding.query.filter_by(criminal_id=sample_criminal.id).all()
+        assert {e.id for e in stored} == {r['encoding_id'] for r in outcome['results']}
+        assert sum(e.is_primary for e in stored) == 1
+        best = max(stored, key=lambda e: e.quality_score)
+        assert best.is_primary
+    
+    def test_failures_reported_and_files_removed(self, db_session, sample_criminal, enrollment, tmp_path):
+        """Undecodable and faceless photos fail without leaving files."""
+        outcome = enrollment.enroll(sample_criminal.id, [
+            ('good.jpg', jpeg(120)), ('broken.jpg', b'not an image'), ('noface.jpg', jpeg(30))
+        ])
+        
+        assert outcome['success_count'] == 1
+        assert [r.get('error') for r in outcome['results']] == [None, 'Could not read image', 'No face detected']
+        assert len(list((tmp_path / str(sample_criminal.id)).iterdir())) == 1
+    
+    def test_existing_better_primary_kept(self, db_session, sample_criminal, enrollment):
+        """A higher-quality existing photo stays primary."""
+        from app import db
+        from app.models.face_encoding import FaceEncoding
+        
+        existing = FaceEncoding(criminal_id=sample_criminal.id, encoding_data=b'x', image_path='old.jpg',
+                                quality_score=0.99, is_primary=False)
+        db.session.add(existing)
+        db.session.commit()
+        
+        outcome = enrollment.enroll(sample_criminal.id, [('new.jpg', jpeg(110))])
+        
+        assert outcome['results'][0]['is_primary'] is False
+        db.session.refresh(existing)
+        assert existing.is_primary is True
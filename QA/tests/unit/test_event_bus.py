@@ -0,0 +1,230 @@
+"""
+Unit Tests for Live Event Bus
+Tests subscription filtering, after-commit publishing and the SSE stream
+"""
+
+import json
+import pytest
+from datetime import datetime
+
+
+@pytest.fixture
+def bus():
+    """Create an isolated event bus."""
+    from app.services.event_bus import EventBus
+    return EventBus()
+
+
+@pytest.mark.unit
+class TestEventBus:
+    """Test pub/sub behaviour."""
+    
+    def test_category_and_severity_filters(self, bus):
+        """Subscribers only receive matching events."""
+        subscription = bus.subscribe(categories=['alert'], min_severity='warning')
+        
+        bus.publish('detection', 'created', {}, severity='critical')
+        bus.publish('alert', 'created', {'id': 1}, severity='info')
+        bus.publish('alert', 'created', {'id': 2}, severity='critical')
+        
+        evt = subscription.get(timeout=0.1)
+        assert evt['data'] == {'id': 2}
+        assert subscription.get(timeout=0.01) is None
+    
+    def test_user_addressed_events(self, bus):
+        """Events for a user are not delivered to other users."""
+        mine = bus.subscribe(user_id=1)
+        other = bus.subscribe(user_id=2)
+        
+        bus.publish('alert', 'created', {}, user_id=1)
+        
+        assert mine.get(timeout=0.1) is not None
+        assert other.get(timeout=0.01) is None
+    
+    def test_slow_subscriber_drops_oldest(self, bus):
+        """A full queue drops the oldest events instead of blocking."""
+        subscription = bus.subscribe(max_queue=2)
+        
+        for i in range(3):
+            bus.publish('detection', 'created', {'n': i})
+        
+        assert subscription.dropped == 1
+        assert subscription.get(timeout=0.1)['data'] == {'n': 1}
+    
+    def test_replay_after_reconnect(self, bus):
+        """Buffered events newer than Last-Event-ID are replayed."""
+        first = bus.publish('detection', 'created', {'n': 1})
+        bus.publish('detection', 'created', {'n': 2})
+        
+        subscription = bus.subscribe(last_event_id=first['id'])
+        
+        assert subscription.get(timeout=0.1)['data'] == {'n': 2}
+
+
+@pytest.mark.unit
+class TestEventRelay:
+    """Test fan-out between processes sharing a relay file."""
+    
+    @pytest.fixture
+    def buses(self, tmp_path):
+        """Two buses standing in for two workers on the same host."""
+        from app.services.event_bus import EventBus, SQLiteEventRelay
+        
+        path = str(tmp_path / 'event_bus.db')
+        pair = [EventBus(), EventBus()]
+        for bus in pair:
+            bus.use_relay(SQLiteEventRelay(path), poll_seconds=0.01)
+        yield pair
+        for bus in pair:
+            bus.stop_relay()
+    
+    def test_event_reaches_other_worker(self, buses):
+        """Subscribers and listeners of every bus receive the event once, with one id."""
+        publisher, other = buses
+        subscription = other.subscribe(categories=['alert'])
+        local = publisher.subscribe(categories=['alert'])
+        heard = []
+        other.add_listener(heard.append)
+        
+        evt = publisher.publish('alert', 'created', {'id': 7})
+        
+        received = subscription.get(timeout=2)
+        assert received['id'] == evt['id']
+        assert received['data'] == {'id': 7}
+        assert local.get(timeout=2)['id'] == evt['id']
+        assert subscription.get(timeout=0.05) is None
+        assert [e['id'] for e in heard] == [evt['id']]
+    
+    def test_replay_on_another_worker(self, buses):
+        """Last-Event-ID from one worker resumes on another."""
+        publisher, other = buses
+        watcher = other.subscribe()
+        first = publisher.publish('detection', 'created', {'n': 1})
+        publisher.publish('detection', 'created', {'n': 2})
+        watcher.get(timeout=2)
+        watcher.get(timeout=2)
+        
+        subscription = other.subscribe(last_event_id=first['id'])
+        
+        assert subscription.get(timeout=0.1)['data'] == {'n': 2}
+        assert subscription.get(timeout=0.05) is None
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestCommitHooks:
+    """Test that committed model changes are published."""
+    
+    def test_detection_published_on_commit(self, db_session, sample_criminal):
+        """New detections are published only after commit."""
+        from app.models.detection_log import DetectionLog
+        from app.services.event_bus import event_bus
+        
+        subscription = event_bus.subscribe(categories=['detection'])
+        try:
+            detection = DetectionLog(
+                criminal_id=sample_criminal.id,
+                detected_at=datetime.utcnow(),
+                confidence_score=0.9,
+                location='Main Street'
+            )
+            db_session.session.add(detection)
+            db_session.session.flush()
+            assert subscription.get(timeout=0.01) is None
+            
+            db_session.session.commit()
+            evt = subscription.get(timeout=0.1)
+        finally:
+            event_bus.unsubscribe(subscription)
+        
+        assert evt['type'] == 'created'
+        assert evt['severity'] == 'critical'
+        assert evt['data']['id'] == detection.id
+        assert evt['data']['location'] == 'Main Street'
+    
+    def test_rollback_discards_events(self, db_session, sample_criminal):
+        """Rolled back changes are never published."""
+        from app.models.detection_log import DetectionLog
+        from app.services.event_bus import event_bus
+        
+        subscription = event_bus.subscribe(categories=['detection'])
+        try:
+            db_session.session.add(DetectionLog(
+                criminal_id=sample_criminal.id,
+                confidence_score=0.5
+            ))
+            db_session.session.flush()
+            db_session.session.rollback()
+            db_session.session.commit()
+            evt = subscription.get(timeout=0.01)
+        finally:
+            event_bus.unsubscribe(subscription)
+        
+        assert evt is None
+    
+    def test_video_progress_published(self, db_session, admin_user):
+        """Video progress updates carry a percentage."""
+        from app.models.video_detection import VideoDetection
+        from app.services.event_bus import event_bus
+        
+        video = VideoDetection(
+            video_filename='clip.mp4',
+            video_path='/tmp/clip.mp4',
+            uploaded_by=admin_user.id,
+            total_frames=200
+        )
+        db_session.session.add(video)
+        db_session.session.commit()
+        
+        subscription = event_bus.subscribe(categories=['video'])
+        try:
+            video.frames_processed = 50
+            db_session.session.commit()
+            evt = subscription.get(timeout=0.1)
+        finally:
+            event_bus.unsubscribe(subscription)
+        
+        assert evt['type'] == 'progress'
+        assert evt['data']['progress_percent'] == 25.0
+
+
+@pytest.mark.unit
+class TestEventStream:
+    """Test the SSE endpoint."""
+    
+    def test_requires_auth(self, client):
+        """Stream requires a token."""
+        response = client.get('/api/events/stream')
+        assert response.status_code == 401
+    
+    def test_rejects_unknown_category(self, client, admin_token):
+        """Unknown categories are rejected."""
+        response = client.get(f'/api/events/stream?jwt={admin_token}&categories=weather')
+        assert response.status_code == 400
+    
+    def test_streams_events_and_heartbeats(self, app, client, admin_token):
+        """Stream emits published events and heartbeat comments."""
+        from app.services.event_bus import event_bus
+        
+        app.config['EVENT_STREAM_HEARTBEAT_SECONDS'] = 0.05
+        try:
+            response = client.get(
+                f'/api/events/stream?jwt={admin_token}&categories=alert',
+                buffered=False
+            )
+            chunks = iter(response.response)
+            
+            assert response.mimetype == 'text/event-stream'
+            assert next(chunks).decode().startswith('retry:')
+            assert next(chunks).decode() == ': heartbeat\n\n'
+            
+            event_bus.publish('alert', 'created', {'id': 7}, severity='warning')
+            message = next(chunks).decode()
+            response.close()
+        finally:
+            app.config['EVENT_STREAM_HEARTBEAT_SECONDS'] = 15
+        
+        assert message.startswith('id: ')
+        assert 'event: alert' in message
+        payload = json.loads(message.split('data: ', 1)[1])
+        assert payload['data'] == {'id': 7}
@@ -0,0 +1,120 @@
+"""
+Unit Tests for Face Detectors
+Tests the SSD detector, per-pipeline detector selection and the benchmark's matching
+"""
+
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+import pytest
+
+
+class FakeNet:
+    """Stands in for the res10 SSD: returns fixed detections, records the input blob."""
+    
+    def __init__(self, rows):
+        self.rows = np.array(rows, dtype=np.float32).reshape(1, 1, -1, 7)
+        self.blobs = []
+    
+    def setInput(self, blob):
+        self.blobs.append(blob.shape)
+    
+    def forward(self):
+        return self.rows
+
+
+class FixedDetector:
+    name = 'fixed'
+    
+    def load(self):
+        pass
+    
+    def detect(self, image):
+        return [(1, 1, image.shape[1] // 2, image.shape[0] // 2)]
+
+
+@pytest.fixture
+def ssd(tmp_path, monkeypatch):
+    """SSD detector on a fake network."""
+    from app.services.face_detectors import SSDDetector
+    
+    net = FakeNet([
+        [0, 1, 0.90, 0.10, 0.20, 0.50, 0.60],
+        [0, 1, 0.30, 0.00, 0.00, 0.50, 0.50],   # below the confidence threshold
+        [0, 1, 0.80, 0.00, 0.00, 0.02, 0.02],   # smaller than min_face_size
+        [0, 1, 0.95, 0.50, 0.50, 1.20, 1.10],   # runs off the image
+    ])
+    monkeypatch.setattr(cv2.dnn, 'readNet', lambda model, config: net)
+    weights = tmp_path / 'res10.caffemodel'
+    weights.write_bytes(b'')
+    detector = SSDDetector('deploy.prototxt', str(weights), confidence=0.5, input_size=200, min_face_size=20)
+    detector.load()
+    return detector, net
+
+
+@pytest.mark.unit
+class TestFaceDetectors:
+    """Test the detector registry."""
+    
+    def test_ssd_boxes(self, ssd):
+        """Scores are thresholded, boxes scaled, clamped and sorted by confidence."""
+        detector, net = ssd
+        image = np.zeros((200, 400, 3), dtype=np.uint8)
+        
+        detections = detector.detect_with_scores(image)
+        
+        assert [box for box, _ in detections] == [(200, 100, 200, 100), (40, 40, 160, 80)]
+        assert [round(score, 2) for _, score in detections] == [0.95, 0.9]
+        assert net.blobs == [(1, 3, 200, 200)]
+    
+    def test_pipelines_select_detectors(self, monkeypatch):
+        """Video uses the configured registry detector, uploads keep the built-in one."""
+        from app.services import face_detectors
+        from app.services.face_service_deepface import FaceServiceDeepFace
+        
+        monkeypatch.setitem(face_detectors.DETECTORS, 'fixed', lambda config: FixedDetector())
+        service = FaceServiceDeepFace()
+        service.configure_detectors({'FACE_DETECTOR_VIDEO': 'fixed'})
+        frame = np.zeros((100, 80, 3), dtype=np.uint8)
+        
+        with patch('app.services.face_service_deepface.DeepFace') as mock_deepface:
+            mock_deepface.extract_faces.return_value = [{'facial_area': {'x': 5, 'y': 6, 'w': 30, 'h': 40}}]
+            
+            assert service.detector_for('video') == 'fixed'
+            assert service.detect_faces(frame, detector=service.detector_for('video')) == [(1, 1, 40, 50)]
+            mock_deepface.extract_faces.assert_not_called()
+            
+            assert service.detector_for('upload') == 'deepface'
+            assert service.detect_faces(frame, detector=service.detector_for('upload')) == [(5, 6, 30, 40)]
+    
+    def test_missing_model_falls_back(self, tmp_path):
+        """A detector that cannot load falls back to the built-in one."""
+        from app.services.face_service_deepface import FaceServiceDeepFace
+        
+        service = FaceServiceDeepFace()
+        service.configure_detectors({'FACE_DETECTOR_LIVE': 'ssd', 'SSD_MODEL': str(tmp_path / 'missing.caffemodel')})
+        
+        with patch('app.services.face_service_deepface.DeepFace') as mock_deepface:
+            mock_deepface.extract_faces.return_value = [{'facial_area': {'x': 1, 'y': 2, 'w': 3, 'h': 4}}]
+            faces = service.detect_faces(np.zeros((50, 50, 3), np.uint8), detector='ssd')
+        
+        assert faces == [(1, 2, 3, 4)]
+        assert service._detectors == {'ssd': None}
+    
+    def test_unknown_detector_rejected(self):
+        from app.services.face_detectors import create_detector
+        
+        with pytest.raises(ValueError):
+            create_detector('yolo', {})
+    
+    def test_benchmark_matching(self):
+        """Recall counts each ground-truth face at most once."""
+        from benchmark_face_detectors import count_matches
+        
+        truth = [(0, 0, 100, 100), (200, 200, 50, 50)]
+        predicted = [(5, 5, 100, 100), (0, 0, 95, 95), (400, 400, 10, 10)]
+        
+        assert count_matches(predicted, truth) == 1
+        assert count_matches(predicted + [(205, 200, 50, 50)], truth) == 2
+        assert count_matches([], truth) == 0
@@ -0,0 +1,154 @@
+"""
+Unit Tests for Face Model Loading
+Tests lazy DeepFace import, explicit warm-up and the readiness probe
+"""
+
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'backend'))
+
+
+@pytest.mark.unit
+class TestFaceModelLoading:
+    """Test deferred face model loading."""
+    
+    def test_app_startup_does_not_import_deepface(self):
+        """create_app() and every blueprint load without DeepFace/TensorFlow."""
+        script = (
+            'import sys; sys.path.insert(0, %r)\n'
+            'from app import create_app\n'
+            'create_app("testing")\n'
+            'import app.services.video_processing_service, app.services.watchlist_importer\n'
+            'print(sorted(m for m in ("deepface", "tensorflow") if m in sys.modules))\n'
+        ) % BACKEND
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                cwd=BACKEND, timeout=120)
+        
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == '[]'
+    
+    def test_prefork_master_does_not_build_model(self):
+        """prepare_for_fork() loads the gallery but leaves TensorFlow to the workers."""
+        script = (
+            'import sys; sys.path.insert(0, %r)\n'
+            'from app import create_app, db, prepare_for_fork\n'
+            'from app.services.face_service_deepface import face_service_deepface\n'
+            'app = create_app("testing")\n'
+            'app.config["FACE_MODEL_WARMUP"] = True\n'
+            'with app.app_context(): db.create_all()\n'
+            'prepare_for_fork(app)\n'
+            'print(face_service_deepface.status["state"],\n'
+            '      sorted(m for m in ("deepface", "tensorflow") if m in sys.modules))\n'
+        ) % BACKEND
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                cwd=BACKEND, timeout=120)
+        
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == 'not_loaded []'
+    
+    @patch('app.services.face_service_deepface.DeepFace')
+    def test_warm_up_builds_model_once(self, mock_deepface):
+        """warm_up() is idempotent and reports its state."""
+        from app.services.face_service_deepface import FaceServiceDeepFace
+        
+        service = FaceServiceDeepFace()
+        assert service.status['state'] == 'not_loaded'
+        
+        assert service.warm_up() is True
+        assert service.warm_up() is True
+        
+        mock_deepface.build_model.assert_called_once_with(service.MODEL_NAME)
+        assert service.status['state'] == 'ready'
+    
+    @patch('app.services.face_service_deepface.DeepFace')
+    def test_first_use_loads_model(self, mock_deepface):
+        """Calling the service without a warm-up loads the model first."""
+        from app.services.face_service_deepface import FaceServiceDeepFace
+        
+        mock_deepface.represent.return_value = [{'embedding': [0.1, 0.2]}]
+        service = FaceServiceDeepFace()
+        
+        assert service.extract_face_encoding('face.jpg') is not None
+        assert service.ready
+    
+    @patch('app.services.face_service_deepface.DeepFace')
+    def test_failed_warm_up_reported(self, mock_deepface):
+        """A failed load is reported instead of raised."""
+        from app.services.face_service_deepface import FaceServiceDeepFace
+        
+        mock_deepface.build_model.side_effect = RuntimeError('no weights')
+        service = FaceServiceDeepFace()
+        
+        assert service.warm_up() is False
+        assert service.status['state'] == 'failed'
+        assert service.status['error'] == 'no weights'
+    
+    @patch('app.services.face_service_deepface.DeepFace')
+    def test_failed_load_retried_with_backoff(self, mock_deepface, monkeypatch):
+        """First use after a failure retries the load once the backoff has passed."""
+        import importlib
+        from app.services.face_service_deepface import FaceServiceDeepFace
+        
+        clock = [1000.0]
+        module = importlib.import_module('app.services.face_service_deepface')
+        monkeypatch.setattr(module.time, 'monotonic', lambda: clock[0])
+        mock_deepface.build_model.side_effect = [RuntimeError('offline'), RuntimeError('offline'), None]
+        mock_deepface.represent.return_value = [{'embedding': [0.1, 0.2]}]
+        service = FaceServiceDeepFace()
+        
+        assert service.warm_up() is False
+        service.extract_face_encoding('face.jpg')
+        assert mock_deepface.build_model.call_count == 1
+        
+        clock[0] += service.RETRY_BASE_SECONDS
+        service.extract_face_encoding('face.jpg')
+        assert mock_deepface.build_model.call_count == 2
+        assert service.status['state'] == 'failed'
+        
+        clock[0] += service.RETRY_BASE_SECONDS  # backoff doubled
+        service.extract_face_encoding('face.jpg')
+        assert mock_deepface.build_model.call_count == 2
+        
+        clock[0] += service.RETRY_BASE_SECONDS
+        service.extract_face_encoding('face.jpg')
+        assert mock_deepface.build_model.call_count == 3
+        assert service.ready
+    
+    def test_readiness_waits_for_model(self, app, client, db_session, monkeypatch):
+        """/api/health/ready is 503 until a warmed-up model is loaded."""
+        from app.services.face_service_deepface import face_service_deepface
+        
+        assert client.get('/api/health/ready').status_code == 200
+        
+        monkeypatch.setitem(app.config, 'FACE_MODEL_WARMUP', True)
+        monkeypatch.setattr(face_service_deepface, '_state', 'loading')
+        response = client.get('/api/health/ready')
+        assert response.status_code == 503
+        assert response.get_json()['face_model']['state'] == 'loading'
+        
+        monkeypatch.setattr(face_service_deepface, '_state', 'ready')
+        assert client.get('/api/health/ready').status_code == 200
+        assert client.get('/api/health/live').status_code == 200
+    
+    def test_readiness_retries_failed_load(self, app, client, db_session, monkeypatch):
+        """The readiness probe restarts a failed load once its retry is due."""
+        from app.services.face_service_deepface import face_service_deepface
+        
+        started = []
+        monkeypatch.setitem(app.config, 'FACE_MODEL_WARMUP', True)
+        monkeypatch.setattr(face_service_deepface, 'start_warm_up', lambda: started.append(True))
+        monkeypatch.setattr(face_service_deepface, '_state', 'failed')
+        monkeypatch.setattr(face_service_deepface, '_retry_at', float('inf'))
+        
+        assert client.get('/api/health/ready').status_code == 503
+        assert started == []
+        
+        monkeypatch.setattr(face_service_deepface, '_retry_at', 0.0)
+        assert client.get('/api/health/ready').status_code == 503
+        assert started == [True]
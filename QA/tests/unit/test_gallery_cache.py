@@ -0,0 +1,83 @@
+"""
+Unit Tests for Gallery Cache
+Tests decoding known encodings once into a shared matrix and reloading on change
+"""
+
+import pickle
+
+import numpy as np
+import pytest
+
+
+def add_encoding(criminal, vector, quality=0.8):
+    from app import db
+    from app.models.face_encoding import FaceEncoding
+    
+    encoding = FaceEncoding(criminal_id=criminal.id, encoding_data=pickle.dumps(np.asarray(vector)),
+                            image_path='face.jpg', quality_score=quality)
+    db.session.add(encoding)
+    db.session.commit()
+    return encoding
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestGalleryCache:
+    """Test the in-memory encoding gallery."""
+    
+    def test_load_builds_one_matrix(self, db_session, sample_criminal):
+        """Encodings are decoded into one read-only float32 matrix."""
+        from app.services.gallery_cache import GalleryCache
+        
+        first = add_encoding(sample_criminal, [1.0, 0.0, 0.0])
+        add_encoding(sample_criminal, [0.0, 1.0, 0.0], quality=None)
+        gallery = GalleryCache()
+        
+        entries = gallery.known_encodings()
+        
+        assert gallery.matrix.shape == (2, 3)
+        assert gallery.matrix.dtype == np.float32
+        assert not gallery.matrix.flags.writeable
+        assert entries[0]['id'] == first.id
+        assert np.shares_memory(entries[0]['encoding'], gallery.matrix)
+        assert entries[1]['quality_score'] == 0.7
+    
+    def test_reloads_when_table_changes(self, db_session, sample_criminal):
+        """New enrollments are picked up without restarting."""
+        from app.services.gallery_cache import GalleryCache
+        
+        add_encoding(sample_criminal, [1.0, 0.0])
+        gallery = GalleryCache()
+        assert len(gallery.known_encodings()) == 1
+        cached = gallery.matrix
+        
+        gallery.known_encodings()
+        assert gallery.matrix is cached
+        
+        add_encoding(sample_criminal, [0.0, 1.0])
+        assert len(gallery.known_encodings()) == 2
+    
+    def test_mismatched_dimensions_skipped(self, db_session, sample_criminal):
+        """Encodings from another model do not break the matrix."""
+        from app.services.gallery_cache import GalleryCache
+        
+        add_encoding(sample_criminal, [1.0, 0.0, 0.0])
+        add_encoding(sample_criminal, [1.0, 0.0, 0.0])
+        add_encoding(sample_criminal, [1.0, 0.0])
+        gallery = GalleryCache()
+        
+        assert len(gallery.known_encodings()) == 2
+        assert gallery.matrix.shape == (2, 3)
+    
+    def test_matches_found_from_gallery(self, db_session, sample_criminal):
+        """find_matches() accepts gallery entries directly."""
+        from app.services.face_service_deepface import face_service_deepface
+        from app.services.gallery_cache import GalleryCache
+        
+        add_encoding(sample_criminal, [0.6, 0.8, 0.0])
+        gallery = GalleryCache()
+        
+        matches = face_service_deepface.find_matches(np.array([0.6, 0.8, 0.0]), gallery.known_encodings())
+        
+        assert [m['criminal_id'] for m in matches] == [sample_criminal.id]
+        assert matches[0]['confidence'] == pytest.approx(1.0)
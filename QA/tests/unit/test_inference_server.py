@@ -0,0 +1,165 @@
+"""
+Unit Tests for Inference Server
+Tests the Unix socket framing, dynamic batching and the face service client mode
+"""
+
+import os
+import pickle
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+
+class FakeFaceService:
+    """Embeds each image as its mean colour; arrays narrower than 50px have no face."""
+    
+    status = {'model': 'fake', 'state': 'ready', 'error': None, 'load_seconds': 0}
+    
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+    
+    def extract_face_encodings(self, images):
+        with self.lock:
+            self.batches.append(len(images))
+        return [image.reshape(-1, 3).mean(axis=0) if image.shape[1] >= 50 else None for image in images]
+    
+    def detect_faces(self, image, detector=None):
+        if image.shape[1] == 13:
+            raise RuntimeError('detector exploded')
+        return [(1, 2, image.shape[1] - 2, image.shape[0] - 4)]
+    
+    def find_matches(self, encoding, known):
+        from app.services.face_service_deepface import FaceServiceDeepFace
+        return FaceServiceDeepFace.find_matches(FaceServiceDeepFace(), encoding, known)
+
+
+@pytest.fixture
+def inference(app, tmp_path):
+    """Server on a temp socket with a fake model, and a client."""
+    from app.services.inference_server import InferenceClient, InferenceServer
+    
+    socket_path = str(tmp_path / 'inference.sock')
+    server = InferenceServer(app, socket_path, face_service=FakeFaceService(), max_batch=32, max_wait_ms=100)
+    server.start()
+    yield server, InferenceClient(socket_path, timeout=10)
+    server.stop()
+
+
+def image(width, value):
+    return np.full((60, width, 3), value, dtype=np.uint8)
+
+
+@pytest.mark.unit
+class TestInferenceServer:
+    """Test the inference sidecar."""
+    
+    def test_embed_roundtrip(self, inference):
+        """Raw arrays and encoded bytes embed in one call, misses come back as None."""
+        server, client = inference
+        encoded = cv2.imencode('.png', image(80, 30))[1].tobytes()
+        
+        encodings = client.embed([image(60, 10), image(20, 50), encoded, b'not an image'])
+        
+        assert np.allclose(encodings[0], [10, 10, 10])
+        assert encodings[1] is None
+        assert np.allclose(encodings[2], [30, 30, 30])
+        assert encodings[3] is None
+        assert server.face_service.batches == [3]
+    
+    def test_concurrent_requests_batched(self, inference):
+        """Embeds from many clients share model calls."""
+        server, client = inference
+        results = {}
+        
+        def embed(i):
+            results[i] = client.embed([image(60, i)])[0]
+        
+        threads = [threading.Thread(target=embed, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert all(np.allclose(results[i], [i, i, i]) for i in range(8))
+        assert sum(server.face_service.batches) == 8
+        assert len(server.face_service.batches) < 8
+        assert client.ping()['requests'] == 8
+    
+    def test_detect_and_errors(self, inference):
+        """Detection returns boxes; server-side failures raise InferenceError."""
+        from app.services.inference_server import InferenceError
+        
+        _, client = inference
+        
+        assert client.detect(image(100, 5)) == [(1, 2, 98, 56)]
+        with pytest.raises(InferenceError, match='detector exploded'):
+            client.detect(image(13, 5))
+        assert client.detect(image(100, 5)) == [(1, 2, 98, 56)]
+    
+    def test_match_against_gallery(self, inference, db_session, sample_criminal):
+        """Match requests use the server's encoding gallery."""
+        from app import db
+        from app.models.face_encoding import FaceEncoding
+        
+        db.session.add(FaceEncoding(criminal_id=sample_criminal.id, image_path='face.jpg', quality_score=0.9,
+                                    encoding_data=pickle.dumps(np.array([0.6, 0.8, 0.0]))))
+        db.session.commit()
+        _, client = inference
+        
+        matches = client.match(np.array([0.6, 0.8, 0.0]))
+        
+        assert [m['criminal_id'] for m in matches] == [sample_criminal.id]
+    
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+    def test_forked_child_reconnects(self, inference):
+        """A child forked after the parent connected opens its own connection."""
+        _, client = inference
+        client.ping()
+        inherited = client._local.conn
+        read_fd, write_fd = os.pipe()
+        
+        pid = os.fork()
+        if pid == 0:
+            ok = False
+            try:
+                ok = client.detect(image(100, 5)) == [(1, 2, 98, 56)] and client._local.conn is not inherited
+            finally:
+                os.write(write_fd, b'1' if ok else b'0')
+                os._exit(0)
+        os.close(write_fd)
+        child_ok = os.read(read_fd, 1)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+        
+        assert child_ok == b'1'
+        assert client.detect(image(60, 5)) == [(1, 2, 58, 56)]
+        assert client._local.conn is inherited
+    
+    def test_face_service_uses_sidecar(self, inference):
+        """A face service pointed at the sidecar never loads the model itself."""
+        from app.services.face_service_deepface import FaceServiceDeepFace
+        
+        _, client = inference
+        service = FaceServiceDeepFace()
+        service.use_inference_server(client)
+        
+        assert service.warm_up() is True
+        assert service.ready
+        assert service.detect_faces(image(100, 5)) == [(1, 2, 98, 56)]
+        assert np.allclose(service.extract_face_encoding(image(60, 7)), [7, 7, 7])
+        assert service.extract_face_encodings([image(20, 1)]) == [None]
+    
+    def test_unavailable_sidecar_reported(self, tmp_path):
+        """A missing server shows up in the readiness status."""
+        from app.services.face_service_deepface import FaceServiceDeepFace
+        from app.services.inference_server import InferenceClient
+        
+        service = FaceServiceDeepFace()
+        service.use_inference_server(InferenceClient(str(tmp_path / 'missing.sock'), timeout=1))
+        
+        assert service.status['state'] == 'unavailable'
+        assert service.warm_up() is False
+        assert service.detect_faces(image(100, 5)) == []
@@ -0,0 +1,125 @@
+"""
+Unit Tests for Mail Transport
+Tests pooled SMTP sessions and multi-recipient delivery
+"""
+
+import smtplib
+import pytest
+
+
+class FakeSMTP:
+    """Stand-in for smtplib.SMTP that records calls."""
+    
+    instances = []
+    
+    def __init__(self, host, port, timeout=None):
+        self.host = host
+        self.port = port
+        self.calls = []
+        self.noop_code = 250
+        self.disconnect_on_send = False
+        FakeSMTP.instances.append(self)
+    
+    def starttls(self):
+        self.calls.append('starttls')
+    
+    def login(self, username, password):
+        self.calls.append('login')
+    
+    def noop(self):
+        self.calls.append('noop')
+        return (self.noop_code, b'OK')
+    
+    def send_message(self, msg, to_addrs=None):
+        if self.disconnect_on_send:
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        self.calls.append(('send', tuple(to_addrs)))
+        return {}
+    
+    def quit(self):
+        self.calls.append('quit')
+    
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """Mail transport backed by FakeSMTP."""
+    from app.services import mail_transport as module
+    
+    FakeSMTP.instances = []
+    monkeypatch.setattr(module.smtplib, 'SMTP', FakeSMTP)
+    transport = module.MailTransport()
+    transport.sender = 'alerts@test.com'
+    transport.pool = module.SMTPConnectionPool(
+        'smtp.test', 587, username='alerts@test.com', password='secret',
+        keepalive_seconds=60, max_idle_seconds=300
+    )
+    return transport
+
+
+def age_idle_sessions(pool, seconds):
+    """Pretend every idle session was last used `seconds` ago."""
+    pool._idle = type(pool._idle)((conn, last_used - seconds) for conn, last_used in pool._idle)
+
+
+@pytest.mark.unit
+class TestMailTransport:
+    """Test the pooled SMTP transport."""
+    
+    def test_sessions_are_reused(self, transport):
+        """Consecutive sends share one TLS handshake and login."""
+        transport.send('One', '<p>1</p>', ['a@test.com'])
+        transport.send('Two', '<p>2</p>', ['b@test.com'])
+        
+        assert len(FakeSMTP.instances) == 1
+        assert FakeSMTP.instances[0].calls.count('login') == 1
+        assert transport.pool.idle_count() == 1
+    
+    def test_multiple_recipients_one_transaction(self, transport):
+        """A message is sent once to all of its recipients."""
+        transport.send('Alert', '<p>x</p>', ['a@test.com', 'b@test.com', 'a@test.com'])
+        
+        sends = [c for c in FakeSMTP.instances[0].calls if c[0] == 'send']
+        assert sends == [('send', ('a@test.com', 'b@test.com'))]
+    
+    def test_idle_session_noop_checked(self, transport):
+        """Sessions idle past the keepalive interval are checked with NOOP."""
+        transport.send('One', '<p>1</p>', ['a@test.com'])
+        age_idle_sessions(transport.pool, 120)
+        
+        transport.send('Two', '<p>2</p>', ['a@test.com'])
+        
+        assert 'noop' in FakeSMTP.instances[0].calls
+        assert len(FakeSMTP.instances) == 1
+    
+    def test_unhealthy_session_replaced(self, transport):
+        """A session failing NOOP is closed and replaced."""
+        transport.send('One', '<p>1</p>', ['a@test.com'])
+        FakeSMTP.instances[0].noop_code = 421
+        age_idle_sessions(transport.pool, 120)
+        
+        transport.send('Two', '<p>2</p>', ['a@test.com'])
+        
+        assert len(FakeSMTP.instances) == 2
+        assert 'quit' in FakeSMTP.instances[0].calls
+    
+    def test_stale_session_retried_fresh(self, transport):
+        """A pooled session dropped by the server is retried on a new one."""
+        transport.send('One', '<p>1</p>', ['a@test.com'])
+        FakeSMTP.instances[0].disconnect_on_send = True
+        
+        transport.send('Two', '<p>2</p>', ['a@test.com'])
+        
+        assert len(FakeSMTP.instances) == 2
+        assert ('send', ('a@test.com',)) in FakeSMTP.instances[1].calls
+        assert transport.pool.idle_count() == 1
+    
+    def test_configured_from_app(self, app):
+        """The shared transport reads Config.SMTP_* settings."""
+        from app.services.mail_transport import mail_transport
+        
+        assert mail_transport.pool.host == app.config['SMTP_SERVER']
+        assert mail_transport.pool.port == app.config['SMTP_PORT']
+        assert mail_transport.pool.max_size == app.config['SMTP_POOL_SIZE']
@@ -0,0 +1,128 @@
+"""
+Unit Tests for Notification Counters
+Tests per-user unread counters maintained on alert writes
+"""
+
+import pytest
+
+
+def add_alert(db_session, **fields):
+    """Create and commit one alert."""
+    from app.models.alert import Alert
+    
+    values = {
+        'alert_type': 'system_alert',
+        'category': 'system',
+        'message': 'Test',
+        'delivery_method': 'in_app',
+        'status': 'delivered'
+    }
+    values.update(fields)
+    alert = Alert(**values)
+    db_session.session.add(alert)
+    db_session.session.commit()
+    return alert
+
+
+def counters():
+    """Counter values by user, as stored."""
+    from app.models.notification_counter import NotificationCounter
+    
+    return {
+        row.user_id: (row.total, row.unread, row.unread_in_app)
+        for row in NotificationCounter.query.all()
+    }
+
+
+def recomputed():
+    """Counter values recomputed from the alerts table."""
+    from app.models.notification_counter import NotificationCounter
+    
+    return {
+        user_id: (total, unread, unread_in_app)
+        for user_id, total, unread, unread_in_app in NotificationCounter.contributions_query().all()
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestNotificationCounters:
+    """Test counter maintenance."""
+    
+    def test_insert_acknowledge_delete(self, db_session, admin_user):
+        """ORM inserts, acknowledgements and deletes keep counters exact."""
+        first = add_alert(db_session)
+        add_alert(db_session, delivery_method='email', status='pending')
+        add_alert(db_session, user_id=admin_user.id)
+        assert counters() == {0: (2, 2, 1), admin_user.id: (1, 1, 1)}
+        
+        first.acknowledged = True
+        db_session.session.commit()
+        assert counters()[0] == (2, 1, 0)
+        
+        db_session.session.delete(first)
+        db_session.session.commit()
+        assert counters() == recomputed()
+    
+    def test_unread_count_endpoint(self, client, admin_token, admin_user, db_session):
+        """The bell counts own and broadcast unread in-app alerts."""
+        add_alert(db_session)
+        add_alert(db_session, user_id=admin_user.id)
+        add_alert(db_session, delivery_method='email', status='pending')
+        
+        response = client.get(
+            '/api/notifications/unread-count',
+            headers={'Authorization': f'Bearer {admin_token}'}
+        )
+        
+        assert response.get_json()['unread_count'] == 2
+    
+    def test_mark_all_read_and_clear_old(self, client, admin_token, db_session):
+        """Bulk updates and deletes adjust the counters."""
+        from datetime import datetime, timedelta
+        
+        for _ in range(3):
+            add_alert(db_session)
+        add_alert(db_session, delivery_method='email', status='pending')
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        assert client.put('/api/notifications/mark-all-read', headers=headers).status_code == 200
+        assert counters() == recomputed() == {0: (4, 1, 0)}
+        
+        add_alert(db_session, acknowledged=True, created_at=datetime.utcnow() - timedelta(days=40))
+        assert client.delete('/api/notifications/clear-old', headers=headers).status_code == 200
+        assert counters() == recomputed()
+        
+        listing = client.get('/api/notifications', headers=headers).get_json()
+        assert listing['total'] == 4
+        assert listing['unread_count'] == 1
+    
+    def test_bulk_fan_out_counted(self, db_session, admin_user):
+        """Alerts inserted in bulk by the enhanced alert service are counted."""
+        from app.services.enhanced_alert_service import EnhancedAlertService
+        
+        EnhancedAlertService.send_alert('Disk full', channels=['in_app', 'email'])
+        
+        assert counters() == recomputed() == {0: (2, 2, 1)}
+    
+    def test_rebuild(self, db_session):
+        """Counters can be rebuilt after drift."""
+        from app.models.notification_counter import NotificationCounter
+        
+        add_alert(db_session)
+        NotificationCounter.query.delete()
+        db_session.session.commit()
+        
+        assert NotificationCounter.rebuild() == 1
+        assert counters() == {0: (1, 1, 1)}
+    
+    def test_apply_delta_upserts(self, db_session):
+        """Deltas for a user without a counter row insert it once, then add up."""
+        from app.models.notification_counter import NotificationCounter
+        
+        with db_session.engine.begin() as connection:
+            NotificationCounter.apply_delta(connection, 7, total=1, unread=1)
+            NotificationCounter.apply_delta(connection, 7, total=1, unread_in_app=1)
+            NotificationCounter.apply_delta(connection, 7, -1, unread=1)
+        
+        assert counters() == {7: (2, 0, 1)}
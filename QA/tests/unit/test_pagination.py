@@ -0,0 +1,140 @@
+"""
+Unit Tests for Keyset Pagination
+Tests cursor encoding and cursor mode on list endpoints
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+
+@pytest.fixture
+def many_detections(db_session, sample_criminal):
+    """Create detections, several sharing the same timestamp."""
+    from app.models.detection_log import DetectionLog
+    
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    for i in range(7):
+        db_session.session.add(DetectionLog(
+            criminal_id=sample_criminal.id,
+            # Pairs of rows share a timestamp to exercise the id tie-breaker
+            detected_at=base + timedelta(minutes=i // 2),
+            confidence_score=0.8,
+            status='pending'
+        ))
+    db_session.session.commit()
+    return DetectionLog.query.all()
+
+
+@pytest.mark.unit
+class TestCursorEncoding:
+    """Test cursor helpers."""
+    
+    def test_round_trip(self):
+        """Decoded cursors match the encoded position."""
+        from app.utils.pagination import encode_cursor, decode_cursor
+        
+        position = (datetime(2024, 5, 1, 8, 30, 15, 123456), 42)
+        assert decode_cursor(encode_cursor(*position)) == position
+    
+    def test_invalid_cursor(self):
+        """Garbage cursors raise InvalidCursor."""
+        from app.utils.pagination import decode_cursor, InvalidCursor
+        
+        with pytest.raises(InvalidCursor):
+            decode_cursor('not-a-cursor')
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestKeysetEndpoints:
+    """Test cursor mode on list endpoints."""
+    
+    def test_walk_detection_logs(self, client, admin_token, many_detections):
+        """Following next_cursor visits every row once, newest first."""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        seen = []
+        cursor = ''
+        
+        while True:
+            response = client.get(f'/api/detection/logs?cursor={cursor}&limit=3', headers=headers)
+            data = response.get_json()
+            assert response.status_code == 200
+            assert data['total'] is None
+            seen.extend(d['id'] for d in data['detections'])
+            if not data['has_more']:
+                break
+            cursor = data['next_cursor']
+        
+        expected = sorted(many_detections, key=lambda d: (d.detected_at, d.id), reverse=True)
+        assert seen == [d.id for d in expected]
+    
+    def test_exact_count(self, client, admin_token, many_detections):
+        """Counts are only computed when requested."""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        response = client.get('/api/detection/logs?cursor=&limit=2&count=exact', headers=headers)
+        
+        assert response.get_json()['total'] == 7
+    
+    def test_invalid_cursor_rejected(self, client, admin_token, many_detections):
+        """Invalid cursors return 400."""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        response = client.get('/api/detection/logs?cursor=bogus', headers=headers)
+        
+        assert response.status_code == 400
+    
+    def test_page_mode_unchanged(self, client, admin_token, many_detections):
+        """Requests without a cursor keep page-number pagination."""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        response = client.get('/api/detection/logs?page=2&per_page=5', headers=headers)
+        data = response.get_json()
+        
+        assert data['total'] == 7
+        assert data['current_page'] == 2
+        assert len(data['detections']) == 2
+    
+    def test_criminals_cursor(self, client, db_session, admin_token, admin_user):
+        """Criminals list supports cursor mode."""
+        from app.models.criminal import Criminal
+        
+        for i in range(5):
+            db_session.session.add(Criminal(
+                name=f'Criminal {i}',
+                crime_type='Theft',
+                added_by=admin_user.id
+            ))
+        db_session.session.commit()
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        response = client.get('/api/criminals?pagination=cursor&limit=3', headers=headers)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        first = response.get_json()
+        second = client.get(f"/api/criminals?cursor={first['next_cursor']}&limit=3", headers=headers).get_json()
+        
+        ids = [c['id'] for c in first['criminals'] + second['criminals']]
+        assert len(ids) == 5
+        assert len(set(ids)) == 5
+        assert second['has_more'] is False
+    
+    def test_notifications_unread_on_first_page(self, client, db_session, admin_token, admin_user):
+        """Unread count is only returned with the first page."""
+        from app.models.alert import Alert
+        
+        for i in range(3):
+            db_session.session.add(Alert(
+                alert_type='criminal_detected',
+                category='detection',
+                message=f'Alert {i}',
+                delivery_method='in_app'
+            ))
+        db_session.session.commit()
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        first = client.get('/api/notifications?cursor=&limit=2', headers=headers).get_json()
+        second = client.get(f"/api/notifications?cursor={first['next_cursor']}&limit=2", headers=headers).get_json()
+        
+        assert first['unread_count'] == 3
+        assert 'unread_count' not in second
+        assert len(second['notifications']) == 1
@@ -0,0 +1,176 @@
+"""
+Unit Tests for Quality Assessor
+Tests single-pass quality scoring and per-thread cascade caching
+"""
+
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def face_image():
+    """Noisy mid-grey image standing in for a face photo."""
+    rng = np.random.default_rng(0)
+    return rng.integers(60, 200, size=(160, 140, 3), dtype=np.uint8)
+
+
+@pytest.mark.unit
+class TestQualityAssessor:
+    """Test the quality assessor."""
+    
+    def test_cascade_loaded_once_per_thread(self, face_image, monkeypatch):
+        """Repeated assessments reuse the thread's eye cascade."""
+        from app.utils.quality_assessment import QualityAssessor
+        
+        loads = []
+        
+        class CountingCascade:
+            def __init__(self, path):
+                loads.append(threading.get_ident())
+            
+            def detectMultiScale(self, gray, **kwargs):
+                return ()
+        
+        monkeypatch.setattr(cv2, 'CascadeClassifier', CountingCascade, raising=False)
+        assessor = QualityAssessor()
+        
+        for _ in range(5):
+            assessor.assess(face_image)
+        worker = threading.Thread(target=assessor.assess, args=(face_image,))
+        worker.start()
+        worker.join()
+        
+        assert len(loads) == 2
+        assert len(set(loads)) == 2
+        assert assessor.assess(face_image)['frontality_score'] == 0.3
+    
+    def test_array_matches_path(self, face_image, tmp_path):
+        """An in-memory array scores the same as the file it came from."""
+        from app.utils.quality_assessment import assess_face_quality
+        
+        path = str(tmp_path / 'face.png')
+        cv2.imwrite(path, face_image)
+        
+        assert assess_face_quality(face_image) == assess_face_quality(path)
+    
+    def test_face_box_crops(self, face_image):
+        """Size is scored on the face box, clamped to the image."""
+        from app.utils.quality_assessment import quality_assessor
+        
+        full = quality_assessor.assess(face_image)
+        small = quality_assessor.assess(face_image, face_box=(-10, 0, 40, 40))
+        
+        assert full['size_score'] == 1.0
+        assert small['size_score'] == 0.3
+    
+    def test_unreadable_image_defaults(self, tmp_path):
+        """Missing files fall back to neutral scores."""
+        from app.utils.quality_assessment import assess_face_quality
+        
+        assert assess_face_quality(str(tmp_path / 'missing.jpg'))['overall_score'] == 0.5
+    
+    def test_batch_matches_single_scores(self, face_image):
+        """Batch brightness and size agree with the per-image scorer."""
+        from app.utils.quality_assessment import QualityAssessor
+        
+        assessor = QualityAssessor(max_workers=2)
+        crops = [face_image, face_image[:40, :40], np.full((80, 60), 30, dtype=np.uint8)]
+        
+        batch = assessor.assess_batch(crops)
+        single = [assessor.assess(crop) for crop in crops]
+        assessor.shutdown()
+        
+        assert len(batch) == 3
+        for batched, alone in zip(batch, single):
+            assert batched['size_score'] == alone['size_score']
+            assert batched['brightness_score'] == pytest.approx(alone['brightness_score'], abs=0.01)
+            assert batched['frontality_score'] == alone['frontality_score']
+        assert batch[2]['blur_score'] == 0.0
+        assert batch[0]['blur_score'] > 0.5
+    
+    def test_batch_blur_matches_single_across_sizes(self):
+        """Blur is measured at each crop's own resolution, so batch and single scores agree."""
+        from app.utils.quality_assessment import QualityAssessor
+        
+        texture = np.random.default_rng(1).integers(0, 255, size=(12, 12), dtype=np.uint8)
+        crops = [cv2.resize(texture, (size, size), interpolation=cv2.INTER_CUBIC) for size in (90, 160, 400)]
+        assessor = QualityAssessor()
+        
+        batch = assessor.assess_batch(crops, frontality=False)
+        single = [assessor.assess(crop) for crop in crops]
+        
+        assert all(0.0 < alone['blur_score'] < 1.0 for alone in single)
+        for batched, alone in zip(batch, single):
+            assert batched['blur_score'] == pytest.approx(alone['blur_score'], abs=0.001)
+            assert batched['brightness_score'] == pytest.approx(alone['brightness_score'], abs=0.001)
+    
+    def test_batch_handles_empty_crops(self):
+        """Empty crops get default scores without failing the batch."""
+        from app.utils.quality_assessment import assess_face_quality_batch
+        
+        results = assess_face_quality_batch([np.zeros((0, 0, 3), dtype=np.uint8), None], frontality=False)
+        
+        assert [r['overall_score'] for r in results] == [0.5, 0.5]
+        assert assess_face_quality_batch([]) == []
+
+
+@pytest.mark.unit
+class TestQualityGate:
+    """Test the embedding quality gate."""
+    
+    def test_small_and_flat_faces_gated(self, face_image):
+        """Tiny boxes are rejected unscored; flat crops fail the score."""
+        from app.utils.quality_assessment import QualityGate
+        
+        gate = QualityGate(min_score=0.5, min_face_size=40)
+        flat = np.full((120, 120, 3), 20, dtype=np.uint8)
+        
+        results = gate.evaluate(
+            [face_image, face_image[:20, :20], flat],
+            [(0, 0, 140, 160), (0, 0, 20, 20), (0, 0, 120, 120)]
+        )
+        
+        assert results[0][1] is None
+        assert results[1] == (None, 'too_small')
+        assert results[2][1] == 'low_quality'
+    
+    def test_disabled_gate_only_scores(self, face_image):
+        """A disabled gate passes every face but still scores it."""
+        from app.utils.quality_assessment import QualityGate
+        
+        gate = QualityGate.from_config({'QUALITY_GATE_ENABLED': False})
+        
+        quality, reason = gate.evaluate([face_image[:20, :20]], [(0, 0, 20, 20)])[0]
+        
+        assert reason is None
+        assert quality['size_score'] == 0.3
+    
+    def test_live_detection_skips_gated_faces(self, app, db_session, face_image, tmp_path, monkeypatch):
+        """Gated faces never reach the embedding model."""
+        import importlib
+        import cv2
+        from app.utils.quality_assessment import QualityGate
+        
+        module = importlib.import_module('app.services.detection_service')
+        
+        frame = np.zeros((300, 300, 3), dtype=np.uint8)
+        frame[20:180, 20:160] = face_image
+        path = str(tmp_path / 'frame.jpg')
+        cv2.imwrite(path, frame)
+        
+        embedded = []
+        monkeypatch.setattr(module.face_service, 'detect_faces',
+                            lambda p, detector=None: [(20, 20, 140, 160), (250, 250, 12, 12)])
+        monkeypatch.setattr(module.face_service, 'extract_face_encoding', lambda p: embedded.append(p) or None)
+        monkeypatch.setattr(module.DetectionService, '_annotate_multi_face_image', staticmethod(lambda *args: None))
+        
+        result = module.DetectionService.process_detection(
+            path, 1, quality_gate=QualityGate(min_score=0.3, min_face_size=40)
+        )
+        
+        assert result['faces_detected'] == 2
+        assert result['faces_gated'] == 1
+        assert len(embedded) == 1
@@ -0,0 +1,68 @@
+"""
+Unit Tests for Query Plan Audit
+Tests hot-path indexes and the db-explain audit helpers
+"""
+
+import pytest
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestQueryAudit:
+    """Test query plan auditing."""
+    
+    def test_audited_endpoints(self, app):
+        """Dashboard and notification GET endpoints are audited."""
+        from app.utils.query_audit import audited_endpoints
+        
+        endpoints = dict(audited_endpoints(app))
+        
+        assert endpoints['dashboard.get_stats'] == '/api/dashboard/stats'
+        assert 'notifications.get_unread_count' in endpoints
+        assert 'face_detection.get_detection_logs' not in endpoints
+    
+    def test_explain_flags_full_scan(self, db_session):
+        """Unindexed filters are reported as full scans."""
+        from app.utils.query_audit import explain
+        
+        _, scans = explain(db_session, 'SELECT * FROM detection_logs WHERE notes = ?', ('x',))
+        
+        assert scans == ['detection_logs']
+    
+    def test_hot_filters_use_indexes(self, db_session):
+        """Hot filters are served by the new indexes."""
+        from app.utils.query_audit import explain
+        
+        statements = [
+            ('SELECT id FROM detection_logs WHERE status = ? ORDER BY detected_at DESC', ('pending',)),
+            ('SELECT id FROM detection_logs WHERE criminal_id = ?', (1,)),
+            ('SELECT id FROM video_frame_detections WHERE video_detection_id = ? ORDER BY frame_number', (1,)),
+            ('SELECT id FROM face_encodings WHERE criminal_id = ?', (1,)),
+        ]
+        for statement, parameters in statements:
+            _, scans = explain(db_session, statement, parameters)
+            assert scans == [], statement
+    
+    def test_unread_count_uses_partial_index(self, db_session):
+        """Unread badge query uses the partial unread index."""
+        from app.utils.query_audit import explain
+        
+        plan, scans = explain(
+            db_session,
+            'SELECT count(*) FROM alerts WHERE delivery_method = ? AND acknowledged = 0',
+            ('in_app',)
+        )
+        
+        assert scans == []
+        assert any('ix_alerts_unread' in line for line in plan)
+    
+    def test_audit_queries(self, app, db_session, admin_user):
+        """Audit explains the queries issued by each endpoint."""
+        from app.utils.query_audit import audit_queries
+        
+        report = audit_queries(app, db_session, identity=str(admin_user.id))
+        endpoints = {entry['endpoint'] for entry in report}
+        
+        assert 'dashboard.get_stats' in endpoints
+        assert all(entry['plan'] for entry in report)
+        assert app.config['RESPONSE_CACHE_ENABLED'] is False
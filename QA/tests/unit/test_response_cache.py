@@ -0,0 +1,157 @@
+"""
+Unit Tests for Response Cache
+Tests cache backends, the cached decorator and write invalidation
+"""
+
+import time
+import pytest
+from datetime import datetime
+
+
+@pytest.fixture
+def cache_enabled(app):
+    """Enable the response cache with an empty in-memory backend."""
+    from app.utils.cache import response_cache
+    
+    app.config['RESPONSE_CACHE_ENABLED'] = True
+    response_cache.clear()
+    yield response_cache
+    response_cache.clear()
+    app.config['RESPONSE_CACHE_ENABLED'] = False
+
+
+@pytest.mark.unit
+class TestCacheBackends:
+    """Test cache backend behaviour."""
+    
+    def test_memory_lru_eviction(self):
+        """Least recently used entries are evicted first."""
+        from app.utils.cache import MemoryCacheBackend
+        
+        backend = MemoryCacheBackend(max_entries=2)
+        backend.set('a', 1, 60)
+        backend.set('b', 2, 60)
+        backend.get('a')
+        backend.set('c', 3, 60)
+        
+        assert backend.get('a') == 1
+        assert backend.get('b') is None
+        assert backend.get('c') == 3
+    
+    def test_memory_ttl_expiry(self):
+        """Expired entries are not returned."""
+        from app.utils.cache import MemoryCacheBackend
+        
+        backend = MemoryCacheBackend()
+        backend.set('a', 1, 0.01)
+        time.sleep(0.02)
+        
+        assert backend.get('a') is None
+    
+    def test_sqlite_backend_shared(self, tmp_path):
+        """Two backends on one file see each other's entries and generations."""
+        from app.utils.cache import SQLiteCacheBackend
+        
+        path = str(tmp_path / 'cache.db')
+        first = SQLiteCacheBackend(path)
+        second = SQLiteCacheBackend(path)
+        
+        first.set('key', {'body': '{}', 'status': 200}, 60)
+        first.bump_generations(['alerts'])
+        
+        assert second.get('key') == {'body': '{}', 'status': 200}
+        assert second.get_generations(['alerts', 'users']) == [1, 0]
+    
+    def test_production_defaults_to_shared_backend(self, tmp_path):
+        """Multi-worker servers get the host-shared backend unless configured otherwise."""
+        from flask import Flask
+        from app.config import ProductionConfig
+        from app.utils.cache import ResponseCache, SQLiteCacheBackend
+        
+        app = Flask(__name__)
+        app.config.from_object(ProductionConfig)
+        app.config['RESPONSE_CACHE_PATH'] = str(tmp_path / 'cache.db')
+        cache = ResponseCache()
+        cache.init_app(app)
+        
+        assert isinstance(cache.backend, SQLiteCacheBackend)
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestCachedEndpoints:
+    """Test caching of dashboard endpoints."""
+    
+    def test_second_request_hits(self, client, admin_token, cache_enabled):
+        """Repeated requests are served from cache."""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        first = client.get('/api/dashboard/alert-stats', headers=headers)
+        second = client.get('/api/dashboard/alert-stats', headers=headers)
+        
+        assert first.headers['X-Cache'] == 'MISS'
+        assert second.headers['X-Cache'] == 'HIT'
+        assert second.get_json() == first.get_json()
+    
+    def test_query_args_are_part_of_key(self, client, admin_token, cache_enabled):
+        """Different query args are cached separately."""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        client.get('/api/dashboard/detections-timeline?days=7', headers=headers)
+        other = client.get('/api/dashboard/detections-timeline?days=30', headers=headers)
+        
+        assert other.headers['X-Cache'] == 'MISS'
+    
+    def test_write_invalidates(self, client, db_session, admin_token, sample_criminal, cache_enabled):
+        """Committing a detection invalidates detection widgets."""
+        from app.models.detection_log import DetectionLog
+        
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        client.get('/api/dashboard/detection-status-breakdown', headers=headers)
+        
+        db_session.session.add(DetectionLog(
+            criminal_id=sample_criminal.id,
+            detected_at=datetime.utcnow(),
+            confidence_score=0.9,
+            status='pending'
+        ))
+        db_session.session.commit()
+        
+        response = client.get('/api/dashboard/detection-status-breakdown', headers=headers)
+        data = response.get_json()
+        assert response.headers['X-Cache'] == 'MISS'
+        assert {'status': 'pending', 'count': 1} in data['breakdown']
+    
+    def test_bulk_update_invalidates(self, client, db_session, admin_token, admin_user, cache_enabled):
+        """Bulk ORM updates invalidate tagged widgets."""
+        from app.models.alert import Alert
+        
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        client.get('/api/dashboard/alert-stats', headers=headers)
+        
+        Alert.query.filter(Alert.status == 'pending').update({'status': 'sent'})
+        db_session.session.commit()
+        
+        response = client.get('/api/dashboard/alert-stats', headers=headers)
+        assert response.headers['X-Cache'] == 'MISS'
+    
+    def test_errors_not_cached(self, client, cache_enabled):
+        """Unauthenticated requests never reach the cache."""
+        response = client.get('/api/dashboard/alert-stats')
+        
+        assert response.status_code == 401
+        assert 'X-Cache' not in response.headers
+    
+    def test_cache_stats(self, client, admin_token, cache_enabled):
+        """Hit/miss metrics are exposed per endpoint."""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        client.get('/api/dashboard/alert-stats', headers=headers)
+        client.get('/api/dashboard/alert-stats', headers=headers)
+        
+        response = client.get('/api/dashboard/cache-stats', headers=headers)
+        data = response.get_json()
+        
+        assert response.status_code == 200
+        assert data['hits'] == 1
+        assert data['misses'] == 1
+        assert data['endpoints']['dashboard.get_alert_stats'] == {'hits': 1, 'misses': 1}
@@ -0,0 +1,103 @@
+"""
+Unit Tests for Retention Service
+Tests batched archival and deletion of old rows and their files
+"""
+
+import gzip
+import json
+import pytest
+from datetime import datetime, timedelta
+
+
+OLD = datetime.utcnow() - timedelta(days=400)
+
+
+@pytest.fixture
+def retention(app, tmp_path):
+    """Retention service archiving to a temp dir, deleting files under tmp_path."""
+    from app.services.retention_service import ArchiveWriter, RetentionService, build_policies
+    
+    return RetentionService(
+        build_policies(app.config),
+        batch_size=2,
+        archive=ArchiveWriter(str(tmp_path / 'archive')),
+        file_roots=[str(tmp_path)]
+    )
+
+
+def add_detection(db_session, criminal, detected_at, image_path=None):
+    from app.models.detection_log import DetectionLog
+    
+    log = DetectionLog(criminal_id=criminal.id, confidence_score=0.9, status='pending',
+                       detected_at=detected_at, image_path=image_path)
+    db_session.session.add(log)
+    db_session.session.commit()
+    return log
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestRetention:
+    """Test retention policies."""
+    
+    def test_detection_logs_archived_and_deleted(self, db_session, sample_criminal, retention, tmp_path):
+        """Old logs are archived in batches, their images removed, alerts detached."""
+        from app.models.alert import Alert
+        from app.models.detection_log import DetectionLog
+        
+        image = tmp_path / 'shared.jpg'
+        image.write_bytes(b'jpg')
+        old_logs = [add_detection(db_session, sample_criminal, OLD, str(image)) for _ in range(3)]
+        old_ids = [log.id for log in old_logs]
+        recent_id = add_detection(db_session, sample_criminal, datetime.utcnow()).id
+        alert = Alert(alert_type='criminal_detected', category='detection', message='x',
+                      delivery_method='in_app', status='delivered', detection_log_id=old_ids[0])
+        db_session.session.add(alert)
+        db_session.session.commit()
+        
+        stats = retention.run(names=['detection_logs'])['detection_logs']
+        
+        assert stats['rows'] == 3
+        assert stats['files'] == 1
+        assert not image.exists()
+        assert [log.id for log in DetectionLog.query.all()] == [recent_id]
+        assert db_session.session.get(Alert, alert.id).detection_log_id is None
+        
+        archived = []
+        for path in stats['archives']:
+            with gzip.open(path, 'rt') as f:
+                archived += [json.loads(line) for line in f]
+        assert sorted(row['id'] for row in archived) == old_ids
+        assert f'month={OLD:%Y-%m}' in stats['archives'][0]
+    
+    def test_pending_alerts_kept(self, db_session, retention):
+        """Undelivered outbox alerts survive; counters stay exact."""
+        from app.models.alert import Alert
+        from app.models.notification_counter import NotificationCounter
+        
+        for status in ('delivered', 'pending'):
+            db_session.session.add(Alert(alert_type='system_alert', category='system', message='x',
+                                         delivery_method='in_app', status=status, created_at=OLD))
+        db_session.session.commit()
+        
+        assert retention.run(names=['alerts'], dry_run=True)['alerts']['rows'] == 1
+        assert retention.run(names=['alerts'])['alerts']['rows'] == 1
+        
+        assert [a.status for a in Alert.query.all()] == ['pending']
+        assert db_session.session.get(NotificationCounter, 0).total == 1
+    
+    def test_files_outside_roots_kept(self, db_session, sample_criminal, retention, tmp_path_factory):
+        """Files outside the upload folders are never deleted."""
+        outside = tmp_path_factory.mktemp('elsewhere') / 'keep.jpg'
+        outside.write_bytes(b'jpg')
+        add_detection(db_session, sample_criminal, OLD, str(outside))
+        
+        assert retention.run(names=['detection_logs'])['detection_logs']['files'] == 0
+        assert outside.exists()
+    
+    def test_disabled_policy_skipped(self, db_session, sample_criminal, retention):
+        """A policy with 0 days keeps rows forever."""
+        retention.policies['detection_logs'].max_age_days = 0
+        add_detection(db_session, sample_criminal, OLD)
+        
+        assert 'detection_logs' not in retention.run()
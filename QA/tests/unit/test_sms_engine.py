@@ -0,0 +1,149 @@
+"""
+Unit Tests for SMS Engine
+Tests concurrent SMS delivery, rate limiting, retries and idempotency
+"""
+
+import time
+
+import pytest
+
+
+@pytest.fixture
+def engine():
+    """SMS engine on the loopback provider."""
+    from app.services.sms_service import SMSEngine
+    
+    engine = SMSEngine()
+    engine.configure({
+        'SMS_PROVIDER': 'loopback',
+        'SMS_MAX_WORKERS': 20,
+        'SMS_RATE_PER_SECOND': 0,
+        'SMS_RETRY_BASE_SECONDS': 0.01
+    })
+    yield engine
+    engine.shutdown()
+
+
+@pytest.mark.unit
+class TestSMSEngine:
+    """Test SMS delivery."""
+    
+    def test_fan_out_is_concurrent(self, engine):
+        """20 numbers take about one round trip, not 20."""
+        engine.provider.latency = 0.1
+        messages = [(f'+1555{i:07d}', 'Alert', f'k{i}') for i in range(20)]
+        
+        started = time.perf_counter()
+        results = engine.send_many(messages)
+        elapsed = time.perf_counter() - started
+        
+        assert all(r['success'] for r in results)
+        assert len(engine.provider.sent) == 20
+        assert elapsed < 1.0
+    
+    def test_transient_failure_retried(self, engine):
+        """Transient provider errors are retried."""
+        engine.provider.fail_next = 2
+        
+        result = engine.send('+15550000001', 'Alert', 'retry-key')
+        
+        assert result['success'] is True
+        assert result['attempts'] == 3
+    
+    def test_gives_up_after_max_retries(self, engine):
+        """Delivery fails once retries are exhausted."""
+        engine.provider.fail_next = engine.max_retries + 1
+        
+        result = engine.send('+15550000001', 'Alert', 'fail-key')
+        
+        assert result['success'] is False
+        assert result['error'] == 'Simulated provider failure'
+    
+    def test_permanent_failure_not_retried(self, engine):
+        """Non-retryable provider errors fail immediately."""
+        from app.services.sms_service import SMSError
+        
+        def reject(to, body, key):
+            raise SMSError('Invalid number', retryable=False)
+        
+        engine.provider.send = reject
+        
+        assert engine.send('+1', 'Alert', 'bad')['attempts'] == 1
+    
+    def test_twilio_retries_only_definite_rejections(self, monkeypatch):
+        """Throttling and 5xx are retried; errors without a status may have been delivered."""
+        from types import SimpleNamespace
+        from app.services import sms_service
+        
+        class TwilioError(Exception):
+            def __init__(self, status=None):
+                super().__init__(f'status {status}')
+                self.status = status
+        
+        def failing(error):
+            def create(**kwargs):
+                raise error
+            return SimpleNamespace(messages=SimpleNamespace(create=create))
+        
+        monkeypatch.setattr(sms_service, 'TWILIO_AVAILABLE', True)
+        provider = sms_service.TwilioProvider('AC1', 'token', '+15550000000')
+        
+        expected = {429: True, 503: True, 400: False, None: False}
+        for status, retryable in expected.items():
+            provider._client = failing(TwilioError(status))
+            with pytest.raises(sms_service.SMSError) as excinfo:
+                provider.send('+15550000001', 'Alert', 'key')
+            assert excinfo.value.retryable is retryable
+    
+    def test_ambiguous_sms_failure_not_resent_by_outbox(self, engine):
+        """The outbox does not resend an SMS whose delivery is unknown."""
+        from types import SimpleNamespace
+        from app.services.alert_dispatcher import SMSSink
+        from app.services.sms_service import SMSError
+        
+        def timeout(to, body, key):
+            raise SMSError('Read timed out', retryable=False)
+        
+        engine.provider.send = timeout
+        sink = SMSSink({'ENABLE_SMS_ALERTS': True}, engine)
+        
+        errors = sink.send_batch([SimpleNamespace(id=1, recipient_phone='+15550000001', message='Alert')])
+        
+        assert errors[1].permanent is True
+    
+    def test_idempotency_key_prevents_duplicates(self, engine):
+        """A delivered key is not sent again."""
+        first = engine.send('5550000001', 'Alert', 'same-key')
+        second = engine.send('5550000001', 'Alert', 'same-key')
+        
+        assert second['message_sid'] == first['message_sid']
+        assert len(engine.provider.sent) == 1
+        assert engine.provider.sent[0]['to'] == '+5550000001'
+    
+    def test_rate_limit(self):
+        """The token bucket spaces sends beyond the burst."""
+        from app.services.sms_service import TokenBucket
+        
+        bucket = TokenBucket(rate=50, burst=1)
+        started = time.perf_counter()
+        for _ in range(6):
+            bucket.acquire()
+        
+        assert time.perf_counter() - started >= 0.09
+    
+    def test_critical_detection_sms(self, engine, monkeypatch):
+        """Critical detections text every on-call number once."""
+        from types import SimpleNamespace
+        from app.services import sms_service
+        
+        monkeypatch.setattr(sms_service, 'sms_engine', engine)
+        criminal = SimpleNamespace(name='John Doe', danger_level='critical')
+        detection = SimpleNamespace(id=7, location='Gate')
+        
+        results = sms_service.send_critical_detection_sms(
+            criminal, detection, 0.95, ['+15550000001', '+15550000002', '+15550000001']
+        )
+        
+        assert [r['phone'] for r in results] == ['+15550000001', '+15550000002']
+        assert all(r['success'] for r in results)
+        assert 'John Doe' in engine.provider.sent[0]['body']
@@ -0,0 +1,134 @@
+"""
+Unit Tests for Video Detection Serialization
+Tests batch serialization, read-only to_dict and write-time match counts
+"""
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def videos_with_matches(db_session, admin_user):
+    """Create videos whose frames match a few criminals."""
+    from app.models.criminal import Criminal
+    from app.models.video_detection import VideoDetection, VideoFrameDetection
+    
+    criminals = [Criminal(name=f'Suspect {i}', crime_type='Theft', added_by=admin_user.id) for i in range(3)]
+    db_session.session.add_all(criminals)
+    db_session.session.flush()
+    
+    videos = []
+    for v in range(4):
+        video = VideoDetection(
+            video_filename=f'clip{v}.mp4',
+            video_path=f'/tmp/clip{v}.mp4',
+            uploaded_by=admin_user.id,
+            processing_status='completed'
+        )
+        db_session.session.add(video)
+        db_session.session.flush()
+        for frame_number, criminal in enumerate(criminals[:v]):
+            # Two frames per criminal to check de-duplication
+            for offset in (0, 1):
+                db_session.session.add(VideoFrameDetection(
+                    video_detection_id=video.id,
+                    frame_number=frame_number * 10 + offset,
+                    timestamp_seconds=frame_number,
+                    criminal_id=criminal.id,
+                    confidence_score=0.9
+                ))
+        video.unique_criminals_matched = v
+        videos.append(video)
+    db_session.session.commit()
+    return videos, criminals
+
+
+class StatementCounter:
+    """Count statements executed on an engine."""
+    
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+    
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+    
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@pytest.mark.unit
+@pytest.mark.database
+@pytest.mark.video
+class TestVideoSerialization:
+    """Test VideoDetection serialization."""
+    
+    def test_serialize_many_single_query(self, db_session, videos_with_matches):
+        """Matched criminals for a page load in one query."""
+        from app.models.video_detection import VideoDetection
+        
+        videos, _ = videos_with_matches
+        db_session.session.expire_all()
+        page = VideoDetection.query.all()
+        
+        with StatementCounter(db_session.engine) as counter:
+            data = VideoDetection.serialize_many(page)
+        
+        assert len(counter.statements) == 1
+        assert [len(v['matched_criminals']) for v in data] == [0, 1, 2, 3]
+    
+    def test_to_dict_is_read_only(self, db_session, videos_with_matches):
+        """Serializing never writes, even when counts disagree."""
+        from app.models.video_detection import VideoDetection
+        
+        videos, _ = videos_with_matches
+        videos[2].unique_criminals_matched = 0
+        db_session.session.commit()
+        
+        with StatementCounter(db_session.engine) as counter:
+            data = videos[2].to_dict()
+        
+        assert len(data['matched_criminals']) == 2
+        assert data['unique_criminals_matched'] == 0
+        assert not any(s.lstrip().upper().startswith(('UPDATE', 'INSERT')) for s in counter.statements)
+    
+    def test_list_endpoint_query_count_constant(self, client, db_session, admin_token, videos_with_matches):
+        """List queries do not grow with the number of matches."""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        with StatementCounter(db_session.engine) as counter:
+            response = client.get('/api/video/list?limit=20', headers=headers)
+        
+        assert response.status_code == 200
+        assert len(response.get_json()['videos']) == 4
+        # User lookup + video page + one matched-criminals query
+        assert len(counter.statements) <= 3
+    
+    def test_frames_include_eager_loaded_criminal(self, client, admin_token, videos_with_matches):
+        """Frame details include the matched criminal."""
+        videos, criminals = videos_with_matches
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        response = client.get(f'/api/video/{videos[3].id}/frames?matched_only=true', headers=headers)
+        frames = response.get_json()['frames']
+        
+        assert len(frames) == 6
+        assert frames[0]['criminal']['name'] == criminals[0].name
+    
+    def test_delete_criminal_refreshes_counts(self, client, db_session, admin_token, videos_with_matches):
+        """Deleting a criminal updates match counts at write time."""
+        from app.models.video_detection import VideoDetection
+        
+        videos, criminals = videos_with_matches
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        response = client.delete(f'/api/criminals/{criminals[0].id}', headers=headers)
+        
+        assert response.status_code == 200
+        db_session.session.expire_all()
+        counts = [VideoDetection.query.get(v.id).unique_criminals_matched for v in videos]
+        assert counts == [0, 0, 1, 2]
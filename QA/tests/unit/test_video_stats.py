@@ -0,0 +1,135 @@
+"""
+Unit Tests for Video Statistics
+Tests SQL-side aggregation and processing-time percentiles
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+
+
+@pytest.fixture
+def timed_videos(db_session, admin_user):
+    """Create videos with known processing times."""
+    from app.models.video_detection import VideoDetection
+    
+    start = datetime(2024, 3, 1, 9, 0, 0)
+    videos = []
+    # Completed videos took 10, 20, 30 and 40 seconds
+    for i, seconds in enumerate((10, 20, 30, 40)):
+        videos.append(VideoDetection(
+            video_filename=f'done{i}.mp4',
+            video_path=f'/tmp/done{i}.mp4',
+            uploaded_by=admin_user.id,
+            processing_status='completed',
+            processing_started_at=start,
+            processing_completed_at=start + timedelta(seconds=seconds),
+            frames_processed=100,
+            total_faces_detected=i + 1,
+            unique_criminals_matched=1
+        ))
+    videos.append(VideoDetection(
+        video_filename='failed.mp4',
+        video_path='/tmp/failed.mp4',
+        uploaded_by=admin_user.id,
+        processing_status='failed',
+        total_faces_detected=5
+    ))
+    videos.append(VideoDetection(
+        video_filename='pending.mp4',
+        video_path='/tmp/pending.mp4',
+        uploaded_by=admin_user.id,
+        processing_status='pending'
+    ))
+    db_session.session.add_all(videos)
+    db_session.session.commit()
+    return videos
+
+
+@pytest.mark.unit
+@pytest.mark.database
+@pytest.mark.video
+class TestVideoStats:
+    """Test video statistics aggregation."""
+    
+    def test_status_summary_single_query(self, db_session, timed_videos):
+        """Per-status totals come from one GROUP BY query."""
+        from app.services.analytics_service import AnalyticsService
+        
+        statements = []
+        
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+        
+        event.listen(db_session.engine, 'before_cursor_execute', record)
+        try:
+            summary = AnalyticsService.get_video_status_summary()
+        finally:
+            event.remove(db_session.engine, 'before_cursor_execute', record)
+        
+        assert len(statements) == 1
+        assert summary['completed']['count'] == 4
+        assert summary['completed']['faces_detected'] == 10
+        assert summary['completed']['total_processing_time'] == pytest.approx(100, abs=0.01)
+        assert summary['completed']['avg_processing_time'] == pytest.approx(25, abs=0.01)
+        assert summary['failed']['timed_count'] == 0
+        assert summary['processing']['count'] == 0
+    
+    def test_percentiles_interpolate(self, db_session, timed_videos):
+        """Percentiles match percentile_cont interpolation."""
+        from app.services.analytics_service import AnalyticsService
+        
+        result = AnalyticsService.get_processing_time_percentiles((0, 50, 95, 100))
+        
+        assert result == {'p0': 10.0, 'p50': 25.0, 'p95': 38.5, 'p100': 40.0}
+    
+    def test_percentiles_empty(self, db_session):
+        """Percentiles are None when nothing has been processed."""
+        from app.services.analytics_service import AnalyticsService
+        
+        assert AnalyticsService.get_processing_time_percentiles() == {'p50': None, 'p95': None}
+    
+    def test_parse_percentiles(self):
+        """Percentile parameters are validated."""
+        from app.services.analytics_service import parse_percentiles
+        
+        assert parse_percentiles('') == (50, 95)
+        assert parse_percentiles('90,99.9') == (90.0, 99.9)
+        with pytest.raises(ValueError):
+            parse_percentiles('150')
+        with pytest.raises(ValueError):
+            parse_percentiles('p95')
+    
+    def test_video_stats_endpoint(self, client, admin_token, timed_videos):
+        """Video stats endpoint reports totals and optional percentiles."""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        response = client.get('/api/video/stats?percentiles=50', headers=headers)
+        stats = response.get_json()['stats']
+        
+        assert response.status_code == 200
+        assert stats['total_videos'] == 6
+        assert stats['videos_by_status'] == {'pending': 1, 'processing': 0, 'completed': 4, 'failed': 1}
+        assert stats['total_faces_detected'] == 10
+        assert stats['processing_time_percentiles'] == {'p50': 25.0}
+    
+    def test_video_analytics_endpoint(self, client, admin_token, timed_videos):
+        """Dashboard video analytics are aggregated in SQL."""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        response = client.get('/api/dashboard/video-analytics', headers=headers)
+        data = response.get_json()
+        
+        assert data['avg_processing_time_seconds'] == 25.0
+        assert data['total_processing_time_seconds'] == 100.0
+        assert data['total_faces_detected'] == 15
+        assert 'processing_time_percentiles' not in data
+        assert {'status': 'processing', 'count': 0} not in data['status_breakdown']
+    
+    def test_invalid_percentiles_rejected(self, client, admin_token):
+        """Invalid percentiles return 400."""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        response = client.get('/api/dashboard/analytics/video-stats?percentiles=abc', headers=headers)
+        
+        assert response.status_code == 400
@@ -0,0 +1,256 @@
+"""
+Unit Tests for Watchlist Importer
+Tests bulk enrollment from directories and zip archives, chunking and resume
+"""
+
+import csv
+import json
+import pickle
+import time
+import zipfile
+
+import cv2
+import numpy as np
+import pytest
+
+
+class FakeFaceService:
+    """Images narrower than 50px have no face."""
+    
+    def extract_face_encodings(self, images):
+        return [np.ones(4) if image.shape[1] >= 50 else None for image in images]
+    
+    def save_encoding(self, encoding):
+        return pickle.dumps(encoding)
+
+
+def jpeg(width):
+    rng = np.random.default_rng(width)
+    image = rng.integers(60, 200, size=(120, width, 3), dtype=np.uint8)
+    return cv2.imencode('.jpg', image)[1].tobytes()
+
+
+@pytest.fixture
+def watchlist_dir(tmp_path):
+    """Three people with photos in folders, one without a usable photo."""
+    root = tmp_path / 'watchlist'
+    for ref, widths in {'p1': [100, 110], 'p2': [120], 'p3': [30]}.items():
+        (root / ref).mkdir(parents=True)
+        for i, width in enumerate(widths):
+            (root / ref / f'{i}.jpg').write_bytes(jpeg(width))
+    with open(root / 'metadata.csv', 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['ref', 'name', 'crime_type', 'danger_level'])
+        writer.writeheader()
+        writer.writerow({'ref': 'p1', 'name': 'Ann Smith', 'crime_type': 'Fraud', 'danger_level': 'low'})
+        writer.writerow({'ref': 'p2', 'name': 'Bob Jones', 'crime_type': 'Theft', 'danger_level': 'high'})
+        writer.writerow({'ref': 'p3', 'name': 'Cy Young', 'crime_type': 'Theft', 'danger_level': ''})
+        writer.writerow({'ref': 'p4', 'name': '', 'crime_type': 'Theft', 'danger_level': ''})
+    return root
+
+
+@pytest.fixture
+def import_api(app, tmp_path, monkeypatch):
+    """Upload a one-person archive to the admin API and wait for the job."""
+    from app.services.watchlist_importer import WatchlistImporter
+    
+    monkeypatch.setitem(app.config, 'WATCHLIST_IMPORT_WORKERS', 0)
+    monkeypatch.setitem(app.config, 'WATCHLIST_IMPORT_FOLDER', str(tmp_path / 'imports'))
+    monkeypatch.setitem(app.config, 'ENCODINGS_FOLDER', str(tmp_path / 'encodings'))
+    monkeypatch.setattr(WatchlistImporter, '_default_face_service', staticmethod(FakeFaceService))
+    
+    archive = tmp_path / 'upload.zip'
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('metadata.csv', 'ref,name,crime_type\nq1,Eve Long,Fraud\n')
+        zf.writestr('q1/face.jpg', jpeg(100))
+    
+    def run(client, headers):
+        with open(archive, 'rb') as f:
+            response = client.post('/api/admin/watchlist-imports', headers=headers,
+                                   data={'archive': (f, 'upload.zip')}, content_type='multipart/form-data')
+        assert response.status_code == 202
+        job_id = response.get_json()['job']['id']
+        
+        for _ in range(100):
+            job = client.get(f'/api/admin/watchlist-imports/{job_id}', headers=headers).get_json()['job']
+            if job['status'] not in ('queued', 'running'):
+                return job
+            time.sleep(0.05)
+        return job
+    
+    return run
+
+
+def make_importer(source, admin_user, tmp_path, **kwargs):
+    from app.services.watchlist_importer import WatchlistImporter
+    
+    return WatchlistImporter(str(source), admin_user.id, workers=0, face_service=FakeFaceService(),
+                             encodings_folder=str(tmp_path / 'encodings'), **kwargs)
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestWatchlistImport:
+    """Test the bulk watchlist importer."""
+    
+    def test_directory_import(self, db_session, admin_user, watchlist_dir, tmp_path):
+        """Valid records are enrolled; failures are reported per file."""
+        from app.models.criminal import Criminal
+        from app.models.face_encoding import FaceEncoding
+        
+        report = make_importer(watchlist_dir, admin_user, tmp_path, chunk_size=1).run()
+        
+        assert report['records'] == 4
+        assert report['imported'] == 2
+        assert report['photos'] == 3
+        assert report['photos_failed'] == 1
+        errors = {(f['ref'], f['error']) for f in report['failures']}
+        assert ('p3', 'No face detected') in errors
+        assert ('p3', 'No usable photo') in errors
+        assert ('p4', 'Missing required field(s): name') in errors
+        
+        ann = Criminal.query.filter_by(name='Ann Smith').one()
+        assert ann.danger_level == 'low'
+        encodings = FaceEncoding.query.filter_by(criminal_id=ann.id).all()
+        assert len(encodings) == 2
+        assert sum(e.is_primary for e in encodings) == 1
+    
+    def test_photo_folders_do_not_collide(self, admin_user, tmp_path):
+        """Photos are stored per source and ref, even when refs sanitize to the same name."""
+        first = make_importer(tmp_path / 'a', admin_user, tmp_path)
+        second = make_importer(tmp_path / 'b', admin_user, tmp_path)
+        
+        folders = {first._photo_folder('p1'), second._photo_folder('p1'),
+                   first._photo_folder('a b'), first._photo_folder('a_b')}
+        
+        assert len(folders) == 4
+        assert first._photo_folder('p1') == make_importer(tmp_path / 'a', admin_user, tmp_path)._photo_folder('p1')
+    
+    def test_resume_skips_completed_records(self, db_session, admin_user, watchlist_dir, tmp_path):
+        """A second run only retries records that did not import."""
+        from app.models.criminal import Criminal
+        
+        make_importer(watchlist_dir, admin_user, tmp_path).run()
+        (watchlist_dir / 'p3' / '0.jpg').write_bytes(jpeg(90))
+        
+        report = make_importer(watchlist_dir, admin_user, tmp_path).run()
+        
+        assert report['skipped'] == 2
+        assert report['imported'] == 1
+        assert Criminal.query.count() == 3
+    
+    def test_zip_with_json_metadata(self, db_session, admin_user, tmp_path):
+        """Zip archives are read in place with listed photo paths."""
+        from app.models.face_encoding import FaceEncoding
+        
+        archive = tmp_path / 'watchlist.zip'
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('metadata.json', json.dumps([
+                {'id': 7, 'name': 'Dee Ray', 'crime_type': 'Assault', 'photos': 'img/a.jpg;img/b.jpg'}
+            ]))
+            zf.writestr('img/a.jpg', jpeg(100))
+            zf.writestr('img/b.jpg', b'not an image')
+        
+        report = make_importer(archive, admin_user, tmp_path).run()
+        
+        assert report['imported'] == 1
+        assert report['failures'] == [{'ref': '7', 'file': 'img/b.jpg', 'error': 'Could not read image'}]
+        stored = FaceEncoding.query.one()
+        assert stored.is_primary
+        assert open(stored.image_path, 'rb').read() == jpeg(100)
+    
+    def test_admin_endpoint_runs_in_background(self, client, db_session, admin_user, admin_token, import_api):
+        """Admins upload a zip and poll the job until it completes."""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        
+        job = import_api(client, headers)
+        
+        assert job['status'] == 'completed', job['error']
+        assert job['report']['imported'] == 1
+    
+    def test_resubmitted_archive_resumes(self, client, db_session, admin_user, admin_token, import_api):
+        """The same upload reuses its folder, so completed records are skipped."""
+        from app.models.watchlist_import_job import WatchlistImportJob
+        
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        first = import_api(client, headers)
+        second = import_api(client, headers)
+        
+        assert second['id'] != first['id']
+        assert second['report']['skipped'] == 1
+        assert second['report']['imported'] == 0
+        assert len({job.source_path for job in WatchlistImportJob.query.all()}) == 1
+    
+    def test_process_runner(self, app, db_session, admin_user, watchlist_dir, tmp_path, monkeypatch):
+        """Jobs are handed to a `flask watchlist-import --job` process that records progress on the row."""
+        from app.services import watchlist_importer
+        from app.services.watchlist_importer import WatchlistImporter, get_import_job, run_import_job
+        
+        launched = []
+        
+        class Popen:
+            def __init__(self, command, **kwargs):
+                launched.append(command)
+            
+            def poll(self):
+                return None
+        
+        monkeypatch.setattr(watchlist_importer.subprocess, 'Popen', Popen)
+        monkeypatch.setitem(app.config, 'WATCHLIST_IMPORT_RUNNER', 'process')
+        monkeypatch.setitem(app.config, 'WATCHLIST_IMPORT_WORKERS', 0)
+        monkeypatch.setitem(app.config, 'ENCODINGS_FOLDER', str(tmp_path / 'encodings'))
+        monkeypatch.setattr(WatchlistImporter, '_default_face_service', staticmethod(FakeFaceService))
+        
+        job = watchlist_importer.start_import_job(app, str(watchlist_dir), admin_user.id)
+        
+        assert job['status'] == 'queued'
+        assert launched[0][-3:] == ['watchlist-import', '--job', job['id']]
+        # A second submission of a source with a live job returns that job
+        assert watchlist_importer.start_import_job(app, str(watchlist_dir), admin_user.id)['id'] == job['id']
+        
+        assert run_import_job(app, job['id'])['status'] == 'completed'
+        job = get_import_job(job['id'])
+        assert job['report']['imported'] == 2
+        assert job['report']['failure_count'] == 3
+        assert json.load(open(f'{watchlist_dir}.report.json'))['imported'] == 2
+    
+    def test_dead_runner_marks_job_failed(self, app, db_session, admin_user, tmp_path):
+        """A running job whose process is gone is reported as failed."""
+        import socket
+        import subprocess
+        import sys
+        from app.models.watchlist_import_job import WatchlistImportJob
+        from app.services.watchlist_importer import get_import_job
+        
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        db_session.session.add(WatchlistImportJob(id='dead', status='running', source_path=str(tmp_path / 'a.zip'),
+                                                  added_by=admin_user.id, runner_host=socket.gethostname(),
+                                                  runner_pid=exited.pid))
+        db_session.session.commit()
+        
+        job = get_import_job('dead')
+        
+        assert job['status'] == 'failed'
+        assert job['error'] == 'Import process exited unexpectedly'
+    
+    def test_unclaimed_job_marks_failed(self, app, db_session, admin_user, tmp_path, monkeypatch):
+        """A queued job is failed when its runner exits before claiming it, or the claim deadline passes."""
+        from datetime import datetime, timedelta
+        from app.models.watchlist_import_job import WatchlistImportJob
+        from app.services import watchlist_importer
+        
+        class ExitedPopen:
+            def poll(self):
+                return 1
+        
+        now = datetime.utcnow()
+        for job_id, created_at in (('exited', now), ('fresh', now), ('stale', now - timedelta(hours=1))):
+            db_session.session.add(WatchlistImportJob(id=job_id, status='queued', added_by=admin_user.id,
+                                                      source_path=str(tmp_path / f'{job_id}.zip'),
+                                                      created_at=created_at))
+        db_session.session.commit()
+        monkeypatch.setitem(watchlist_importer._runners, 'exited', ExitedPopen())
+        
+        assert watchlist_importer.get_import_job('exited')['status'] == 'failed'
+        assert watchlist_importer.get_import_job('fresh')['status'] == 'queued'
+        assert watchlist_importer.get_import_job('stale')['status'] == 'failed'
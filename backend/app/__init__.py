@@ -1,4 +1,5 @@
 import os
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -8,6 +9,7 @@ from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from .config import config
+from .utils.cache import response_cache
 import logging
 from logging.handlers import RotatingFileHandler
 
@@ -28,6 +30,7 @@ def create_app(config_name='default'):
     
     # Load configuration
     app.config.from_object(config[config_name])
+    app.config['CONFIG_NAME'] = config_name
     
     # Initialize extensions with app
     db.init_app(app)
@@ -36,6 +39,7 @@ def create_app(config_name='default'):
     jwt.init_app(app)
     CORS(app, origins=app.config['CORS_ORIGINS'], supports_credentials=True)
     limiter.init_app(app)
+    response_cache.init_app(app)
     
     # Create upload directories if they don't exist
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -54,9 +58,105 @@ def create_app(config_name='default'):
     # Register CLI commands
     register_commands(app)
     
+    # Relay live events between processes on this host
+    from .services.event_bus import event_bus
+    event_bus.init_app(app)
+    
+    # Configure alert delivery over pooled SMTP sessions and a concurrent SMS
+    # engine; server entry points start the dispatcher thread
+    from .services.mail_transport import mail_transport
+    from .services.sms_service import sms_engine
+    from .services.alert_dispatcher import alert_dispatcher
+    mail_transport.init_app(app)
+    sms_engine.init_app(app)
+    alert_dispatcher.init_app(app)
+    
+    # Pick the embedding backend, or hand detection/embedding to the
+    # inference sidecar when one is configured
+    from .services.face_service_deepface import face_service_deepface
+    from .services.embedding_backends import create_embedding_backend
+    face_service_deepface.use_embedding_backend(create_embedding_backend(app.config))
+    face_service_deepface.configure_detectors(app.config)
+    if app.config.get('INFERENCE_SOCKET'):
+        from .services.inference_server import InferenceClient
+        face_service_deepface.use_inference_server(
+            InferenceClient(app.config['INFERENCE_SOCKET'], app.config.get('INFERENCE_TIMEOUT_SECONDS', 30))
+        )
+    
     return app
 
 
+def warm_up_face_model(app):
+    """
+    Start loading the face model in a background thread.
+    
+    Call from server entry points only: create_app() never loads the model,
+    so CLI commands and migrations start without TensorFlow. Readiness is
+    reported by GET /api/health/ready.
+    """
+    if not app.config.get('FACE_MODEL_WARMUP', True):
+        return None
+    from .services.face_service_deepface import face_service_deepface
+    return face_service_deepface.start_warm_up()
+
+
+def start_alert_dispatcher(app):
+    """
+    Start delivering queued alerts from a background thread.
+    
+    Call from server entry points only: create_app() just configures the
+    dispatcher, so CLI commands and migrations never send alerts. Other
+    processes deliver with `flask dispatch-alerts`.
+    """
+    if not app.config.get('ALERT_DISPATCHER_ENABLED') or app.testing:
+        return
+    from .services.alert_dispatcher import alert_dispatcher
+    alert_dispatcher.start()
+
+
+def prepare_for_fork(app):
+    """
+    Load shared state in a pre-forking master so workers inherit it.
+    
+    Loads the encoding gallery, stops the master's SMS threads and closes
+    its pooled and inference connections (threads do not survive fork and
+    sockets must not be shared), then freezes the heap so the cyclic GC in
+    each worker leaves the inherited pages untouched. The face model is not
+    built here: building it starts TensorFlow's thread pools, which a forked
+    child cannot use, so each worker loads it in init_forked_worker().
+    """
+    import gc
+    from .services.face_service_deepface import face_service_deepface
+    from .services.gallery_cache import gallery_cache
+    from .services.mail_transport import mail_transport
+    from .services.sms_service import sms_engine
+    
+    with app.app_context():
+        gallery_cache.load()
+        db.session.remove()
+        db.engine.dispose()
+    
+    sms_engine.shutdown()
+    if mail_transport.pool:
+        mail_transport.pool.close_all()
+    face_service_deepface.close_inference_connection()
+    
+    gc.collect()
+    gc.freeze()
+
+
+def init_forked_worker(app):
+    """Start per-process resources in a worker forked by prepare_for_fork()."""
+    from .services.face_service_deepface import face_service_deepface
+    
+    with app.app_context():
+        # Drop any pooled connections inherited from the master
+        db.engine.dispose(close=False)
+    face_service_deepface.close_inference_connection()
+    warm_up_face_model(app)
+    start_alert_dispatcher(app)
+
+
 def setup_logging(app):
     """Configure application logging."""
     if not app.debug and not app.testing:
@@ -78,7 +178,7 @@ def setup_logging(app):
 
 def register_blueprints(app):
     """Register application blueprints."""
-    from .routes import auth, face_detection, criminal, dashboard, video_detection, admin, notifications
+    from .routes import auth, face_detection, criminal, dashboard, video_detection, admin, notifications, events, health
     from flask import jsonify, render_template_string, send_from_directory
     
     # Root route
@@ -94,7 +194,8 @@ def register_blueprints(app):
                 'criminals': '/api/criminals (GET, POST, PUT, DELETE)',
                 'detection': '/api/detection (POST /upload, /live)',
                 'video_detection': '/api/video (POST /upload, /process)',
-                'dashboard': '/api/dashboard (GET /stats, /recent-detections)'
+                'dashboard': '/api/dashboard (GET /stats, /recent-detections)',
+                'events': '/api/events (GET /stream)'
             },
             'documentation': 'Visit /test for API testing interface'
         }), 200
@@ -221,6 +322,8 @@ def register_blueprints(app):
     app.register_blueprint(video_detection.bp, url_prefix='/api/video')
     app.register_blueprint(admin.bp, url_prefix='/api/admin')
     app.register_blueprint(notifications.bp, url_prefix='/api/notifications')
+    app.register_blueprint(events.bp, url_prefix='/api/events')
+    app.register_blueprint(health.bp, url_prefix='/api/health')
 
 
 def register_error_handlers(app):
@@ -289,3 +392,193 @@ def register_commands(app):
         db.session.add(admin)
         db.session.commit()
         print(f"Admin user '{username}' created successfully!")
+    
+    @app.cli.command('rollup-backfill')
+    @click.option('--batch-size', default=5000, show_default=True, help='Raw rows fetched per round trip.')
+    def rollup_backfill(batch_size):
+        """Rebuild hourly detection rollups from detection logs."""
+        from .services.analytics_service import AnalyticsService
+        
+        result = AnalyticsService.backfill_detection_rollups(batch_size=batch_size)
+        print(f"Scanned {result['logs_scanned']} detection logs, wrote {result['rollup_rows']} rollup rows.")
+    
+    @app.cli.command('notification-counters-rebuild')
+    def notification_counters_rebuild():
+        """Recompute per-user notification counters from the alerts table."""
+        from .models.notification_counter import NotificationCounter
+        
+        rows = NotificationCounter.rebuild()
+        print(f"Rebuilt notification counters for {rows} recipient(s).")
+    
+    @app.cli.command('retention-run')
+    @click.option('--policy', 'policies', multiple=True, help='Policy to run (repeatable); default all.')
+    @click.option('--dry-run', is_flag=True, help='Only count the rows that would be removed.')
+    @click.option('--max-batches', type=int, default=None, help='Stop each policy after this many batches.')
+    def retention_run(policies, dry_run, max_batches):
+        """Archive and delete rows past their retention period."""
+        from .services.retention_service import RetentionService
+        
+        service = RetentionService.from_config(app.config)
+        unknown = [name for name in policies if name not in service.policies]
+        if unknown:
+            raise click.BadParameter(f"Unknown policy: {', '.join(unknown)}. Expected: {', '.join(service.policies)}")
+        
+        results = service.run(names=list(policies) or None, dry_run=dry_run, max_batches=max_batches)
+        for name, stats in results.items():
+            verb = 'would remove' if dry_run else 'removed'
+            print(f"{name}: {verb} {stats['rows']} row(s), {stats['files']} file(s), {len(stats['archives'])} archive file(s).")
+    
+    @app.cli.command('watchlist-import')
+    @click.argument('source', required=False)
+    @click.option('--metadata', default=None, help='Metadata CSV/JSON file (default: metadata.* inside SOURCE).')
+    @click.option('--workers', type=int, default=None, help='Embedding processes (0 embeds inline).')
+    @click.option('--chunk-size', type=int, default=None, help='Records written per transaction.')
+    @click.option('--added-by', type=int, default=None, help='User id recorded on the criminals (default: first admin).')
+    @click.option('--report', 'report_path', default=None, help='Write the full JSON report, with every failure, here.')
+    @click.option('--job', 'job_id', default=None, help='Run an import job queued by the admin API instead of SOURCE.')
+    def watchlist_import(source, metadata, workers, chunk_size, added_by, report_path, job_id):
+        """Enroll a watchlist from a directory or zip archive (resumable)."""
+        import json
+        from .models.user import User
+        from .services.watchlist_importer import WatchlistImporter, WatchlistImportError, run_import_job
+        
+        if job_id:
+            job = run_import_job(app, job_id)
+            if job is None:
+                raise click.ClickException(f'Import job {job_id} is not queued.')
+            print(f"Import job {job_id} {job['status']}" + (f": {job['error']}" if job['error'] else '.'))
+            return
+        if not source:
+            raise click.UsageError('Pass SOURCE or --job.')
+        
+        if added_by is None:
+            admin = User.query.filter(User.role.in_(['admin', 'super_admin'])).order_by(User.id).first()
+            if not admin:
+                raise click.UsageError('No admin user found; pass --added-by.')
+            added_by = admin.id
+        
+        importer = WatchlistImporter.from_config(app.config, source, added_by, metadata)
+        if workers is not None:
+            importer.workers = workers
+        if chunk_size is not None:
+            importer.chunk_size = chunk_size
+        
+        def progress(report):
+            print(f"  {report['imported']} imported, {report['failed']} failed, "
+                  f"{report['photos_per_second']:.1f} photos/s")
+        
+        try:
+            report = importer.run(progress=progress)
+        except WatchlistImportError as e:
+            raise click.ClickException(str(e))
+        
+        print(f"Imported {report['imported']}/{report['records']} record(s) with {report['photos']} photo(s) "
+              f"in {report['elapsed_seconds']:.1f}s ({report['records_per_second']:.1f} records/s); "
+              f"{report['skipped']} already imported, {report['failed']} failed, "
+              f"{report['photos_failed']} photo(s) rejected.")
+        for failure in report['failures'][:20]:
+            print(f"  {failure['ref']}: {failure['file'] or '-'}: {failure['error']}")
+        if len(report['failures']) > 20:
+            print(f"  ... {len(report['failures']) - 20} more")
+        if report_path:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"Report written to {report_path}")
+    
+    @app.cli.command('dispatch-alerts')
+    @click.option('--once', is_flag=True, help='Deliver one batch of due alerts and exit.')
+    def dispatch_alerts(once):
+        """Deliver pending email/SMS alerts from the outbox."""
+        from .services.alert_dispatcher import alert_dispatcher
+        
+        if once:
+            counts = alert_dispatcher.run(once=True) or {}
+            print(f"Sent {counts.get('sent', 0)}, retrying {counts.get('retried', 0)}, failed {counts.get('failed', 0)}.")
+            return
+        
+        print('Dispatching alerts (Ctrl+C to stop)...')
+        try:
+            alert_dispatcher.run()
+        except KeyboardInterrupt:
+            pass
+    
+    @app.cli.command('sms-benchmark')
+    @click.option('--recipients', default=100, show_default=True, help='Numbers on the simulated on-call list.')
+    @click.option('--latency', default=0.2, show_default=True, help='Simulated provider round trip in seconds.')
+    def sms_benchmark(recipients, latency):
+        """Time a critical SMS fan-out against the loopback provider."""
+        import time
+        from .services.sms_service import SMSEngine
+        
+        engine = SMSEngine()
+        engine.configure({**app.config, 'SMS_PROVIDER': 'loopback', 'SMS_LOOPBACK_LATENCY_SECONDS': latency})
+        messages = [(f'+1555{i:07d}', 'Benchmark alert', f'benchmark:{i}') for i in range(recipients)]
+        
+        started = time.perf_counter()
+        results = engine.send_many(messages)
+        elapsed = time.perf_counter() - started
+        engine.shutdown()
+        
+        sent = sum(1 for r in results if r['success'])
+        print(f"Sent {sent}/{recipients} SMS in {elapsed:.2f}s "
+              f"({engine.max_workers} workers, {engine.bucket.rate:g}/s limit, {latency:g}s round trip; "
+              f"sequential would take ~{recipients * latency:.2f}s).")
+    
+    @app.cli.command('db-explain')
+    @click.option('--all', 'show_all', is_flag=True, help='Print plans for every query, not only flagged ones.')
+    @click.option('--strict', is_flag=True, help='Exit with status 1 if any full table scan is found.')
+    def db_explain(show_all, strict):
+        """EXPLAIN every dashboard/notification query and flag full table scans."""
+        from .models.user import User
+        from .utils.query_audit import audit_queries
+        
+        admin = User.query.filter(User.role.in_(['admin', 'super_admin'])).first()
+        report = audit_queries(app, db, identity=str(admin.id) if admin else '0')
+        
+        flagged = [entry for entry in report if entry['full_scans']]
+        for entry in report:
+            if not (show_all or entry['full_scans']):
+                continue
+            marker = 'FULL SCAN: ' + ', '.join(entry['full_scans']) if entry['full_scans'] else 'ok'
+            print(f"[{marker}] {entry['endpoint']} ({entry['path']})")
+            print('    ' + ' '.join(entry['statement'].split()))
+            for line in entry['plan']:
+                print(f'      {line}')
+        
+        print(f"Explained {len(report)} queries, {len(flagged)} with full table scans.")
+        if strict and flagged:
+            raise SystemExit(1)
+    
+    @app.cli.command('inference-server')
+    @click.option('--socket', 'socket_path', default=None, help='Unix socket path (default: INFERENCE_SOCKET).')
+    @click.option('--max-batch', type=int, default=None, help='Most images per model call.')
+    @click.option('--max-wait-ms', type=float, default=None, help='How long a batch waits to fill up.')
+    @click.option('--threads', type=int, default=None, help='Batches run concurrently.')
+    def inference_server(socket_path, max_batch, max_wait_ms, threads):
+        """Own the face model and serve detect/embed/match over a Unix socket."""
+        import signal
+        import threading
+        from .services.inference_server import InferenceServer
+        
+        socket_path = socket_path or app.config.get('INFERENCE_SOCKET')
+        if not socket_path:
+            raise click.UsageError('Pass --socket or set INFERENCE_SOCKET.')
+        server = InferenceServer(
+            app, socket_path,
+            max_batch=max_batch or app.config.get('INFERENCE_MAX_BATCH', 16),
+            max_wait_ms=max_wait_ms if max_wait_ms is not None else app.config.get('INFERENCE_MAX_WAIT_MS', 5),
+            threads=threads or app.config.get('INFERENCE_THREADS', 1)
+        )
+        if not server.face_service.warm_up():
+            raise click.ClickException(f"Face model failed to load: {server.face_service.status['error']}")
+        
+        stopped = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+        server.start()
+        print(f'Serving inference on {socket_path} (Ctrl+C to stop)...')
+        try:
+            stopped.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
@@ -31,12 +31,92 @@ class Config:
     
     # Face Recognition Configuration
     FACE_RECOGNITION_TOLERANCE = float(os.getenv('FACE_RECOGNITION_TOLERANCE', 0.6))
+    # Load the face model in the background when the server starts (the model
+    # is otherwise loaded on first use); /api/health/ready waits for it
+    FACE_MODEL_WARMUP = os.getenv('FACE_MODEL_WARMUP', 'true').lower() == 'true'
+    # Face detector per pipeline: deepface (Haar + eye alignment, built in) or
+    # ssd (res10 SSD via OpenCV dnn; fetch the weights with download_models.py)
+    FACE_DETECTOR_UPLOAD = os.getenv('FACE_DETECTOR_UPLOAD', 'deepface')
+    FACE_DETECTOR_LIVE = os.getenv('FACE_DETECTOR_LIVE', 'deepface')
+    FACE_DETECTOR_VIDEO = os.getenv('FACE_DETECTOR_VIDEO', 'deepface')
+    SSD_PROTOTXT = os.getenv('SSD_PROTOTXT', os.path.join('models', 'deploy.prototxt'))
+    SSD_MODEL = os.getenv('SSD_MODEL', os.path.join('models', 'res10_300x300_ssd_iter_140000.caffemodel'))
+    SSD_CONFIDENCE = float(os.getenv('SSD_CONFIDENCE', 0.5))  # lower finds more faces, more false positives
+    SSD_INPUT_SIZE = int(os.getenv('SSD_INPUT_SIZE', 300))  # smaller is faster, larger finds small faces
+    SSD_MIN_FACE_SIZE = int(os.getenv('SSD_MIN_FACE_SIZE', 20))  # pixels
+    
+    # Embedding backend: deepface (TensorFlow), or onnxruntime / opencv-dnn
+    # running Facenet512 exported by export_facenet512_onnx.py on CPU
+    EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'deepface')
+    EMBEDDING_MODEL_PATH = os.getenv('EMBEDDING_MODEL_PATH', os.path.join('models', 'facenet512.onnx'))
+    EMBEDDING_THREADS = int(os.getenv('EMBEDDING_THREADS', 0))  # CPU threads, 0 = runtime default
+    # Optional inference sidecar (`flask inference-server`): when set, workers
+    # send detect/embed calls over this Unix socket instead of loading the model
+    INFERENCE_SOCKET = os.getenv('INFERENCE_SOCKET', '')
+    INFERENCE_TIMEOUT_SECONDS = float(os.getenv('INFERENCE_TIMEOUT_SECONDS', 30))
+    INFERENCE_MAX_BATCH = int(os.getenv('INFERENCE_MAX_BATCH', 16))  # images per model call
+    INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', 5))  # wait to fill a batch
+    INFERENCE_THREADS = int(os.getenv('INFERENCE_THREADS', 1))  # concurrent batches
+    
+    # Quality gate: skip embedding faces too small or too poor to match
+    # (video processing and live detection)
+    QUALITY_GATE_ENABLED = os.getenv('QUALITY_GATE_ENABLED', 'true').lower() == 'true'
+    QUALITY_GATE_MIN_SCORE = float(os.getenv('QUALITY_GATE_MIN_SCORE', 0.45))
+    QUALITY_GATE_MIN_FACE_SIZE = int(os.getenv('QUALITY_GATE_MIN_FACE_SIZE', 40))
+    
+    # Bulk watchlist import (`flask watchlist-import`, POST /api/admin/watchlist-imports)
+    WATCHLIST_IMPORT_WORKERS = int(os.getenv('WATCHLIST_IMPORT_WORKERS', 2))  # embedding processes
+    WATCHLIST_IMPORT_CHUNK_SIZE = int(os.getenv('WATCHLIST_IMPORT_CHUNK_SIZE', 100))  # records per transaction
+    WATCHLIST_IMPORT_FOLDER = os.getenv('WATCHLIST_IMPORT_FOLDER', 'uploads/watchlist_imports')
+    # API imports run in their own process; 'thread' runs them in the web process (single worker only)
+    WATCHLIST_IMPORT_RUNNER = os.getenv('WATCHLIST_IMPORT_RUNNER', 'process')
+    # A queued job no runner has claimed by then is reported failed
+    WATCHLIST_IMPORT_CLAIM_SECONDS = int(os.getenv('WATCHLIST_IMPORT_CLAIM_SECONDS', 300))
     
     # Email Configuration
     SMTP_EMAIL = os.getenv('SMTP_EMAIL')
     SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
     SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
     SMTP_PORT = int(os.getenv('SMTP_PORT', 587))
+    ALERT_EMAIL = os.getenv('ALERT_EMAIL')  # fallback alert recipient (defaults to SMTP_EMAIL)
+    SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+    SMTP_TIMEOUT_SECONDS = int(os.getenv('SMTP_TIMEOUT_SECONDS', 30))
+    SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', 2))  # open sessions kept per worker
+    SMTP_KEEPALIVE_SECONDS = int(os.getenv('SMTP_KEEPALIVE_SECONDS', 60))  # NOOP-check sessions idle longer than this
+    SMTP_MAX_IDLE_SECONDS = int(os.getenv('SMTP_MAX_IDLE_SECONDS', 300))  # reconnect after this much idle time
+    ENABLE_SMS_ALERTS = os.getenv('ENABLE_SMS_ALERTS', 'false').lower() == 'true'
+    
+    # SMS Configuration
+    SMS_PROVIDER = os.getenv('SMS_PROVIDER', 'twilio')  # 'twilio' or 'loopback' (records instead of sending)
+    TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
+    TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
+    TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
+    SMS_MAX_WORKERS = int(os.getenv('SMS_MAX_WORKERS', 8))  # concurrent provider requests
+    SMS_RATE_PER_SECOND = float(os.getenv('SMS_RATE_PER_SECOND', 10))  # provider send limit; 0 disables
+    SMS_RATE_BURST = int(os.getenv('SMS_RATE_BURST', 10))
+    SMS_MAX_RETRIES = int(os.getenv('SMS_MAX_RETRIES', 3))
+    SMS_RETRY_BASE_SECONDS = float(os.getenv('SMS_RETRY_BASE_SECONDS', 0.5))  # doubled per retry
+    SMS_LOOPBACK_LATENCY_SECONDS = float(os.getenv('SMS_LOOPBACK_LATENCY_SECONDS', 0))  # simulated round trip
+    
+    # Outbound Alert Dispatcher Configuration
+    ALERT_SINK = os.getenv('ALERT_SINK', 'smtp')  # 'smtp' or 'memory' (records instead of sending)
+    ALERT_DISPATCHER_ENABLED = os.getenv('ALERT_DISPATCHER_ENABLED', 'true').lower() == 'true'
+    ALERT_DISPATCH_INTERVAL_SECONDS = int(os.getenv('ALERT_DISPATCH_INTERVAL_SECONDS', 5))
+    ALERT_DISPATCH_BATCH_SIZE = int(os.getenv('ALERT_DISPATCH_BATCH_SIZE', 50))
+    ALERT_DISPATCH_LEASE_SECONDS = int(os.getenv('ALERT_DISPATCH_LEASE_SECONDS', 300))
+    ALERT_MAX_RETRIES = int(os.getenv('ALERT_MAX_RETRIES', 5))
+    ALERT_RETRY_BASE_SECONDS = int(os.getenv('ALERT_RETRY_BASE_SECONDS', 30))  # doubled per retry
+    ALERT_RETRY_MAX_SECONDS = int(os.getenv('ALERT_RETRY_MAX_SECONDS', 3600))
+    ALERT_COALESCE_WINDOW_SECONDS = int(os.getenv('ALERT_COALESCE_WINDOW_SECONDS', 300))  # 0 disables digests
+    
+    # Retention Configuration (`flask retention-run`; 0 days keeps rows forever)
+    RETENTION_ALERTS_DAYS = int(os.getenv('RETENTION_ALERTS_DAYS', 90))
+    RETENTION_DETECTION_LOGS_DAYS = int(os.getenv('RETENTION_DETECTION_LOGS_DAYS', 365))
+    RETENTION_FRAME_DETECTIONS_DAYS = int(os.getenv('RETENTION_FRAME_DETECTIONS_DAYS', 30))
+    RETENTION_BATCH_SIZE = int(os.getenv('RETENTION_BATCH_SIZE', 1000))  # rows deleted per transaction
+    RETENTION_ARCHIVE = os.getenv('RETENTION_ARCHIVE', 'true').lower() == 'true'  # export rows before deleting
+    RETENTION_ARCHIVE_DIR = os.getenv('RETENTION_ARCHIVE_DIR', 'archive')
+    RETENTION_ARCHIVE_FORMAT = os.getenv('RETENTION_ARCHIVE_FORMAT', 'jsonl')  # 'jsonl' (gzip) or 'parquet' (needs pyarrow)
     
     # Logging Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -48,12 +128,32 @@ class Config:
     # Rate Limiting
     RATELIMIT_STORAGE_URL = "memory://"
     RATELIMIT_DEFAULT = os.getenv('API_RATE_LIMIT', "100/minute")
+    
+    # Response Cache Configuration
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    # 'sqlite' is shared (entries and invalidations) by every process on the host;
+    # 'memory' is private to one process, so only suits single-process servers
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'sqlite')
+    RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH', os.path.join('instance', 'response_cache.db'))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 512))
+    RESPONSE_CACHE_DEFAULT_TTL = int(os.getenv('RESPONSE_CACHE_DEFAULT_TTL', 30))  # seconds
+    
+    # Live Event Stream Configuration
+    # 'sqlite' relays events between every process on the host (gunicorn workers,
+    # video jobs, CLI commands); 'memory' only delivers events within one process
+    EVENT_BUS_BACKEND = os.getenv('EVENT_BUS_BACKEND', 'sqlite')
+    EVENT_BUS_PATH = os.getenv('EVENT_BUS_PATH', os.path.join('instance', 'event_bus.db'))
+    EVENT_BUS_POLL_SECONDS = float(os.getenv('EVENT_BUS_POLL_SECONDS', 0.25))
+    EVENT_STREAM_HEARTBEAT_SECONDS = int(os.getenv('EVENT_STREAM_HEARTBEAT_SECONDS', 15))
+    EVENT_STREAM_MAX_QUEUE = int(os.getenv('EVENT_STREAM_MAX_QUEUE', 100))  # per connection
 
 
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     SQLALCHEMY_ECHO = True
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')  # run.py is one process
+    EVENT_BUS_BACKEND = os.getenv('EVENT_BUS_BACKEND', 'memory')
 
 
 class ProductionConfig(Config):
@@ -69,6 +169,15 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test_crime_detection.db'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=5)
+    RESPONSE_CACHE_ENABLED = False
+    RESPONSE_CACHE_BACKEND = 'memory'
+    EVENT_BUS_BACKEND = 'memory'
+    ALERT_SINK = 'memory'
+    ALERT_DISPATCHER_ENABLED = False
+    SMS_PROVIDER = 'loopback'
+    SMS_RETRY_BASE_SECONDS = 0.01
+    FACE_MODEL_WARMUP = False
+    WATCHLIST_IMPORT_RUNNER = 'thread'
 
 
 # Configuration dictionary
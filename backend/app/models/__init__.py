@@ -5,5 +5,9 @@ from .criminal import Criminal
 from .face_encoding import FaceEncoding
 from .detection_log import DetectionLog
 from .alert import Alert
+from .detection_rollup import DetectionRollup
+from .notification_counter import NotificationCounter
+from .watchlist_import_job import WatchlistImportJob
 
-__all__ = ['User', 'Criminal', 'FaceEncoding', 'DetectionLog', 'Alert']
+__all__ = ['User', 'Criminal', 'FaceEncoding', 'DetectionLog', 'Alert', 'DetectionRollup', 'NotificationCounter',
+           'WatchlistImportJob']
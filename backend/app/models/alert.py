@@ -8,6 +8,24 @@ class Alert(db.Model):
     """Enhanced alert model with severity, categories, and multiple delivery methods."""
     
     __tablename__ = 'alerts'
+    __table_args__ = (
+        db.Index('ix_alerts_sent_at_id', 'sent_at', 'id'),  # notification history, keyset pagination
+        db.Index('ix_alerts_status', 'status'),
+        db.Index('ix_alerts_outbox', 'status', 'next_attempt_at'),  # dispatcher due-alert scan
+        db.Index('ix_alerts_coalesce', 'coalesce_key', 'created_at'),  # repeat-detection lookups
+        # At most one open (pending, not yet attempted) digest per coalescing key
+        db.Index(
+            'ux_alerts_open_digest', 'coalesce_key', unique=True,
+            postgresql_where=db.text("alert_type = 'detection_digest' AND status = 'pending' AND retry_count = 0"),
+            sqlite_where=db.text("alert_type = 'detection_digest' AND status = 'pending' AND retry_count = 0")
+        ),
+        # Unread badge and unread filters only touch unacknowledged rows
+        db.Index(
+            'ix_alerts_unread', 'delivery_method', 'sent_at',
+            postgresql_where=db.text('acknowledged = false'),
+            sqlite_where=db.text('acknowledged = 0')
+        ),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -35,7 +53,7 @@ class Alert(db.Model):
     recipient_phone = db.Column(db.String(20), nullable=True)
     
     # Status tracking
-    status = db.Column(db.String(20), default='sent', nullable=False)  # sent, failed, pending, delivered, read
+    status = db.Column(db.String(20), default='sent', nullable=False)  # sent, failed, pending, sending, delivered, read
     acknowledged = db.Column(db.Boolean, default=False, nullable=False)
     acknowledged_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     acknowledged_at = db.Column(db.DateTime, nullable=True)
@@ -44,11 +62,24 @@ class Alert(db.Model):
     sent_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     expires_at = db.Column(db.DateTime, nullable=True)
     retry_count = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)  # outbox: earliest next delivery attempt
+    last_error = db.Column(db.Text, nullable=True)  # outbox: most recent delivery error
+    coalesce_key = db.Column(db.String(200), nullable=True)  # detection:<criminal>:<camera or location>
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
     def __repr__(self):
         return f'<Alert {self.id} - {self.status}>'
     
+    @classmethod
+    def open_digest_criteria(cls, key):
+        """Filter for the digest still collecting hits for `key` (see ux_alerts_open_digest)."""
+        return (
+            cls.coalesce_key == key,
+            cls.alert_type == 'detection_digest',
+            cls.status == 'pending',
+            cls.retry_count == 0
+        )
+    
     def to_dict(self, include_detection=False):
         """Convert alert object to dictionary."""
         data = {
@@ -65,6 +96,8 @@ class Alert(db.Model):
             'recipient_email': self.recipient_email,
             'recipient_phone': self.recipient_phone,
             'status': self.status,
+            'retry_count': self.retry_count,
+            'last_error': self.last_error,
             'acknowledged': self.acknowledged,
             'acknowledged_by': self.acknowledged_by,
             'acknowledged_at': self.acknowledged_at.isoformat() if self.acknowledged_at else None,
@@ -8,6 +8,10 @@ class Criminal(db.Model):
     """Criminal record model."""
     
     __tablename__ = 'criminals'
+    __table_args__ = (
+        db.Index('ix_criminals_added_date_id', 'added_date', 'id'),  # keyset pagination
+        db.Index('ix_criminals_status', 'status'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, index=True)
@@ -8,6 +8,13 @@ class DetectionLog(db.Model):
     """Detection log model for recording face detection events."""
     
     __tablename__ = 'detection_logs'
+    __table_args__ = (
+        db.Index('ix_detection_logs_detected_at_id', 'detected_at', 'id'),  # keyset pagination
+        db.Index('ix_detection_logs_status_detected_at', 'status', 'detected_at'),
+        db.Index('ix_detection_logs_criminal_detected_at', 'criminal_id', 'detected_at'),
+        db.Index('ix_detection_logs_location_detected_at', 'location', 'detected_at'),
+        db.Index('ix_detection_logs_confidence_score', 'confidence_score'),  # confidence distribution
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     criminal_id = db.Column(db.Integer, db.ForeignKey('criminals.id'), nullable=True)
@@ -0,0 +1,158 @@
+"""Hourly detection rollup model for analytics queries."""
+
+from datetime import datetime
+from sqlalchemy import event, func, literal_column
+from app import db
+from app.models.detection_log import DetectionLog
+from app.models.incremental import changed_values, track_old_values, upsert_increment
+
+
+class DetectionRollup(db.Model):
+    """
+    Pre-aggregated detection counts per hour.
+    
+    One row per (hour, location, camera_id, criminal_id, status), enforced
+    by a unique index in which NULL key columns compare equal. Rows are
+    maintained incrementally by DetectionLog insert/update hooks and can be
+    rebuilt from scratch with `flask rollup-backfill`. Rollups are history:
+    they are not decremented when raw logs are purged.
+    """
+    
+    __tablename__ = 'detection_rollups_hourly'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    bucket_hour = db.Column(db.DateTime, nullable=False)  # detected_at truncated to the hour
+    location = db.Column(db.String(200), nullable=True)
+    camera_id = db.Column(db.String(50), nullable=True)
+    criminal_id = db.Column(db.Integer, db.ForeignKey('criminals.id', ondelete='SET NULL'), nullable=True, index=True)
+    status = db.Column(db.String(20), nullable=False)
+    
+    # Aggregates
+    detection_count = db.Column(db.Integer, default=0, nullable=False)
+    confidence_sum = db.Column(db.Float, default=0.0, nullable=False)
+    
+    KEY_COLUMNS = ('bucket_hour', 'location', 'camera_id', 'criminal_id', 'status')
+    
+    def __repr__(self):
+        return f'<DetectionRollup {self.bucket_hour} - {self.status}: {self.detection_count}>'
+    
+    @staticmethod
+    def bucket_for(timestamp):
+        """Truncate a timestamp to its hourly bucket."""
+        if timestamp is None:
+            timestamp = datetime.utcnow()
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    
+    @classmethod
+    def key_for(cls, bucket_hour, location, camera_id, criminal_id, status):
+        """Build a rollup key dictionary (empty location/camera count as missing)."""
+        return {
+            'bucket_hour': bucket_hour,
+            'location': location or None,
+            'camera_id': camera_id or None,
+            'criminal_id': criminal_id,
+            'status': status
+        }
+    
+    @classmethod
+    def unique_key(cls):
+        """
+        Expressions of the unique rollup key.
+        
+        A plain unique index treats NULLs as distinct, so nullable columns
+        are indexed through COALESCE with a value key_for() never produces.
+        """
+        return (
+            cls.bucket_hour,
+            func.coalesce(cls.location, literal_column("''")),
+            func.coalesce(cls.camera_id, literal_column("''")),
+            func.coalesce(cls.criminal_id, literal_column('0')),
+            cls.status
+        )
+    
+    @classmethod
+    def apply_delta(cls, connection, key, count_delta, confidence_delta):
+        """
+        Add deltas to the rollup row for `key`, creating it if needed.
+        
+        Runs on the flushing connection so the rollup change commits or
+        rolls back together with the detection log change.
+        
+        Args:
+            connection: SQLAlchemy connection
+            key: Dictionary produced by key_for()
+            count_delta: Change in detection count
+            confidence_delta: Change in confidence sum
+        """
+        upsert_increment(
+            connection,
+            cls.__table__,
+            key,
+            cls.unique_key(),
+            {'detection_count': count_delta, 'confidence_sum': confidence_delta}
+        )
+    
+    def to_dict(self):
+        """Convert rollup row to dictionary."""
+        return {
+            'bucket_hour': self.bucket_hour.isoformat() if self.bucket_hour else None,
+            'location': self.location,
+            'camera_id': self.camera_id,
+            'criminal_id': self.criminal_id,
+            'status': self.status,
+            'detection_count': self.detection_count,
+            'confidence_sum': self.confidence_sum,
+            'avg_confidence': (self.confidence_sum / self.detection_count) if self.detection_count else 0
+        }
+
+
+db.Index('ux_detection_rollups_key', *DetectionRollup.unique_key(), unique=True)
+
+
+def _rollup_key(detection_log, **overrides):
+    """Build the rollup key for a detection log, optionally with old values."""
+    values = {
+        'detected_at': detection_log.detected_at,
+        'location': detection_log.location,
+        'camera_id': detection_log.camera_id,
+        'criminal_id': detection_log.criminal_id,
+        'status': detection_log.status
+    }
+    values.update(overrides)
+    return DetectionRollup.key_for(
+        DetectionRollup.bucket_for(values['detected_at']),
+        values['location'],
+        values['camera_id'],
+        values['criminal_id'],
+        values['status']
+    )
+
+
+_TRACKED_ATTRIBUTES = ('detected_at', 'location', 'camera_id', 'criminal_id', 'status', 'confidence_score')
+
+
+# Find the old bucket even when the log was expired (e.g. after commit)
+track_old_values(DetectionLog, _TRACKED_ATTRIBUTES)
+
+
+@event.listens_for(DetectionLog, 'after_insert')
+def _rollup_after_insert(mapper, connection, target):
+    """Count a new detection in its hourly bucket."""
+    DetectionRollup.apply_delta(
+        connection,
+        _rollup_key(target),
+        1,
+        target.confidence_score or 0.0
+    )
+
+
+@event.listens_for(DetectionLog, 'after_update')
+def _rollup_after_update(mapper, connection, target):
+    """Move a detection between buckets when a keyed attribute changes."""
+    old_values = changed_values(target, _TRACKED_ATTRIBUTES)
+    if not old_values:
+        return
+    
+    old_confidence = old_values.pop('confidence_score', target.confidence_score)
+    DetectionRollup.apply_delta(connection, _rollup_key(target, **old_values), -1, -(old_confidence or 0.0))
+    DetectionRollup.apply_delta(connection, _rollup_key(target), 1, target.confidence_score or 0.0)
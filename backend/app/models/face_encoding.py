@@ -10,6 +10,9 @@ class FaceEncoding(db.Model):
     """Face encoding model for storing facial feature vectors."""
     
     __tablename__ = 'face_encodings'
+    __table_args__ = (
+        db.Index('ix_face_encodings_criminal_id', 'criminal_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     criminal_id = db.Column(db.Integer, db.ForeignKey('criminals.id', ondelete='CASCADE'), nullable=False)
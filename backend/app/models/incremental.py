@@ -0,0 +1,58 @@
+"""Helpers for tables maintained incrementally from ORM flush hooks."""
+
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+
+_UPSERT_DIALECTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert
+}
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+def track_old_values(model, attributes):
+    """
+    Load the previous value of `attributes` on assignment.
+    
+    Without this an attribute that has been expired (e.g. after commit)
+    has no deleted history, and after_update hooks cannot find the row
+    the old value was counted in.
+    """
+    for name in attributes:
+        event.listen(getattr(model, name), 'set', _keep_old_value, active_history=True, retval=True)
+
+
+def changed_values(target, attributes):
+    """Previous values of the tracked attributes changed in this flush."""
+    state = inspect(target)
+    old_values = {}
+    for name in attributes:
+        history = state.attrs[name].history
+        if history.has_changes() and history.deleted:
+            old_values[name] = history.deleted[0]
+    return old_values
+
+
+def upsert_increment(connection, table, key, conflict_target, deltas):
+    """
+    Add `deltas` to the row identified by `key`, inserting it if missing.
+    
+    Uses a single INSERT ... ON CONFLICT DO UPDATE, so concurrent writers
+    of a new key cannot both insert it.
+    
+    Args:
+        connection: SQLAlchemy connection
+        table: Table to write
+        key: Column values identifying the row
+        conflict_target: Columns or expressions of the table's unique index
+        deltas: Increment per counter column
+    """
+    insert = _UPSERT_DIALECTS[connection.dialect.name]
+    statement = insert(table).values(**key, **deltas)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=conflict_target,
+        set_={name: table.c[name] + statement.excluded[name] for name in deltas}
+    ))
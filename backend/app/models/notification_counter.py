@@ -0,0 +1,166 @@
+"""Per-user notification counters for the unread badge."""
+
+from sqlalchemy import and_, case, event, func
+from app import db
+from app.models.alert import Alert
+from app.models.incremental import changed_values, track_old_values, upsert_increment
+
+# Counter row for alerts addressed to every user (Alert.user_id is NULL)
+BROADCAST = 0
+
+
+class NotificationCounter(db.Model):
+    """
+    Alert totals and unread counts per recipient user.
+    
+    One row per Alert.user_id, with broadcast alerts under user 0. Rows
+    are maintained incrementally by Alert insert/update/delete hooks;
+    bulk writes that bypass the ORM call apply_alerts(). Counters can be
+    rebuilt from scratch with `flask notification-counters-rebuild`.
+    """
+    
+    __tablename__ = 'notification_counters'
+    
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    total = db.Column(db.Integer, default=0, nullable=False)
+    unread = db.Column(db.Integer, default=0, nullable=False)
+    unread_in_app = db.Column(db.Integer, default=0, nullable=False)
+    
+    COUNTER_COLUMNS = ('total', 'unread', 'unread_in_app')
+    
+    def __repr__(self):
+        return f'<NotificationCounter {self.user_id}: {self.unread}/{self.total}>'
+    
+    @staticmethod
+    def contribution(user_id, delivery_method, acknowledged):
+        """Counter values a single alert contributes to."""
+        unread = 0 if acknowledged else 1
+        return user_id or BROADCAST, {
+            'total': 1,
+            'unread': unread,
+            'unread_in_app': unread if delivery_method == 'in_app' else 0
+        }
+    
+    @classmethod
+    def apply_delta(cls, connection, user_id, sign=1, **deltas):
+        """
+        Add deltas to the counter row for `user_id`, creating it if needed.
+        
+        Runs on the flushing connection so the counter change commits or
+        rolls back together with the alert change.
+        
+        Args:
+            connection: SQLAlchemy connection
+            user_id: Counter row (BROADCAST for alerts without a user)
+            sign: 1 to add the deltas, -1 to subtract them
+            **deltas: Changes to total, unread and unread_in_app
+        """
+        values = {name: sign * deltas.get(name, 0) for name in cls.COUNTER_COLUMNS}
+        if not any(values.values()):
+            return
+        
+        upsert_increment(connection, cls.__table__, {'user_id': user_id}, [cls.user_id], values)
+    
+    @classmethod
+    def contributions_query(cls, *criteria):
+        """Per-user counter contributions of the alerts matching `criteria`."""
+        unread = Alert.acknowledged == False
+        return db.session.query(
+            func.coalesce(Alert.user_id, BROADCAST),
+            func.count(Alert.id),
+            func.sum(case((unread, 1), else_=0)),
+            func.sum(case((and_(unread, Alert.delivery_method == 'in_app'), 1), else_=0))
+        ).filter(*criteria).group_by(func.coalesce(Alert.user_id, BROADCAST))
+    
+    @classmethod
+    def apply_alerts(cls, connection, alerts, sign=1, columns=COUNTER_COLUMNS):
+        """
+        Count or uncount alerts written outside the ORM unit of work.
+        
+        Use with bulk INSERT/UPDATE/DELETE statements, which the ORM hooks
+        cannot see; RETURNING the affected rows keeps the counters exact.
+        
+        Args:
+            connection: SQLAlchemy connection in the writing transaction
+            alerts: (user_id, delivery_method, acknowledged) per alert, as
+                it was before an update or delete
+            sign: 1 to add, -1 to subtract
+            columns: Counters to change (e.g. only the unread ones)
+        """
+        totals = {}
+        for user_id, delivery_method, acknowledged in alerts:
+            key, deltas = cls.contribution(user_id, delivery_method, acknowledged)
+            user_totals = totals.setdefault(key, dict.fromkeys(cls.COUNTER_COLUMNS, 0))
+            for name in columns:
+                user_totals[name] += deltas[name]
+        for user_id, deltas in totals.items():
+            cls.apply_delta(connection, user_id, sign, **deltas)
+    
+    @classmethod
+    def rebuild(cls):
+        """Recompute every counter from the alerts table."""
+        rows = cls.contributions_query().all()
+        cls.query.delete(synchronize_session=False)
+        if rows:
+            db.session.execute(cls.__table__.insert(), [
+                {'user_id': user_id, 'total': total, 'unread': unread or 0, 'unread_in_app': unread_in_app or 0}
+                for user_id, total, unread, unread_in_app in rows
+            ])
+        db.session.commit()
+        return len(rows)
+    
+    @classmethod
+    def unread_in_app_for(cls, user_id):
+        """Unread in-app notifications visible to `user_id` (own + broadcast)."""
+        return db.session.query(func.coalesce(func.sum(cls.unread_in_app), 0)).filter(
+            cls.user_id.in_([BROADCAST, user_id])
+        ).scalar()
+    
+    @classmethod
+    def totals(cls):
+        """Total and unread alerts across all recipients."""
+        total, unread = db.session.query(
+            func.coalesce(func.sum(cls.total), 0),
+            func.coalesce(func.sum(cls.unread), 0)
+        ).one()
+        return total, unread
+
+
+_TRACKED_ATTRIBUTES = ('user_id', 'delivery_method', 'acknowledged')
+
+
+# Subtract the old counts even when the alert was expired (e.g. after commit)
+track_old_values(Alert, _TRACKED_ATTRIBUTES)
+
+
+def _values(alert, **overrides):
+    values = {name: getattr(alert, name) for name in _TRACKED_ATTRIBUTES}
+    values.update(overrides)
+    return values
+
+
+@event.listens_for(Alert, 'after_insert')
+def _counters_after_insert(mapper, connection, target):
+    """Count a new alert."""
+    user_id, deltas = NotificationCounter.contribution(**_values(target))
+    NotificationCounter.apply_delta(connection, user_id, **deltas)
+
+
+@event.listens_for(Alert, 'after_update')
+def _counters_after_update(mapper, connection, target):
+    """Move counts when an alert is acknowledged or re-addressed."""
+    old_values = changed_values(target, _TRACKED_ATTRIBUTES)
+    if not old_values:
+        return
+    
+    user_id, deltas = NotificationCounter.contribution(**_values(target, **old_values))
+    NotificationCounter.apply_delta(connection, user_id, -1, **deltas)
+    user_id, deltas = NotificationCounter.contribution(**_values(target))
+    NotificationCounter.apply_delta(connection, user_id, **deltas)
+
+
+@event.listens_for(Alert, 'after_delete')
+def _counters_after_delete(mapper, connection, target):
+    """Uncount a deleted alert."""
+    user_id, deltas = NotificationCounter.contribution(**_values(target))
+    NotificationCounter.apply_delta(connection, user_id, -1, **deltas)
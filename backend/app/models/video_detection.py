@@ -8,6 +8,9 @@ class VideoDetection(db.Model):
     """Video detection model for recording face detection events from video files."""
     
     __tablename__ = 'video_detections'
+    __table_args__ = (
+        db.Index('ix_video_detections_processing_status', 'processing_status'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     video_filename = db.Column(db.String(255), nullable=False)
@@ -27,6 +30,7 @@ class VideoDetection(db.Model):
     processing_status = db.Column(db.String(20), default='pending', nullable=False)  # pending, processing, completed, failed
     frames_processed = db.Column(db.Integer, default=0)
     total_faces_detected = db.Column(db.Integer, default=0)
+    faces_gated = db.Column(db.Integer, default=0)  # Faces skipped by the quality gate (not embedded)
     unique_criminals_matched = db.Column(db.Integer, default=0)
     processing_started_at = db.Column(db.DateTime, nullable=True)
     processing_completed_at = db.Column(db.DateTime, nullable=True)
@@ -41,13 +45,108 @@ class VideoDetection(db.Model):
     summary_report = db.Column(db.Text, nullable=True)  # JSON string with detailed results
     
     # Relationships
-    frame_detections = db.relationship('VideoFrameDetection', backref='video', lazy=True, cascade='all, delete-orphan')
+    frame_detections = db.relationship(
+        'VideoFrameDetection', backref='video', lazy=True, cascade='all, delete-orphan',
+        order_by='VideoFrameDetection.frame_number'
+    )
     
     def __repr__(self):
         return f'<VideoDetection {self.id} - {self.video_filename}>'
     
-    def to_dict(self, include_frames=False):
-        """Convert video detection object to dictionary."""
+    @staticmethod
+    def load_matched_criminals(video_ids):
+        """
+        Load the distinct criminals matched in each video with one query.
+        
+        Args:
+            video_ids: IDs of the videos to look up
+        
+        Returns:
+            Dictionary mapping video ID to a list of criminal summaries
+        """
+        from app.models.criminal import Criminal
+        
+        matched = {video_id: [] for video_id in video_ids}
+        if not matched:
+            return matched
+        
+        rows = db.session.query(
+            VideoFrameDetection.video_detection_id,
+            Criminal.id,
+            Criminal.name,
+            Criminal.crime_type,
+            Criminal.danger_level
+        ).join(
+            Criminal, Criminal.id == VideoFrameDetection.criminal_id
+        ).filter(
+            VideoFrameDetection.video_detection_id.in_(list(matched))
+        ).distinct().order_by(
+            VideoFrameDetection.video_detection_id,
+            Criminal.id
+        ).all()
+        
+        for video_id, criminal_id, name, crime_type, danger_level in rows:
+            matched[video_id].append({
+                'id': criminal_id,
+                'name': name,
+                'crime_type': crime_type,
+                'danger_level': danger_level
+            })
+        
+        return matched
+    
+    @classmethod
+    def serialize_many(cls, videos, include_frames=False):
+        """
+        Serialize a page of videos, loading matched criminals in one query.
+        
+        Args:
+            videos: List of VideoDetection objects
+            include_frames: Include frame detections for each video
+        
+        Returns:
+            List of dictionaries in the same order as `videos`
+        """
+        matched = cls.load_matched_criminals([video.id for video in videos])
+        return [
+            video.to_dict(include_frames=include_frames, matched_criminals=matched[video.id])
+            for video in videos
+        ]
+    
+    @staticmethod
+    def refresh_match_counts(video_ids):
+        """
+        Recompute unique_criminals_matched for videos whose frames changed.
+        
+        Runs in the caller's transaction; the caller commits.
+        """
+        if not video_ids:
+            return
+        
+        distinct_matches = db.select(
+            db.func.count(db.distinct(VideoFrameDetection.criminal_id))
+        ).where(
+            VideoFrameDetection.video_detection_id == VideoDetection.id,
+            VideoFrameDetection.criminal_id.isnot(None)
+        ).scalar_subquery()
+        
+        db.session.execute(
+            db.update(VideoDetection).where(
+                VideoDetection.id.in_(list(video_ids))
+            ).values(unique_criminals_matched=distinct_matches).execution_options(synchronize_session='fetch')
+        )
+    
+    def to_dict(self, include_frames=False, matched_criminals=None):
+        """
+        Convert video detection object to dictionary.
+        
+        Read-only: counts are maintained when frames are written, not here.
+        
+        Args:
+            include_frames: Include frame detections
+            matched_criminals: Pre-loaded criminal summaries (see
+                serialize_many); loaded for this video when omitted
+        """
         data = {
             'id': self.id,
             'video_filename': self.video_filename,
@@ -62,6 +161,7 @@ class VideoDetection(db.Model):
             'processing_status': self.processing_status,
             'frames_processed': self.frames_processed,
             'total_faces_detected': self.total_faces_detected,
+            'faces_gated': self.faces_gated,
             'unique_criminals_matched': self.unique_criminals_matched,
             'processing_started_at': self.processing_started_at.isoformat() if self.processing_started_at else None,
             'processing_completed_at': self.processing_completed_at.isoformat() if self.processing_completed_at else None,
@@ -71,34 +171,10 @@ class VideoDetection(db.Model):
             'annotated_video_path': self.annotated_video_path
         }
         
-        # Add matched criminals info - always fetch to ensure data consistency
-        from app.models.criminal import Criminal
-        # Get unique criminal IDs from frame detections
-        criminal_ids = db.session.query(VideoFrameDetection.criminal_id).filter(
-            VideoFrameDetection.video_detection_id == self.id,
-            VideoFrameDetection.criminal_id.isnot(None)
-        ).distinct().all()
-        
-        matched_criminals = []
-        for (cid,) in criminal_ids:
-            criminal = Criminal.query.get(cid)
-            if criminal:
-                matched_criminals.append({
-                    'id': criminal.id,
-                    'name': criminal.name,
-                    'crime_type': criminal.crime_type,
-                    'danger_level': criminal.danger_level
-                })
+        if matched_criminals is None:
+            matched_criminals = self.load_matched_criminals([self.id])[self.id]
         data['matched_criminals'] = matched_criminals
         
-        # Update unique_criminals_matched count if it doesn't match
-        if len(matched_criminals) != self.unique_criminals_matched:
-            self.unique_criminals_matched = len(matched_criminals)
-            try:
-                db.session.commit()
-            except:
-                db.session.rollback()
-        
         if include_frames and self.frame_detections:
             data['frame_detections'] = [frame.to_dict() for frame in self.frame_detections]
         
@@ -109,6 +185,10 @@ class VideoFrameDetection(db.Model):
     """Individual frame detection results within a video."""
     
     __tablename__ = 'video_frame_detections'
+    __table_args__ = (
+        db.Index('ix_video_frame_detections_video_frame', 'video_detection_id', 'frame_number'),
+        db.Index('ix_video_frame_detections_criminal_id', 'criminal_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     video_detection_id = db.Column(db.Integer, db.ForeignKey('video_detections.id', ondelete='CASCADE'), nullable=False)
@@ -128,6 +208,9 @@ class VideoFrameDetection(db.Model):
     
     detected_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
+    # Relationships
+    criminal = db.relationship('Criminal', lazy=True)
+    
     def __repr__(self):
         return f'<VideoFrameDetection Video:{self.video_detection_id} Frame:{self.frame_number}>'
     
@@ -146,10 +229,8 @@ class VideoFrameDetection(db.Model):
             'detected_at': self.detected_at.isoformat() if self.detected_at else None
         }
         
-        if include_criminal and self.criminal_id:
-            from app.models.criminal import Criminal
-            criminal = Criminal.query.get(self.criminal_id)
-            if criminal:
-                data['criminal'] = criminal.to_dict()
+        # Eager-load `criminal` (selectinload) when serializing many frames
+        if include_criminal and self.criminal is not None:
+            data['criminal'] = self.criminal.to_dict()
         
         return data
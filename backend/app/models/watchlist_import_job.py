@@ -0,0 +1,65 @@
+"""Watchlist import job model."""
+
+import json
+from datetime import datetime
+from app import db
+
+
+class WatchlistImportJob(db.Model):
+    """
+    A bulk watchlist import started from the admin API.
+    
+    The row is the shared record of the job: the import runs in its own
+    process (`flask watchlist-import --job <id>`) and writes its progress
+    here, so any web worker can report it. `report` keeps the counters and
+    the first failures; the full report is written next to the source.
+    """
+    
+    __tablename__ = 'watchlist_import_jobs'
+    
+    # Failures kept in the stored report
+    FAILURE_LIMIT = 100
+    
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(20), default='queued', nullable=False, index=True)  # queued, running, completed, failed
+    source_path = db.Column(db.String(500), nullable=False, index=True)
+    metadata_path = db.Column(db.String(500), nullable=True)
+    added_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    
+    # Process running the import
+    runner_host = db.Column(db.String(255), nullable=True)
+    runner_pid = db.Column(db.Integer, nullable=True)
+    
+    report = db.Column(db.Text, nullable=True)  # JSON string
+    error = db.Column(db.Text, nullable=True)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)  # last progress update
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<WatchlistImportJob {self.id}: {self.status}>'
+    
+    @property
+    def active(self):
+        return self.status in ('queued', 'running')
+    
+    def set_report(self, report):
+        """Store the running report, keeping only the first failures."""
+        failures = report.get('failures', [])
+        self.report = json.dumps(dict(report, failures=failures[:self.FAILURE_LIMIT], failure_count=len(failures)))
+        self.updated_at = datetime.utcnow()
+    
+    def to_dict(self):
+        """Convert job to dictionary."""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'report': json.loads(self.report) if self.report else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
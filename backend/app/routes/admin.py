@@ -1,12 +1,16 @@
-"""Admin-only routes for user management."""
+"""Admin-only routes for user management and watchlist imports."""
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.user import User
 from app.models.invitation import Invitation
+from app.utils.pagination import InvalidCursor, keyset_args, keyset_paginate
 from functools import wraps
 import logging
+import os
+import shutil
+import zipfile
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +47,16 @@ def get_users():
         if role_filter:
             query = query.filter_by(role=role_filter)
         
+        keyset = keyset_args(default_limit=per_page)
+        if keyset:
+            result = keyset_paginate(query, User.created_at, User.id, **keyset)
+            return jsonify({
+                'users': [user.to_dict() for user in result['items']],
+                'total': result['total'],
+                'next_cursor': result['next_cursor'],
+                'has_more': result['has_more']
+            }), 200
+        
         pagination = query.order_by(User.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -54,6 +68,8 @@ def get_users():
             'current_page': page
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         logger.error(f"Failed to fetch users: {str(e)}")
         return jsonify({'message': f'Failed to fetch users: {str(e)}'}), 500
@@ -233,6 +249,16 @@ def get_invitations():
                 Invitation.used_at.is_(None)
             )
         
+        keyset = keyset_args(default_limit=per_page)
+        if keyset:
+            result = keyset_paginate(query, Invitation.created_at, Invitation.id, **keyset)
+            return jsonify({
+                'invitations': [inv.to_dict() for inv in result['items']],
+                'total': result['total'],
+                'next_cursor': result['next_cursor'],
+                'has_more': result['has_more']
+            }), 200
+        
         pagination = query.order_by(Invitation.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -244,6 +270,8 @@ def get_invitations():
             'current_page': page
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Failed to fetch invitations: {str(e)}'}), 500
 
@@ -291,3 +319,60 @@ def resend_invitation(invitation_id):
         
     except Exception as e:
         return jsonify({'message': f'Failed to resend invitation: {str(e)}'}), 500
+
+
+@bp.route('/watchlist-imports', methods=['POST'])
+@admin_required
+def create_watchlist_import():
+    """
+    Start a bulk watchlist import from an uploaded zip archive (admin only).
+    
+    Form fields: `archive` (zip with photos and optionally metadata.*),
+    `metadata` (optional CSV/JSON file). The import runs in its own process;
+    poll GET /watchlist-imports/<job_id> for progress. Uploading the same
+    files again resumes an interrupted import.
+    """
+    try:
+        from app.services.watchlist_importer import start_import_job, store_upload
+        
+        archive = request.files.get('archive')
+        if not archive or not archive.filename.lower().endswith('.zip'):
+            return jsonify({'message': 'A zip archive is required (field: archive)'}), 400
+        
+        metadata = request.files.get('metadata')
+        extension = None
+        if metadata and metadata.filename:
+            extension = metadata.filename.rsplit('.', 1)[-1].lower()
+            if extension not in ('csv', 'json', 'jsonl'):
+                return jsonify({'message': 'Metadata must be a CSV, JSON or JSON Lines file'}), 400
+        else:
+            metadata = None
+        
+        archive_path, metadata_path = store_upload(current_app.config['WATCHLIST_IMPORT_FOLDER'], archive,
+                                                   metadata, extension)
+        if not zipfile.is_zipfile(archive_path):
+            shutil.rmtree(os.path.dirname(archive_path), ignore_errors=True)
+            return jsonify({'message': 'Uploaded archive is not a valid zip file'}), 400
+        
+        job = start_import_job(current_app._get_current_object(), archive_path, int(get_jwt_identity()), metadata_path)
+        return jsonify({'message': 'Watchlist import started', 'job': job}), 202
+    
+    except Exception as e:
+        logger.error(f"Failed to start watchlist import: {str(e)}")
+        return jsonify({'message': f'Failed to start watchlist import: {str(e)}'}), 500
+
+
+@bp.route('/watchlist-imports/<job_id>', methods=['GET'])
+@admin_required
+def get_watchlist_import(job_id):
+    """Get the progress and report (first 100 failures) of a watchlist import (admin only)."""
+    try:
+        from app.services.watchlist_importer import get_import_job
+        
+        job = get_import_job(job_id)
+        if not job:
+            return jsonify({'message': 'Import job not found'}), 404
+        return jsonify({'job': job}), 200
+    
+    except Exception as e:
+        return jsonify({'message': f'Failed to get watchlist import: {str(e)}'}), 500
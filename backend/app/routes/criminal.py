@@ -4,11 +4,15 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
 import os
+import cv2
 from app import db
 from app.models.criminal import Criminal
 from app.models.face_encoding import FaceEncoding
+from app.models.video_detection import VideoDetection, VideoFrameDetection
 from app.services.face_service_deepface import face_service_deepface as face_service  # Using DeepFace AI (99.65% accuracy)
+from app.services.enrollment_service import enrollment_service
 from app.utils.quality_assessment import assess_face_quality, determine_pose_type  # Phase 3 enhancement
+from app.utils.pagination import InvalidCursor, keyset_args, keyset_paginate
 from app.services.criminal_alert_service import (
     send_criminal_added_alert,
     send_criminal_updated_alert,
@@ -44,6 +48,16 @@ def get_criminals():
         if status:
             query = query.filter_by(status=status)
         
+        keyset = keyset_args(default_limit=per_page)
+        if keyset:
+            result = keyset_paginate(query, Criminal.added_date, Criminal.id, **keyset)
+            return jsonify({
+                'criminals': [criminal.to_dict() for criminal in result['items']],
+                'total': result['total'],
+                'next_cursor': result['next_cursor'],
+                'has_more': result['has_more']
+            }), 200
+        
         pagination = query.order_by(Criminal.added_date.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -55,6 +69,8 @@ def get_criminals():
             'current_page': page
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Failed to fetch criminals: {str(e)}'}), 500
 
@@ -202,6 +218,18 @@ def delete_criminal(criminal_id):
             'encodings_count': len(criminal.face_encodings)
         }
         
+        # Unlink video frame matches and keep per-video match counts current
+        affected_videos = [
+            video_id for (video_id,) in db.session.query(
+                VideoFrameDetection.video_detection_id
+            ).filter(VideoFrameDetection.criminal_id == criminal_id).distinct()
+        ]
+        if affected_videos:
+            VideoFrameDetection.query.filter(
+                VideoFrameDetection.criminal_id == criminal_id
+            ).update({'criminal_id': None}, synchronize_session=False)
+            VideoDetection.refresh_match_counts(affected_videos)
+        
         db.session.delete(criminal)
         db.session.commit()
         
@@ -260,14 +288,17 @@ def upload_criminal_photo(criminal_id):
         filepath = os.path.join(encodings_dir, filename)
         file.save(filepath)
         
+        # Decode once; encoding and quality assessment share the array
+        image = cv2.imread(filepath)
+        
         # Extract face encoding
-        encoding = face_service.extract_face_encoding(filepath)
+        encoding = face_service.extract_face_encoding(image if image is not None else filepath)
         if encoding is None:
             os.remove(filepath)  # Clean up
             return jsonify({'message': 'No face detected in photo'}), 400
         
         # Phase 3: Assess photo quality
-        quality_metrics = assess_face_quality(filepath)
+        quality_metrics = assess_face_quality(image if image is not None else filepath)
         quality_score = quality_metrics.get('overall_score', 0.5)
         pose_type = determine_pose_type(quality_metrics.get('frontality_score', 0.5))
         
@@ -331,7 +362,7 @@ def upload_multiple_photos(criminal_id):
             return jsonify({'message': 'No photo files provided'}), 400
         
         results = []
-        success_count = 0
+        photos = []
         
         for file in files:
             if file.filename == '':
@@ -346,71 +377,12 @@ def upload_multiple_photos(criminal_id):
                 })
                 continue
             
-            try:
-                # Save photo
-                filename = secure_filename(file.filename)
-                encodings_dir = os.path.join('encodings', str(criminal_id))
-                os.makedirs(encodings_dir, exist_ok=True)
-                
-                import time
-                timestamp = int(time.time())
-                filename = f"{timestamp}_{filename}"
-                filepath = os.path.join(encodings_dir, filename)
-                file.save(filepath)
-                
-                # Extract encoding
-                encoding = face_service.extract_face_encoding(filepath)
-                if encoding is None:
-                    os.remove(filepath)
-                    results.append({
-                        'filename': file.filename,
-                        'success': False,
-                        'error': 'No face detected'
-                    })
-                    continue
-                
-                # Assess quality
-                quality_metrics = assess_face_quality(filepath)
-                quality_score = quality_metrics.get('overall_score', 0.5)
-                pose_type = determine_pose_type(quality_metrics.get('frontality_score', 0.5))
-                
-                # Save to database
-                encoding_bytes = face_service.save_encoding(encoding)
-                face_encoding = FaceEncoding(
-                    criminal_id=criminal_id,
-                    encoding_data=encoding_bytes,
-                    image_path=filepath,
-                    quality_score=quality_score,
-                    pose_type=pose_type,
-                    is_primary=False
-                )
-                
-                db.session.add(face_encoding)
-                success_count += 1
-                
-                results.append({
-                    'filename': file.filename,
-                    'success': True,
-                    'encoding_id': face_encoding.id,
-                    'quality_score': quality_score,
-                    'pose_type': pose_type
-                })
-                
-            except Exception as e:
-                results.append({
-                    'filename': file.filename,
-                    'success': False,
-                    'error': str(e)
-                })
-        
-        # Update primary photo (highest quality)
-        if success_count > 0:
-            all_encodings = FaceEncoding.query.filter_by(criminal_id=criminal_id).all()
-            best_encoding = max(all_encodings, key=lambda e: e.quality_score or 0.0)
-            for enc in all_encodings:
-                enc.is_primary = (enc.id == best_encoding.id)
+            photos.append((file.filename, file.read()))
         
-        db.session.commit()
+        # Save, embed, score and insert the whole batch at once
+        enrolled = enrollment_service.enroll(criminal_id, photos)
+        results.extend(enrolled['results'])
+        success_count = enrolled['success_count']
         
         return jsonify({
             'message': f'Uploaded {success_count}/{len(files)} photos successfully',
@@ -7,16 +7,24 @@ from datetime import datetime, timedelta
 from app import db
 from app.models.criminal import Criminal
 from app.models.detection_log import DetectionLog
+from app.models.detection_rollup import DetectionRollup
 from app.models.user import User
 from app.models.alert import Alert
 from app.models.video_detection import VideoDetection, VideoFrameDetection
-from app.services.analytics_service import AnalyticsService
+from app.services.analytics_service import AnalyticsService, parse_percentiles
+from app.utils.cache import response_cache
 
 bp = Blueprint('dashboard', __name__)
 
+# Tables each cached widget reads; a committed write to any of them
+# invalidates the widget's cached responses.
+DETECTION_TABLES = ('detection_logs', 'detection_rollups_hourly')
+VIDEO_TABLES = ('video_detections', 'video_frame_detections')
+
 
 @bp.route('/stats', methods=['GET'])
 @jwt_required()
+@response_cache.cached(ttl=15, tags=DETECTION_TABLES + VIDEO_TABLES + ('criminals', 'users', 'alerts'))
 def get_stats():
     """Get dashboard statistics."""
     try:
@@ -81,27 +89,29 @@ def get_recent_detections():
 
 @bp.route('/top-criminals', methods=['GET'])
 @jwt_required()
+@response_cache.cached(ttl=60, tags=DETECTION_TABLES + ('criminals',))
 def get_top_criminals():
     """Get most detected criminals."""
     try:
         limit = int(request.args.get('limit', 5))
         
-        # Query for criminals with most detections
+        # Query for criminals with most detections (from hourly rollups)
+        detection_count = func.sum(DetectionRollup.detection_count)
         top_criminals = db.session.query(
             Criminal,
-            func.count(DetectionLog.id).label('detection_count')
+            detection_count.label('detection_count')
         ).join(
-            DetectionLog, Criminal.id == DetectionLog.criminal_id
+            DetectionRollup, Criminal.id == DetectionRollup.criminal_id
         ).group_by(
             Criminal.id
         ).order_by(
-            func.count(DetectionLog.id).desc()
+            detection_count.desc()
         ).limit(limit).all()
         
         result = []
         for criminal, count in top_criminals:
             criminal_dict = criminal.to_dict()
-            criminal_dict['detection_count'] = count
+            criminal_dict['detection_count'] = int(count or 0)
             result.append(criminal_dict)
         
         return jsonify({
@@ -114,6 +124,7 @@ def get_top_criminals():
 
 @bp.route('/detections-timeline', methods=['GET'])
 @jwt_required()
+@response_cache.cached(ttl=60, tags=DETECTION_TABLES)
 def get_detections_timeline():
     """Get detection counts over time."""
     try:
@@ -121,23 +132,23 @@ def get_detections_timeline():
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        # Query detections grouped by date
+        # Query detections grouped by date (from hourly rollups)
         detections_by_date = db.session.query(
-            func.date(DetectionLog.detected_at).label('date'),
-            func.count(DetectionLog.id).label('count')
+            func.date(DetectionRollup.bucket_hour).label('date'),
+            func.sum(DetectionRollup.detection_count).label('count')
         ).filter(
-            DetectionLog.detected_at >= start_date
+            DetectionRollup.bucket_hour >= DetectionRollup.bucket_for(start_date)
         ).group_by(
-            func.date(DetectionLog.detected_at)
+            func.date(DetectionRollup.bucket_hour)
         ).order_by(
-            func.date(DetectionLog.detected_at)
+            func.date(DetectionRollup.bucket_hour)
         ).all()
         
         # Format data for chart
         timeline_data = [
             {
                 'date': str(date) if date else None,
-                'count': count
+                'count': int(count or 0)
             }
             for date, count in detections_by_date
         ]
@@ -153,20 +164,21 @@ def get_detections_timeline():
 
 @bp.route('/detection-status-breakdown', methods=['GET'])
 @jwt_required()
+@response_cache.cached(ttl=30, tags=DETECTION_TABLES)
 def get_detection_status_breakdown():
     """Get breakdown of detections by status."""
     try:
         status_counts = db.session.query(
-            DetectionLog.status,
-            func.count(DetectionLog.id).label('count')
+            DetectionRollup.status,
+            func.sum(DetectionRollup.detection_count).label('count')
         ).group_by(
-            DetectionLog.status
+            DetectionRollup.status
         ).all()
         
         breakdown = [
             {
                 'status': status,
-                'count': count
+                'count': int(count or 0)
             }
             for status, count in status_counts
         ]
@@ -181,6 +193,7 @@ def get_detection_status_breakdown():
 
 @bp.route('/confidence-distribution', methods=['GET'])
 @jwt_required()
+@response_cache.cached(ttl=60, tags=DETECTION_TABLES)
 def get_confidence_distribution():
     """Get distribution of detection confidence scores."""
     try:
@@ -215,26 +228,28 @@ def get_confidence_distribution():
 
 @bp.route('/location-stats', methods=['GET'])
 @jwt_required()
+@response_cache.cached(ttl=60, tags=DETECTION_TABLES)
 def get_location_stats():
     """Get detection counts by location."""
     try:
         limit = int(request.args.get('limit', 10))
         
+        location_count = func.sum(DetectionRollup.detection_count)
         location_counts = db.session.query(
-            DetectionLog.location,
-            func.count(DetectionLog.id).label('count')
+            DetectionRollup.location,
+            location_count.label('count')
         ).filter(
-            DetectionLog.location.isnot(None)
+            DetectionRollup.location.isnot(None)
         ).group_by(
-            DetectionLog.location
+            DetectionRollup.location
         ).order_by(
-            func.count(DetectionLog.id).desc()
+            location_count.desc()
         ).limit(limit).all()
         
         locations = [
             {
                 'location': location,
-                'count': count
+                'count': int(count or 0)
             }
             for location, count in location_counts
         ]
@@ -249,61 +264,46 @@ def get_location_stats():
 
 @bp.route('/video-analytics', methods=['GET'])
 @jwt_required()
+@response_cache.cached(ttl=60, tags=VIDEO_TABLES)
 def get_video_analytics():
-    """Get video processing analytics."""
+    """
+    Get video processing analytics.
+    
+    Query params:
+        - percentiles: optional comma-separated processing-time
+          percentiles, e.g. "50,95" (empty selects p50 and p95)
+    """
     try:
-        # Total processing time
-        completed_videos = VideoDetection.query.filter_by(
-            processing_status='completed'
-        ).filter(
-            VideoDetection.processing_started_at.isnot(None),
-            VideoDetection.processing_completed_at.isnot(None)
-        ).all()
-        
-        total_processing_time = 0
-        avg_processing_time = 0
-        
-        if completed_videos:
-            processing_times = []
-            for video in completed_videos:
-                delta = video.processing_completed_at - video.processing_started_at
-                processing_times.append(delta.total_seconds())
-            
-            total_processing_time = sum(processing_times)
-            avg_processing_time = total_processing_time / len(processing_times)
-        
-        # Videos by status
-        status_counts = db.session.query(
-            VideoDetection.processing_status,
-            func.count(VideoDetection.id).label('count')
-        ).group_by(
-            VideoDetection.processing_status
-        ).all()
+        percentiles = None
+        if 'percentiles' in request.args:
+            percentiles = parse_percentiles(request.args.get('percentiles'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    try:
+        summary = AnalyticsService.get_video_status_summary()
+        completed = summary['completed']
         
         status_breakdown = [
             {
                 'status': status,
-                'count': count
+                'count': totals['count']
             }
-            for status, count in status_counts
+            for status, totals in summary.items()
+            if totals['count']
         ]
         
-        # Total faces and criminals detected in videos
-        total_faces = db.session.query(
-            func.sum(VideoDetection.total_faces_detected)
-        ).scalar() or 0
-        
-        total_criminals = db.session.query(
-            func.sum(VideoDetection.unique_criminals_matched)
-        ).scalar() or 0
-        
-        return jsonify({
-            'avg_processing_time_seconds': round(avg_processing_time, 2),
-            'total_processing_time_seconds': round(total_processing_time, 2),
+        result = {
+            'avg_processing_time_seconds': round(completed['avg_processing_time'], 2),
+            'total_processing_time_seconds': round(completed['total_processing_time'], 2),
             'status_breakdown': status_breakdown,
-            'total_faces_detected': total_faces,
-            'total_criminals_matched': total_criminals
-        }), 200
+            'total_faces_detected': sum(totals['faces_detected'] for totals in summary.values()),
+            'total_criminals_matched': sum(totals['criminals_matched'] for totals in summary.values())
+        }
+        if percentiles:
+            result['processing_time_percentiles'] = AnalyticsService.get_processing_time_percentiles(percentiles)
+        
+        return jsonify(result), 200
         
     except Exception as e:
         return jsonify({'message': f'Failed to fetch video analytics: {str(e)}'}), 500
@@ -311,6 +311,7 @@ def get_video_analytics():
 
 @bp.route('/alert-stats', methods=['GET'])
 @jwt_required()
+@response_cache.cached(ttl=30, tags=('alerts',))
 def get_alert_stats():
     """Get alert statistics."""
     try:
@@ -362,6 +363,7 @@ def get_alert_stats():
 
 @bp.route('/analytics/report', methods=['GET'])
 @jwt_required()
+@response_cache.cached(ttl=300, tags=DETECTION_TABLES + VIDEO_TABLES + ('criminals', 'alerts'))
 def get_analytics_report():
     """Get comprehensive analytics report."""
     try:
@@ -374,6 +376,7 @@ def get_analytics_report():
 
 @bp.route('/analytics/performance', methods=['GET'])
 @jwt_required()
+@response_cache.cached(ttl=300, tags=DETECTION_TABLES + ('alerts',))
 def get_performance_analytics():
     """Get performance metrics."""
     try:
@@ -385,6 +388,7 @@ def get_performance_analytics():
 
 @bp.route('/analytics/activity', methods=['GET'])
 @jwt_required()
+@response_cache.cached(ttl=300, tags=DETECTION_TABLES + ('criminals',))
 def get_activity_report():
     """Get criminal activity report."""
     try:
@@ -396,6 +400,7 @@ def get_activity_report():
 
 @bp.route('/analytics/locations', methods=['GET'])
 @jwt_required()
+@response_cache.cached(ttl=300, tags=DETECTION_TABLES)
 def get_location_analytics():
     """Get location heatmap data."""
     try:
@@ -407,6 +412,7 @@ def get_location_analytics():
 
 @bp.route('/analytics/patterns', methods=['GET'])
 @jwt_required()
+@response_cache.cached(ttl=300, tags=DETECTION_TABLES)
 def get_time_patterns():
     """Get time-based detection patterns."""
     try:
@@ -418,11 +424,28 @@ def get_time_patterns():
 
 @bp.route('/analytics/video-stats', methods=['GET'])
 @jwt_required()
+@response_cache.cached(ttl=300, tags=VIDEO_TABLES)
 def get_detailed_video_stats():
     """Get detailed video processing statistics."""
     try:
-        stats = AnalyticsService.get_video_processing_stats()
+        percentiles = None
+        if 'percentiles' in request.args:
+            percentiles = parse_percentiles(request.args.get('percentiles'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    try:
+        stats = AnalyticsService.get_video_processing_stats(percentiles)
         return jsonify(stats), 200
     except Exception as e:
         return jsonify({'message': f'Failed to fetch video stats: {str(e)}'}), 500
 
+
+@bp.route('/cache-stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """Get response cache hit/miss metrics for this worker."""
+    try:
+        return jsonify(response_cache.stats()), 200
+    except Exception as e:
+        return jsonify({'message': f'Failed to fetch cache stats: {str(e)}'}), 500
@@ -0,0 +1,66 @@
+"""Server-Sent Events stream for live dashboard updates."""
+
+import json
+from flask import Blueprint, Response, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services.event_bus import event_bus, SEVERITY_LEVELS
+
+bp = Blueprint('events', __name__)
+
+CATEGORIES = ('detection', 'alert', 'video')
+
+
+@bp.route('/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream():
+    """
+    Stream detection, alert and video events.
+    
+    EventSource cannot send headers, so the token may be passed as
+    ?jwt=<access_token>.
+    
+    Query params:
+        categories: Comma-separated subset of detection, alert, video
+        min_severity: info, warning or critical
+    """
+    categories = [c.strip() for c in request.args.get('categories', '').split(',') if c.strip()]
+    invalid = [c for c in categories if c not in CATEGORIES]
+    if invalid:
+        return jsonify({'message': f'Unknown categories: {", ".join(invalid)}'}), 400
+    
+    min_severity = request.args.get('min_severity')
+    if min_severity and min_severity not in SEVERITY_LEVELS:
+        return jsonify({'message': f'Invalid min_severity: {min_severity}'}), 400
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    heartbeat = current_app.config.get('EVENT_STREAM_HEARTBEAT_SECONDS', 15)
+    subscription = event_bus.subscribe(
+        categories=categories or None,
+        min_severity=min_severity,
+        user_id=int(get_jwt_identity()),
+        max_queue=current_app.config.get('EVENT_STREAM_MAX_QUEUE', 100),
+        last_event_id=last_event_id
+    )
+    
+    def generate():
+        try:
+            yield f'retry: {int(heartbeat * 1000)}\n\n'
+            while True:
+                evt = subscription.get(timeout=heartbeat)
+                if evt is None:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ': heartbeat\n\n'
+                    continue
+                yield f"id: {evt['id']}\nevent: {evt['category']}\ndata: {json.dumps(evt)}\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
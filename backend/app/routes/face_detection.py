@@ -1,11 +1,13 @@
 """Face detection routes."""
 
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, current_app, request, jsonify, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.detection_log import DetectionLog
 from app.models.criminal import Criminal
 from app.services.detection_service import detection_service
+from app.utils.pagination import InvalidCursor, keyset_args, keyset_paginate
+from app.utils.quality_assessment import QualityGate
 import os
 
 bp = Blueprint('face_detection', __name__)
@@ -72,12 +74,14 @@ def live_detection():
         if not filepath:
             return jsonify({'message': 'Invalid frame format'}), 400
         
-        # Process detection
+        # Process detection; camera frames skip faces too poor to match
         result = detection_service.process_detection(
             filepath,
             current_user_id,
             location,
-            camera_id
+            camera_id,
+            quality_gate=QualityGate.from_config(current_app.config),
+            pipeline='live'
         )
         
         return jsonify(result), 200 if result['success'] else 500
@@ -89,10 +93,16 @@ def live_detection():
 @bp.route('/logs', methods=['GET'])
 @jwt_required()
 def get_detection_logs():
-    """Get detection history with pagination."""
+    """
+    Get detection history with pagination.
+    
+    Pass `cursor` (empty for the first page) to use keyset pagination on
+    (detected_at, id); see app.utils.pagination.keyset_args.
+    """
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        keyset = keyset_args(default_limit=per_page)
         status = request.args.get('status', None)
         
         query = DetectionLog.query
@@ -102,14 +112,19 @@ def get_detection_logs():
             query = query.filter_by(status=status)
         
         # Paginate
-        pagination = query.order_by(DetectionLog.detected_at.desc()).paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        if keyset:
+            result = keyset_paginate(query, DetectionLog.detected_at, DetectionLog.id, **keyset)
+            logs = result['items']
+        else:
+            pagination = query.order_by(DetectionLog.detected_at.desc()).paginate(
+                page=page,
+                per_page=per_page,
+                error_out=False
+            )
+            logs = pagination.items
         
         detections = []
-        for log in pagination.items:
+        for log in logs:
             criminal = Criminal.query.get(log.criminal_id)
             detections.append({
                 'id': log.id,
@@ -124,6 +139,14 @@ def get_detection_logs():
                 'notes': log.notes
             })
         
+        if keyset:
+            return jsonify({
+                'detections': detections,
+                'total': result['total'],
+                'next_cursor': result['next_cursor'],
+                'has_more': result['has_more']
+            }), 200
+        
         return jsonify({
             'detections': detections,
             'total': pagination.total,
@@ -131,6 +154,8 @@ def get_detection_logs():
             'current_page': page
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Failed to get logs: {str(e)}'}), 500
 
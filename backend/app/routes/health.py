@@ -0,0 +1,45 @@
+"""Liveness and readiness probes."""
+
+from flask import Blueprint, current_app, jsonify
+from sqlalchemy import text
+from app import db, limiter
+from app.services.face_service_deepface import face_service_deepface
+
+bp = Blueprint('health', __name__)
+
+
+@bp.route('/live', methods=['GET'])
+@limiter.exempt
+def live():
+    """The process is up and serving requests."""
+    return jsonify({'status': 'ok'}), 200
+
+
+@bp.route('/ready', methods=['GET'])
+@limiter.exempt
+def ready():
+    """
+    Ready for traffic: database reachable and, when the server warms the
+    face model at startup (FACE_MODEL_WARMUP), the model loaded.
+    
+    Returns 503 until then so load balancers hold vision traffic back.
+    A failed model load is retried in the background once its backoff
+    has passed.
+    """
+    try:
+        db.session.execute(text('SELECT 1'))
+        database = 'ok'
+    except Exception as e:
+        database = f'error: {str(e)}'
+    
+    model_required = current_app.config.get('FACE_MODEL_WARMUP', True)
+    if model_required:
+        face_service_deepface.retry_failed_warm_up()
+    face_model = face_service_deepface.status
+    is_ready = database == 'ok' and (face_model['state'] == 'ready' or not model_required)
+    
+    return jsonify({
+        'status': 'ready' if is_ready else 'not_ready',
+        'database': database,
+        'face_model': face_model
+    }), 200 if is_ready else 503
@@ -3,10 +3,13 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
-from sqlalchemy import or_, and_
+from sqlalchemy import and_, delete, or_, update
 from app import db
 from app.models.alert import Alert
+from app.models.notification_counter import NotificationCounter
 from app.models.user import User
+from app.services.alert_templates import render_alert
+from app.utils.pagination import InvalidCursor, keyset_args, keyset_paginate
 
 bp = Blueprint('notifications', __name__)
 
@@ -22,6 +25,9 @@ def get_notifications():
         - limit: int (default: 50)
         - severity: info/warning/critical
         - category: detection/criminal_mgmt/system/operational
+        - cursor: opt into keyset pagination on (sent_at, id); empty for
+          the first page. Counts are then only computed when requested
+          with count=exact|estimate, and unread_count only on the first page.
     """
     try:
         current_user_id = int(get_jwt_identity())
@@ -45,17 +51,39 @@ def get_notifications():
         if category:
             query = query.filter(Alert.category == category)
         
+        keyset = keyset_args(default_limit=limit)
+        if keyset:
+            result = keyset_paginate(query, Alert.sent_at, Alert.id, **keyset)
+            response = {
+                'notifications': [a.to_dict() for a in result['items']],
+                'total': result['total'],
+                'next_cursor': result['next_cursor'],
+                'has_more': result['has_more']
+            }
+            if not keyset['cursor']:
+                response['unread_count'] = NotificationCounter.totals()[1]
+            return jsonify(response), 200
+        
         # Get alerts, newest first
         alerts = query.order_by(
             Alert.sent_at.desc()
         ).limit(limit).all()
         
+        # Unfiltered totals come from the counters instead of COUNT scans
+        total, unread_count = NotificationCounter.totals()
+        if severity or category:
+            total = query.count()
+        elif unread_only:
+            total = unread_count
+        
         return jsonify({
             'notifications': [a.to_dict() for a in alerts],
-            'total': query.count(),
-            'unread_count': Alert.query.filter(Alert.acknowledged == False).count()
+            'total': total,
+            'unread_count': unread_count
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Failed to get notifications: {str(e)}'}), 500
 
@@ -67,15 +95,8 @@ def get_unread_count():
     try:
         current_user_id = int(get_jwt_identity())
         
-        count = Alert.query.filter(
-            Alert.delivery_method == 'in_app',
-            Alert.acknowledged == False
-            # Note: user_id column not in DB yet
-            # or_(
-            #     Alert.user_id == current_user_id,
-            #     Alert.user_id.is_(None)
-            # )
-        ).count()
+        # Own plus broadcast notifications, read from two counter rows
+        count = NotificationCounter.unread_in_app_for(current_user_id)
         
         return jsonify({'unread_count': count}), 200
         
@@ -83,6 +104,25 @@ def get_unread_count():
         return jsonify({'message': f'Failed to get count: {str(e)}'}), 500
 
 
+@bp.route('/<int:notification_id>/render', methods=['GET'])
+@jwt_required()
+def render_notification(notification_id):
+    """Render a notification's full email body on demand."""
+    try:
+        notification = db.session.get(Alert, notification_id)
+        if not notification:
+            return jsonify({'message': 'Notification not found'}), 404
+        
+        return jsonify({
+            'id': notification.id,
+            'subject': notification.subject,
+            'html': render_alert(notification)
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'message': f'Failed to render notification: {str(e)}'}), 500
+
+
 @bp.route('/<int:notification_id>/mark-read', methods=['PUT'])
 @jwt_required()
 def mark_as_read(notification_id):
@@ -102,7 +142,9 @@ def mark_as_read(notification_id):
         notification.acknowledged = True
         notification.acknowledged_by = current_user_id
         notification.acknowledged_at = datetime.utcnow()
-        notification.status = 'read'
+        # Reading an outbound alert must not pull it out of the outbox
+        if notification.status not in ('pending', 'sending'):
+            notification.status = 'read'
         
         db.session.commit()
         
@@ -123,8 +165,7 @@ def mark_all_as_read():
     try:
         current_user_id = int(get_jwt_identity())
         
-        # Update all unread notifications
-        Alert.query.filter(
+        unread = (
             Alert.delivery_method == 'in_app',
             Alert.acknowledged == False
             # Note: user_id column not in DB yet
@@ -132,12 +173,24 @@ def mark_all_as_read():
             #     Alert.user_id == current_user_id,
             #     Alert.user_id.is_(None)
             # )
-        ).update({
-            'acknowledged': True,
-            'acknowledged_by': current_user_id,
-            'acknowledged_at': datetime.utcnow(),
-            'status': 'read'
-        }, synchronize_session=False)
+        )
+        
+        # Update all unread notifications; the bulk UPDATE bypasses the
+        # ORM hooks, so the returned rows adjust the counters
+        marked = db.session.execute(
+            update(Alert).where(*unread).values(
+                acknowledged=True,
+                acknowledged_by=current_user_id,
+                acknowledged_at=datetime.utcnow(),
+                status='read'
+            ).returning(Alert.user_id, Alert.delivery_method).execution_options(synchronize_session=False)
+        ).all()
+        NotificationCounter.apply_alerts(
+            db.session.connection(),
+            ((user_id, delivery_method, False) for user_id, delivery_method in marked),
+            sign=-1,
+            columns=('unread', 'unread_in_app')
+        )
         
         db.session.commit()
         
@@ -182,8 +235,7 @@ def clear_old_notifications():
         current_user_id = int(get_jwt_identity())
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
         
-        # Delete old acknowledged notifications
-        Alert.query.filter(
+        old = (
             Alert.delivery_method == 'in_app',
             Alert.acknowledged == True,
             Alert.created_at < thirty_days_ago
@@ -192,7 +244,16 @@ def clear_old_notifications():
             #     Alert.user_id == current_user_id,
             #     Alert.user_id.is_(None)
             # )
-        ).delete(synchronize_session=False)
+        )
+        
+        # Delete old acknowledged notifications; the bulk DELETE bypasses
+        # the ORM hooks, so the returned rows adjust the counters
+        deleted = db.session.execute(
+            delete(Alert).where(*old).returning(
+                Alert.user_id, Alert.delivery_method, Alert.acknowledged
+            ).execution_options(synchronize_session=False)
+        ).all()
+        NotificationCounter.apply_alerts(db.session.connection(), deleted, sign=-1)
         
         db.session.commit()
         
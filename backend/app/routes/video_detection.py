@@ -6,10 +6,13 @@ from werkzeug.utils import secure_filename
 import os
 import json
 import logging
+from sqlalchemy.orm import selectinload
 
 from app import db
 from app.models.video_detection import VideoDetection, VideoFrameDetection
+from app.services.analytics_service import AnalyticsService, VIDEO_STATUSES, parse_percentiles
 from app.services.video_processing_service import video_processing_service
+from app.utils.pagination import InvalidCursor, keyset_args, keyset_paginate
 
 logger = logging.getLogger(__name__)
 
@@ -155,9 +158,11 @@ def list_videos():
     Query Parameters:
         - limit: Number of videos to return (default: 20)
         - status: Filter by processing status (pending/processing/completed/failed)
+        - cursor: Opt into keyset pagination on (upload_date, id); empty for the first page
     
     Response:
         - videos: List of video detection records
+        - next_cursor, has_more: In keyset mode
     """
     try:
         limit = request.args.get('limit', 20, type=int)
@@ -168,16 +173,30 @@ def list_videos():
         if status_filter:
             query = query.filter_by(processing_status=status_filter)
         
+        keyset = keyset_args(default_limit=limit)
+        if keyset:
+            result = keyset_paginate(query, VideoDetection.upload_date, VideoDetection.id, **keyset)
+            return jsonify({
+                'success': True,
+                'videos': VideoDetection.serialize_many(result['items']),
+                'count': len(result['items']),
+                'total': result['total'],
+                'next_cursor': result['next_cursor'],
+                'has_more': result['has_more']
+            }), 200
+        
         videos = query.order_by(
             VideoDetection.upload_date.desc()
         ).limit(limit).all()
         
         return jsonify({
             'success': True,
-            'videos': [v.to_dict() for v in videos],
+            'videos': VideoDetection.serialize_many(videos),
             'count': len(videos)
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         logger.error(f"Failed to list videos: {str(e)}")
         return jsonify({'message': f'Failed to list videos: {str(e)}'}), 500
@@ -196,7 +215,9 @@ def get_video_details(video_id):
         - video: Complete video detection data including frame detections
     """
     try:
-        video = VideoDetection.query.get(video_id)
+        video = VideoDetection.query.options(
+            selectinload(VideoDetection.frame_detections)
+        ).get(video_id)
         if not video:
             return jsonify({'message': 'Video not found'}), 404
         
@@ -241,7 +262,9 @@ def get_video_frames(video_id):
         
         matched_only = request.args.get('matched_only', 'false').lower() == 'true'
         
-        query = VideoFrameDetection.query.filter_by(video_detection_id=video_id)
+        query = VideoFrameDetection.query.options(
+            selectinload(VideoFrameDetection.criminal)
+        ).filter_by(video_detection_id=video_id)
         
         if matched_only:
             query = query.filter(VideoFrameDetection.criminal_id.isnot(None))
@@ -312,38 +335,43 @@ def get_video_stats():
     """
     Get statistics about video processing.
     
+    Query params:
+        - percentiles: optional comma-separated processing-time
+          percentiles, e.g. "50,95" (empty selects p50 and p95)
+    
     Response:
         - total_videos: Total number of videos
         - videos_by_status: Count by processing status
         - total_faces_detected: Sum of all faces detected
         - total_criminals_matched: Sum of unique criminals matched
+        - processing_time_percentiles: Only when percentiles is given
     """
     try:
-        total_videos = VideoDetection.query.count()
-        
-        pending = VideoDetection.query.filter_by(processing_status='pending').count()
-        processing = VideoDetection.query.filter_by(processing_status='processing').count()
-        completed = VideoDetection.query.filter_by(processing_status='completed').count()
-        failed = VideoDetection.query.filter_by(processing_status='failed').count()
-        
-        # Sum statistics from completed videos
-        completed_videos = VideoDetection.query.filter_by(processing_status='completed').all()
-        total_faces = sum(v.total_faces_detected or 0 for v in completed_videos)
-        total_criminals = sum(v.unique_criminals_matched or 0 for v in completed_videos)
+        percentiles = None
+        if 'percentiles' in request.args:
+            percentiles = parse_percentiles(request.args.get('percentiles'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    try:
+        summary = AnalyticsService.get_video_status_summary()
+        completed = summary['completed']
+        
+        stats = {
+            'total_videos': sum(totals['count'] for totals in summary.values()),
+            'videos_by_status': {
+                status: summary[status]['count']
+                for status in VIDEO_STATUSES
+            },
+            'total_faces_detected': completed['faces_detected'],
+            'total_criminals_matched': completed['criminals_matched']
+        }
+        if percentiles:
+            stats['processing_time_percentiles'] = AnalyticsService.get_processing_time_percentiles(percentiles)
         
         return jsonify({
             'success': True,
-            'stats': {
-                'total_videos': total_videos,
-                'videos_by_status': {
-                    'pending': pending,
-                    'processing': processing,
-                    'completed': completed,
-                    'failed': failed
-                },
-                'total_faces_detected': total_faces,
-                'total_criminals_matched': total_criminals
-            }
+            'stats': stats
         }), 200
         
     except Exception as e:
@@ -0,0 +1,143 @@
+"""Coalesce repeated detection alerts into per-camera digests.
+
+Live detection can match the same criminal at the same camera many times
+a second. The first match sends an alert right away; further matches for
+the same (criminal, camera/location) within ALERT_COALESCE_WINDOW_SECONDS
+are folded into one digest alert, delivered when the window closes, with
+hit counts, first/last seen and peak confidence.
+"""
+
+from datetime import datetime, timedelta
+import logging
+
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.alert import Alert
+from app.services.alert_templates import template_fields
+
+logger = logging.getLogger(__name__)
+
+
+def coalesce_key(criminal_id, camera_id=None, location=None):
+    """Build the coalescing key for a criminal seen at a camera or location."""
+    return f'detection:{criminal_id}:{camera_id or location or "unknown"}'
+
+
+def _lock_open_digest(key):
+    """
+    Lock and return the open digest for `key`, or None.
+    
+    The lock is taken with an UPDATE rather than SELECT ... FOR UPDATE,
+    which SQLite ignores: it locks the row on PostgreSQL and takes the
+    database write lock on SQLite, so concurrent hits fold in one at a time.
+    """
+    criteria = Alert.open_digest_criteria(key)
+    locked = db.session.execute(
+        update(Alert).where(*criteria).values(coalesce_key=Alert.coalesce_key).execution_options(
+            synchronize_session=False
+        )
+    ).rowcount
+    if not locked:
+        return None
+    return Alert.query.filter(*criteria).populate_existing().one()
+
+
+def _fold_hit(digest, detection_log, confidence, seen_at, now):
+    """Add a hit to a digest's parameters."""
+    # Copy rather than mutate so the JSON column is marked dirty
+    params = dict((digest.data or {}).get('params') or {})
+    params['hit_count'] = params.get('hit_count', 0) + 1
+    params['last_seen'] = max(params.get('last_seen') or seen_at, seen_at)
+    params['first_seen'] = min(params.get('first_seen') or seen_at, seen_at)
+    params['peak_confidence'] = max(params.get('peak_confidence') or 0, confidence)
+    params['last_detection_log_id'] = detection_log.id
+    params['generated_at'] = now.isoformat()
+    return params
+
+
+def _digest_fields(params):
+    """Rendered data, subject and message of a digest."""
+    fields = template_fields('detection_digest', params)
+    return {'data': fields['data'], 'subject': fields['subject'], 'message': fields['message']}
+
+
+def coalesce_detection(criminal, detection_log, confidence, recipient_email):
+    """
+    Fold a detection into a pending digest if an alert was sent recently.
+    
+    Args:
+        criminal: Criminal model instance
+        detection_log: DetectionLog model instance
+        confidence: Confidence score (0-1)
+        recipient_email: Digest recipient
+    
+    Returns:
+        Tuple of (suppressed, key). When suppressed is False the caller
+        should send a normal alert tagged with `key`.
+    """
+    key = coalesce_key(criminal.id, detection_log.camera_id, detection_log.location)
+    window = current_app.config.get('ALERT_COALESCE_WINDOW_SECONDS', 0)
+    if not window:
+        return False, key
+    
+    now = datetime.utcnow()
+    opened = db.session.query(Alert.created_at).filter(
+        Alert.coalesce_key == key,
+        Alert.alert_type == 'criminal_detected',
+        Alert.created_at >= now - timedelta(seconds=window)
+    ).order_by(Alert.created_at.desc()).first()
+    if opened is None:
+        return False, key
+    
+    seen_at = (detection_log.detected_at or now).isoformat()
+    digest = _lock_open_digest(key)
+    
+    if digest is None:
+        params = {
+            'criminal_id': criminal.id,
+            'criminal_name': criminal.name,
+            'crime_type': criminal.crime_type,
+            'camera_id': detection_log.camera_id,
+            'location': detection_log.location,
+            'where': detection_log.camera_id or detection_log.location or 'unknown location',
+            'hit_count': 1,
+            'first_seen': seen_at,
+            'last_seen': seen_at,
+            'peak_confidence': confidence,
+            'last_detection_log_id': detection_log.id,
+            'generated_at': now.isoformat()
+        }
+        digest = Alert(
+            alert_type='detection_digest',
+            severity='critical',
+            category='detection',
+            priority=5,
+            criminal_id=criminal.id,
+            detection_log_id=detection_log.id,
+            recipient_email=recipient_email,
+            delivery_method='email',
+            status='pending',
+            retry_count=0,
+            coalesce_key=key,
+            # Delivered by the dispatcher when the suppression window closes
+            next_attempt_at=opened.created_at + timedelta(seconds=window),
+            **_digest_fields(params)
+        )
+        try:
+            with db.session.begin_nested():
+                db.session.add(digest)
+        except IntegrityError:
+            # Another detection opened the digest first (unique open-digest key)
+            digest = _lock_open_digest(key)
+            params = _fold_hit(digest, detection_log, confidence, seen_at, now)
+    else:
+        params = _fold_hit(digest, detection_log, confidence, seen_at, now)
+    
+    for name, value in _digest_fields(params).items():
+        setattr(digest, name, value)
+    
+    logger.info(f"Detection {detection_log.id} coalesced into digest for {key} ({params['hit_count']} hit(s))")
+    return True, key
@@ -0,0 +1,382 @@
+"""Outbox dispatcher for outbound email and SMS alerts.
+
+Alerts are written to the ``alerts`` table as ``pending`` in the same
+transaction as the detection that caused them. The dispatcher delivers
+them afterwards, from a background thread or the ``flask dispatch-alerts``
+command, so request latency never includes a round trip to a mail or SMS
+provider.
+"""
+
+import json
+import logging
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, update
+
+from app import db
+from app.models.alert import Alert
+from app.services.alert_templates import render_alert
+from app.services.event_bus import event_bus
+from app.services.mail_transport import mail_transport
+from app.services.sms_service import sms_engine
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryError(Exception):
+    """Raised by a sink when an alert could not be delivered."""
+    
+    def __init__(self, message, permanent=False):
+        super().__init__(message)
+        # Permanent failures (e.g. no recipient) are not retried
+        self.permanent = permanent
+
+
+class SMTPSink:
+    """Deliver email alerts through the shared pooled mail transport."""
+    
+    channel = 'email'
+    # Alerts with the same subject and body go out as one message
+    batchable = True
+    
+    def __init__(self, transport):
+        self.transport = transport
+    
+    @property
+    def configured(self):
+        return self.transport.configured
+    
+    def send_batch(self, alerts):
+        """
+        Send one message to every recipient in `alerts`.
+        
+        Returns:
+            Dictionary of alert id -> exception for alerts not delivered
+        """
+        errors, deliverable = _split_missing_recipients(alerts, 'recipient_email')
+        if not deliverable:
+            return errors
+        
+        first = deliverable[0]
+        subject = first.subject or first.title or 'Crime Detection System Alert'
+        try:
+            refused = self.transport.send(subject, render_alert(first), [a.recipient_email for a in deliverable])
+        except smtplib.SMTPRecipientsRefused as e:
+            refused = e.recipients
+        except Exception as e:
+            errors.update((alert.id, e) for alert in deliverable)
+            return errors
+        
+        for alert in deliverable:
+            if alert.recipient_email in refused:
+                code, reply = refused[alert.recipient_email]
+                if isinstance(reply, bytes):
+                    reply = reply.decode(errors='replace')
+                # 5xx replies are permanent; 4xx may succeed later
+                errors[alert.id] = DeliveryError(f'Recipient refused: {code} {reply}', permanent=code >= 500)
+        return errors
+
+
+class SMSSink:
+    """Deliver SMS alerts concurrently through the SMS engine."""
+    
+    channel = 'sms'
+    # Identical texts to an on-call list are sent in parallel as one batch
+    batchable = True
+    
+    def __init__(self, config, engine):
+        self.enabled = config.get('ENABLE_SMS_ALERTS', False)
+        self.engine = engine
+    
+    @property
+    def configured(self):
+        return self.enabled
+    
+    def send_batch(self, alerts):
+        errors, deliverable = _split_missing_recipients(alerts, 'recipient_phone')
+        # Keyed by alert id so an alert this process delivered is not resent
+        results = self.engine.send_many(
+            (alert.recipient_phone, alert.message, f'alert:{alert.id}') for alert in deliverable
+        )
+        for alert, result in zip(deliverable, results):
+            if not result.get('success'):
+                # Not retryable: rejected, or possibly delivered already
+                errors[alert.id] = DeliveryError(result.get('error') or 'SMS delivery failed',
+                                                 permanent=not result.get('retryable', True))
+        return errors
+
+
+class MemorySink:
+    """
+    Record alerts in memory instead of delivering them.
+    
+    Used by the test suite and for local development without SMTP or
+    Twilio credentials. Set ``failures`` to make the next sends fail.
+    """
+    
+    configured = True
+    
+    def __init__(self, channel):
+        self.channel = channel
+        self.batchable = True
+        self.sent = []
+        self.failures = 0
+    
+    def send_batch(self, alerts):
+        field = 'recipient_email' if self.channel == 'email' else 'recipient_phone'
+        errors, deliverable = _split_missing_recipients(alerts, field)
+        if not deliverable:
+            return errors
+        if self.failures:
+            self.failures -= 1
+            error = DeliveryError('Simulated delivery failure')
+            errors.update((alert.id, error) for alert in deliverable)
+            return errors
+        self.sent.append({
+            'alert_ids': [alert.id for alert in deliverable],
+            'recipients': [getattr(alert, field) for alert in deliverable],
+            'subject': deliverable[0].subject,
+            'message': deliverable[0].message,
+            'html': render_alert(deliverable[0])
+        })
+        return errors
+    
+    def clear(self):
+        self.sent = []
+        self.failures = 0
+
+
+def _split_missing_recipients(alerts, field):
+    """Separate alerts lacking a recipient, which can never be delivered."""
+    errors = {}
+    deliverable = []
+    for alert in alerts:
+        if getattr(alert, field):
+            deliverable.append(alert)
+        else:
+            errors[alert.id] = DeliveryError(f'Alert has no {field.replace("_", " ")}', permanent=True)
+    return errors, deliverable
+
+
+def build_sinks(config):
+    """Create the delivery sink for each outbound channel."""
+    if config.get('ALERT_SINK', 'smtp') == 'memory':
+        return {'email': MemorySink('email'), 'sms': MemorySink('sms')}
+    return {'email': SMTPSink(mail_transport), 'sms': SMSSink(config, sms_engine)}
+
+
+class AlertDispatcher:
+    """Deliver pending outbound alerts with retries and exponential backoff."""
+    
+    def __init__(self):
+        self.app = None
+        self.sinks = {}
+        self.max_retries = 5
+        self.retry_base_seconds = 30
+        self.retry_max_seconds = 3600
+        self.lease_seconds = 300
+        self.batch_size = 50
+        self.interval = 5
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._listening = False
+    
+    def init_app(self, app):
+        """
+        Configure sinks from the app config.
+        
+        Does not start the background thread: every process that builds the
+        app (including each `flask` CLI command) calls this, but only server
+        processes should dispatch. Servers call start_alert_dispatcher().
+        """
+        self.app = app
+        self.sinks = build_sinks(app.config)
+        self.max_retries = app.config.get('ALERT_MAX_RETRIES', 5)
+        self.retry_base_seconds = app.config.get('ALERT_RETRY_BASE_SECONDS', 30)
+        self.retry_max_seconds = app.config.get('ALERT_RETRY_MAX_SECONDS', 3600)
+        self.lease_seconds = app.config.get('ALERT_DISPATCH_LEASE_SECONDS', 300)
+        self.batch_size = app.config.get('ALERT_DISPATCH_BATCH_SIZE', 50)
+        self.interval = app.config.get('ALERT_DISPATCH_INTERVAL_SECONDS', 5)
+        
+        if not self._listening:
+            event_bus.add_listener(self._on_event)
+            self._listening = True
+    
+    def channel_ready(self, channel):
+        """Check whether alerts for `channel` can be delivered."""
+        sink = self.sinks.get(channel)
+        return bool(sink and sink.configured)
+    
+    def backoff(self, retry_count):
+        """Delay before retry number `retry_count` (1-based)."""
+        return min(self.retry_base_seconds * 2 ** (retry_count - 1), self.retry_max_seconds)
+    
+    def _due(self, now):
+        return or_(
+            and_(Alert.status == 'pending', or_(Alert.next_attempt_at.is_(None), Alert.next_attempt_at <= now)),
+            # A dispatcher that died mid-send leaves its lease to expire
+            and_(Alert.status == 'sending', Alert.next_attempt_at <= now)
+        )
+    
+    def _claim(self, alert_id, now):
+        """Atomically lease one alert; False if another dispatcher got it."""
+        result = db.session.execute(
+            update(Alert).where(
+                Alert.id == alert_id,
+                self._due(now)
+            ).values(
+                status='sending',
+                next_attempt_at=now + timedelta(seconds=self.lease_seconds)
+            )
+        )
+        db.session.commit()
+        return result.rowcount == 1
+    
+    def dispatch_pending(self, limit=None):
+        """
+        Deliver one batch of due alerts.
+        
+        Must be called inside an application context.
+        
+        Args:
+            limit: Maximum alerts to attempt (defaults to the batch size)
+        
+        Returns:
+            Dictionary with sent, retried and failed counts
+        """
+        counts = {'sent': 0, 'retried': 0, 'failed': 0}
+        now = datetime.utcnow()
+        
+        due_ids = [alert_id for (alert_id,) in db.session.query(Alert.id).filter(
+            Alert.delivery_method.in_(list(self.sinks)),
+            self._due(now)
+        ).order_by(
+            Alert.priority.desc(),
+            Alert.id
+        ).limit(limit or self.batch_size).all()]
+        
+        claimed = [alert_id for alert_id in due_ids if self._claim(alert_id, now)]
+        if not claimed:
+            return counts
+        alerts = Alert.query.filter(Alert.id.in_(claimed)).order_by(Alert.priority.desc(), Alert.id).all()
+        
+        # Identical emails to several recipients are sent as one message
+        groups = {}
+        for alert in alerts:
+            sink = self.sinks[alert.delivery_method]
+            if sink.batchable:
+                body = json.dumps(alert.data, sort_keys=True, default=str)
+                key = (alert.delivery_method, alert.subject, alert.message, body)
+            else:
+                key = (alert.delivery_method, alert.id)
+            groups.setdefault(key, []).append(alert)
+        
+        for key, group in groups.items():
+            try:
+                errors = self.sinks[key[0]].send_batch(group)
+            except Exception as e:
+                errors = {alert.id: e for alert in group}
+            for alert in group:
+                counts[self._record(alert, errors.get(alert.id))] += 1
+            db.session.commit()
+        
+        return counts
+    
+    def _record(self, alert, error):
+        """Update an alert after a delivery attempt and return the outcome."""
+        if error is None:
+            alert.status = 'sent'
+            alert.last_error = None
+            alert.next_attempt_at = None
+            return 'sent'
+        
+        alert.retry_count = (alert.retry_count or 0) + 1
+        alert.last_error = str(error)[:500]
+        permanent = isinstance(error, DeliveryError) and error.permanent
+        if permanent or alert.retry_count >= self.max_retries:
+            alert.status = 'failed'
+            alert.next_attempt_at = None
+            logger.error(f"Alert {alert.id} failed after {alert.retry_count} attempt(s): {str(error)}")
+            return 'failed'
+        
+        alert.status = 'pending'
+        alert.next_attempt_at = datetime.utcnow() + timedelta(seconds=self.backoff(alert.retry_count))
+        logger.warning(f"Alert {alert.id} delivery failed, retry {alert.retry_count} scheduled: {str(error)}")
+        return 'retried'
+    
+    def run(self, once=False):
+        """
+        Dispatch alerts until stopped.
+        
+        Args:
+            once: Deliver a single batch and return its counts
+        """
+        while not self._stop.is_set():
+            self._wake.clear()
+            counts = None
+            try:
+                with self.app.app_context():
+                    counts = self.dispatch_pending()
+            except Exception as e:
+                logger.error(f"Alert dispatch failed: {str(e)}")
+                with self.app.app_context():
+                    db.session.rollback()
+            
+            if once:
+                return counts
+            # A full batch means more may be due; otherwise sleep until woken
+            if not counts or sum(counts.values()) < self.batch_size:
+                self._wake.wait(self.interval)
+    
+    def start(self):
+        """Start the background dispatcher thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        # Wake up for alerts committed by other processes too
+        event_bus.start_relay()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='alert-dispatcher', daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout=5):
+        """Stop the background dispatcher thread."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self._stop.clear()
+    
+    def wake(self):
+        """Ask the dispatcher to check for due alerts now."""
+        self._wake.set()
+    
+    def _on_event(self, evt):
+        # New outbound alerts are published once their transaction commits
+        data = evt.get('data') or {}
+        if evt['category'] == 'alert' and evt['type'] == 'created' and data.get('delivery_method') in self.sinks:
+            self.wake()
+
+
+alert_dispatcher = AlertDispatcher()
+
+
+def queue_alert(**fields):
+    """
+    Add a pending outbound alert to the current session.
+    
+    The alert is delivered by the dispatcher once the caller's
+    transaction commits; nothing is sent synchronously.
+    
+    Args:
+        **fields: Alert column values (delivery_method, recipient, ...)
+    
+    Returns:
+        The new Alert
+    """
+    fields.setdefault('retry_count', 0)
+    alert = Alert(status='pending', **fields)
+    db.session.add(alert)
+    return alert
@@ -0,0 +1,436 @@
+"""Precompiled HTML templates for alert emails.
+
+Alerts store a template id and compact parameters in ``Alert.data``
+(``{'template': ..., 'params': {...}}``) instead of rendered HTML. The
+body is rendered from the shared layout fragments below when the alert
+is delivered or viewed.
+"""
+
+from datetime import datetime, timedelta
+from html import escape
+from string import Template
+
+IST_OFFSET = timedelta(hours=5, minutes=30)
+
+# Shared layout fragments, compiled once at import time
+LAYOUT = Template("""<html>
+<body style="font-family: Arial, sans-serif;">
+    <div style="background-color: $banner_color; color: $banner_text; padding: 20px; text-align: center;">
+        <h1>$heading</h1>$subheading
+    </div>
+    <div style="padding: 20px;">$content
+    </div>
+    <div style="background-color: #f5f5f5; padding: 20px; text-align: center; font-size: 12px; color: #666;">
+        <p>This is an automated alert from Crime Detection System</p>
+        <p>Generated at $generated_at</p>
+    </div>
+</body>
+</html>""")
+SUBHEADING = Template("""
+        <p style="font-size: 18px; margin: 10px 0;">$text</p>""")
+PARAGRAPH = Template("""
+        <p>$text</p>""")
+SECTION = Template("""
+        <h2 style="margin-top: 30px;">$title</h2>
+        <table style="border-collapse: collapse; width: 100%;">$rows
+        </table>""")
+ROW = Template("""
+            <tr>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>$label:</strong></td>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd;$style">$value</td>
+            </tr>""")
+CHANGE_ROW = Template("""
+            <tr>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd; width: 25%;"><strong>$label:</strong></td>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd; width: 35%; color: #dc3545; text-decoration: line-through;">$old</td>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd; width: 5%; text-align: center;">→</td>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd; width: 35%; color: #28a745; font-weight: bold;">$new</td>
+            </tr>""")
+VIDEO_CRIMINAL_ROW = Template("""
+            <tr style="border-bottom: 2px solid #f44336;">
+                <td style="padding: 15px; background-color: #ffebee;">
+                    <strong style="font-size: 16px;">$name</strong><br/>
+                    <span style="color: #666;">Crime: $crime_type</span><br/>
+                    <span style="color: #666;">Status: $status</span>
+                </td>
+                <td style="padding: 15px; text-align: center; background-color: #ffebee;">
+                    <strong style="font-size: 18px; color: #d32f2f;">$confidence</strong><br/>
+                    <span style="font-size: 12px; color: #666;">Max Confidence</span>
+                </td>
+                <td style="padding: 15px; text-align: center; background-color: #ffebee;">
+                    <strong style="font-size: 18px;">$frame_count</strong><br/>
+                    <span style="font-size: 12px; color: #666;">Frames</span>
+                </td>
+                <td style="padding: 15px; text-align: center; background-color: #ffebee;">
+                    <strong>${first_timestamp}s</strong><br/>
+                    <span style="font-size: 12px; color: #666;">First Seen</span>
+                </td>
+            </tr>""")
+VIDEO_CRIMINALS_TABLE = Template("""
+        <h2 style="margin-top: 30px;">🚨 Detected Criminals</h2>
+        <table style="border-collapse: collapse; width: 100%; margin-top: 10px;">
+            <thead>
+                <tr style="background-color: #f44336; color: white;">
+                    <th style="padding: 12px; text-align: left;">Criminal Details</th>
+                    <th style="padding: 12px; text-align: center;">Confidence</th>
+                    <th style="padding: 12px; text-align: center;">Detections</th>
+                    <th style="padding: 12px; text-align: center;">First Seen</th>
+                </tr>
+            </thead>
+            <tbody>$rows
+            </tbody>
+        </table>""")
+NOTICE = Template("""
+        <div style="margin-top: 30px; padding: 15px; background-color: $background; border-left: 4px solid $border;">
+            <strong>$title</strong> $body
+        </div>""")
+
+UPPERCASE = ' text-transform: uppercase;'
+
+
+class AlertTemplate:
+    """A registered alert template."""
+    
+    def __init__(self, template_id, subject, summary, build):
+        self.id = template_id
+        self.subject = Template(subject)
+        self.summary = Template(summary)
+        self.build = build
+
+
+_templates = {}
+
+
+def register(template_id, subject, summary):
+    """
+    Register a template body builder.
+    
+    Args:
+        template_id: Id stored in ``Alert.data['template']``
+        subject: string.Template for the email subject
+        summary: string.Template for the short plain-text ``Alert.message``
+    """
+    def decorator(build):
+        _templates[template_id] = AlertTemplate(template_id, subject, summary, build)
+        return build
+    return decorator
+
+
+def get_template(template_id):
+    """Get a registered template, raising KeyError if unknown."""
+    return _templates[template_id]
+
+
+def template_ids():
+    return sorted(_templates)
+
+
+def _text(params):
+    """Stringify parameters for the plain-text subject and summary."""
+    return {key: '' if value is None else value for key, value in params.items()}
+
+
+def render_subject(template_id, params):
+    return get_template(template_id).subject.safe_substitute(_text(params))
+
+
+def render_summary(template_id, params):
+    return get_template(template_id).summary.safe_substitute(_text(params))
+
+
+def render_html(template_id, params):
+    """Render the full HTML body for a template."""
+    return get_template(template_id).build(params)
+
+
+def render_alert(alert):
+    """
+    Render an alert's email body.
+    
+    Alerts stored before templates existed keep their HTML in ``message``.
+    """
+    data = alert.data or {}
+    if data.get('template') in _templates:
+        return render_html(data['template'], data.get('params') or {})
+    return alert.message
+
+
+def template_fields(template_id, params):
+    """
+    Build the Alert column values for a templated alert.
+    
+    Returns:
+        Dictionary with subject, message (short summary) and data
+    """
+    return {
+        'subject': render_subject(template_id, params),
+        'message': render_summary(template_id, params),
+        'data': {'template': template_id, 'params': params}
+    }
+
+
+# Fragment helpers; every parameter value is HTML-escaped
+
+def _row(label, value, uppercase=False, default='N/A'):
+    value = default if value in (None, '') else value
+    return ROW.substitute(label=escape(label), value=escape(str(value)), style=UPPERCASE if uppercase else '')
+
+
+def _section(title, rows):
+    return SECTION.substitute(title=escape(title), rows=''.join(rows))
+
+
+def _notice(title, body, background, border):
+    return NOTICE.substitute(title=title, body=body, background=background, border=border)
+
+
+def _list(items):
+    return '<ul style="margin: 10px 0 0 20px;">' + ''.join(f'<li>{item}</li>' for item in items) + '</ul>'
+
+
+def _layout(params, heading, content, banner_color, banner_text='white', subheading=None, ist=False):
+    return LAYOUT.substitute(
+        banner_color=banner_color,
+        banner_text=banner_text,
+        heading=heading,
+        subheading=SUBHEADING.substitute(text=escape(subheading)) if subheading else '',
+        content=''.join(content),
+        generated_at=format_time(params.get('generated_at'), ist=ist)
+    )
+
+
+def format_time(value, ist=False):
+    """Format an ISO timestamp parameter for display."""
+    if not value:
+        return 'N/A'
+    moment = datetime.fromisoformat(value)
+    if ist:
+        return (moment + IST_OFFSET).strftime('%Y-%m-%d %H:%M:%S') + ' IST'
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _percent(value, digits=2):
+    return f'{(value or 0) * 100:.{digits}f}%'
+
+
+@register(
+    'criminal_detected',
+    subject='🚨 ALERT: Criminal Detected - $name',
+    summary='Criminal detected: $name at $where (confidence $confidence_text)'
+)
+def _criminal_detected(p):
+    content = [
+        _section('Criminal Information', [
+            _row('Name', p['name']),
+            _row('Crime Type', p.get('crime_type')),
+            _row('Status', (p.get('status') or '').upper()),
+            _row('Danger Level', (p.get('danger_level') or '').upper()),
+            _row('Confidence Score', _percent(p.get('confidence'))),
+        ]),
+        _section('Detection Details', [
+            _row('Time (IST)', format_time(p.get('detected_at'), ist=True)[:-4]),
+            _row('Location', p.get('location')),
+            _row('Camera ID', p.get('camera_id')),
+        ]),
+        _notice('⚡ ACTION REQUIRED:', 'Please verify this detection and take appropriate action immediately.', '#fff3cd', '#ffc107'),
+    ]
+    if p.get('description'):
+        content.append(PARAGRAPH.substitute(text=f"<strong>Description:</strong> {escape(p['description'])}"))
+    return _layout(p, '⚠️ CRIMINAL DETECTION ALERT', content, '#f44336', ist=True)
+
+
+@register(
+    'detection_digest',
+    subject='🔁 REPEAT ALERT: $criminal_name seen $hit_count more time(s)',
+    summary='$criminal_name seen $hit_count more time(s) at $where'
+)
+def _detection_digest(p):
+    content = [
+        _section('Repeat Detections', [
+            _row('Name', p['criminal_name']),
+            _row('Crime Type', p.get('crime_type')),
+            _row('Location', p.get('location')),
+            _row('Camera ID', p.get('camera_id')),
+            _row('Additional Detections', p['hit_count']),
+            _row('First Seen (IST)', format_time(p.get('first_seen'), ist=True)[:-4]),
+            _row('Last Seen (IST)', format_time(p.get('last_seen'), ist=True)[:-4]),
+            _row('Peak Confidence', _percent(p.get('peak_confidence'))),
+        ]),
+    ]
+    subheading = f"{p['criminal_name']} was detected {p['hit_count']} more time(s) after the initial alert"
+    return _layout(p, '🔁 REPEAT DETECTION DIGEST', content, '#f44336', subheading=subheading, ist=True)
+
+
+@register(
+    'video_detection',
+    subject='🎥 VIDEO ALERT: $criminal_count Criminal(s) Detected',
+    summary='$criminal_count criminal(s) detected in video #$video_id'
+)
+def _video_detection(p):
+    criminals = p.get('criminals') or []
+    rows = ''.join(
+        VIDEO_CRIMINAL_ROW.substitute(
+            name=escape(c['name']),
+            crime_type=escape(c.get('crime_type') or 'N/A'),
+            status=escape((c.get('status') or '').upper()),
+            confidence=_percent(c.get('max_confidence'), digits=1),
+            frame_count=c.get('frame_count', 0),
+            first_timestamp=escape(str(c.get('first_timestamp')))
+        )
+        for c in criminals
+    )
+    duration = p.get('duration_seconds') or 0
+    content = [
+        _section('Video Information', [
+            _row('Video ID', f"#{p['video_id']}"),
+            _row('Upload Time (IST)', format_time(p.get('upload_date'), ist=True)[:-4]),
+            _row('Location', p.get('location')),
+            _row('Camera ID', p.get('camera_id')),
+            _row('Duration', f"{duration:.1f}s ({p.get('total_frames') or 0} frames)"),
+        ]),
+        VIDEO_CRIMINALS_TABLE.substitute(rows=rows),
+        _notice(
+            '⚡ URGENT ACTION REQUIRED',
+            f'<p style="margin: 10px 0 0 0;">{len(criminals)} wanted criminal(s) detected in video footage. '
+            'Immediate verification and response required.</p>',
+            '#fff3cd', '#ffc107'
+        ),
+    ]
+    subheading = f'{len(criminals)} Criminal(s) Detected in Video'
+    return _layout(p, '🎥 VIDEO DETECTION ALERT', content, '#d32f2f', subheading=subheading, ist=True)
+
+
+@register(
+    'criminal_added',
+    subject='✅ New Criminal Added: $name',
+    summary='New criminal added: $name ($crime_type) by $actor'
+)
+def _criminal_added(p):
+    rows = [_row('Name', p['name'])]
+    if p.get('alias'):
+        rows.append(_row('Alias', p['alias']))
+    rows += [
+        _row('Crime Type', p.get('crime_type')),
+        _row('Status', p.get('status'), uppercase=True),
+        _row('Danger Level', p.get('danger_level'), uppercase=True, default='Not Specified'),
+    ]
+    if p.get('last_seen_location'):
+        rows.append(_row('Last Seen', p['last_seen_location']))
+    
+    content = [
+        PARAGRAPH.substitute(text='A new criminal record has been added to the Crime Detection System.'),
+        _section('Criminal Information', rows),
+    ]
+    if p.get('description'):
+        content.append(_notice('Description:', '<br>' + escape(p['description']), '#f8f9fa', '#6c757d'))
+    content += [
+        _section('Action Details', [
+            _row('Added By', f"{p.get('actor')} ({p.get('actor_email')})"),
+            _row('Added At', format_time(p.get('added_at'))),
+            _row('Criminal ID', f"#{p['criminal_id']}"),
+        ]),
+        _notice('ℹ️ Next Steps:', _list([
+            'Upload photos for face encoding',
+            'Review and verify criminal details',
+            'System will start monitoring for this individual',
+        ]), '#d1ecf1', '#17a2b8'),
+    ]
+    return _layout(p, '✅ NEW CRIMINAL RECORD ADDED', content, '#28a745')
+
+
+@register(
+    'criminal_updated',
+    subject='📝 Criminal Record Updated: $name',
+    summary='Criminal record updated: $name by $actor'
+)
+def _criminal_updated(p):
+    content = [
+        PARAGRAPH.substitute(text='A criminal record has been modified in the Crime Detection System.'),
+        _section('Criminal Information', [
+            _row('Criminal ID', f"#{p['criminal_id']}"),
+            _row('Name', p['name']),
+            _row('Crime Type', p.get('crime_type')),
+            _row('Current Status', p.get('status'), uppercase=True),
+        ]),
+    ]
+    changes = p.get('changes') or []
+    if changes:
+        content.append(_section('Changes Made', [
+            CHANGE_ROW.substitute(
+                label=escape(field.replace('_', ' ').title()),
+                old=escape(str(old if old not in (None, '') else 'N/A')),
+                new=escape(str(new if new not in (None, '') else 'N/A'))
+            )
+            for field, old, new in changes
+        ]))
+    content += [
+        _section('Update Details', [
+            _row('Updated By', f"{p.get('actor')} ({p.get('actor_email')})"),
+            _row('Updated At', format_time(p.get('generated_at'))),
+        ]),
+        _notice('ℹ️ Note:', 'All detection alerts and monitoring for this criminal will continue with updated information.', '#fff3cd', '#ffc107'),
+    ]
+    return _layout(p, '📝 CRIMINAL RECORD UPDATED', content, '#ffc107', banner_text='#333')
+
+
+@register(
+    'criminal_deleted',
+    subject='🗑️ Criminal Record Deleted: $name',
+    summary='Criminal record deleted: $name by $actor'
+)
+def _criminal_deleted(p):
+    rows = [
+        _row('Criminal ID', f"#{p['criminal_id']}"),
+        _row('Name', p['name']),
+    ]
+    if p.get('alias'):
+        rows.append(_row('Alias', p['alias']))
+    rows += [
+        _row('Crime Type', p.get('crime_type')),
+        _row('Status', p.get('status'), uppercase=True),
+        _row('Danger Level', p.get('danger_level'), uppercase=True),
+        _row('Total Detections', p.get('detection_count') or 0),
+        _row('Face Encodings', p.get('encodings_count') or 0),
+    ]
+    content = [
+        PARAGRAPH.substitute(text='A criminal record has been permanently removed from the Crime Detection System.'),
+        _notice(
+            '⚠️ WARNING:',
+            'This action is permanent. All associated data including face encodings and detection history have been removed.',
+            '#f8d7da', '#dc3545'
+        ),
+        _section('Deleted Criminal Information', rows),
+        _section('Deletion Details', [
+            _row('Deleted By', f"{p.get('actor')} ({p.get('actor_email')})"),
+            _row('Deleted At', format_time(p.get('generated_at'))),
+            _row('Reason', p.get('reason'), default='Not specified'),
+        ]),
+        _notice('ℹ️ Impact:', _list([
+            'System will no longer monitor for this individual',
+            'All face encodings have been removed',
+            'Historical detection logs are preserved for audit purposes',
+            'Associated alerts remain in the system',
+        ]), '#d1ecf1', '#17a2b8'),
+    ]
+    return _layout(p, '🗑️ CRIMINAL RECORD DELETED', content, '#dc3545')
+
+
+SEVERITY_COLORS = {'critical': '#d32f2f', 'warning': '#ed6c02'}
+
+
+@register(
+    'general',
+    subject='[$severity_label] $category_label',
+    summary='$message'
+)
+def _general(p):
+    severity = p.get('severity') or 'info'
+    content = [
+        PARAGRAPH.substitute(text=f'<span style="font-size: 16px; line-height: 1.5;">{escape(p.get("message") or "")}</span>'),
+        _section('Details', [
+            _row('Category', p.get('category_label')),
+            _row('Priority', p.get('priority')),
+            _row('Time', format_time(p.get('generated_at'))),
+        ]),
+    ]
+    return _layout(p, f'{escape(severity.upper())} Alert', content, SEVERITY_COLORS.get(severity, '#0288d1'))
@@ -1,43 +1,90 @@
 """Analytics service for generating reports and insights."""
 
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, case, extract
 from app import db
 from app.models.criminal import Criminal
 from app.models.detection_log import DetectionLog
+from app.models.detection_rollup import DetectionRollup
 from app.models.alert import Alert
 from app.models.video_detection import VideoDetection, VideoFrameDetection
 
+# Processing-time percentiles reported when ?percentiles= is given without values
+DEFAULT_PERCENTILES = (50, 95)
+
+VIDEO_STATUSES = ('pending', 'processing', 'completed', 'failed')
+
+
+def processing_seconds():
+    """
+    SQL expression for a video's processing time in seconds.
+    
+    NULL when either timestamp is missing, so aggregates skip the row.
+    """
+    started = VideoDetection.processing_started_at
+    completed = VideoDetection.processing_completed_at
+    if db.engine.dialect.name == 'sqlite':
+        return (func.julianday(completed) - func.julianday(started)) * 86400.0
+    return extract('epoch', completed - started)
+
+
+def parse_percentiles(value):
+    """
+    Parse a ``percentiles`` query parameter such as ``"50,95,99"``.
+    
+    Args:
+        value: Raw parameter value; an empty string selects the defaults
+    
+    Returns:
+        Tuple of percentiles between 0 and 100
+    
+    Raises:
+        ValueError: If a value is not a number in range
+    """
+    if not value or not value.strip():
+        return DEFAULT_PERCENTILES
+    
+    percentiles = []
+    for part in value.split(','):
+        try:
+            percentile = float(part)
+        except ValueError:
+            raise ValueError(f'Invalid percentile: {part.strip()}')
+        if not 0 <= percentile <= 100:
+            raise ValueError(f'Percentile out of range: {part.strip()}')
+        percentiles.append(percentile)
+    return tuple(percentiles)
+
 
 class AnalyticsService:
     """Service for generating analytics and reports."""
     
     @staticmethod
     def get_detection_trends(days=30):
-        """Get detection trends over specified number of days."""
+        """Get detection trends over specified number of days (from hourly rollups)."""
         end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
+        start_date = DetectionRollup.bucket_for(end_date - timedelta(days=days))
         
         # Daily detections
         daily_detections = db.session.query(
-            func.date(DetectionLog.detected_at).label('date'),
-            func.count(DetectionLog.id).label('total'),
-            func.count(func.nullif(DetectionLog.status == 'verified', False)).label('verified'),
-            func.count(func.nullif(DetectionLog.status == 'pending', False)).label('pending')
+            func.date(DetectionRollup.bucket_hour).label('date'),
+            func.sum(DetectionRollup.detection_count).label('total'),
+            func.sum(case((DetectionRollup.status == 'verified', DetectionRollup.detection_count), else_=0)).label('verified'),
+            func.sum(case((DetectionRollup.status == 'pending', DetectionRollup.detection_count), else_=0)).label('pending')
         ).filter(
-            DetectionLog.detected_at >= start_date
+            DetectionRollup.bucket_hour >= start_date
         ).group_by(
-            func.date(DetectionLog.detected_at)
+            func.date(DetectionRollup.bucket_hour)
         ).order_by(
-            func.date(DetectionLog.detected_at)
+            func.date(DetectionRollup.bucket_hour)
         ).all()
         
         return [
             {
                 'date': str(date) if date else None,
-                'total': total,
-                'verified': verified,
-                'pending': pending
+                'total': int(total or 0),
+                'verified': int(verified or 0),
+                'pending': int(pending or 0)
             }
             for date, total, verified, pending in daily_detections
         ]
@@ -73,56 +120,62 @@ class AnalyticsService:
     
     @staticmethod
     def get_location_heatmap_data():
-        """Get data for location heatmap visualization."""
+        """Get data for location heatmap visualization (from hourly rollups)."""
+        total_detections = func.sum(DetectionRollup.detection_count)
+        
         location_data = db.session.query(
-            DetectionLog.location,
-            func.count(DetectionLog.id).label('total_detections'),
-            func.count(func.distinct(DetectionLog.criminal_id)).label('unique_criminals'),
-            func.avg(DetectionLog.confidence_score).label('avg_confidence')
+            DetectionRollup.location,
+            total_detections.label('total_detections'),
+            func.count(func.distinct(DetectionRollup.criminal_id)).label('unique_criminals'),
+            func.sum(DetectionRollup.confidence_sum).label('confidence_sum')
         ).filter(
-            DetectionLog.location.isnot(None)
+            DetectionRollup.location.isnot(None)
         ).group_by(
-            DetectionLog.location
+            DetectionRollup.location
         ).order_by(
-            func.count(DetectionLog.id).desc()
+            total_detections.desc()
         ).all()
         
         return [
             {
                 'location': location,
-                'total_detections': total,
+                'total_detections': int(total or 0),
                 'unique_criminals': unique,
-                'avg_confidence': round(float(avg_conf), 3) if avg_conf else 0
+                'avg_confidence': round(float(conf_sum) / total, 3) if total else 0
             }
-            for location, total, unique, avg_conf in location_data
+            for location, total, unique, conf_sum in location_data
         ]
     
     @staticmethod
     def get_performance_metrics():
         """Get system performance metrics."""
-        # Detection accuracy
-        total_reviewed = DetectionLog.query.filter(
-            or_(DetectionLog.status == 'verified', DetectionLog.status == 'false_positive')
-        ).count()
+        # Detection counts and confidence sums per status (one rollup scan)
+        status_totals = {
+            status: (int(count or 0), float(conf_sum or 0))
+            for status, count, conf_sum in db.session.query(
+                DetectionRollup.status,
+                func.sum(DetectionRollup.detection_count),
+                func.sum(DetectionRollup.confidence_sum)
+            ).group_by(DetectionRollup.status).all()
+        }
         
-        verified = DetectionLog.query.filter_by(status='verified').count()
-        false_positives = DetectionLog.query.filter_by(status='false_positive').count()
+        def _average(count, conf_sum):
+            return conf_sum / count if count else 0
+        
+        verified, verified_conf = status_totals.get('verified', (0, 0.0))
+        false_positives, false_conf = status_totals.get('false_positive', (0, 0.0))
+        total_reviewed = verified + false_positives
         
         accuracy = (verified / total_reviewed * 100) if total_reviewed > 0 else 0
         false_positive_rate = (false_positives / total_reviewed * 100) if total_reviewed > 0 else 0
         
         # Average confidence scores
-        avg_confidence_all = db.session.query(
-            func.avg(DetectionLog.confidence_score)
-        ).scalar() or 0
-        
-        avg_confidence_verified = db.session.query(
-            func.avg(DetectionLog.confidence_score)
-        ).filter_by(status='verified').scalar() or 0
-        
-        avg_confidence_false = db.session.query(
-            func.avg(DetectionLog.confidence_score)
-        ).filter_by(status='false_positive').scalar() or 0
+        avg_confidence_all = _average(
+            sum(count for count, _ in status_totals.values()),
+            sum(conf_sum for _, conf_sum in status_totals.values())
+        )
+        avg_confidence_verified = _average(verified, verified_conf)
+        avg_confidence_false = _average(false_positives, false_conf)
         
         # Response time (alerts sent)
         alerts_with_delay = db.session.query(
@@ -156,61 +209,148 @@ class AnalyticsService:
         }
     
     @staticmethod
-    def get_video_processing_stats():
-        """Get detailed video processing statistics."""
-        completed_videos = VideoDetection.query.filter_by(
-            processing_status='completed'
+    def get_video_status_summary():
+        """
+        Aggregate video counts, totals and processing times per status.
+        
+        Computed in a single GROUP BY query.
+        
+        Returns:
+            Dictionary keyed by processing status
+        """
+        duration = processing_seconds()
+        rows = db.session.query(
+            VideoDetection.processing_status,
+            func.count(VideoDetection.id),
+            func.sum(VideoDetection.frames_processed),
+            func.sum(VideoDetection.total_faces_detected),
+            func.sum(VideoDetection.unique_criminals_matched),
+            func.count(duration),
+            func.sum(duration),
+            func.avg(duration)
+        ).group_by(
+            VideoDetection.processing_status
         ).all()
         
-        if not completed_videos:
-            return {
-                'total_videos_processed': 0,
-                'total_frames_processed': 0,
-                'total_faces_detected': 0,
-                'total_criminals_matched': 0,
-                'avg_processing_time': 0,
-                'avg_frames_per_video': 0,
-                'avg_faces_per_video': 0
+        summary = {
+            status: {
+                'count': 0,
+                'frames_processed': 0,
+                'faces_detected': 0,
+                'criminals_matched': 0,
+                'timed_count': 0,
+                'total_processing_time': 0.0,
+                'avg_processing_time': 0.0
             }
+            for status in VIDEO_STATUSES
+        }
+        for status, count, frames, faces, criminals, timed, total_time, avg_time in rows:
+            summary[status] = {
+                'count': count,
+                'frames_processed': int(frames or 0),
+                'faces_detected': int(faces or 0),
+                'criminals_matched': int(criminals or 0),
+                'timed_count': timed,
+                'total_processing_time': float(total_time or 0),
+                'avg_processing_time': float(avg_time or 0)
+            }
+        return summary
+    
+    @staticmethod
+    def get_processing_time_percentiles(percentiles=DEFAULT_PERCENTILES, status='completed'):
+        """
+        Get processing-time percentiles for videos with the given status.
         
-        total_frames = sum(v.frames_processed or 0 for v in completed_videos)
-        total_faces = sum(v.total_faces_detected or 0 for v in completed_videos)
-        total_criminals = sum(v.unique_criminals_matched or 0 for v in completed_videos)
+        Uses ``percentile_cont`` on PostgreSQL. Other databases read the
+        one or two rows around each rank with ORDER BY/OFFSET and
+        interpolate between them, matching ``percentile_cont``.
         
-        processing_times = []
-        for video in completed_videos:
-            if video.processing_started_at and video.processing_completed_at:
-                delta = video.processing_completed_at - video.processing_started_at
-                processing_times.append(delta.total_seconds())
+        Args:
+            percentiles: Percentiles between 0 and 100
+            status: Processing status to include
         
-        avg_processing_time = sum(processing_times) / len(processing_times) if processing_times else 0
+        Returns:
+            Dictionary such as {'p50': 12.5, 'p95': 40.1}; values are None
+            when no video has both timestamps
+        """
+        duration = processing_seconds()
+        filters = (VideoDetection.processing_status == status, duration.isnot(None))
+        keys = [f'p{p:g}' for p in percentiles]
         
-        return {
-            'total_videos_processed': len(completed_videos),
-            'total_frames_processed': total_frames,
-            'total_faces_detected': total_faces,
-            'total_criminals_matched': total_criminals,
-            'avg_processing_time': round(avg_processing_time, 2),
-            'avg_frames_per_video': round(total_frames / len(completed_videos), 2),
-            'avg_faces_per_video': round(total_faces / len(completed_videos), 2)
+        if db.engine.dialect.name == 'postgresql':
+            row = db.session.query(*[
+                func.percentile_cont(p / 100.0).within_group(duration)
+                for p in percentiles
+            ]).filter(*filters).one()
+            return {
+                key: round(float(value), 2) if value is not None else None
+                for key, value in zip(keys, row)
+            }
+        
+        total = db.session.query(func.count(duration)).filter(*filters).scalar() or 0
+        result = {}
+        for key, p in zip(keys, percentiles):
+            if not total:
+                result[key] = None
+                continue
+            position = (total - 1) * p / 100.0
+            lower = int(position)
+            values = [
+                value for (value,) in db.session.query(duration).filter(
+                    *filters
+                ).order_by(duration).offset(lower).limit(2).all()
+            ]
+            value = values[0]
+            if len(values) > 1:
+                value += (values[1] - values[0]) * (position - lower)
+            result[key] = round(float(value), 2)
+        return result
+    
+    @staticmethod
+    def get_video_processing_stats(percentiles=None):
+        """
+        Get detailed video processing statistics.
+        
+        Args:
+            percentiles: Optional processing-time percentiles to include
+        """
+        completed = AnalyticsService.get_video_status_summary()['completed']
+        count = completed['count']
+        
+        stats = {
+            'total_videos_processed': count,
+            'total_frames_processed': completed['frames_processed'],
+            'total_faces_detected': completed['faces_detected'],
+            'total_criminals_matched': completed['criminals_matched'],
+            'avg_processing_time': round(completed['avg_processing_time'], 2),
+            'avg_frames_per_video': round(completed['frames_processed'] / count, 2) if count else 0,
+            'avg_faces_per_video': round(completed['faces_detected'] / count, 2) if count else 0
         }
+        if percentiles:
+            stats['processing_time_percentiles'] = AnalyticsService.get_processing_time_percentiles(percentiles)
+        return stats
     
     @staticmethod
     def get_time_based_patterns():
-        """Analyze detection patterns by time of day and day of week."""
-        # Get all detections
-        detections = DetectionLog.query.all()
+        """Analyze detection patterns by time of day and day of week (from hourly rollups)."""
+        hour_expr = extract('hour', DetectionRollup.bucket_hour)
+        dow_expr = extract('dow', DetectionRollup.bucket_hour)  # 0 = Sunday
+        
+        rows = db.session.query(
+            hour_expr,
+            dow_expr,
+            func.sum(DetectionRollup.detection_count)
+        ).group_by(hour_expr, dow_expr).all()
         
         # Initialize patterns
         hourly_counts = {hour: 0 for hour in range(24)}
         daily_counts = {day: 0 for day in range(7)}  # 0 = Monday
         
-        for detection in detections:
-            if detection.detected_at:
-                hour = detection.detected_at.hour
-                day = detection.detected_at.weekday()
-                hourly_counts[hour] += 1
-                daily_counts[day] += 1
+        for hour, dow, count in rows:
+            if hour is None or dow is None:
+                continue
+            hourly_counts[int(hour)] += int(count or 0)
+            daily_counts[(int(dow) + 6) % 7] += int(count or 0)
         
         day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         
@@ -230,17 +370,17 @@ class AnalyticsService:
         """Generate a comprehensive summary report."""
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
+        start_bucket = DetectionRollup.bucket_for(start_date)
         
         # Period statistics
-        period_detections = DetectionLog.query.filter(
-            DetectionLog.detected_at >= start_date
-        ).count()
-        
-        period_criminals = db.session.query(
-            func.count(func.distinct(DetectionLog.criminal_id))
+        period_detections, period_criminals = db.session.query(
+            func.sum(DetectionRollup.detection_count),
+            func.count(func.distinct(DetectionRollup.criminal_id))
         ).filter(
-            DetectionLog.detected_at >= start_date
-        ).scalar() or 0
+            DetectionRollup.bucket_hour >= start_bucket
+        ).one()
+        period_detections = int(period_detections or 0)
+        period_criminals = period_criminals or 0
         
         period_alerts = Alert.query.filter(
             Alert.sent_at >= start_date
@@ -253,16 +393,17 @@ class AnalyticsService:
         performance = AnalyticsService.get_performance_metrics()
         
         # Get top locations
+        location_count = func.sum(DetectionRollup.detection_count)
         top_locations = db.session.query(
-            DetectionLog.location,
-            func.count(DetectionLog.id).label('count')
+            DetectionRollup.location,
+            location_count.label('count')
         ).filter(
-            DetectionLog.detected_at >= start_date,
-            DetectionLog.location.isnot(None)
+            DetectionRollup.bucket_hour >= start_bucket,
+            DetectionRollup.location.isnot(None)
         ).group_by(
-            DetectionLog.location
+            DetectionRollup.location
         ).order_by(
-            func.count(DetectionLog.id).desc()
+            location_count.desc()
         ).limit(5).all()
         
         return {
@@ -279,7 +420,65 @@ class AnalyticsService:
             'performance': performance,
             'trends': trends,
             'top_locations': [
-                {'location': loc, 'count': count}
+                {'location': loc, 'count': int(count or 0)}
                 for loc, count in top_locations
             ]
         }
+    
+    @staticmethod
+    def backfill_detection_rollups(batch_size=5000):
+        """
+        Rebuild hourly detection rollups from the raw detection logs.
+        
+        Streams detection logs in detected_at order and writes each hourly
+        bucket once it is complete, so memory stays bounded by one hour of
+        distinct keys.
+        
+        Args:
+            batch_size: Number of raw rows fetched per round trip
+        
+        Returns:
+            Dictionary with number of logs scanned and rollup rows written
+        """
+        DetectionRollup.query.delete(synchronize_session=False)
+        
+        rows = db.session.query(
+            DetectionLog.detected_at,
+            DetectionLog.location,
+            DetectionLog.camera_id,
+            DetectionLog.criminal_id,
+            DetectionLog.status,
+            DetectionLog.confidence_score
+        ).order_by(
+            DetectionLog.detected_at, DetectionLog.id
+        ).yield_per(batch_size)
+        
+        scanned = 0
+        written = 0
+        current_bucket = None
+        pending = {}
+        
+        def _flush_bucket():
+            if pending:
+                db.session.execute(DetectionRollup.__table__.insert(), [
+                    dict(zip(DetectionRollup.KEY_COLUMNS, key), detection_count=count, confidence_sum=conf_sum)
+                    for key, (count, conf_sum) in pending.items()
+                ])
+            return len(pending)
+        
+        for detected_at, location, camera_id, criminal_id, status, confidence in rows:
+            scanned += 1
+            bucket = DetectionRollup.bucket_for(detected_at)
+            if bucket != current_bucket:
+                written += _flush_bucket()
+                pending = {}
+                current_bucket = bucket
+            
+            key = tuple(DetectionRollup.key_for(bucket, location, camera_id, criminal_id, status).values())
+            count, conf_sum = pending.get(key, (0, 0.0))
+            pending[key] = (count + 1, conf_sum + (confidence or 0.0))
+        
+        written += _flush_bucket()
+        db.session.commit()
+        
+        return {'logs_scanned': scanned, 'rollup_rows': written}
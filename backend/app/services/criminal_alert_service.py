@@ -1,19 +1,26 @@
 """Alert service for criminal management operations."""
 
-import smtplib
-import os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from flask import current_app
 from datetime import datetime
 import logging
 
 from app import db
-from app.models.alert import Alert
 from app.models.user import User
+from app.services.alert_dispatcher import alert_dispatcher, queue_alert
+from app.services.alert_templates import template_fields
 
 logger = logging.getLogger(__name__)
 
 
+def _json_value(value):
+    """Make a changed field value JSON-safe for the alert parameters."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
 def send_criminal_added_alert(criminal, added_by_user):
     """
     Send alert when a new criminal is added to the database.
@@ -23,11 +30,9 @@ def send_criminal_added_alert(criminal, added_by_user):
         added_by_user: User who added the criminal
     """
     try:
-        sender_email = os.getenv('SMTP_EMAIL')
-        sender_password = os.getenv('SMTP_PASSWORD')
-        recipient_email = os.getenv('ALERT_EMAIL', sender_email)
+        recipient_email = current_app.config.get('ALERT_EMAIL') or current_app.config.get('SMTP_EMAIL')
         
-        if not sender_email or not sender_password:
+        if not alert_dispatcher.channel_ready('email'):
             logger.warning("SMTP credentials not configured, skipping criminal added alert")
             return False
         
@@ -38,111 +43,37 @@ def send_criminal_added_alert(criminal, added_by_user):
         if not recipient_emails:
             recipient_emails = [recipient_email]
         
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['From'] = sender_email
-        msg['To'] = ', '.join(recipient_emails)
-        msg['Subject'] = f'✅ New Criminal Added: {criminal.name}'
-        
-        # HTML body
-        html_body = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif;">
-            <div style="background-color: #28a745; color: white; padding: 20px; text-align: center;">
-                <h1>✅ NEW CRIMINAL RECORD ADDED</h1>
-            </div>
-            <div style="padding: 20px;">
-                <p>A new criminal record has been added to the Crime Detection System.</p>
-                
-                <h2>Criminal Information</h2>
-                <table style="border-collapse: collapse; width: 100%;">
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Name:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{criminal.name}</td>
-                    </tr>
-                    {f'''<tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Alias:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{criminal.alias}</td>
-                    </tr>''' if criminal.alias else ''}
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Crime Type:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{criminal.crime_type}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Status:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd; text-transform: uppercase;">{criminal.status}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Danger Level:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd; text-transform: uppercase;">{criminal.danger_level or 'Not Specified'}</td>
-                    </tr>
-                    {f'''<tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Last Seen:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{criminal.last_seen_location}</td>
-                    </tr>''' if criminal.last_seen_location else ''}
-                </table>
-                
-                {f'<div style="margin-top: 20px; padding: 15px; background-color: #f8f9fa; border-left: 4px solid #6c757d;"><strong>Description:</strong><br>{criminal.description}</div>' if criminal.description else ''}
-                
-                <h2 style="margin-top: 30px;">Action Details</h2>
-                <table style="border-collapse: collapse; width: 100%;">
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Added By:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{added_by_user.username} ({added_by_user.email})</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Added At:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{criminal.added_date.strftime('%Y-%m-%d %H:%M:%S')}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Criminal ID:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">#{criminal.id}</td>
-                    </tr>
-                </table>
-                
-                <div style="margin-top: 30px; padding: 15px; background-color: #d1ecf1; border-left: 4px solid #17a2b8;">
-                    <strong>ℹ️ Next Steps:</strong>
-                    <ul style="margin: 10px 0 0 20px;">
-                        <li>Upload photos for face encoding</li>
-                        <li>Review and verify criminal details</li>
-                        <li>System will start monitoring for this individual</li>
-                    </ul>
-                </div>
-            </div>
-            <div style="background-color: #f5f5f5; padding: 20px; text-align: center; font-size: 12px; color: #666;">
-                <p>This is an automated alert from Crime Detection System</p>
-                <p>Generated at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        msg.attach(MIMEText(html_body, 'html'))
-        
-        # Send email
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.send_message(msg)
-        
-        # Log alert in database
+        params = {
+            'criminal_id': criminal.id,
+            'name': criminal.name,
+            'alias': criminal.alias,
+            'crime_type': criminal.crime_type,
+            'status': criminal.status,
+            'danger_level': criminal.danger_level,
+            'last_seen_location': criminal.last_seen_location,
+            'description': criminal.description,
+            'added_at': criminal.added_date.isoformat() if criminal.added_date else None,
+            'actor': added_by_user.username,
+            'actor_email': added_by_user.email,
+            'generated_at': datetime.now().isoformat()
+        }
+        fields = template_fields('criminal_added', params)
+        
+        # One outbox entry per recipient; the dispatcher delivers them after commit
         for email in recipient_emails:
-            alert = Alert(
+            queue_alert(
                 alert_type='criminal_added',
                 severity='info',
                 category='criminal_mgmt',
                 priority=3,
                 detection_log_id=None,
                 recipient_email=email,
-                subject=msg['Subject'],
-                message=html_body,
                 delivery_method='email',
-                status='sent'
+                **fields
             )
-            db.session.add(alert)
         
         db.session.commit()
-        logger.info(f"Criminal added alert sent for criminal {criminal.id}")
+        logger.info(f"Criminal added alert queued for criminal {criminal.id}")
         return True
         
     except Exception as e:
@@ -160,11 +91,9 @@ def send_criminal_updated_alert(criminal, updated_by_user, changes):
         changes: Dictionary of changed fields
     """
     try:
-        sender_email = os.getenv('SMTP_EMAIL')
-        sender_password = os.getenv('SMTP_PASSWORD')
-        recipient_email = os.getenv('ALERT_EMAIL', sender_email)
+        recipient_email = current_app.config.get('ALERT_EMAIL') or current_app.config.get('SMTP_EMAIL')
         
-        if not sender_email or not sender_password:
+        if not alert_dispatcher.channel_ready('email'):
             logger.warning("SMTP credentials not configured, skipping criminal updated alert")
             return False
         
@@ -175,109 +104,36 @@ def send_criminal_updated_alert(criminal, updated_by_user, changes):
         if not recipient_emails:
             recipient_emails = [recipient_email]
         
-        # Build changes table
-        changes_html = ""
-        if changes:
-            changes_html = "<h2>Changes Made</h2><table style='border-collapse: collapse; width: 100%;'>"
-            for field, (old_value, new_value) in changes.items():
-                changes_html += f"""
-                <tr>
-                    <td style="padding: 10px; border-bottom: 1px solid #ddd; width: 25%;"><strong>{field.replace('_', ' ').title()}:</strong></td>
-                    <td style="padding: 10px; border-bottom: 1px solid #ddd; width: 35%; color: #dc3545; text-decoration: line-through;">{old_value or 'N/A'}</td>
-                    <td style="padding: 10px; border-bottom: 1px solid #ddd; width: 5%; text-align: center;">→</td>
-                    <td style="padding: 10px; border-bottom: 1px solid #ddd; width: 35%; color: #28a745; font-weight: bold;">{new_value or 'N/A'}</td>
-                </tr>
-                """
-            changes_html += "</table>"
-        
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['From'] = sender_email
-        msg['To'] = ', '.join(recipient_emails)
-        msg['Subject'] = f'📝 Criminal Record Updated: {criminal.name}'
-        
-        # HTML body
-        html_body = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif;">
-            <div style="background-color: #ffc107; color: #333; padding: 20px; text-align: center;">
-                <h1>📝 CRIMINAL RECORD UPDATED</h1>
-            </div>
-            <div style="padding: 20px;">
-                <p>A criminal record has been modified in the Crime Detection System.</p>
-                
-                <h2>Criminal Information</h2>
-                <table style="border-collapse: collapse; width: 100%;">
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Criminal ID:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">#{criminal.id}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Name:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{criminal.name}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Crime Type:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{criminal.crime_type}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Current Status:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd; text-transform: uppercase;">{criminal.status}</td>
-                    </tr>
-                </table>
-                
-                {changes_html}
-                
-                <h2 style="margin-top: 30px;">Update Details</h2>
-                <table style="border-collapse: collapse; width: 100%;">
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Updated By:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{updated_by_user.username} ({updated_by_user.email})</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Updated At:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</td>
-                    </tr>
-                </table>
-                
-                <div style="margin-top: 30px; padding: 15px; background-color: #fff3cd; border-left: 4px solid #ffc107;">
-                    <strong>ℹ️ Note:</strong> All detection alerts and monitoring for this criminal will continue with updated information.
-                </div>
-            </div>
-            <div style="background-color: #f5f5f5; padding: 20px; text-align: center; font-size: 12px; color: #666;">
-                <p>This is an automated alert from Crime Detection System</p>
-                <p>Generated at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        msg.attach(MIMEText(html_body, 'html'))
-        
-        # Send email
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.send_message(msg)
-        
-        # Log alert in database
+        params = {
+            'criminal_id': criminal.id,
+            'name': criminal.name,
+            'crime_type': criminal.crime_type,
+            'status': criminal.status,
+            'changes': [
+                [field, _json_value(old_value), _json_value(new_value)]
+                for field, (old_value, new_value) in (changes or {}).items()
+            ],
+            'actor': updated_by_user.username,
+            'actor_email': updated_by_user.email,
+            'generated_at': datetime.now().isoformat()
+        }
+        fields = template_fields('criminal_updated', params)
+        
+        # One outbox entry per recipient; the dispatcher delivers them after commit
         for email in recipient_emails:
-            alert = Alert(
+            queue_alert(
                 alert_type='criminal_updated',
                 severity='info',
                 category='criminal_mgmt',
                 priority=3,
                 detection_log_id=None,
                 recipient_email=email,
-                subject=msg['Subject'],
-                message=html_body,
                 delivery_method='email',
-                status='sent'
+                **fields
             )
-            db.session.add(alert)
         
         db.session.commit()
-        logger.info(f"Criminal updated alert sent for criminal {criminal.id}")
+        logger.info(f"Criminal updated alert queued for criminal {criminal.id}")
         return True
         
     except Exception as e:
@@ -294,11 +150,9 @@ def send_criminal_deleted_alert(criminal_data, deleted_by_user):
         deleted_by_user: User who deleted the criminal
     """
     try:
-        sender_email = os.getenv('SMTP_EMAIL')
-        sender_password = os.getenv('SMTP_PASSWORD')
-        recipient_email = os.getenv('ALERT_EMAIL', sender_email)
+        recipient_email = current_app.config.get('ALERT_EMAIL') or current_app.config.get('SMTP_EMAIL')
         
-        if not sender_email or not sender_password:
+        if not alert_dispatcher.channel_ready('email'):
             logger.warning("SMTP credentials not configured, skipping criminal deleted alert")
             return False
         
@@ -309,122 +163,37 @@ def send_criminal_deleted_alert(criminal_data, deleted_by_user):
         if not recipient_emails:
             recipient_emails = [recipient_email]
         
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['From'] = sender_email
-        msg['To'] = ', '.join(recipient_emails)
-        msg['Subject'] = f'🗑️ Criminal Record Deleted: {criminal_data["name"]}'
-        
-        # HTML body
-        html_body = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif;">
-            <div style="background-color: #dc3545; color: white; padding: 20px; text-align: center;">
-                <h1>🗑️ CRIMINAL RECORD DELETED</h1>
-            </div>
-            <div style="padding: 20px;">
-                <p>A criminal record has been permanently removed from the Crime Detection System.</p>
-                
-                <div style="padding: 15px; background-color: #f8d7da; border-left: 4px solid #dc3545; margin-bottom: 20px;">
-                    <strong>⚠️ WARNING:</strong> This action is permanent. All associated data including face encodings and detection history have been removed.
-                </div>
-                
-                <h2>Deleted Criminal Information</h2>
-                <table style="border-collapse: collapse; width: 100%;">
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Criminal ID:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">#{criminal_data["id"]}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Name:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{criminal_data["name"]}</td>
-                    </tr>
-                    {f'''<tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Alias:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{criminal_data.get("alias", "N/A")}</td>
-                    </tr>''' if criminal_data.get("alias") else ''}
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Crime Type:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{criminal_data["crime_type"]}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Status:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd; text-transform: uppercase;">{criminal_data["status"]}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Danger Level:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd; text-transform: uppercase;">{criminal_data.get("danger_level", "N/A")}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Total Detections:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{criminal_data.get("detection_count", 0)}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Face Encodings:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{criminal_data.get("encodings_count", 0)}</td>
-                    </tr>
-                </table>
-                
-                <h2 style="margin-top: 30px;">Deletion Details</h2>
-                <table style="border-collapse: collapse; width: 100%;">
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Deleted By:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{deleted_by_user.username} ({deleted_by_user.email})</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Deleted At:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Reason:</strong></td>
-                        <td style="padding: 10px; border-bottom: 1px solid #ddd;">{criminal_data.get("deletion_reason", "Not specified")}</td>
-                    </tr>
-                </table>
-                
-                <div style="margin-top: 30px; padding: 15px; background-color: #d1ecf1; border-left: 4px solid #17a2b8;">
-                    <strong>ℹ️ Impact:</strong>
-                    <ul style="margin: 10px 0 0 20px;">
-                        <li>System will no longer monitor for this individual</li>
-                        <li>All face encodings have been removed</li>
-                        <li>Historical detection logs are preserved for audit purposes</li>
-                        <li>Associated alerts remain in the system</li>
-                    </ul>
-                </div>
-            </div>
-            <div style="background-color: #f5f5f5; padding: 20px; text-align: center; font-size: 12px; color: #666;">
-                <p>This is an automated alert from Crime Detection System</p>
-                <p>Generated at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        msg.attach(MIMEText(html_body, 'html'))
-        
-        # Send email
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.send_message(msg)
-        
-        # Log alert in database
+        params = {
+            'criminal_id': criminal_data['id'],
+            'name': criminal_data['name'],
+            'alias': criminal_data.get('alias'),
+            'crime_type': criminal_data.get('crime_type'),
+            'status': criminal_data.get('status'),
+            'danger_level': criminal_data.get('danger_level'),
+            'detection_count': criminal_data.get('detection_count', 0),
+            'encodings_count': criminal_data.get('encodings_count', 0),
+            'reason': criminal_data.get('deletion_reason'),
+            'actor': deleted_by_user.username,
+            'actor_email': deleted_by_user.email,
+            'generated_at': datetime.now().isoformat()
+        }
+        fields = template_fields('criminal_deleted', params)
+        
+        # One outbox entry per recipient; the dispatcher delivers them after commit
         for email in recipient_emails:
-            alert = Alert(
+            queue_alert(
                 alert_type='criminal_deleted',
                 severity='warning',
                 category='criminal_mgmt',
                 priority=4,
                 detection_log_id=None,
                 recipient_email=email,
-                subject=msg['Subject'],
-                message=html_body,
                 delivery_method='email',
-                status='sent'
+                **fields
             )
-            db.session.add(alert)
         
         db.session.commit()
-        logger.info(f"Criminal deleted alert sent for criminal {criminal_data['id']}")
+        logger.info(f"Criminal deleted alert queued for criminal {criminal_data['id']}")
         return True
         
     except Exception as e:
@@ -9,10 +9,11 @@ import logging
 
 from app import db
 from app.models.criminal import Criminal
-from app.models.face_encoding import FaceEncoding
 from app.models.detection_log import DetectionLog
 from app.services.face_service_deepface import face_service_deepface as face_service  # Using DeepFace AI (99.65% accuracy)
 from app.services.alert_service import send_detection_alert
+from app.services.gallery_cache import gallery_cache
+from app.utils.quality_assessment import QualityGate
 
 logger = logging.getLogger(__name__)
 
@@ -61,7 +62,8 @@ class DetectionService:
             return None
     
     @staticmethod
-    def process_detection(image_path: str, user_id: int, location: str = None, camera_id: str = None) -> Dict:
+    def process_detection(image_path: str, user_id: int, location: str = None, camera_id: str = None,
+                          quality_gate: Optional[QualityGate] = None, pipeline: str = 'upload') -> Dict:
         """
         Process face detection on an image with multi-face support.
         
@@ -73,6 +75,8 @@ class DetectionService:
             user_id: ID of user performing detection
             location: Optional location information
             camera_id: Optional camera identifier
+            quality_gate: Skip embedding faces that fail this gate (live frames)
+            pipeline: 'upload' or 'live', selects the configured face detector
             
         Returns:
             Detection results dictionary with multiple matches
@@ -81,7 +85,7 @@ class DetectionService:
             logger.info(f"Processing detection for image: {image_path}")
             
             # Detect all faces in image
-            faces = face_service.detect_faces(image_path)
+            faces = face_service.detect_faces(image_path, detector=face_service.detector_for(pipeline))
             logger.info(f"Detected {len(faces)} face(s) in image")
             
             if not faces:
@@ -92,30 +96,37 @@ class DetectionService:
                     'message': 'No faces detected in image'
                 }
             
-            # Get all known criminal face encodings with quality scores
-            known_encodings = []
-            face_encodings = FaceEncoding.query.all()
-            logger.info(f"Loading {len(face_encodings)} known face encodings from database")
+            # Known criminal face encodings, decoded once and shared by requests
+            known_encodings = gallery_cache.known_encodings()
+            logger.info(f"Matching against {len(known_encodings)} known face encodings")
             
-            for fe in face_encodings:
-                try:
-                    known_encodings.append({
-                        'id': fe.id,
-                        'criminal_id': fe.criminal_id,
-                        'encoding': fe.encoding_data,
-                        'quality_score': fe.quality_score or 0.7,
-                        'pose_type': fe.pose_type,
-                        'is_primary': fe.is_primary
-                    })
-                except Exception as e:
-                    logger.error(f"Error loading encoding {fe.id}: {str(e)}")
-                    continue
+            # Decode once and crop every face with some padding
+            import cv2
+            image = cv2.imread(image_path)
+            padding = 20
+            face_crops = []
+            for x, y, w, h in faces:
+                y1 = max(0, y - padding)
+                y2 = min(image.shape[0], y + h + padding)
+                x1 = max(0, x - padding)
+                x2 = min(image.shape[1], x + w + padding)
+                face_crops.append(image[y1:y2, x1:x2])
+            
+            # Cheap quality metrics decide which faces are worth embedding
+            gate_results = quality_gate.evaluate(face_crops, faces) if quality_gate else None
+            faces_gated = 0
             
             # Process each detected face
             all_detection_logs = []
             face_match_results = []  # Track matches per face for annotation
             
             for face_idx, face_region in enumerate(faces):
+                if gate_results and gate_results[face_idx][1]:
+                    logger.info(f"Face {face_idx + 1} skipped by quality gate ({gate_results[face_idx][1]})")
+                    faces_gated += 1
+                    face_match_results.append([])
+                    continue
+                
                 logger.info(f"Processing face {face_idx + 1}/{len(faces)}")
                 
                 # Extract encoding for this specific face
@@ -124,20 +135,7 @@ class DetectionService:
                 # and rely on DeepFace to handle it (it returns embeddings for all detected faces)
                 
                 try:
-                    # For true multi-face support, we should crop the image to face region
-                    # But DeepFace.represent actually returns ALL faces, so let's use that
-                    import cv2
-                    image = cv2.imread(image_path)
-                    x, y, w, h = face_region
-                    
-                    # Crop to face region with some padding
-                    padding = 20
-                    y1 = max(0, y - padding)
-                    y2 = min(image.shape[0], y + h + padding)
-                    x1 = max(0, x - padding)
-                    x2 = min(image.shape[1], x + w + padding)
-                    
-                    face_crop = image[y1:y2, x1:x2]
+                    face_crop = face_crops[face_idx]
                     
                     # Save temporary cropped face
                     import tempfile
@@ -205,12 +203,13 @@ class DetectionService:
                         
                         logger.info(f"  ✓ Face {face_idx + 1} matched: {criminal.name} ({confidence_score:.2%})")
                         
-                        # Send email alert for high-confidence matches
+                        # Queue email alert for high-confidence matches; it is
+                        # committed with the detection and delivered in the background
                         if confidence_score >= 0.7:
                             try:
                                 send_detection_alert(criminal, detection_log, confidence_score)
                             except Exception as e:
-                                logger.error(f"Failed to send alert: {str(e)}")
+                                logger.error(f"Failed to queue alert: {str(e)}")
                     
                     face_match_results.append(face_matches)
                     
@@ -234,6 +233,7 @@ class DetectionService:
             return {
                 'success': True,
                 'faces_detected': total_faces,
+                'faces_gated': faces_gated,
                 'matched_faces': matched_faces,
                 'total_matches': total_matches,
                 'matches': all_detection_logs,
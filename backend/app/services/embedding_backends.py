@@ -0,0 +1,234 @@
+"""Pluggable face embedding backends.
+
+FaceServiceDeepFace embeds through DeepFace (TensorFlow) by default. The
+backends here run the same Facenet512 network exported to ONNX (see
+export_facenet512_onnx.py) on CPU, through ONNX Runtime or OpenCV's dnn
+module. Neither imports TensorFlow, so they avoid its startup cost and
+per-call overhead, which dominate single-face requests.
+
+Each backend reproduces the DeepFace pipeline used by FaceServiceDeepFace:
+OpenCV Haar face detection with eye-based alignment, then DeepFace's
+preprocessing (BGR, scaled to [0, 1], resized to 160x160 keeping the aspect
+ratio and zero-padded). QA/tests/unit/test_embedding_backends.py checks
+parity with DeepFace when the models are installed.
+
+Select one with EMBEDDING_BACKEND = deepface | onnxruntime | opencv-dnn.
+"""
+
+import logging
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INPUT_SIZE = (160, 160)  # Facenet512 input (height, width)
+
+
+def preprocess_face(face: np.ndarray, target_size: Tuple[int, int] = INPUT_SIZE) -> np.ndarray:
+    """
+    Prepare a BGR face crop the way DeepFace does for Facenet512.
+    
+    Args:
+        face: BGR face crop (uint8, or float in [0, 1])
+        target_size: (height, width) of the network input
+    
+    Returns:
+        float32 array of shape (height, width, 3) in [0, 1]
+    """
+    face = face.astype(np.float32)
+    if face.max() > 1:
+        face /= 255.0
+    factor = min(target_size[0] / face.shape[0], target_size[1] / face.shape[1])
+    resized = cv2.resize(face, (int(face.shape[1] * factor), int(face.shape[0] * factor)))
+    diff_0 = target_size[0] - resized.shape[0]
+    diff_1 = target_size[1] - resized.shape[1]
+    padded = np.pad(resized, ((diff_0 // 2, diff_0 - diff_0 // 2), (diff_1 // 2, diff_1 - diff_1 // 2), (0, 0)),
+                    'constant')
+    if padded.shape[:2] != target_size:
+        padded = cv2.resize(padded, (target_size[1], target_size[0]))
+    return padded
+
+
+class EmbeddingBackend:
+    """
+    Detect, align and embed faces without DeepFace.
+    
+    Subclasses implement load() and forward(); detection, alignment and
+    batching are shared.
+    """
+    
+    name = None
+    
+    def __init__(self, model_path: str, threads: int = 0):
+        """
+        Args:
+            model_path: Exported Facenet512 model (.onnx)
+            threads: CPU threads for inference (0 = runtime default)
+        """
+        self.model_path = model_path
+        self.threads = threads
+        self._local = threading.local()
+    
+    def load(self):
+        """Load the network; raises if the model or runtime is missing."""
+        raise NotImplementedError
+    
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Run the network.
+        
+        Args:
+            batch: float32 array (N, 160, 160, 3) from preprocess_face()
+        
+        Returns:
+            float32 array (N, 512) of embeddings
+        """
+        raise NotImplementedError
+    
+    def _cascades(self):
+        # CascadeClassifier is not thread-safe; keep one pair per thread
+        if getattr(self._local, 'face', None) is None:
+            self._local.face = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+            self._local.eye = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+        return self._local.face, self._local.eye
+    
+    @staticmethod
+    def _read(image) -> Optional[np.ndarray]:
+        if isinstance(image, np.ndarray):
+            return image
+        if isinstance(image, (bytes, bytearray)):
+            return cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return cv2.imread(image)
+    
+    def detect_faces(self, image) -> List[Tuple[int, int, int, int]]:
+        """
+        Detect faces with the same Haar settings as DeepFace's 'opencv' detector.
+        
+        Args:
+            image: Path, encoded bytes or BGR array
+        
+        Returns:
+            List of (x, y, width, height) tuples
+        """
+        image = self._read(image)
+        if image is None:
+            return []
+        face_cascade, _ = self._cascades()
+        faces = face_cascade.detectMultiScale(image, 1.1, 10)
+        return [tuple(int(v) for v in box) for box in faces]
+    
+    def align_face(self, image: np.ndarray, box: Tuple[int, int, int, int]) -> np.ndarray:
+        """Crop a face, levelling the eyes first when both are found."""
+        x, y, w, h = box
+        face = image[y:y + h, x:x + w]
+        _, eye_cascade = self._cascades()
+        eyes = eye_cascade.detectMultiScale(cv2.cvtColor(face, cv2.COLOR_BGR2GRAY), 1.1, 10)
+        if len(eyes) < 2:
+            return face
+        
+        eyes = sorted(eyes, key=lambda e: e[2] * e[3], reverse=True)[:2]
+        left, right = sorted(eyes, key=lambda e: e[0])
+        left_center = (x + left[0] + left[2] / 2, y + left[1] + left[3] / 2)
+        right_center = (x + right[0] + right[2] / 2, y + right[1] + right[3] / 2)
+        angle = np.degrees(np.arctan2(right_center[1] - left_center[1], right_center[0] - left_center[0]))
+        center = ((left_center[0] + right_center[0]) / 2, (left_center[1] + right_center[1]) / 2)
+        rotation = cv2.getRotationMatrix2D(center, angle, 1.0)
+        rotated = cv2.warpAffine(image, rotation, (image.shape[1], image.shape[0]))
+        return rotated[y:y + h, x:x + w]
+    
+    def represent(self, images: List) -> List[Optional[np.ndarray]]:
+        """
+        Embed the first detected face of each image in one forward pass.
+        
+        Like DeepFace with enforce_detection=False, an image where no face is
+        found is embedded whole; callers often pass tight face crops that the
+        Haar detector misses.
+        
+        Args:
+            images: Paths, encoded bytes or BGR arrays
+        
+        Returns:
+            One embedding (or None when the image could not be read) per image
+        """
+        crops = []
+        owners = []
+        for i, image in enumerate(images):
+            image = self._read(image)
+            if image is None:
+                continue
+            faces = self.detect_faces(image)
+            face = self.align_face(image, faces[0]) if faces else image
+            crops.append(preprocess_face(face))
+            owners.append(i)
+        
+        encodings = [None] * len(images)
+        if crops:
+            for i, embedding in zip(owners, self.forward(np.stack(crops))):
+                encodings[i] = np.asarray(embedding, dtype=np.float64)
+        return encodings
+
+
+class OnnxRuntimeBackend(EmbeddingBackend):
+    """Facenet512 through ONNX Runtime's CPU provider."""
+    
+    name = 'onnxruntime'
+    
+    def load(self):
+        import onnxruntime
+        
+        options = onnxruntime.SessionOptions()
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+            options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(self.model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+    
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        # InferenceSession.run is thread-safe
+        return self.session.run(None, {self.input_name: batch.astype(np.float32)})[0]
+
+
+class OpenCVDnnBackend(EmbeddingBackend):
+    """Facenet512 through OpenCV's dnn module (no extra dependency)."""
+    
+    name = 'opencv-dnn'
+    
+    def load(self):
+        if self.threads:
+            cv2.setNumThreads(self.threads)
+        self.net = cv2.dnn.readNetFromONNX(self.model_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self._net_lock = threading.Lock()
+    
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        # A cv2.dnn.Net holds per-call state; one forward at a time
+        with self._net_lock:
+            self.net.setInput(batch.astype(np.float32))
+            return self.net.forward()
+
+
+BACKENDS = {backend.name: backend for backend in (OnnxRuntimeBackend, OpenCVDnnBackend)}
+
+
+def create_embedding_backend(config) -> Optional[EmbeddingBackend]:
+    """
+    Build the backend named by EMBEDDING_BACKEND.
+    
+    Args:
+        config: Flask config (or any mapping)
+    
+    Returns:
+        Backend instance, or None for the built-in DeepFace backend
+    """
+    name = (config.get('EMBEDDING_BACKEND') or 'deepface').lower()
+    if name == 'deepface':
+        return None
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{name}' (use deepface, {', '.join(BACKENDS)})")
+    model_path = config.get('EMBEDDING_MODEL_PATH', os.path.join('models', 'facenet512.onnx'))
+    return BACKENDS[name](model_path, threads=config.get('EMBEDDING_THREADS', 0))
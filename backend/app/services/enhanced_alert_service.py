@@ -1,15 +1,14 @@
 """Enhanced alert service with multi-channel support (email, SMS, in-app)."""
 
-import os
 from datetime import datetime
-from flask import current_app
+from sqlalchemy import insert
 from app import db
 from app.models.alert import Alert
+from app.models.notification_counter import NotificationCounter
 from app.models.user import User
-from app.services.sms_service import send_sms_alert
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from app.services.alert_dispatcher import alert_dispatcher
+from app.services.alert_templates import template_fields
+from app.services.event_bus import queue_event
 
 
 class EnhancedAlertService:
@@ -43,51 +42,85 @@ class EnhancedAlertService:
             Alert object
         """
         try:
-            # Get recipients
+            # Resolve recipients once
             if user_id:
-                recipients = [User.query.get(user_id)]
+                recipients = [db.session.get(User, user_id)]
             else:
                 # Notify all admin users
                 recipients = User.query.filter_by(role='admin').all()
+            recipients = [recipient for recipient in recipients if recipient]
             
             if not recipients:
                 print("No recipients found for alert")
                 return None
             
-            # Create alert record(s)
-            alerts = []
+            now = datetime.utcnow()
+            data = data or {}
+            rows = []
             for channel in channels:
+                # Outbound channels share one rendered template per fan-out
+                fields = {'data': data}
+                if channel != 'in_app':
+                    fields = template_fields('general', {
+                        'message': message,
+                        'severity': severity,
+                        'severity_label': severity.upper(),
+                        'category': category,
+                        'category_label': category.replace('_', ' ').title(),
+                        'priority': priority,
+                        'generated_at': now.isoformat(),
+                        'data': data
+                    })
+                
                 for recipient in recipients:
-                    alert = Alert(
-                        message=message,
-                        severity=severity,
-                        category=category,
-                        alert_type=alert_type,
-                        priority=priority,
-                        # user_id=recipient.id,  # Column not in DB yet
-                        delivery_method=channel,
-                        data=data or {},
-                        status='pending'
-                    )
-                    db.session.add(alert)
-                    alerts.append(alert)
+                    row = {
+                        'severity': severity,
+                        'category': category,
+                        'alert_type': alert_type,
+                        'priority': priority,
+                        # 'user_id': recipient.id,  # Column not in DB yet
+                        'message': message,
+                        'delivery_method': channel,
+                        'retry_count': 0,
+                        # Same keys on every row, so all go in one executemany
+                        'subject': None,
+                        'recipient_email': None,
+                        'recipient_phone': None,
+                        'last_error': None,
+                        **fields
+                    }
+                    row.update(EnhancedAlertService._delivery_fields(channel, recipient))
+                    rows.append(row)
             
-            db.session.commit()
+            # One executemany INSERT for every channel and recipient;
+            # RETURNING the delivery fields avoids relying on row order
+            inserted = db.session.execute(
+                insert(Alert).returning(Alert.id, Alert.delivery_method, Alert.status),
+                rows
+            ).all()
             
-            # Send through each channel
-            for alert in alerts:
-                recipient = User.query.get(alert.user_id)
-                
-                if alert.delivery_method == 'email':
-                    EnhancedAlertService._send_email(alert, recipient)
-                elif alert.delivery_method == 'sms':
-                    EnhancedAlertService._send_sms(alert, recipient)
-                elif alert.delivery_method == 'in_app':
-                    # In-app notifications are stored in DB, no action needed
-                    alert.status = 'delivered'
-                    db.session.commit()
+            # Bulk inserts bypass the ORM hooks that keep the unread
+            # counters and publish alert events
+            NotificationCounter.apply_alerts(
+                db.session.connection(),
+                ((None, row['delivery_method'], False) for row in rows)
+            )
+            for alert_id, delivery_method, status in inserted:
+                queue_event(db.session, 'alert', 'created', {
+                    'id': alert_id,
+                    'alert_type': alert_type,
+                    'category': category,
+                    'title': None,
+                    'criminal_id': None,
+                    'detection_log_id': None,
+                    'delivery_method': delivery_method,
+                    'status': status,
+                    'acknowledged': False
+                }, severity)
             
-            return alerts[0] if alerts else None
+            db.session.commit()
+            
+            return db.session.get(Alert, min(row.id for row in inserted)) if inserted else None
             
         except Exception as e:
             db.session.rollback()
@@ -95,111 +128,23 @@ class EnhancedAlertService:
             return None
     
     @staticmethod
-    def _send_email(alert, recipient):
-        """Send email alert."""
-        try:
-            smtp_server = os.getenv('SMTP_SERVER')
-            smtp_port = int(os.getenv('SMTP_PORT', 587))
-            smtp_username = os.getenv('SMTP_EMAIL')  # Using SMTP_EMAIL from .env
-            smtp_password = os.getenv('SMTP_PASSWORD')
-            sender_email = smtp_username  # Sender is same as username
-            
-            if not all([smtp_server, smtp_username, smtp_password]):
-                print("SMTP not configured, skipping email")
-                alert.status = 'failed'
-                db.session.commit()
-                return
-            
-            # Create email
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = f"[{alert.severity.upper()}] {alert.category.replace('_', ' ').title()}"
-            msg['From'] = sender_email
-            msg['To'] = recipient.email
-            
-            # Email body
-            html = f"""
-            <html>
-              <body style="font-family: Arial, sans-serif; padding: 20px;">
-                <div style="max-width: 600px; margin: 0 auto;">
-                  <div style="background: {'#d32f2f' if alert.severity == 'critical' else '#ed6c02' if alert.severity == 'warning' else '#0288d1'}; 
-                              color: white; padding: 15px; border-radius: 5px 5px 0 0;">
-                    <h2 style="margin: 0;">{alert.severity.upper()} Alert</h2>
-                  </div>
-                  <div style="background: #f5f5f5; padding: 20px; border-radius: 0 0 5px 5px;">
-                    <p style="font-size: 16px; line-height: 1.5;">
-                      {alert.message}
-                    </p>
-                    <div style="margin-top: 15px; padding-top: 15px; border-top: 1px solid #ddd;">
-                      <p style="font-size: 12px; color: #666; margin: 5px 0;">
-                        <strong>Category:</strong> {alert.category.replace('_', ' ').title()}
-                      </p>
-                      <p style="font-size: 12px; color: #666; margin: 5px 0;">
-                        <strong>Priority:</strong> {alert.priority}
-                      </p>
-                      <p style="font-size: 12px; color: #666; margin: 5px 0;">
-                        <strong>Time:</strong> {alert.created_at.strftime('%Y-%m-%d %I:%M %p')}
-                      </p>
-                    </div>
-                  </div>
-                </div>
-              </body>
-            </html>
-            """
-            
-            msg.attach(MIMEText(html, 'html'))
-            
-            # Send email
-            with smtplib.SMTP(smtp_server, smtp_port) as server:
-                server.starttls()
-                server.login(smtp_username, smtp_password)
-                server.send_message(msg)
-            
-            alert.status = 'delivered'
-            db.session.commit()
-            print(f"Email alert sent to {recipient.email}")
-            
-        except Exception as e:
-            print(f"Failed to send email alert: {str(e)}")
-            alert.status = 'failed'
-            db.session.commit()
-    
-    @staticmethod
-    def _send_sms(alert, recipient):
-        """Send SMS alert."""
-        try:
-            # Check if SMS is enabled
-            sms_enabled = os.getenv('ENABLE_SMS_ALERTS', 'false').lower() == 'true'
-            if not sms_enabled:
-                print("SMS alerts disabled (ENABLE_SMS_ALERTS=false)")
-                alert.status = 'skipped'
-                db.session.commit()
-                return
-            
-            if not recipient.phone:
-                print(f"User {recipient.username} has no phone number")
-                alert.status = 'failed'
-                db.session.commit()
-                return
-            
-            # Send SMS using SMS service
-            result = send_sms_alert(
-                phone_number=recipient.phone,
-                message_text=alert.message,
-                alert_type=alert.alert_type
-            )
-            
-            if result.get('success'):
-                alert.status = 'delivered'
-                alert.recipient_phone = recipient.phone
-            else:
-                alert.status = 'failed'
-            
-            db.session.commit()
-            
-        except Exception as e:
-            print(f"Failed to send SMS alert: {str(e)}")
-            alert.status = 'failed'
-            db.session.commit()
+    def _delivery_fields(channel, recipient):
+        """
+        Initial delivery state for one recipient on one channel.
+        
+        In-app notifications are delivered by being stored. Email and SMS
+        rows are left pending for the alert dispatcher, which batches
+        identical emails into one message.
+        """
+        if channel == 'in_app':
+            return {'status': 'delivered'}
+        
+        field, address = ('recipient_email', recipient.email) if channel == 'email' else ('recipient_phone', recipient.phone)
+        if not alert_dispatcher.channel_ready(channel):
+            return {field: address, 'status': 'skipped', 'last_error': f'{channel} alerts are not configured'}
+        if not address:
+            return {'status': 'failed', 'last_error': f'User {recipient.username} has no {field.replace("recipient_", "")}'}
+        return {field: address, 'status': 'pending'}
     
     @staticmethod
     def send_detection_alert(criminal_name, location, confidence, detection_data=None):
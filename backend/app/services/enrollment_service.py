@@ -0,0 +1,171 @@
+"""Batch photo enrollment for criminals.
+
+Enrolling many photos used to run save, embed, score and insert once per
+file inside the request. The pipeline here saves and decodes the files in
+a thread pool, embeds all decoded images in one batched model call while
+quality is scored in parallel, and inserts every FaceEncoding row with a
+single statement. The primary photo is chosen in memory.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from sqlalchemy import insert, update
+from werkzeug.utils import secure_filename
+
+from app import db
+from app.models.face_encoding import FaceEncoding
+from app.services.face_service_deepface import face_service_deepface
+from app.utils.quality_assessment import assess_face_quality, determine_pose_type
+
+logger = logging.getLogger(__name__)
+
+ENCODINGS_FOLDER = 'encodings'
+
+
+class EnrollmentService:
+    """Enroll a batch of photos for one criminal."""
+    
+    def __init__(self, face_service, max_workers: int = 4, encodings_folder: str = ENCODINGS_FOLDER):
+        """
+        Args:
+            face_service: Face service providing extract_face_encodings() and save_encoding()
+            max_workers: Threads used to save, decode and score photos
+            encodings_folder: Root folder for enrolled photos (one sub-folder per criminal)
+        """
+        self.face_service = face_service
+        self.max_workers = max_workers
+        self.encodings_folder = encodings_folder
+    
+    def enroll(self, criminal_id: int, photos: List[Tuple[str, bytes]]) -> Dict:
+        """
+        Save, embed, score and store a batch of photos in one transaction.
+        
+        Args:
+            criminal_id: Criminal the photos belong to
+            photos: (original filename, file contents) per photo
+        
+        Returns:
+            Dictionary with 'success_count' and per-photo 'results' in input order
+        """
+        results: List[Optional[Dict]] = [None] * len(photos)
+        if not photos:
+            return {'success_count': 0, 'results': []}
+        
+        directory = os.path.join(self.encodings_folder, str(criminal_id))
+        os.makedirs(directory, exist_ok=True)
+        timestamp = int(time.time())
+        # The index keeps names unique when two uploads share a filename
+        paths = [
+            os.path.join(directory, f"{timestamp}_{index}_{secure_filename(name) or 'photo'}")
+            for index, (name, _) in enumerate(photos)
+        ]
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='enroll') as pool:
+            images = list(pool.map(self._save_and_decode, paths, [data for _, data in photos]))
+            
+            decoded = [i for i, image in enumerate(images) if image is not None]
+            for i in set(range(len(photos))) - set(decoded):
+                results[i] = self._failure(photos[i][0], 'Could not read image')
+            
+            # Score quality in the pool while the model embeds the whole batch
+            qualities = pool.map(assess_face_quality, [images[i] for i in decoded])
+            encodings = self.face_service.extract_face_encodings([images[i] for i in decoded])
+            qualities = list(qualities)
+        
+        rows = []
+        for i, encoding, quality in zip(decoded, encodings, qualities):
+            if encoding is None:
+                results[i] = self._failure(photos[i][0], 'No face detected')
+                continue
+            rows.append({
+                'criminal_id': criminal_id,
+                'encoding_data': self.face_service.save_encoding(encoding),
+                'image_path': paths[i],
+                'quality_score': quality.get('overall_score', 0.5),
+                'pose_type': determine_pose_type(quality.get('frontality_score', 0.5)),
+                'is_primary': False
+            })
+        
+        kept = {row['image_path'] for row in rows}
+        for path in paths:
+            if path not in kept:
+                self._remove(path)
+        
+        if rows:
+            try:
+                ids = self._insert(criminal_id, rows)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                for path in kept:
+                    self._remove(path)
+                raise
+            
+            position = {path: i for i, path in enumerate(paths)}
+            for row in rows:
+                results[position[row['image_path']]] = {
+                    'filename': photos[position[row['image_path']]][0],
+                    'success': True,
+                    'encoding_id': ids[row['image_path']],
+                    'quality_score': row['quality_score'],
+                    'pose_type': row['pose_type'],
+                    'is_primary': row['is_primary']
+                }
+        
+        return {'success_count': len(rows), 'results': results}
+    
+    def _insert(self, criminal_id: int, rows: List[Dict]) -> Dict[str, int]:
+        """Pick the primary photo, then insert all rows in one statement."""
+        existing = db.session.query(
+            FaceEncoding.id, FaceEncoding.quality_score, FaceEncoding.is_primary
+        ).filter(FaceEncoding.criminal_id == criminal_id).all()
+        
+        best_existing = max(existing, key=lambda e: e.quality_score or 0.0, default=None)
+        best_new = max(rows, key=lambda row: row['quality_score'] or 0.0)
+        if best_existing is None or (best_new['quality_score'] or 0.0) >= (best_existing.quality_score or 0.0):
+            best_new['is_primary'] = True
+            primary_id = None
+        else:
+            primary_id = best_existing.id
+        
+        if any(e.is_primary != (e.id == primary_id) for e in existing):
+            db.session.execute(
+                update(FaceEncoding).where(FaceEncoding.criminal_id == criminal_id).values(
+                    is_primary=(FaceEncoding.id == primary_id) if primary_id else False
+                ).execution_options(synchronize_session=False)
+            )
+        
+        inserted = db.session.execute(
+            insert(FaceEncoding).returning(FaceEncoding.id, FaceEncoding.image_path), rows
+        )
+        return {image_path: encoding_id for encoding_id, image_path in inserted}
+    
+    @staticmethod
+    def _save_and_decode(path: str, data: bytes) -> Optional[np.ndarray]:
+        """Write the upload to disk and decode it from memory."""
+        with open(path, 'wb') as f:
+            f.write(data)
+        if not data:
+            return None
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    @staticmethod
+    def _failure(filename: str, error: str) -> Dict:
+        return {'filename': filename, 'success': False, 'error': error}
+
+
+# Global instance
+enrollment_service = EnrollmentService(face_service_deepface)
@@ -0,0 +1,424 @@
+"""Pub/sub bus for live dashboard events."""
+
+import itertools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_LEVELS = {'info': 0, 'warning': 1, 'critical': 2}
+
+# Detections at or above this confidence are published as critical.
+CRITICAL_DETECTION_CONFIDENCE = 0.85
+
+
+class Subscription:
+    """A bounded event queue for one connected client."""
+    
+    def __init__(self, categories=None, min_severity=None, user_id=None, max_queue=100):
+        self.categories = set(categories) if categories else None
+        self.min_level = SEVERITY_LEVELS.get(min_severity, 0)
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+    
+    def matches(self, evt):
+        """Check whether an event passes this subscription's filters."""
+        if self.categories is not None and evt['category'] not in self.categories:
+            return False
+        if SEVERITY_LEVELS.get(evt['severity'], 0) < self.min_level:
+            return False
+        # Events addressed to a user are only delivered to that user
+        if evt.get('user_id') is not None and evt['user_id'] != self.user_id:
+            return False
+        return True
+    
+    def put(self, evt):
+        """Enqueue an event, dropping the oldest one if the client is slow."""
+        while True:
+            try:
+                self.queue.put_nowait(evt)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+    
+    def get(self, timeout=None):
+        """Wait for the next event; returns None on timeout."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class SQLiteEventRelay:
+    """
+    Host-wide event log in a local SQLite file.
+    
+    Every process on the host (gunicorn workers, video jobs, CLI commands)
+    appends the events it publishes, and each bus tails the file to deliver
+    them to its own subscribers and listeners. Row ids are the event ids,
+    so a client can resume with Last-Event-ID on any worker.
+    """
+    
+    def __init__(self, path, retain=1000):
+        self.path = path
+        self.retain = retain
+        self._local = threading.local()
+        self._writes = 0
+        
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, event TEXT NOT NULL)'
+        )
+    
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # SQLite connections must not be used across fork
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def append(self, evt):
+        """Store an event (without its id) and return the id assigned to it."""
+        conn = self._connection()
+        event_id = conn.execute('INSERT INTO events (event) VALUES (?)', (json.dumps(evt),)).lastrowid
+        
+        self._writes += 1
+        if self._writes % 100 == 0:
+            conn.execute('DELETE FROM events WHERE id <= ?', (event_id - self.retain,))
+        return event_id
+    
+    def read_since(self, last_id):
+        """Stored events with an id above `last_id`, oldest first."""
+        rows = self._connection().execute(
+            'SELECT id, event FROM events WHERE id > ? ORDER BY id LIMIT ?',
+            (last_id, self.retain)
+        ).fetchall()
+        return [dict(json.loads(event), id=event_id) for event_id, event in rows]
+    
+    def last_id(self):
+        """Id of the newest stored event (0 if none)."""
+        return self._connection().execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+
+
+class EventBus:
+    """
+    Fan out committed model changes to live subscribers.
+    
+    Events are only published after the transaction that produced them
+    commits. With a relay (EVENT_BUS_BACKEND=sqlite) events committed by
+    any process on the host reach subscribers in every worker, within
+    EVENT_BUS_POLL_SECONDS; without one the bus only sees its own process.
+    Events committed on other hosts are not relayed.
+    """
+    
+    def __init__(self, history_size=256):
+        self._subscriptions = set()
+        self._listeners = []
+        self._history = deque(maxlen=history_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._relay = None
+        self._poll_seconds = 0.25
+        self._cursor = 0  # newest event delivered in this process
+        self._tail_pid = None
+        self._tail_stop = threading.Event()
+    
+    def init_app(self, app):
+        """Configure the relay from EVENT_BUS_BACKEND ('sqlite' or 'memory')."""
+        backend = app.config.get('EVENT_BUS_BACKEND', 'sqlite')
+        if backend == 'sqlite':
+            relay = SQLiteEventRelay(app.config['EVENT_BUS_PATH'])
+            self.use_relay(relay, app.config.get('EVENT_BUS_POLL_SECONDS', 0.25))
+        elif backend == 'memory':
+            self.use_relay(None)
+        else:
+            raise ValueError(f'Unknown event bus backend: {backend}')
+    
+    def use_relay(self, relay, poll_seconds=0.25):
+        """
+        Share events with other processes through `relay` (None for this process only).
+        
+        Args:
+            relay: SQLiteEventRelay, or None
+            poll_seconds: How often the relay is checked for new events
+        """
+        self.stop_relay()
+        with self._lock:
+            self._relay = relay
+            self._poll_seconds = poll_seconds
+    
+    def start_relay(self):
+        """
+        Start delivering relayed events in this process (idempotent).
+        
+        Runs on the first subscription and when the alert dispatcher starts,
+        so a pre-forking master never tails the relay; a forked worker gets
+        its own thread because the pid changed.
+        """
+        with self._lock:
+            if self._relay is None or self._tail_pid == os.getpid():
+                return
+            self._tail_pid = os.getpid()
+            self._cursor = self._relay.last_id()
+            self._tail_stop = threading.Event()
+            threading.Thread(target=self._tail, args=(self._relay, self._tail_stop),
+                             name='event-relay', daemon=True).start()
+    
+    def stop_relay(self):
+        """Stop delivering relayed events in this process."""
+        with self._lock:
+            self._tail_stop.set()
+            self._tail_pid = None
+    
+    def _tail(self, relay, stop):
+        while not stop.wait(self._poll_seconds):
+            try:
+                events = relay.read_since(self._cursor)
+            except Exception as e:
+                logger.warning(f'Event relay read failed: {str(e)}')
+                continue
+            if events:
+                self._deliver(events)
+    
+    def subscribe(self, categories=None, min_severity=None, user_id=None, max_queue=100, last_event_id=None):
+        """
+        Register a subscriber.
+        
+        Args:
+            categories: Iterable of categories to receive (None for all)
+            min_severity: Lowest severity to receive (info, warning, critical)
+            user_id: Subscriber's user id, used for user-addressed events
+            max_queue: Maximum buffered events before the oldest are dropped
+            last_event_id: Replay buffered events newer than this id
+        
+        Returns:
+            Subscription
+        """
+        subscription = Subscription(categories, min_severity, user_id, max_queue)
+        self.start_relay()
+        with self._lock:
+            if last_event_id is not None:
+                for evt in self._replay(last_event_id):
+                    if subscription.matches(evt):
+                        subscription.put(evt)
+            self._subscriptions.add(subscription)
+        return subscription
+    
+    def _replay(self, last_event_id):
+        # Called with the lock held; events after the cursor are still to be delivered
+        if self._relay is None:
+            return [evt for evt in self._history if evt['id'] > last_event_id]
+        return [evt for evt in self._relay.read_since(last_event_id) if evt['id'] <= self._cursor]
+    
+    def unsubscribe(self, subscription):
+        """Remove a subscriber."""
+        with self._lock:
+            self._subscriptions.discard(subscription)
+    
+    def add_listener(self, callback):
+        """Call `callback(event)` for every published event."""
+        with self._lock:
+            self._listeners.append(callback)
+    
+    def publish(self, category, event_type, data, severity='info', user_id=None):
+        """
+        Publish an event immediately.
+        
+        Args:
+            category: Event category (detection, alert, video)
+            event_type: Event name, e.g. 'created' or 'progress'
+            data: JSON-serializable payload
+            severity: info, warning or critical
+            user_id: Restrict delivery to one user (None for everyone)
+        
+        Returns:
+            The published event dictionary
+        """
+        evt = {
+            'category': category,
+            'type': event_type,
+            'severity': severity,
+            'user_id': user_id,
+            'data': data,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        if self._relay is not None:
+            # Every process delivers it from the relay, this one included
+            return dict(evt, id=self._relay.append(evt))
+        return self._deliver([evt])[0]
+    
+    def _deliver(self, events):
+        """Hand events to matching subscribers and to listeners, in id order."""
+        deliveries = []
+        with self._lock:
+            for evt in events:
+                if 'id' not in evt:
+                    evt['id'] = next(self._ids)
+                elif evt['id'] <= self._cursor:
+                    continue
+                self._cursor = evt['id']
+                self._history.append(evt)
+                deliveries.append((evt, [s for s in self._subscriptions if s.matches(evt)]))
+            listeners = list(self._listeners)
+        
+        for evt, subscribers in deliveries:
+            for subscription in subscribers:
+                subscription.put(evt)
+            
+            for listener in listeners:
+                try:
+                    listener(evt)
+                except Exception as e:
+                    logger.warning(f'Event listener failed: {str(e)}')
+        
+        return events
+    
+    def subscriber_count(self):
+        """Get the number of connected subscribers."""
+        with self._lock:
+            return len(self._subscriptions)
+
+
+event_bus = EventBus()
+
+
+def queue_event(session, category, event_type, data, severity='info', user_id=None):
+    """
+    Queue an event to be published when `session` commits.
+    
+    Use this for writes that bypass the ORM unit of work (bulk inserts
+    and updates), which the flush hooks below cannot see.
+    """
+    session.info.setdefault('pending_events', []).append(
+        (category, event_type, data, severity, user_id)
+    )
+
+
+# ORM hooks: build payloads at flush time, while the rows are loaded and
+# have primary keys, and publish them once the transaction commits.
+
+def _detection_event(obj, state, is_new):
+    if is_new:
+        severity = 'critical' if (obj.confidence_score or 0) >= CRITICAL_DETECTION_CONFIDENCE else 'warning'
+        return 'detection', 'created', {
+            'id': obj.id,
+            'criminal_id': obj.criminal_id,
+            'confidence_score': obj.confidence_score,
+            'location': obj.location,
+            'camera_id': obj.camera_id,
+            'status': obj.status,
+            'detected_at': obj.detected_at.isoformat() if obj.detected_at else None
+        }, severity, None
+    if state.attrs.status.history.has_changes():
+        return 'detection', 'status_changed', {
+            'id': obj.id,
+            'criminal_id': obj.criminal_id,
+            'status': obj.status
+        }, 'info', None
+    return None
+
+
+def _alert_event(obj, state, is_new):
+    if is_new:
+        event_type = 'created'
+    elif state.attrs.status.history.has_changes() or state.attrs.acknowledged.history.has_changes():
+        event_type = 'updated'
+    else:
+        return None
+    return 'alert', event_type, {
+        'id': obj.id,
+        'alert_type': obj.alert_type,
+        'category': obj.category,
+        'title': obj.title,
+        'criminal_id': obj.criminal_id,
+        'detection_log_id': obj.detection_log_id,
+        'delivery_method': obj.delivery_method,
+        'status': obj.status,
+        'acknowledged': obj.acknowledged
+    }, obj.severity or 'info', obj.user_id
+
+
+def _video_event(obj, state, is_new):
+    tracked = ('processing_status', 'frames_processed', 'total_faces_detected', 'unique_criminals_matched')
+    if not is_new and not any(state.attrs[name].history.has_changes() for name in tracked):
+        return None
+    
+    if is_new:
+        event_type = 'created'
+    elif state.attrs.processing_status.history.has_changes():
+        event_type = obj.processing_status
+    else:
+        event_type = 'progress'
+    
+    progress = None
+    if obj.total_frames:
+        progress = round(min((obj.frames_processed or 0) / obj.total_frames, 1.0) * 100, 1)
+    
+    return 'video', event_type, {
+        'id': obj.id,
+        'video_filename': obj.video_filename,
+        'processing_status': obj.processing_status,
+        'frames_processed': obj.frames_processed,
+        'total_frames': obj.total_frames,
+        'progress_percent': progress,
+        'total_faces_detected': obj.total_faces_detected,
+        'unique_criminals_matched': obj.unique_criminals_matched,
+        'error_message': obj.error_message
+    }, 'warning' if obj.processing_status == 'failed' else 'info', None
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_events(session, flush_context):
+    from app.models.alert import Alert
+    from app.models.detection_log import DetectionLog
+    from app.models.video_detection import VideoDetection
+    
+    pending = session.info.setdefault('pending_events', [])
+    new_objects = set(session.new)
+    
+    for obj in list(session.new) + list(session.dirty):
+        is_new = obj in new_objects
+        state = inspect(obj)
+        
+        if isinstance(obj, DetectionLog):
+            evt = _detection_event(obj, state, is_new)
+        elif isinstance(obj, Alert):
+            evt = _alert_event(obj, state, is_new)
+        elif isinstance(obj, VideoDetection):
+            evt = _video_event(obj, state, is_new)
+        else:
+            evt = None
+        
+        if evt is not None:
+            pending.append(evt)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_events(session):
+    for category, event_type, data, severity, user_id in session.info.pop('pending_events', []):
+        try:
+            event_bus.publish(category, event_type, data, severity=severity, user_id=user_id)
+        except Exception as e:
+            logger.warning(f'Failed to publish {category} event: {str(e)}')
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_events(session, previous_transaction):
+    session.info.pop('pending_events', None)
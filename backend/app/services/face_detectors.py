@@ -0,0 +1,136 @@
+"""Face detector registry.
+
+FaceServiceDeepFace detects with DeepFace's 'opencv' backend (Haar cascade
+plus eye alignment) unless a pipeline is configured to use a detector from
+this registry. Each pipeline picks its own detector, so video processing
+can run the fast SSD while uploads keep the built-in detector:
+    
+    FACE_DETECTOR_UPLOAD / FACE_DETECTOR_LIVE / FACE_DETECTOR_VIDEO
+        deepface   built-in DeepFace detector (default)
+        ssd        res10_300x300 SSD through OpenCV dnn (download_models.py)
+
+benchmark_face_detectors.py measures speed and recall on an annotated set.
+"""
+
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BUILTIN_DETECTOR = 'deepface'
+PIPELINES = ('upload', 'live', 'video')
+
+
+class FaceDetector:
+    """Find face boxes in a BGR image."""
+    
+    name = None
+    
+    def load(self):
+        """Load the model; raises if it is missing."""
+    
+    def detect(self, image: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """
+        Args:
+            image: BGR image
+        
+        Returns:
+            List of (x, y, width, height) tuples, most confident first
+        """
+        return [box for box, _ in self.detect_with_scores(image)]
+    
+    def detect_with_scores(self, image: np.ndarray) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        raise NotImplementedError
+
+
+class SSDDetector(FaceDetector):
+    """OpenCV's res10 SSD face detector (Caffe) run through cv2.dnn."""
+    
+    name = 'ssd'
+    MEAN = (104.0, 177.0, 123.0)
+    
+    def __init__(self, prototxt: str, model: str, confidence: float = 0.5, input_size: int = 300,
+                 min_face_size: int = 20, threads: int = 0):
+        """
+        Args:
+            prototxt: Network definition (models/deploy.prototxt)
+            model: Weights (models/res10_300x300_ssd_iter_140000.caffemodel)
+            confidence: Minimum detection score (0-1); lower finds more faces
+            input_size: Square network input; smaller is faster, larger finds small faces
+            min_face_size: Boxes narrower or shorter than this (pixels) are dropped
+            threads: OpenCV threads (0 = OpenCV default)
+        """
+        self.prototxt = prototxt
+        self.model = model
+        self.confidence = confidence
+        self.input_size = input_size
+        self.min_face_size = min_face_size
+        self.threads = threads
+        self.net = None
+        self._lock = threading.Lock()
+    
+    def load(self):
+        if not os.path.exists(self.model):
+            raise FileNotFoundError(f'{self.model} not found; run download_models.py')
+        if self.threads:
+            cv2.setNumThreads(self.threads)
+        # readNet picks the Caffe importer from the extensions (OpenCV 4.x)
+        self.net = cv2.dnn.readNet(self.model, self.prototxt)
+    
+    def detect_with_scores(self, image: np.ndarray) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        height, width = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(image, 1.0, (self.input_size, self.input_size), self.MEAN)
+        # A cv2.dnn.Net holds per-call state; one forward at a time
+        with self._lock:
+            self.net.setInput(blob)
+            detections = self.net.forward()
+        
+        # Rows are [image_id, label, score, x1, y1, x2, y2] with coordinates in [0, 1]
+        rows = detections.reshape(-1, 7)
+        rows = rows[rows[:, 2] >= self.confidence]
+        faces = []
+        for score, x1, y1, x2, y2 in rows[np.argsort(-rows[:, 2])][:, 2:7]:
+            x1, x2 = (np.clip([x1, x2], 0, 1) * width).astype(int)
+            y1, y2 = (np.clip([y1, y2], 0, 1) * height).astype(int)
+            w, h = x2 - x1, y2 - y1
+            if w >= self.min_face_size and h >= self.min_face_size:
+                faces.append(((int(x1), int(y1), int(w), int(h)), float(score)))
+        return faces
+
+
+def _ssd_from_config(config) -> SSDDetector:
+    return SSDDetector(
+        config.get('SSD_PROTOTXT', os.path.join('models', 'deploy.prototxt')),
+        config.get('SSD_MODEL', os.path.join('models', 'res10_300x300_ssd_iter_140000.caffemodel')),
+        confidence=config.get('SSD_CONFIDENCE', 0.5),
+        input_size=config.get('SSD_INPUT_SIZE', 300),
+        min_face_size=config.get('SSD_MIN_FACE_SIZE', 20)
+    )
+
+
+# Detector name -> factory taking the app config
+DETECTORS: Dict[str, Callable] = {
+    'ssd': _ssd_from_config
+}
+
+
+def register_detector(name: str, factory: Callable):
+    """Make a detector selectable by name (factory takes the app config)."""
+    DETECTORS[name] = factory
+
+
+def create_detector(name: str, config) -> FaceDetector:
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown face detector '{name}' (use {BUILTIN_DETECTOR}, {', '.join(DETECTORS)})")
+    return DETECTORS[name](config)
+
+
+def pipeline_detectors(config) -> Dict[str, str]:
+    """Detector name per pipeline from ``FACE_DETECTOR_<PIPELINE>``."""
+    return {pipeline: (config.get(f'FACE_DETECTOR_{pipeline.upper()}') or BUILTIN_DETECTOR).lower()
+            for pipeline in PIPELINES}
@@ -8,13 +8,35 @@ import cv2
 import numpy as np
 import os
 import pickle
+import threading
+import time
 from typing import List, Dict, Tuple, Optional
 import logging
-from deepface import DeepFace
+
+from app.services.face_detectors import BUILTIN_DETECTOR, create_detector, pipeline_detectors
 
 logger = logging.getLogger(__name__)
 
 
+# Bound on first use by _deepface()
+DeepFace = None
+
+
+def _deepface():
+    """
+    Import DeepFace on first use.
+    
+    DeepFace pulls in TensorFlow (seconds of startup, hundreds of MB of
+    RSS), so importing this module must stay cheap: CLI commands and
+    non-vision blueprints import it without ever touching the model.
+    """
+    global DeepFace
+    if DeepFace is None:
+        from deepface import DeepFace as deepface_module
+        DeepFace = deepface_module
+    return DeepFace
+
+
 class FaceServiceDeepFace:
     """
     Production-grade face recognition using DeepFace.
@@ -45,19 +67,172 @@ class FaceServiceDeepFace:
     # For compatibility with old code
     RECOGNITION_THRESHOLD = 0.40  # Cosine distance threshold (relaxed for real-world photos)
     
+    # Delay before a failed load is retried, doubling per failure
+    RETRY_BASE_SECONDS = 5
+    RETRY_MAX_SECONDS = 300
+    
     def __init__(self):
-        """Initialize DeepFace service."""
-        logger.info(f"Initializing DeepFace with model: {self.MODEL_NAME}")
-        logger.info(f"Expected accuracy: {self._get_accuracy()}")
+        """Create the service; the model is loaded by warm_up() or on first use."""
+        self._state = 'not_loaded'  # not_loaded, loading, ready, failed
+        self._error = None
+        self._load_seconds = None
+        self._failures = 0
+        self._retry_at = 0.0  # time.monotonic() after which a failed load is retried
+        self._lock = threading.Lock()
+        self._remote = None
+        self._embedder = None
+        self._detector_config = {}
+        self._pipeline_detectors = {}
+        self._detectors = {}  # name -> loaded FaceDetector, None if unavailable
+    
+    @property
+    def status(self) -> Dict:
+        """Model load state, for readiness checks."""
+        if self._remote is not None:
+            # The sidecar owns the model; report its state live
+            try:
+                return self._remote.ping()['face_model']
+            except Exception as e:
+                return {'model': self.MODEL_NAME, 'state': 'unavailable', 'error': str(e), 'load_seconds': None}
+        return {
+            'model': self.MODEL_NAME,
+            'backend': self._embedder.name if self._embedder else 'deepface',
+            'state': self._state,
+            'error': self._error,
+            'load_seconds': self._load_seconds
+        }
+    
+    @property
+    def ready(self) -> bool:
+        return self.status['state'] == 'ready'
+    
+    def use_inference_server(self, client):
+        """
+        Send detection and embedding to an inference sidecar.
         
-        # Pre-load model to avoid first-time delay
-        try:
-            # This will download model if not present (~100MB first time)
-            DeepFace.build_model(self.MODEL_NAME)
-            logger.info(f"✓ {self.MODEL_NAME} model loaded successfully")
-        except Exception as e:
-            logger.error(f"Model loading failed: {str(e)}")
-            logger.warning("Model will be downloaded on first use")
+        The model is then never loaded in this process; warm_up() only
+        checks that the server answers.
+        
+        Args:
+            client: InferenceClient, or None to run the model in-process again
+        """
+        with self._lock:
+            self._remote = client
+            self._state = 'not_loaded'
+            self._error = None
+    
+    def close_inference_connection(self):
+        """Close this thread's inference server connection, if any."""
+        if self._remote is not None:
+            self._remote.close()
+    
+    def use_embedding_backend(self, backend):
+        """
+        Detect and embed with a non-TensorFlow backend (see embedding_backends).
+        
+        Args:
+            backend: EmbeddingBackend, or None for DeepFace
+        """
+        with self._lock:
+            self._embedder = backend
+            self._state = 'not_loaded'
+            self._error = None
+    
+    def configure_detectors(self, config):
+        """
+        Choose the face detector of each pipeline (``FACE_DETECTOR_*``).
+        
+        Args:
+            config: Flask config with the detector names and ``SSD_*`` settings
+        """
+        with self._lock:
+            self._detector_config = config
+            self._pipeline_detectors = pipeline_detectors(config)
+            self._detectors = {}
+    
+    def detector_for(self, pipeline: str) -> str:
+        """Detector name configured for 'upload', 'live' or 'video'."""
+        return self._pipeline_detectors.get(pipeline, BUILTIN_DETECTOR)
+    
+    def _detector(self, name: str):
+        """Registry detector, loaded on first use; None falls back to the built-in one."""
+        if name not in self._detectors:
+            with self._lock:
+                if name not in self._detectors:
+                    try:
+                        detector = create_detector(name, self._detector_config)
+                        detector.load()
+                    except Exception as e:
+                        logger.error(f"Face detector '{name}' unavailable, using {BUILTIN_DETECTOR}: {str(e)}")
+                        detector = None
+                    self._detectors[name] = detector
+        return self._detectors[name]
+    
+    def warm_up(self) -> bool:
+        """
+        Import DeepFace/TensorFlow and build the model (idempotent).
+        
+        Returns:
+            True if the model is loaded
+        """
+        with self._lock:
+            if self._state == 'ready':
+                return True
+            self._state = 'loading'
+            logger.info(f"Initializing DeepFace with model: {self.MODEL_NAME}")
+            logger.info(f"Expected accuracy: {self._get_accuracy()}")
+            started = time.perf_counter()
+            try:
+                if self._remote is not None:
+                    self._remote.ping()
+                elif self._embedder is not None:
+                    self._embedder.load()
+                else:
+                    # This will download model if not present (~100MB first time)
+                    _deepface().build_model(self.MODEL_NAME)
+            except Exception as e:
+                self._state = 'failed'
+                self._error = str(e)
+                self._failures += 1
+                delay = min(self.RETRY_BASE_SECONDS * 2 ** (self._failures - 1), self.RETRY_MAX_SECONDS)
+                self._retry_at = time.monotonic() + delay
+                logger.error(f"Model loading failed: {str(e)}")
+                logger.warning(f"Model loading will be retried in {delay}s")
+                return False
+            self._state = 'ready'
+            self._error = None
+            self._failures = 0
+            self._load_seconds = round(time.perf_counter() - started, 2)
+            logger.info(f"✓ {self.MODEL_NAME} model loaded successfully in {self._load_seconds}s")
+            return True
+    
+    def start_warm_up(self) -> threading.Thread:
+        """Load the model in a background thread so startup is not blocked."""
+        thread = threading.Thread(target=self.warm_up, name='face-model-warmup', daemon=True)
+        thread.start()
+        return thread
+    
+    def _load_due(self) -> bool:
+        """Not loaded yet, or failed and the retry delay has passed."""
+        return self._state == 'not_loaded' or (self._state == 'failed' and time.monotonic() >= self._retry_at)
+    
+    def retry_failed_warm_up(self) -> Optional[threading.Thread]:
+        """Start another background load if the last one failed and its retry is due."""
+        if self._state == 'failed' and self._load_due():
+            return self.start_warm_up()
+        return None
+    
+    def _model(self):
+        """DeepFace, with the model loaded on first use (or retried after a failure)."""
+        if self._load_due():
+            self.warm_up()
+        return _deepface()
+    
+    def _embedding_backend(self):
+        """The configured embedding backend, loaded on first use (or retried after a failure)."""
+        if self._load_due():
+            self.warm_up()
+        return self._embedder
     
     def _get_accuracy(self) -> str:
         """Get expected accuracy for current model."""
@@ -70,19 +245,36 @@ class FaceServiceDeepFace:
         }
         return accuracies.get(self.MODEL_NAME, "99%+")
     
-    def detect_faces(self, image_path: str) -> List[Tuple[int, int, int, int]]:
+    def detect_faces(self, image_path, detector: Optional[str] = None) -> List[Tuple[int, int, int, int]]:
         """
-        Detect faces using DeepFace's built-in detector.
+        Detect faces using DeepFace's built-in detector or a registry detector.
         
         Args:
-            image_path: Path to image file
+            image_path: Path to image file, or an already decoded BGR array
+            detector: Detector name (see face_detectors); None for the built-in one
             
         Returns:
             List of (x, y, width, height) tuples
         """
         try:
+            if self._remote is not None:
+                return self._remote.detect(image_path, detector)
+            
+            registered = self._detector(detector) if detector and detector != BUILTIN_DETECTOR else None
+            if registered is not None:
+                image = image_path if isinstance(image_path, np.ndarray) else cv2.imread(image_path)
+                if image is None:
+                    logger.warning(f"Could not read image {image_path}")
+                    return []
+                face_regions = registered.detect(image)
+                logger.info(f"Detected {len(face_regions)} face(s) with {detector}")
+                return face_regions
+            
+            if self._embedder is not None:
+                return self._embedding_backend().detect_faces(image_path)
+            
             # DeepFace.extract_faces returns detected faces with coordinates
-            faces = DeepFace.extract_faces(
+            faces = self._model().extract_faces(
                 img_path=image_path,
                 detector_backend='opencv',  # Fast and reliable
                 enforce_detection=False,     # Don't fail if no face
@@ -108,21 +300,26 @@ class FaceServiceDeepFace:
             logger.error(f"Face detection failed: {str(e)}")
             return []
     
-    def extract_face_encoding(self, image_path: str) -> Optional[np.ndarray]:
+    def extract_face_encoding(self, image_path) -> Optional[np.ndarray]:
         """
         Extract face embedding using DeepFace.
         
         Returns 128-D (Facenet) or 512-D (Facenet512) or 2622-D (VGG-Face) embedding.
         
         Args:
-            image_path: Path to image file
+            image_path: Path to image file, or an already decoded BGR array
             
         Returns:
             Face embedding as numpy array
         """
         try:
+            if self._remote is not None:
+                return self._remote.embed([image_path])[0]
+            if self._embedder is not None:
+                return self._embedding_backend().represent([image_path])[0]
+            
             # DeepFace.represent extracts embeddings
-            embedding_objs = DeepFace.represent(
+            embedding_objs = self._model().represent(
                 img_path=image_path,
                 model_name=self.MODEL_NAME,
                 enforce_detection=False,  # Don't throw error if no face detected
@@ -149,6 +346,49 @@ class FaceServiceDeepFace:
             logger.error(f"Embedding extraction failed: {str(e)}", exc_info=True)
             return None
     
+    def extract_face_encodings(self, images: List) -> List[Optional[np.ndarray]]:
+        """
+        Extract embeddings for many images in as few model calls as possible.
+        
+        DeepFace releases that accept a list of images embed them in one
+        batched forward pass; older releases reject the list and each image
+        is embedded on its own.
+        
+        Args:
+            images: Image paths or decoded BGR arrays
+        
+        Returns:
+            One embedding (or None when no face was found) per image
+        """
+        if not images:
+            return []
+        
+        if self._remote is not None or self._embedder is not None:
+            try:
+                if self._remote is not None:
+                    return self._remote.embed(list(images))
+                return self._embedding_backend().represent(list(images))
+            except Exception as e:
+                logger.error(f"Embedding extraction failed: {str(e)}")
+                return [None] * len(images)
+        
+        try:
+            batch = self._model().represent(
+                img_path=list(images),
+                model_name=self.MODEL_NAME,
+                enforce_detection=False,
+                detector_backend='opencv',
+                align=True
+            )
+            if len(batch) == len(images) and all(isinstance(objs, list) for objs in batch):
+                encodings = [np.array(objs[0]['embedding']) if objs else None for objs in batch]
+                logger.info(f"Extracted {len(images)} embedding(s) in one batch using {self.MODEL_NAME}")
+                return encodings
+        except Exception as e:
+            logger.debug(f"Batched embedding unavailable, falling back to per-image calls: {str(e)}")
+        
+        return [self.extract_face_encoding(image) for image in images]
+    
     def compare_faces(self, known_encoding: np.ndarray, unknown_encoding: np.ndarray) -> Tuple[bool, float]:
         """
         Compare two face embeddings.
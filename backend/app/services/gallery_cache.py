@@ -0,0 +1,116 @@
+"""In-memory gallery of known face encodings.
+
+Live detection matches every face against every stored encoding, which used
+to mean a full FaceEncoding query and one unpickle per row per request. The
+gallery decodes them once into a single contiguous float32 matrix.
+
+Under a pre-forking server the gallery is loaded in the master before the
+workers fork (see ``prepare_for_fork``), so all workers read the same pages
+copy-on-write: one large array buffer is never written, whereas thousands of
+small per-row arrays would each have their object header touched by
+reference counting.
+"""
+
+import logging
+import pickle
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+
+from app import db
+from app.models.face_encoding import FaceEncoding
+
+logger = logging.getLogger(__name__)
+
+
+class GalleryCache:
+    """Decoded face encodings, reloaded when the face_encodings table changes."""
+    
+    def __init__(self):
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self._entries: List[Dict] = []
+        self._signature: Optional[Tuple] = None
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    @staticmethod
+    def signature() -> Tuple:
+        """Cheap change marker: row count, highest id and latest insert time."""
+        count, max_id, latest = db.session.query(
+            func.count(FaceEncoding.id), func.max(FaceEncoding.id), func.max(FaceEncoding.created_at)
+        ).one()
+        return count, max_id, latest
+    
+    def load(self) -> int:
+        """
+        Read and decode every stored encoding.
+        
+        Returns:
+            Number of encodings loaded
+        """
+        signature = self.signature()
+        rows = db.session.query(
+            FaceEncoding.id, FaceEncoding.criminal_id, FaceEncoding.encoding_data,
+            FaceEncoding.quality_score, FaceEncoding.pose_type, FaceEncoding.is_primary
+        ).order_by(FaceEncoding.id).all()
+        
+        vectors = []
+        metadata = []
+        for row in rows:
+            try:
+                vectors.append(np.asarray(pickle.loads(row.encoding_data), dtype=np.float32).ravel())
+            except Exception as e:
+                logger.error(f"Error loading encoding {row.id}: {str(e)}")
+                continue
+            metadata.append(row)
+        
+        # Encodings from different models cannot share one matrix; keep the
+        # dominant dimension and report the rest
+        if vectors:
+            dims = [len(v) for v in vectors]
+            dim = max(set(dims), key=dims.count)
+            skipped = [row.id for row, d in zip(metadata, dims) if d != dim]
+            if skipped:
+                logger.warning(f"Skipping {len(skipped)} encoding(s) not {dim}-D: {skipped[:10]}")
+            keep = [i for i, d in enumerate(dims) if d == dim]
+            matrix = np.ascontiguousarray(np.stack([vectors[i] for i in keep]))
+            metadata = [metadata[i] for i in keep]
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        matrix.setflags(write=False)
+        
+        entries = [{
+            'id': row.id,
+            'criminal_id': row.criminal_id,
+            'encoding': matrix[i],
+            'quality_score': row.quality_score or 0.7,
+            'pose_type': row.pose_type,
+            'is_primary': row.is_primary
+        } for i, row in enumerate(metadata)]
+        
+        with self._lock:
+            self.matrix = matrix
+            self._entries = entries
+            self._signature = signature
+        logger.info(f"Gallery loaded: {len(entries)} encoding(s), {matrix.nbytes / 1024:.0f} KiB")
+        return len(entries)
+    
+    def known_encodings(self) -> List[Dict]:
+        """
+        Encodings in the shape find_matches() expects, reloaded if stale.
+        
+        Returns:
+            List of dicts with 'id', 'criminal_id', 'encoding', 'quality_score',
+            'pose_type' and 'is_primary'
+        """
+        if self._signature is None or self.signature() != self._signature:
+            self.load()
+        return self._entries
+
+
+# Global instance
+gallery_cache = GalleryCache()
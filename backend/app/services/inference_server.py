@@ -0,0 +1,425 @@
+"""Face inference sidecar over a Unix domain socket.
+
+`flask inference-server` runs one process that owns the face detector and
+embedding model; Flask workers configured with INFERENCE_SOCKET send their
+detect/embed/match calls to it instead of loading TensorFlow themselves.
+Requests from all workers share one queue and are dynamically batched, so
+HTTP concurrency (gunicorn workers) and model concurrency (inference
+threads) are sized separately.
+
+Framing: every message is a fixed header followed by a small JSON metadata
+block and a binary payload that carries image buffers and embeddings as-is.
+    
+    header   !2sBIII  magic b'FI', op (request) or status (response),
+                      request id, metadata length, payload length
+    images   metadata {'images': [{'kind': 'encoded' | 'raw', 'length',
+                      'shape', 'dtype'}]}, payload = buffers back to back
+    vectors  float32 rows in the payload, metadata {'dims': D, ...}
+"""
+
+import itertools
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'FI'
+HEADER = struct.Struct('!2sBIII')
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+OP_PING = 0
+OP_DETECT = 1
+OP_EMBED = 2
+OP_MATCH = 3
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+class InferenceError(RuntimeError):
+    """The inference server could not be reached or reported an error."""
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise ConnectionError('Connection closed by peer')
+        received += count
+    return bytes(buffer)
+
+
+def send_frame(sock, code, request_id, meta=None, payload=b''):
+    """Write one frame: header, JSON metadata, binary payload."""
+    meta_bytes = json.dumps(meta or {}, separators=(',', ':')).encode()
+    sock.sendall(HEADER.pack(MAGIC, code, request_id, len(meta_bytes), len(payload)) + meta_bytes)
+    if payload:
+        sock.sendall(payload)
+
+
+def recv_frame(sock):
+    """
+    Read one frame.
+    
+    Returns:
+        (code, request_id, meta, payload)
+    """
+    magic, code, request_id, meta_length, payload_length = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if magic != MAGIC or meta_length + payload_length > MAX_FRAME_BYTES:
+        raise ConnectionError('Malformed frame')
+    meta = json.loads(_recv_exact(sock, meta_length)) if meta_length else {}
+    payload = _recv_exact(sock, payload_length) if payload_length else b''
+    return code, request_id, meta, payload
+
+
+def pack_images(images):
+    """
+    Serialize images for a request.
+    
+    Args:
+        images: Paths or encoded bytes (sent as-is) or decoded arrays (sent raw)
+    
+    Returns:
+        (metadata entries, payload)
+    """
+    entries = []
+    buffers = []
+    for image in images:
+        if isinstance(image, np.ndarray):
+            data = np.ascontiguousarray(image).tobytes()
+            entries.append({'kind': 'raw', 'length': len(data), 'shape': list(image.shape), 'dtype': str(image.dtype)})
+        else:
+            if isinstance(image, str):
+                with open(image, 'rb') as f:
+                    data = f.read()
+            else:
+                data = bytes(image)
+            entries.append({'kind': 'encoded', 'length': len(data)})
+        buffers.append(data)
+    return entries, b''.join(buffers)
+
+
+def unpack_images(entries, payload):
+    """Decode request images; undecodable buffers become None."""
+    images = []
+    offset = 0
+    for entry in entries:
+        data = payload[offset:offset + entry['length']]
+        offset += entry['length']
+        if entry['kind'] == 'raw':
+            images.append(np.frombuffer(data, dtype=entry['dtype']).reshape(entry['shape']))
+        else:
+            images.append(cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR))
+    return images
+
+
+def pack_vectors(vectors):
+    """Serialize optional embeddings as float32 rows plus a presence mask."""
+    found = [vector is not None for vector in vectors]
+    rows = [np.asarray(vector, dtype=np.float32).ravel() for vector in vectors if vector is not None]
+    dims = len(rows[0]) if rows else 0
+    payload = np.stack(rows).tobytes() if rows else b''
+    return {'dims': dims, 'found': found}, payload
+
+
+def unpack_vectors(meta, payload):
+    rows = iter(np.frombuffer(payload, dtype=np.float32).reshape(-1, meta['dims'])) if meta['dims'] else iter(())
+    return [next(rows).astype(np.float64) if found else None for found in meta['found']]
+
+
+class _Pending:
+    """One queued request waiting for its batch to run."""
+    
+    def __init__(self, op, images=None, vector=None, detector=None):
+        self.op = op
+        self.images = images or []
+        self.vector = vector
+        self.detector = detector
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class InferenceServer:
+    """Serve detect/embed/match requests from a dynamically batched queue."""
+    
+    def __init__(self, app, socket_path: str, face_service=None, max_batch: int = 16,
+                 max_wait_ms: float = 5, threads: int = 1):
+        """
+        Args:
+            app: Flask app (for the gallery used by match requests)
+            socket_path: Unix socket to listen on
+            face_service: Local FaceServiceDeepFace (default: a fresh one on EMBEDDING_BACKEND)
+            max_batch: Most images embedded in one model call
+            max_wait_ms: How long a batch waits for more requests to arrive
+            threads: Batches run concurrently (the CPU inference pool)
+        """
+        if face_service is None:
+            from app.services.embedding_backends import create_embedding_backend
+            from app.services.face_service_deepface import FaceServiceDeepFace
+            face_service = FaceServiceDeepFace()
+            face_service.use_embedding_backend(create_embedding_backend(app.config))
+            face_service.configure_detectors(app.config)
+        self.app = app
+        self.socket_path = socket_path
+        self.face_service = face_service
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.threads = threads
+        self._queue = queue.Queue()
+        self._server = None
+        self._workers = []
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'batches': 0, 'images': 0}
+    
+    def status(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {'face_model': self.face_service.status, 'threads': self.threads,
+                'max_batch': self.max_batch, **stats}
+    
+    def submit(self, pending: _Pending, timeout: Optional[float] = None):
+        """Queue a request and wait for its result."""
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise InferenceError('Timed out waiting for inference')
+        if pending.error:
+            raise InferenceError(pending.error)
+        return pending.result
+    
+    def _next_batch(self):
+        """Block for one request, then gather more until full or the wait expires."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        size = max(len(first.images), 1)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if pending is None:
+                self._queue.put(None)
+                break
+            batch.append(pending)
+            size += max(len(pending.images), 1)
+        return batch
+    
+    def _run_batch(self, batch: List[_Pending]):
+        embeds = [p for p in batch if p.op == OP_EMBED]
+        try:
+            images = [image for p in embeds for image in p.images]
+            decoded = [i for i, image in enumerate(images) if image is not None]
+            encodings = [None] * len(images)
+            for i, encoding in zip(decoded, self.face_service.extract_face_encodings([images[i] for i in decoded])):
+                encodings[i] = encoding
+            offset = 0
+            for pending in embeds:
+                pending.result = encodings[offset:offset + len(pending.images)]
+                offset += len(pending.images)
+        except Exception as e:
+            for pending in embeds:
+                pending.error = str(e)
+        
+        for pending in batch:
+            try:
+                if pending.op == OP_DETECT:
+                    image = pending.images[0]
+                    pending.result = (self.face_service.detect_faces(image, detector=pending.detector)
+                                      if image is not None else [])
+                elif pending.op == OP_MATCH:
+                    from app import db
+                    from app.services.gallery_cache import gallery_cache
+                    with self.app.app_context():
+                        known = gallery_cache.known_encodings()
+                        pending.result = self.face_service.find_matches(pending.vector, known)
+                        db.session.remove()
+            except Exception as e:
+                pending.error = str(e)
+            pending.done.set()
+        
+        with self._stats_lock:
+            self.stats['requests'] += len(batch)
+            self.stats['batches'] += 1
+            self.stats['images'] += sum(len(p.images) for p in batch)
+    
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._run_batch(batch)
+    
+    def _handle(self, conn):
+        """Serve one client connection until it closes."""
+        while True:
+            try:
+                op, request_id, meta, payload = recv_frame(conn)
+            except (ConnectionError, OSError, struct.error, ValueError):
+                return
+            try:
+                if op == OP_PING:
+                    response = (self.status(), b'')
+                elif op in (OP_DETECT, OP_EMBED):
+                    images = unpack_images(meta.get('images', []), payload)
+                    if op == OP_DETECT and len(images) != 1:
+                        raise ValueError('detect takes exactly one image')
+                    result = self.submit(_Pending(op, images=images, detector=meta.get('detector')))
+                    if op == OP_DETECT:
+                        response = ({'faces': [[int(v) for v in box] for box in result]}, b'')
+                    else:
+                        response = pack_vectors(result)
+                elif op == OP_MATCH:
+                    vector = np.frombuffer(payload, dtype=np.float32).astype(np.float64)
+                    response = ({'matches': self.submit(_Pending(op, vector=vector))}, b'')
+                else:
+                    raise ValueError(f'Unknown op {op}')
+                send_frame(conn, STATUS_OK, request_id, *response)
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                send_frame(conn, STATUS_ERROR, request_id, {'error': str(e)})
+    
+    def start(self):
+        """Bind the socket and start the inference threads (non-blocking)."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = self
+        
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                server._handle(self.request)
+        
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self._server.daemon_threads = True
+        os.chmod(self.socket_path, 0o660)
+        self._workers = [threading.Thread(target=self._work, name=f'inference-{i}', daemon=True)
+                         for i in range(self.threads)]
+        for worker in self._workers:
+            worker.start()
+        threading.Thread(target=self._server.serve_forever, name='inference-accept', daemon=True).start()
+        logger.info(f"Inference server listening on {self.socket_path} "
+                    f"(threads={self.threads}, max_batch={self.max_batch})")
+    
+    def stop(self):
+        """Stop accepting connections and let the inference threads exit."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(5)
+        self._workers = []
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class InferenceClient:
+    """
+    Blocking client; each thread keeps its own connection.
+    
+    Connections are tagged with the pid that opened them. A forked worker
+    inherits the master's socket, and two processes reading one stream
+    would steal each other's responses, so the child opens its own.
+    """
+    
+    def __init__(self, socket_path: str, timeout: float = 30):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._ids_lock = threading.Lock()
+    
+    def _connect(self):
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(self.timeout)
+        conn.connect(self.socket_path)
+        return conn
+    
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid != os.getpid():
+            # Inherited across fork: closing our copy leaves the parent's open
+            self.close()
+            conn = None
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+        return conn
+    
+    def close(self):
+        """Close this thread's connection (e.g. before forking workers)."""
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn:
+            conn.close()
+    
+    def call(self, op, meta=None, payload=b''):
+        """
+        Send one request and wait for the response.
+        
+        Returns:
+            (meta, payload) of the response
+        """
+        with self._ids_lock:
+            request_id = next(self._ids) & 0xFFFFFFFF
+        for attempt in (1, 2):
+            try:
+                conn = self._connection()
+                send_frame(conn, op, request_id, meta, payload)
+                status, response_id, response_meta, response_payload = recv_frame(conn)
+                break
+            except (ConnectionError, OSError) as e:
+                # A connection inherited across a server restart fails once; retry on a fresh one
+                self.close()
+                if attempt == 2:
+                    raise InferenceError(f'Inference server unavailable: {str(e)}') from e
+        if response_id != request_id:
+            self.close()
+            raise InferenceError('Out-of-order response')
+        if status != STATUS_OK:
+            raise InferenceError(response_meta.get('error', 'Inference failed'))
+        return response_meta, response_payload
+    
+    def ping(self) -> Dict:
+        """Server status, including its face model state and batching stats."""
+        return self.call(OP_PING)[0]
+    
+    def detect(self, image, detector: Optional[str] = None) -> List[tuple]:
+        """Face boxes (x, y, w, h) in one image (path, encoded bytes or array)."""
+        entries, payload = pack_images([image])
+        meta, _ = self.call(OP_DETECT, {'images': entries, 'detector': detector}, payload)
+        return [tuple(box) for box in meta['faces']]
+    
+    def embed(self, images) -> List[Optional[np.ndarray]]:
+        """One embedding (or None when no face was found) per image."""
+        if not images:
+            return []
+        entries, payload = pack_images(images)
+        return unpack_vectors(*self.call(OP_EMBED, {'images': entries}, payload))
+    
+    def match(self, encoding) -> List[Dict]:
+        """Match an embedding against the server's encoding gallery."""
+        payload = np.asarray(encoding, dtype=np.float32).tobytes()
+        return self.call(OP_MATCH, payload=payload)[0]['matches']
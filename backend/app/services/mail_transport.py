@@ -0,0 +1,201 @@
+"""Shared SMTP transport with pooled, reusable sessions.
+
+Opening an SMTP session costs a TCP connect, STARTTLS handshake and
+login. The transport keeps a few authenticated sessions open, checks
+idle ones with NOOP before reuse, and sends each message once to all of
+its recipients.
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """A small pool of authenticated SMTP sessions."""
+    
+    def __init__(self, host, port=587, username=None, password=None, use_tls=True,
+                 timeout=30, max_size=2, keepalive_seconds=60, max_idle_seconds=300):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.max_size = max_size
+        self.keepalive_seconds = keepalive_seconds
+        self.max_idle_seconds = max_idle_seconds
+        self._idle = deque()  # (connection, last_used)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.connections_opened = 0
+    
+    def _connect(self):
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                conn.starttls()
+            if self.username and self.password:
+                conn.login(self.username, self.password)
+        except Exception:
+            _close(conn)
+            raise
+        self.connections_opened += 1
+        return conn
+    
+    def _healthy(self, conn, last_used):
+        """Check an idle session; NOOP only when it has been idle a while."""
+        idle = time.monotonic() - last_used
+        if idle > self.max_idle_seconds:
+            return False
+        if idle > self.keepalive_seconds:
+            try:
+                return conn.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                return False
+        return True
+    
+    def _checkout(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, last_used = self._idle.pop()
+            if self._healthy(conn, last_used):
+                return conn
+            _close(conn)
+        return self._connect()
+    
+    @contextmanager
+    def connection(self, fresh=False):
+        """
+        Borrow a session, returning it to the pool afterwards.
+        
+        Sessions that raise anything other than a recipient refusal are
+        discarded rather than reused.
+        
+        Args:
+            fresh: Skip idle sessions and open a new one
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise smtplib.SMTPException('Timed out waiting for an SMTP connection')
+        conn = None
+        try:
+            conn = self._connect() if fresh else self._checkout()
+            yield conn
+        except smtplib.SMTPRecipientsRefused:
+            raise
+        except Exception:
+            _close(conn)
+            conn = None
+            raise
+        finally:
+            if conn is not None:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+            self._slots.release()
+    
+    def close_all(self):
+        """Close every idle session."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            _close(conn)
+    
+    def idle_count(self):
+        with self._lock:
+            return len(self._idle)
+
+
+def _close(conn):
+    if conn is None:
+        return
+    try:
+        conn.quit()
+    except (smtplib.SMTPException, OSError):
+        try:
+            conn.close()
+        except OSError:
+            pass
+
+
+class MailTransport:
+    """Send HTML mail through a shared SMTP connection pool."""
+    
+    def __init__(self):
+        self.pool = None
+        self.sender = None
+    
+    def init_app(self, app):
+        """Configure the pool from ``Config.SMTP_*``."""
+        if self.pool:
+            self.pool.close_all()
+        config = app.config
+        self.sender = config.get('SMTP_EMAIL')
+        self.pool = SMTPConnectionPool(
+            config.get('SMTP_SERVER'),
+            config.get('SMTP_PORT', 587),
+            username=config.get('SMTP_EMAIL'),
+            password=config.get('SMTP_PASSWORD'),
+            use_tls=config.get('SMTP_USE_TLS', True),
+            timeout=config.get('SMTP_TIMEOUT_SECONDS', 30),
+            max_size=config.get('SMTP_POOL_SIZE', 2),
+            keepalive_seconds=config.get('SMTP_KEEPALIVE_SECONDS', 60),
+            max_idle_seconds=config.get('SMTP_MAX_IDLE_SECONDS', 300)
+        )
+    
+    @property
+    def configured(self):
+        pool = self.pool
+        return bool(pool and pool.host and pool.username and pool.password)
+    
+    def build_message(self, subject, html_body, recipients):
+        msg = MIMEMultipart('alternative')
+        msg['From'] = self.sender
+        msg['To'] = ', '.join(recipients)
+        msg['Subject'] = subject
+        msg.attach(MIMEText(html_body, 'html'))
+        return msg
+    
+    def send(self, subject, html_body, recipients):
+        """
+        Send one message to all recipients in a single SMTP transaction.
+        
+        A pooled session the server has silently dropped is retried once
+        on a fresh connection.
+        
+        Args:
+            subject: Message subject
+            html_body: HTML body
+            recipients: List of email addresses
+        
+        Returns:
+            Dictionary of refused recipients, {address: (code, message)}
+        
+        Raises:
+            smtplib.SMTPRecipientsRefused: If every recipient was refused
+            smtplib.SMTPException: On other delivery failures
+        """
+        if not self.configured:
+            raise smtplib.SMTPException('SMTP is not configured')
+        
+        recipients = list(dict.fromkeys(recipients))
+        msg = self.build_message(subject, html_body, recipients)
+        
+        try:
+            with self.pool.connection() as conn:
+                return conn.send_message(msg, to_addrs=recipients)
+        except smtplib.SMTPServerDisconnected:
+            logger.info('Pooled SMTP session was closed by the server, reconnecting')
+            with self.pool.connection(fresh=True) as conn:
+                return conn.send_message(msg, to_addrs=recipients)
+
+
+mail_transport = MailTransport()
@@ -0,0 +1,303 @@
+"""Retention and archival for high-volume tables.
+
+Each policy removes rows older than a configured age from one table in
+bounded batches (``DELETE ... WHERE id IN (...)``), optionally writing
+them first to compressed JSONL (or Parquet) partitions, and deletes the
+image files that only those rows referenced. Run it on a schedule with
+``flask retention-run``.
+"""
+
+import gzip
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, select, update
+
+from app import db
+from app.models.alert import Alert
+from app.models.detection_log import DetectionLog
+from app.models.notification_counter import NotificationCounter
+from app.models.video_detection import VideoFrameDetection
+
+logger = logging.getLogger(__name__)
+
+# Try to import pyarrow (optional dependency, only for Parquet archives)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+ARCHIVE_FORMATS = ('jsonl', 'parquet')
+
+
+class RetentionPolicy:
+    """How long rows of one table are kept, and what to clean up with them."""
+    
+    def __init__(self, name, model, timestamp_column, max_age_days, file_column=None, keep=None):
+        """
+        Args:
+            name: Policy name (also the archive directory)
+            model: SQLAlchemy model
+            timestamp_column: Column compared against the cutoff
+            max_age_days: Rows older than this are removed; 0 disables
+            file_column: Column holding a file path to delete with the row
+            keep: Extra criterion; rows matching it are never removed
+        """
+        self.name = name
+        self.model = model
+        self.timestamp_column = timestamp_column
+        self.max_age_days = max_age_days
+        self.file_column = file_column
+        self.keep = keep
+    
+    @property
+    def enabled(self):
+        return bool(self.max_age_days)
+    
+    def criteria(self, now):
+        conditions = [self.timestamp_column < now - timedelta(days=self.max_age_days)]
+        if self.keep is not None:
+            conditions.append(~self.keep)
+        return conditions
+    
+    def before_delete(self, ids):
+        """Detach rows in other tables that reference the rows about to go."""
+    
+    def delete(self, ids):
+        """Delete rows by id."""
+        db.session.execute(
+            delete(self.model).where(self.model.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+
+
+class AlertPolicy(RetentionPolicy):
+    """Alerts: keep the notification counters exact."""
+    
+    def delete(self, ids):
+        deleted = db.session.execute(
+            delete(Alert).where(Alert.id.in_(ids)).returning(
+                Alert.user_id, Alert.delivery_method, Alert.acknowledged
+            ).execution_options(synchronize_session=False)
+        ).all()
+        NotificationCounter.apply_alerts(db.session.connection(), deleted, sign=-1)
+
+
+class DetectionLogPolicy(RetentionPolicy):
+    """Detection logs: alerts keep their history but lose the link."""
+    
+    def before_delete(self, ids):
+        db.session.execute(
+            update(Alert).where(Alert.detection_log_id.in_(ids)).values(
+                detection_log_id=None
+            ).execution_options(synchronize_session=False)
+        )
+
+
+def build_policies(config):
+    """Create the retention policies from ``Config.RETENTION_*``."""
+    return {
+        'alerts': AlertPolicy(
+            'alerts', Alert, Alert.created_at,
+            config.get('RETENTION_ALERTS_DAYS', 90),
+            # Undelivered outbox entries are never purged
+            keep=Alert.status.in_(['pending', 'sending'])
+        ),
+        'detection_logs': DetectionLogPolicy(
+            'detection_logs', DetectionLog, DetectionLog.detected_at,
+            config.get('RETENTION_DETECTION_LOGS_DAYS', 365),
+            file_column=DetectionLog.image_path
+        ),
+        'video_frame_detections': RetentionPolicy(
+            'video_frame_detections', VideoFrameDetection, VideoFrameDetection.detected_at,
+            config.get('RETENTION_FRAME_DETECTIONS_DAYS', 30),
+            file_column=VideoFrameDetection.frame_image_path
+        ),
+    }
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+class ArchiveWriter:
+    """Write archived rows to compressed, month-partitioned files."""
+    
+    def __init__(self, root, fmt='jsonl'):
+        if fmt not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format '{fmt}'. Expected one of: {', '.join(ARCHIVE_FORMATS)}")
+        if fmt == 'parquet' and not PYARROW_AVAILABLE:
+            raise ValueError('Parquet archives need pyarrow. Install with: pip install pyarrow')
+        self.root = root
+        self.format = fmt
+    
+    def write(self, policy, rows, run_id):
+        """
+        Write one batch of rows, partitioned by the month of their timestamp.
+        
+        Args:
+            policy: RetentionPolicy the rows belong to
+            rows: List of row dictionaries
+            run_id: Identifier shared by every file of one retention run
+        
+        Returns:
+            List of written file paths
+        """
+        partitions = {}
+        for row in rows:
+            stamp = row.get(policy.timestamp_column.key)
+            partitions.setdefault(stamp.strftime('%Y-%m') if stamp else 'unknown', []).append(row)
+        
+        paths = []
+        for month, batch in sorted(partitions.items()):
+            directory = os.path.join(self.root, policy.name, f'month={month}')
+            os.makedirs(directory, exist_ok=True)
+            stem = f'part-{run_id}-{batch[0]["id"]}'
+            if self.format == 'parquet':
+                path = os.path.join(directory, f'{stem}.parquet')
+                records = [json.loads(json.dumps(row, default=_json_default)) for row in batch]
+                pq.write_table(pa.Table.from_pylist(records), path, compression='zstd')
+            else:
+                path = os.path.join(directory, f'{stem}.jsonl.gz')
+                with gzip.open(path, 'wt', encoding='utf-8') as f:
+                    for row in batch:
+                        f.write(json.dumps(row, default=_json_default) + '\n')
+            paths.append(path)
+        return paths
+
+
+class RetentionService:
+    """Apply retention policies in bounded batches."""
+    
+    def __init__(self, policies, batch_size=1000, archive=None, file_roots=()):
+        """
+        Args:
+            policies: Dictionary of name -> RetentionPolicy
+            batch_size: Rows removed per transaction
+            archive: ArchiveWriter, or None to delete without archiving
+            file_roots: Directories files may be deleted from
+        """
+        self.policies = policies
+        self.batch_size = batch_size
+        self.archive = archive
+        self.file_roots = [os.path.realpath(root) for root in file_roots]
+    
+    @classmethod
+    def from_config(cls, config):
+        archive = None
+        if config.get('RETENTION_ARCHIVE', True):
+            archive = ArchiveWriter(config.get('RETENTION_ARCHIVE_DIR', 'archive'), config.get('RETENTION_ARCHIVE_FORMAT', 'jsonl'))
+        return cls(
+            build_policies(config),
+            batch_size=config.get('RETENTION_BATCH_SIZE', 1000),
+            archive=archive,
+            file_roots=[root for root in (config.get('UPLOAD_FOLDER'), 'uploads') if root]
+        )
+    
+    def run(self, names=None, dry_run=False, max_batches=None, now=None):
+        """
+        Apply the selected policies.
+        
+        Args:
+            names: Policy names to run (default: all enabled policies)
+            dry_run: Only count the rows that would be removed
+            max_batches: Stop each policy after this many batches
+            now: Reference time (defaults to utcnow)
+        
+        Returns:
+            Dictionary of policy name -> {'rows', 'files', 'archives'}
+        """
+        now = now or datetime.utcnow()
+        run_id = now.strftime('%Y%m%dT%H%M%S')
+        results = {}
+        for name in names or list(self.policies):
+            policy = self.policies[name]
+            if not policy.enabled:
+                continue
+            if dry_run:
+                count = db.session.query(policy.model.id).filter(*policy.criteria(now)).count()
+                results[name] = {'rows': count, 'files': 0, 'archives': []}
+            else:
+                results[name] = self._apply(policy, now, run_id, max_batches)
+        return results
+    
+    def _apply(self, policy, now, run_id, max_batches):
+        stats = {'rows': 0, 'files': 0, 'archives': []}
+        table = policy.model.__table__
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            # Old rows have the lowest ids, so an id-ordered scan finds them first
+            query = select(table) if self.archive else select(table.c.id)
+            rows = db.session.execute(
+                query.where(*policy.criteria(now)).order_by(table.c.id).limit(self.batch_size)
+            ).mappings().all()
+            if not rows:
+                break
+            
+            ids = [row['id'] for row in rows]
+            files = []
+            if policy.file_column is not None:
+                files = list(dict.fromkeys(
+                    path for (path,) in db.session.query(policy.file_column).filter(
+                        policy.model.id.in_(ids), policy.file_column.isnot(None)
+                    )
+                ))
+            
+            try:
+                # Archive first: if writing fails nothing is deleted
+                if self.archive:
+                    stats['archives'] += self.archive.write(policy, [dict(row) for row in rows], run_id)
+                policy.before_delete(ids)
+                policy.delete(ids)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            
+            # Files go only after the rows are gone for good
+            stats['files'] += self._delete_files(policy, files)
+            stats['rows'] += len(ids)
+            batches += 1
+            logger.info(f"Retention {policy.name}: removed {len(ids)} row(s)")
+            if len(ids) < self.batch_size:
+                break
+        return stats
+    
+    def _delete_files(self, policy, paths):
+        if not paths:
+            return 0
+        # Several rows can share one image (e.g. faces from one upload)
+        still_used = {
+            path for (path,) in db.session.query(policy.file_column).filter(policy.file_column.in_(paths))
+        }
+        removed = 0
+        for path in paths:
+            if path in still_used or not self._deletable(path):
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Retention {policy.name}: could not delete {path}: {str(e)}")
+        return removed
+    
+    def _deletable(self, path):
+        """Only files inside the upload folders are ever deleted."""
+        real = os.path.realpath(path)
+        for root in self.file_roots:
+            try:
+                if os.path.commonpath([real, root]) == root:
+                    return True
+            except ValueError:
+                # Different drives on Windows
+                continue
+        return False
@@ -1,8 +1,21 @@
-"""SMS alert service using Twilio."""
+"""SMS alert service with pluggable providers.
+
+Messages are delivered by an SMS engine that sends on a bounded thread
+pool, rate-limits each provider with a token bucket and retries
+failures the provider definitely rejected. Each message carries an
+idempotency key; a key this process has already delivered is not sent
+again. Sending to N numbers takes roughly one provider round trip
+instead of N.
+"""
 
 import os
 import logging
-from datetime import datetime
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -15,73 +28,321 @@ except ImportError:
     logger.warning("Twilio not installed. SMS functionality disabled. Install with: pip install twilio")
 
 
-def send_sms_alert(phone_number, message_text, alert_type='info'):
+class SMSError(Exception):
+    """Raised by a provider when a message could not be sent."""
+    
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        # Invalid numbers and rejected content are not worth retrying
+        self.retryable = retryable
+
+
+class SMSProvider:
     """
-    Send SMS alert using Twilio.
+    Interface for SMS providers.
     
-    Args:
-        phone_number: Recipient phone number (+1234567890 format)
-        message_text: SMS message content (max 160 chars recommended)
-        alert_type: Type of alert for logging
-        
-    Returns:
-        dict: {'success': bool, 'message_sid': str or None, 'error': str or None}
+    ``send`` returns the provider's message id or raises SMSError.
+    Providers must be safe to call from several threads at once.
     """
-    if not TWILIO_AVAILABLE:
-        logger.error("Twilio library not installed")
-        return {
-            'success': False,
-            'message_sid': None,
-            'error': 'Twilio library not installed. Run: pip install twilio'
-        }
-    
-    try:
-        # Get Twilio credentials from environment
-        account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-        auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-        from_number = os.getenv('TWILIO_PHONE_NUMBER')
-        
-        if not all([account_sid, auth_token, from_number]):
-            logger.warning("Twilio credentials not configured")
-            return {
-                'success': False,
-                'message_sid': None,
-                'error': 'Twilio credentials not configured in .env'
-            }
+    
+    name = 'base'
+    
+    @property
+    def configured(self):
+        return True
+    
+    def send(self, to, body, idempotency_key):
+        raise NotImplementedError
+
+
+class TwilioProvider(SMSProvider):
+    """
+    Send SMS through the Twilio REST API.
+    
+    Twilio has no server-side idempotency: the key is not sent, and a
+    repeated request is a second message. Only responses that show Twilio
+    did not accept the message (HTTP 429 or 5xx) are retryable. A timeout
+    or dropped connection may come after Twilio accepted it, so those fail
+    without a retry rather than risk texting the same alert twice.
+    """
+    
+    name = 'twilio'
+    
+    def __init__(self, account_sid=None, auth_token=None, from_number=None):
+        self.account_sid = account_sid or os.getenv('TWILIO_ACCOUNT_SID')
+        self.auth_token = auth_token or os.getenv('TWILIO_AUTH_TOKEN')
+        self.from_number = from_number or os.getenv('TWILIO_PHONE_NUMBER')
+        self._client = None
+        self._lock = threading.Lock()
+    
+    @property
+    def configured(self):
+        return TWILIO_AVAILABLE and all([self.account_sid, self.auth_token, self.from_number])
+    
+    def _get_client(self):
+        # One client (and HTTP session) shared by every worker thread
+        with self._lock:
+            if self._client is None:
+                self._client = Client(self.account_sid, self.auth_token)
+            return self._client
+    
+    def send(self, to, body, idempotency_key):
+        if not TWILIO_AVAILABLE:
+            raise SMSError('Twilio library not installed. Run: pip install twilio', retryable=False)
+        if not self.configured:
+            raise SMSError('Twilio credentials not configured in .env', retryable=False)
         
-        # Validate phone number format
-        if not phone_number.startswith('+'):
-            phone_number = f'+{phone_number}'
+        try:
+            message = self._get_client().messages.create(body=body, from_=self.from_number, to=to)
+        except Exception as e:
+            status = getattr(e, 'status', None)
+            # Throttling and server errors are transient; other 4xx are not.
+            # No status means the outcome is unknown (see class docstring).
+            retryable = status is not None and (status == 429 or status >= 500)
+            raise SMSError(str(e), retryable=retryable) from e
+        return message.sid
+
+
+class LoopbackProvider(SMSProvider):
+    """
+    Record messages locally instead of sending them.
+    
+    Used by the test suite and for load benchmarks. ``latency`` simulates
+    the provider round trip; ``fail_next`` makes the next sends fail.
+    Like a real provider API, a repeated idempotency key returns the
+    original message id without sending again.
+    """
+    
+    name = 'loopback'
+    
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.fail_next = 0
+        self.sent = []
+        self._by_key = {}
+        self._lock = threading.Lock()
+    
+    def send(self, to, body, idempotency_key):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if idempotency_key in self._by_key:
+                return self._by_key[idempotency_key]
+            if self.fail_next:
+                self.fail_next -= 1
+                raise SMSError('Simulated provider failure')
+            sid = f'LB{uuid.uuid4().hex}'
+            self._by_key[idempotency_key] = sid
+            self.sent.append({'to': to, 'body': body, 'sid': sid, 'idempotency_key': idempotency_key})
+            return sid
+    
+    def clear(self):
+        with self._lock:
+            self.sent = []
+            self._by_key = {}
+            self.fail_next = 0
+
+
+PROVIDERS = {
+    'twilio': TwilioProvider,
+    'loopback': LoopbackProvider
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until a token is free."""
+    
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(rate, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def normalize_number(phone_number):
+    """Ensure E.164-style leading '+'."""
+    return phone_number if phone_number.startswith('+') else f'+{phone_number}'
+
+
+def truncate(message_text):
+    """Truncate to one SMS segment (160 chars)."""
+    return message_text if len(message_text) <= 160 else message_text[:157] + '...'
+
+
+class SMSEngine:
+    """Concurrent, rate-limited SMS delivery with retries."""
+    
+    def __init__(self):
+        self.provider = None
+        self.bucket = None
+        self.max_workers = 8
+        self.max_retries = 3
+        self.retry_base_seconds = 0.5
+        self._executor = None
+        self._delivered = OrderedDict()  # idempotency key -> message id
+        self._delivered_limit = 10000
+        self._lock = threading.Lock()
+    
+    def init_app(self, app):
+        """Configure the provider and pool from ``Config.SMS_*``."""
+        self.configure(app.config)
+    
+    def configure(self, config):
+        """
+        Configure from a config mapping.
         
-        # Truncate message if too long (SMS limit is 160 chars per segment)
-        if len(message_text) > 160:
-            message_text = message_text[:157] + '...'
+        Args:
+            config: Mapping with SMS_* and TWILIO_* settings
+        """
+        self.shutdown()
+        name = config.get('SMS_PROVIDER', 'twilio')
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown SMS provider '{name}'. Expected one of: {', '.join(PROVIDERS)}")
+        if name == 'loopback':
+            self.provider = LoopbackProvider(latency=config.get('SMS_LOOPBACK_LATENCY_SECONDS', 0.0))
+        else:
+            self.provider = TwilioProvider(
+                config.get('TWILIO_ACCOUNT_SID'),
+                config.get('TWILIO_AUTH_TOKEN'),
+                config.get('TWILIO_PHONE_NUMBER')
+            )
+        self.bucket = TokenBucket(config.get('SMS_RATE_PER_SECOND', 10), config.get('SMS_RATE_BURST'))
+        self.max_workers = config.get('SMS_MAX_WORKERS', 8)
+        self.max_retries = config.get('SMS_MAX_RETRIES', 3)
+        self.retry_base_seconds = config.get('SMS_RETRY_BASE_SECONDS', 0.5)
+        with self._lock:
+            self._delivered.clear()
+    
+    def _ensure_configured(self):
+        # Standalone scripts may send without creating the Flask app
+        if self.provider is None:
+            from app.config import Config
+            self.configure({name: getattr(Config, name) for name in dir(Config) if name.isupper()})
+    
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='sms')
+            return self._executor
+    
+    def shutdown(self):
+        """Stop the worker pool after in-flight sends finish."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+    
+    def _remember(self, key, sid):
+        with self._lock:
+            self._delivered[key] = sid
+            self._delivered.move_to_end(key)
+            while len(self._delivered) > self._delivered_limit:
+                self._delivered.popitem(last=False)
+    
+    def send(self, phone_number, message_text, idempotency_key=None):
+        """
+        Send one SMS on the calling thread, retrying transient failures.
         
-        # Create Twilio client
-        client = Client(account_sid, auth_token)
+        Args:
+            phone_number: Recipient phone number (+1234567890 format)
+            message_text: SMS message content (truncated to 160 chars)
+            idempotency_key: Key identifying this logical message; a key
+                that was already delivered is not sent again
         
-        # Send SMS
-        message = client.messages.create(
-            body=message_text,
-            from_=from_number,
-            to=phone_number
-        )
+        Returns:
+            dict: {'success', 'message_sid', 'error', 'attempts'}, plus
+            'retryable' on failure (False when resending could duplicate
+            the message or cannot succeed)
+        """
+        self._ensure_configured()
+        key = idempotency_key or uuid.uuid4().hex
+        with self._lock:
+            sid = self._delivered.get(key)
+        if sid:
+            return {'success': True, 'message_sid': sid, 'error': None, 'attempts': 0}
         
-        logger.info(f"SMS sent successfully. SID: {message.sid}, To: {phone_number}")
+        to = normalize_number(phone_number)
+        body = truncate(message_text)
+        attempts = 0
+        while True:
+            attempts += 1
+            self.bucket.acquire()
+            try:
+                sid = self.provider.send(to, body, key)
+            except Exception as e:
+                retryable = not isinstance(e, SMSError) or e.retryable
+                if not retryable or attempts > self.max_retries:
+                    logger.error(f"Failed to send SMS to {to} after {attempts} attempt(s): {str(e)}")
+                    return {'success': False, 'message_sid': None, 'error': str(e), 'attempts': attempts,
+                            'retryable': retryable}
+                # Exponential backoff with jitter so retries don't arrive in lockstep
+                delay = self.retry_base_seconds * 2 ** (attempts - 1)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                continue
+            
+            self._remember(key, sid)
+            logger.info(f"SMS sent successfully. SID: {sid}, To: {to}")
+            return {'success': True, 'message_sid': sid, 'error': None, 'attempts': attempts}
+    
+    def send_many(self, messages):
+        """
+        Send several SMS concurrently on the worker pool.
         
-        return {
-            'success': True,
-            'message_sid': message.sid,
-            'error': None
-        }
+        Args:
+            messages: Iterable of (phone_number, message_text, idempotency_key)
         
-    except Exception as e:
-        logger.error(f"Failed to send SMS: {str(e)}")
-        return {
-            'success': False,
-            'message_sid': None,
-            'error': str(e)
-        }
+        Returns:
+            list: Result dicts in the order of `messages`
+        """
+        self._ensure_configured()
+        futures = [self.executor.submit(self.send, phone, text, key) for phone, text, key in messages]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # Raised before the provider was called, so nothing was sent
+                results.append({'success': False, 'message_sid': None, 'error': str(e), 'attempts': 0,
+                                'retryable': True})
+        return results
+
+
+sms_engine = SMSEngine()
+
+
+def send_sms_alert(phone_number, message_text, alert_type='info', idempotency_key=None):
+    """
+    Send SMS alert through the configured provider.
+    
+    Args:
+        phone_number: Recipient phone number (+1234567890 format)
+        message_text: SMS message content (max 160 chars recommended)
+        alert_type: Type of alert for logging
+        idempotency_key: Optional key that prevents duplicate delivery
+    
+    Returns:
+        dict: {'success': bool, 'message_sid': str or None, 'error': str or None}
+    """
+    result = sms_engine.send(phone_number, message_text, idempotency_key)
+    if not result['success']:
+        logger.error(f"Failed to send {alert_type} SMS: {result['error']}")
+    return {key: result[key] for key in ('success', 'message_sid', 'error')}
 
 
 def format_criminal_detection_sms(criminal_name, location, confidence):
@@ -93,7 +354,7 @@ def format_criminal_detection_sms(criminal_name, location, confidence):
         criminal_name: Name of detected criminal
         location: Detection location
         confidence: Confidence score (0-1)
-        
+    
     Returns:
         str: Formatted SMS message
     """
@@ -113,7 +374,7 @@ def format_system_alert_sms(alert_title, details):
     Args:
         alert_title: Alert title
         details: Brief details
-        
+    
     Returns:
         str: Formatted SMS message
     """
@@ -126,12 +387,15 @@ def send_critical_detection_sms(criminal, detection_log, confidence, phone_numbe
     Send SMS for critical criminal detections.
     Only sends if confidence > 90% and criminal danger level is high/critical.
     
+    All numbers are sent to concurrently, so a large on-call list takes
+    about one provider round trip.
+    
     Args:
         criminal: Criminal model instance
-        detection_log: DetectionLog model instance  
+        detection_log: DetectionLog model instance
         confidence: Confidence score (0-1)
         phone_numbers: List of phone numbers to notify
-        
+    
     Returns:
         list: List of result dicts for each SMS sent
     """
@@ -151,13 +415,10 @@ def send_critical_detection_sms(criminal, detection_log, confidence, phone_numbe
         confidence
     )
     
-    # Send to all numbers
-    results = []
-    for phone in phone_numbers:
-        result = send_sms_alert(phone, sms_text, alert_type='critical_detection')
-        results.append({
-            'phone': phone,
-            **result
-        })
+    # One key per detection and number, so retries never double-send
+    phones = list(dict.fromkeys(phone_numbers))
+    results = sms_engine.send_many(
+        (phone, sms_text, f'detection:{detection_log.id}:{phone}') for phone in phones
+    )
     
-    return results
+    return [{'phone': phone, **result} for phone, result in zip(phones, results)]
@@ -6,8 +6,10 @@ import json
 import logging
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
+from flask import current_app
 from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
+from sqlalchemy.orm import selectinload
 
 from app import db
 from app.models.video_detection import VideoDetection, VideoFrameDetection
@@ -16,6 +18,7 @@ from app.models.face_encoding import FaceEncoding
 from app.models.detection_log import DetectionLog
 from app.services.face_service_deepface import face_service_deepface as face_service
 from app.services.alert_service import send_detection_alert
+from app.utils.quality_assessment import QualityGate
 
 logger = logging.getLogger(__name__)
 
@@ -166,6 +169,8 @@ class VideoProcessingService:
             # Process video frames
             frame_number = 0
             total_faces = 0
+            faces_gated = 0
+            quality_gate = QualityGate.from_config(current_app.config)
             matched_criminals = set()
             matched_criminals_details = {}  # Store details for email alert
             frames_with_matches = []
@@ -191,27 +196,36 @@ class VideoProcessingService:
                 
                 # Detect faces in frame
                 try:
-                    faces = face_service.detect_faces(frame_path)
+                    faces = face_service.detect_faces(frame_path, detector=face_service.detector_for('video'))
                     
                     if faces:
                         total_faces += len(faces)
                         logger.info(f"Frame {frame_number}: Detected {len(faces)} face(s)")
                         
+                        # Crop every face with padding, then score them together
+                        padding = 20
+                        face_crops = []
+                        for x, y, w, h in faces:
+                            y1 = max(0, y - padding)
+                            y2 = min(frame.shape[0], y + h + padding)
+                            x1 = max(0, x - padding)
+                            x2 = min(frame.shape[1], x + w + padding)
+                            face_crops.append(frame[y1:y2, x1:x2])
+                        face_qualities = quality_gate.evaluate(face_crops, faces)
+                        
                         # Process each face
                         for face_idx, face_coords in enumerate(faces):
                             # Extract face encoding
                             import tempfile
-                            import numpy as np
                             
                             x, y, w, h = face_coords
-                            # Crop face with padding
-                            padding = 20
-                            y1 = max(0, y - padding)
-                            y2 = min(frame.shape[0], y + h + padding)
-                            x1 = max(0, x - padding)
-                            x2 = min(frame.shape[1], x + w + padding)
-                            
-                            face_crop = frame[y1:y2, x1:x2]
+                            face_crop = face_crops[face_idx]
+                            quality, gate_reason = face_qualities[face_idx]
+                            if gate_reason:
+                                # Too small or blurry to match; later frames get another chance
+                                faces_gated += 1
+                                continue
+                            face_quality = quality['overall_score']
                             
                             with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp:
                                 temp_face_path = tmp.name
@@ -271,7 +285,8 @@ class VideoProcessingService:
                                             'frame': frame_number,
                                             'timestamp': round(frame_number / fps, 2),
                                             'criminal': best_match['criminal_name'],
-                                            'confidence': round(best_confidence * 100, 2)
+                                            'confidence': round(best_confidence * 100, 2),
+                                            'quality': face_quality
                                         })
                                         
                                         logger.info(f"Match found in frame {frame_number}: {best_match['criminal_name']} ({best_confidence*100:.1f}%)")
@@ -306,28 +321,33 @@ class VideoProcessingService:
                 # Update progress periodically
                 if frame_number % 50 == 0:
                     video_detection.frames_processed = frame_number
+                    video_detection.total_faces_detected = total_faces
+                    video_detection.faces_gated = faces_gated
+                    video_detection.unique_criminals_matched = len(matched_criminals)
                     db.session.commit()
             
             cap.release()
             
-            # Send ONE consolidated email alert if criminals were detected
+            # Queue ONE consolidated email alert if criminals were detected
             if matched_criminals_details:
                 try:
                     from app.services.alert_service import send_video_detection_alert
                     send_video_detection_alert(video_detection, matched_criminals_details)
                 except Exception as e:
-                    logger.error(f"Failed to send video alert: {str(e)}")
+                    logger.error(f"Failed to queue video alert: {str(e)}")
             
             # Update final statistics
             video_detection.processing_status = 'completed'
             video_detection.processing_completed_at = datetime.utcnow()
             video_detection.frames_processed = frame_number
             video_detection.total_faces_detected = total_faces
+            video_detection.faces_gated = faces_gated
             video_detection.unique_criminals_matched = len(matched_criminals)
             video_detection.summary_report = json.dumps({
                 'total_frames': frame_number,
                 'frames_processed': frame_number // frame_skip,
                 'total_faces': total_faces,
+                'faces_gated': faces_gated,
                 'unique_criminals': len(matched_criminals),
                 'matches': frames_with_matches
             })
@@ -337,6 +357,7 @@ class VideoProcessingService:
                 'success': True,
                 'frames_processed': frame_number,
                 'total_faces': total_faces,
+                'faces_gated': faces_gated,
                 'unique_criminals_matched': len(matched_criminals),
                 'matches': frames_with_matches
             }
@@ -364,7 +385,7 @@ class VideoProcessingService:
                 VideoDetection.upload_date.desc()
             ).limit(limit).all()
             
-            return [v.to_dict() for v in videos]
+            return VideoDetection.serialize_many(videos)
             
         except Exception as e:
             logger.error(f"Failed to retrieve video detections: {str(e)}")
@@ -374,7 +395,9 @@ class VideoProcessingService:
     def get_video_detection_details(video_id: int) -> Optional[Dict]:
         """Get detailed results for a specific video detection."""
         try:
-            video = VideoDetection.query.get(video_id)
+            video = VideoDetection.query.options(
+                selectinload(VideoDetection.frame_detections)
+            ).get(video_id)
             if not video:
                 return None
             
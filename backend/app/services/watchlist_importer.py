@@ -0,0 +1,679 @@
+"""Bulk watchlist import.
+
+Enrolls many criminals and their photos from a directory tree or a zip
+archive plus CSV/JSON metadata, without going through the REST API one
+person at a time. Records stream through a pool of embedding processes
+(each loads the face model once) and are written in chunked
+transactions. Completed records are appended to a state file so an
+interrupted import resumes where it stopped.
+
+Source layout::
+    
+    metadata.csv | metadata.json | metadata.jsonl
+    <ref>/photo1.jpg
+    <ref>/photo2.jpg
+
+Each metadata record needs ``name`` and ``crime_type`` and may set
+``ref`` (or ``id``/``external_id``), ``alias``, ``description``,
+``status``, ``danger_level``, ``last_seen_location`` and ``photos``
+(';'-separated paths relative to the source root). Without ``photos``
+the images under ``<ref>/`` are used.
+
+Imports started from the admin API are WatchlistImportJob rows: each runs
+in its own ``flask watchlist-import --job`` process and records its
+progress on the row, so any web worker can report it.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+from typing import Callable, Dict, Iterator, List, Optional
+
+import cv2
+import numpy as np
+from flask import current_app
+from sqlalchemy import exists, insert
+from werkzeug.utils import secure_filename
+
+from app import db
+from app.models.criminal import Criminal
+from app.models.face_encoding import FaceEncoding
+from app.models.watchlist_import_job import WatchlistImportJob
+from app.utils.quality_assessment import assess_face_quality, determine_pose_type
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}
+METADATA_FILES = ('metadata.csv', 'metadata.json', 'metadata.jsonl')
+CRIMINAL_FIELDS = ('alias', 'description', 'danger_level', 'last_seen_location')
+
+
+class WatchlistImportError(ValueError):
+    """Raised for an unusable import source or metadata file."""
+
+
+def _is_image(name: str) -> bool:
+    return '.' in name and name.rsplit('.', 1)[1].lower() in IMAGE_EXTENSIONS
+
+
+class DirectorySource:
+    """Photos and metadata in a directory tree."""
+    
+    def __init__(self, root: str):
+        self.root = root
+    
+    def open_text(self, name: str):
+        return open(os.path.join(self.root, name), encoding='utf-8', newline='')
+    
+    def exists(self, name: str) -> bool:
+        return os.path.isfile(os.path.join(self.root, name))
+    
+    def photos(self, ref: str, listed: List[str]) -> List[tuple]:
+        if listed:
+            names = listed
+        else:
+            folder = os.path.join(self.root, ref)
+            names = sorted(
+                f'{ref}/{name}' for name in (os.listdir(folder) if os.path.isdir(folder) else []) if _is_image(name)
+            )
+        return [('dir', os.path.join(self.root, *name.split('/')), None) for name in names]
+
+
+class ZipSource:
+    """Photos and metadata in a zip archive (read in place, not extracted)."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.archive = zipfile.ZipFile(path)
+        self.names = set(self.archive.namelist())
+    
+    def open_text(self, name: str):
+        return io.TextIOWrapper(self.archive.open(name), encoding='utf-8', newline='')
+    
+    def close(self):
+        self.archive.close()
+    
+    def exists(self, name: str) -> bool:
+        return name in self.names
+    
+    def photos(self, ref: str, listed: List[str]) -> List[tuple]:
+        if listed:
+            names = listed
+        else:
+            prefix = f'{ref}/'
+            names = sorted(name for name in self.names if name.startswith(prefix) and _is_image(name))
+        return [('zip', self.path, name) for name in names]
+
+
+def open_source(path: str):
+    """Open a directory or zip archive as an import source."""
+    if os.path.isdir(path):
+        return DirectorySource(path)
+    if zipfile.is_zipfile(path):
+        return ZipSource(path)
+    raise WatchlistImportError(f'Import source must be a directory or zip archive: {path}')
+
+
+def iter_records(source, metadata: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Stream metadata records from a CSV, JSON or JSON Lines file.
+    
+    Args:
+        source: DirectorySource or ZipSource
+        metadata: Metadata file on disk (default: metadata.* inside the source)
+    
+    Yields:
+        Record dictionaries with 'ref' filled in
+    """
+    if metadata:
+        handle, name = open(metadata, encoding='utf-8', newline=''), metadata
+    else:
+        name = next((candidate for candidate in METADATA_FILES if source.exists(candidate)), None)
+        if name is None:
+            raise WatchlistImportError(f"No metadata file found (expected one of: {', '.join(METADATA_FILES)})")
+        handle = source.open_text(name)
+    
+    with handle:
+        if name.endswith('.csv'):
+            rows = csv.DictReader(handle)
+        elif name.endswith('.jsonl'):
+            rows = (json.loads(line) for line in handle if line.strip())
+        else:
+            rows = json.load(handle)
+        for number, row in enumerate(rows, start=1):
+            ref = str(row.get('ref') or row.get('id') or row.get('external_id') or number).strip()
+            yield {**row, 'ref': ref}
+
+
+# Per-process state of embedding workers
+_worker_face_service = None
+_worker_archives = {}
+
+
+def _init_worker(embedding_config=None):
+    """Load the face model once per worker process."""
+    global _worker_face_service
+    from app.services.face_service_deepface import face_service_deepface
+    if embedding_config:
+        from app.services.embedding_backends import create_embedding_backend
+        face_service_deepface.use_embedding_backend(create_embedding_backend(embedding_config))
+    _worker_face_service = face_service_deepface
+
+
+def _read_photo(photo: tuple) -> bytes:
+    kind, location, member = photo
+    if kind == 'zip':
+        archive = _worker_archives.get(location)
+        if archive is None:
+            archive = _worker_archives[location] = zipfile.ZipFile(location)
+        return archive.read(member)
+    with open(location, 'rb') as f:
+        return f.read()
+
+
+def embed_record(task: Dict, face_service=None) -> Dict:
+    """
+    Read, store, embed and score the photos of one record.
+    
+    Runs in an embedding worker process (or inline), never touches the
+    database.
+    
+    Args:
+        task: {'ref', 'photos': [(kind, location, member)], 'dest': folder}
+        face_service: Face service (default: the worker's)
+    
+    Returns:
+        {'ref', 'photos': [{'file', 'image_path', 'encoding', 'quality_score', 'pose_type'} | {'file', 'error'}]}
+    """
+    face_service = face_service or _worker_face_service
+    results, images, stored = [], [], []
+    for index, photo in enumerate(task['photos']):
+        name = photo[2] or photo[1]
+        try:
+            data = _read_photo(photo)
+            image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR) if data else None
+            if image is None:
+                results.append({'file': name, 'error': 'Could not read image'})
+                continue
+            os.makedirs(task['dest'], exist_ok=True)
+            # The index keeps names unique when two folders share a filename
+            path = os.path.join(task['dest'], f"{index}_{secure_filename(os.path.basename(name)) or 'photo'}")
+            with open(path, 'wb') as f:
+                f.write(data)
+            images.append(image)
+            stored.append((name, path))
+        except Exception as e:
+            results.append({'file': name, 'error': str(e)})
+    
+    encodings = face_service.extract_face_encodings(images) if images else []
+    for (name, path), image, encoding in zip(stored, images, encodings):
+        if encoding is None:
+            os.remove(path)
+            results.append({'file': name, 'error': 'No face detected'})
+            continue
+        quality = assess_face_quality(image)
+        results.append({
+            'file': name,
+            'image_path': path,
+            'encoding': face_service.save_encoding(encoding),
+            'quality_score': quality.get('overall_score', 0.5),
+            'pose_type': determine_pose_type(quality.get('frontality_score', 0.5))
+        })
+    return {'ref': task['ref'], 'photos': results}
+
+
+class WatchlistImporter:
+    """Import a watchlist source into criminals and face encodings."""
+    
+    def __init__(self, source_path: str, added_by: int, metadata: Optional[str] = None,
+                 workers: int = 2, chunk_size: int = 100, state_path: Optional[str] = None,
+                 encodings_folder: str = 'encodings', face_service=None,
+                 embedding_config: Optional[Dict] = None):
+        """
+        Args:
+            source_path: Directory or zip archive with photos (and metadata)
+            added_by: User id recorded as having added the criminals
+            metadata: Metadata file outside the source (optional)
+            workers: Embedding processes; 0 embeds inline in this process
+            chunk_size: Records written per transaction
+            state_path: File of completed refs (default: <source>.import-state)
+            encodings_folder: Root folder imported photos are stored under
+            face_service: Face service for inline embedding (default: DeepFace)
+            embedding_config: ``EMBEDDING_*`` settings for the embedding workers
+        """
+        self.source_path = source_path
+        self.added_by = added_by
+        self.metadata = metadata
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.state_path = state_path or source_path.rstrip('/\\') + '.import-state'
+        self.encodings_folder = encodings_folder
+        self.face_service = face_service
+        self.embedding_config = embedding_config
+        # Photos are stored per source so imports reusing a ref never overwrite each other
+        self.source_key = hashlib.sha256(os.path.abspath(source_path).encode()).hexdigest()[:16]
+    
+    @classmethod
+    def from_config(cls, config, source_path: str, added_by: int, metadata: Optional[str] = None) -> 'WatchlistImporter':
+        """Create an importer using ``Config.WATCHLIST_IMPORT_*``."""
+        return cls(
+            source_path, added_by, metadata=metadata,
+            workers=config.get('WATCHLIST_IMPORT_WORKERS', 2),
+            chunk_size=config.get('WATCHLIST_IMPORT_CHUNK_SIZE', 100),
+            encodings_folder=config.get('ENCODINGS_FOLDER', 'encodings'),
+            embedding_config={name: config.get(name) for name in
+                              ('EMBEDDING_BACKEND', 'EMBEDDING_MODEL_PATH', 'EMBEDDING_THREADS')}
+        )
+    
+    def run(self, progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Run (or resume) the import.
+        
+        Args:
+            progress: Called with the running report after every chunk
+        
+        Returns:
+            Report with record/photo counts, throughput and per-file failures
+        """
+        source = open_source(self.source_path)
+        done = self._load_state()
+        report = {
+            'records': 0, 'imported': 0, 'skipped': 0, 'failed': 0,
+            'photos': 0, 'photos_failed': 0, 'failures': [],
+            'elapsed_seconds': 0.0, 'records_per_second': 0.0, 'photos_per_second': 0.0
+        }
+        started = time.perf_counter()
+        
+        pool = None
+        if self.workers > 0:
+            # Spawned workers never inherit the app's database connections
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                       initargs=(self.embedding_config,), mp_context=get_context('spawn'))
+        try:
+            in_flight = deque()
+            chunk = []
+            for record in iter_records(source, self.metadata):
+                report['records'] += 1
+                if record['ref'] in done:
+                    report['skipped'] += 1
+                    continue
+                error = self._validate(record)
+                if error:
+                    self._fail(report, record['ref'], None, error)
+                    continue
+                
+                in_flight.append((record, self._submit(pool, source, record)))
+                # Bound the work queued ahead of the writer
+                while len(in_flight) > max(self.workers, 1) * 4 or (in_flight and in_flight[0][1].done()):
+                    chunk.append(self._collect(*in_flight.popleft(), report))
+                    if len(chunk) >= self.chunk_size:
+                        self._write_chunk(chunk, report, started, progress)
+                        chunk = []
+            
+            while in_flight:
+                chunk.append(self._collect(*in_flight.popleft(), report))
+            if chunk:
+                self._write_chunk(chunk, report, started, progress)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+            if hasattr(source, 'close'):
+                source.close()
+        
+        self._update_rates(report, started)
+        return report
+    
+    def _photo_folder(self, ref: str) -> str:
+        """Folder for a record's stored photos, unique per source and ref."""
+        # Distinct refs can share a secure_filename(), so the ref's hash is kept too
+        ref_key = hashlib.sha256(ref.encode()).hexdigest()[:8]
+        name = f"{secure_filename(ref) or 'record'}-{ref_key}"
+        return os.path.join(self.encodings_folder, 'imported', self.source_key, name)
+    
+    def _submit(self, pool, source, record) -> Future:
+        listed = [name.strip() for name in str(record.get('photos') or '').split(';') if name.strip()]
+        task = {
+            'ref': record['ref'],
+            'photos': source.photos(record['ref'], listed),
+            'dest': self._photo_folder(record['ref'])
+        }
+        if pool is not None:
+            return pool.submit(embed_record, task)
+        future = Future()
+        try:
+            future.set_result(embed_record(task, self.face_service or self._default_face_service()))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    def _collect(self, record, future, report) -> Optional[Dict]:
+        """Wait for one record's embeddings; None if nothing usable came back."""
+        try:
+            result = future.result()
+        except Exception as e:
+            self._fail(report, record['ref'], None, f'Embedding failed: {str(e)}')
+            return None
+        
+        photos = []
+        for photo in result['photos']:
+            if 'error' in photo:
+                report['photos_failed'] += 1
+                report['failures'].append({'ref': record['ref'], 'file': photo['file'], 'error': photo['error']})
+            else:
+                photos.append(photo)
+        if not photos:
+            # Not marked done, so a later run retries it once photos are fixed
+            self._fail(report, record['ref'], None, 'No usable photo')
+            return None
+        return {'record': record, 'photos': photos}
+    
+    def _write_chunk(self, chunk, report, started, progress):
+        """Insert one chunk of criminals and encodings in a single transaction."""
+        chunk = [item for item in chunk if item]
+        if chunk:
+            try:
+                criminals = [self._criminal(item['record']) for item in chunk]
+                db.session.add_all(criminals)
+                db.session.flush()
+                
+                rows = []
+                for criminal, item in zip(criminals, chunk):
+                    best = max(item['photos'], key=lambda photo: photo['quality_score'])
+                    rows.extend({
+                        'criminal_id': criminal.id,
+                        'encoding_data': photo['encoding'],
+                        'image_path': photo['image_path'],
+                        'quality_score': photo['quality_score'],
+                        'pose_type': photo['pose_type'],
+                        'is_primary': photo is best
+                    } for photo in item['photos'])
+                db.session.execute(insert(FaceEncoding), rows)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Watchlist import chunk failed: {str(e)}")
+                for item in chunk:
+                    self._fail(report, item['record']['ref'], None, f'Database write failed: {str(e)}')
+            else:
+                self._save_state(item['record']['ref'] for item in chunk)
+                report['imported'] += len(chunk)
+                report['photos'] += len(rows)
+        
+        self._update_rates(report, started)
+        logger.info(f"Watchlist import: {report['imported']} imported, {report['failed']} failed, "
+                    f"{report['photos_per_second']:.1f} photos/s")
+        if progress:
+            progress(report)
+    
+    def _criminal(self, record) -> Criminal:
+        return Criminal(
+            name=record['name'].strip(),
+            crime_type=record['crime_type'].strip(),
+            status=(record.get('status') or 'wanted').strip(),
+            added_by=self.added_by,
+            **{field: record.get(field) or None for field in CRIMINAL_FIELDS}
+        )
+    
+    @staticmethod
+    def _validate(record) -> Optional[str]:
+        missing = [field for field in ('name', 'crime_type') if not str(record.get(field) or '').strip()]
+        if missing:
+            return f"Missing required field(s): {', '.join(missing)}"
+        return None
+    
+    @staticmethod
+    def _fail(report, ref, file, error):
+        report['failed'] += 1
+        report['failures'].append({'ref': ref, 'file': file, 'error': error})
+    
+    @staticmethod
+    def _update_rates(report, started):
+        elapsed = time.perf_counter() - started
+        report['elapsed_seconds'] = round(elapsed, 2)
+        report['records_per_second'] = round(report['imported'] / elapsed, 2) if elapsed else 0.0
+        report['photos_per_second'] = round(report['photos'] / elapsed, 2) if elapsed else 0.0
+    
+    def _load_state(self) -> set:
+        if not os.path.exists(self.state_path):
+            return set()
+        with open(self.state_path, encoding='utf-8') as f:
+            return {line.rstrip('\n') for line in f if line.strip()}
+    
+    def _save_state(self, refs):
+        with open(self.state_path, 'a', encoding='utf-8') as f:
+            f.writelines(f'{ref}\n' for ref in refs)
+    
+    @staticmethod
+    def _default_face_service():
+        from app.services.face_service_deepface import face_service_deepface
+        return face_service_deepface
+
+
+def store_upload(folder: str, archive, metadata=None, metadata_extension: Optional[str] = None) -> tuple:
+    """
+    Save an uploaded archive (and metadata) under a folder named by content.
+    
+    Resubmitting the same files reuses the folder, so the import resumes
+    from the state file left next to the archive.
+    
+    Args:
+        folder: WATCHLIST_IMPORT_FOLDER
+        archive: Uploaded zip (werkzeug FileStorage)
+        metadata: Uploaded metadata file (optional)
+        metadata_extension: 'csv', 'json' or 'jsonl' (required with metadata)
+    
+    Returns:
+        (absolute archive path, absolute metadata path or None)
+    """
+    os.makedirs(folder, exist_ok=True)
+    digest = hashlib.sha256()
+    uploads = []
+    for upload, name in ((archive, 'source.zip'), (metadata, f'metadata.{metadata_extension}')):
+        if upload is None:
+            continue
+        temp_path = os.path.join(folder, f'.upload-{uuid.uuid4().hex}')
+        upload.save(temp_path)
+        with open(temp_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        digest.update(name.encode())
+        uploads.append((temp_path, name))
+    
+    target = os.path.abspath(os.path.join(folder, digest.hexdigest()[:32]))
+    os.makedirs(target, exist_ok=True)
+    paths = []
+    for temp_path, name in uploads:
+        path = os.path.join(target, name)
+        if os.path.exists(path):
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, path)
+        paths.append(path)
+    return paths[0], (paths[1] if len(paths) > 1 else None)
+
+
+# Runner processes started by this process, reaped when jobs are checked
+_runners = {}
+_runners_lock = threading.Lock()
+
+
+def _runner_alive(job) -> bool:
+    """False when the job's runner is known to have exited, or never claimed the job."""
+    exited = False
+    with _runners_lock:
+        for job_id, process in list(_runners.items()):
+            if process.poll() is not None:
+                del _runners[job_id]
+                exited = exited or job_id == job.id
+    if job.status == 'queued':
+        # A runner that dies before claiming the job never updates the row
+        claim_seconds = current_app.config.get('WATCHLIST_IMPORT_CLAIM_SECONDS', 300)
+        return not exited and datetime.utcnow() - job.created_at < timedelta(seconds=claim_seconds)
+    if not job.runner_pid or job.runner_host != socket.gethostname():
+        return True
+    if os.name == 'nt':
+        # os.kill(pid, 0) would signal the process on Windows
+        return True
+    try:
+        os.kill(job.runner_pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _finish(job, status: str, error: Optional[str] = None):
+    job.status = status
+    job.error = error
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _fail_dead_runner(job):
+    """Mark a job failed after its runner died, unless it moved on meanwhile (e.g. was just claimed)."""
+    table = WatchlistImportJob.__table__
+    db.session.execute(
+        table.update().where(table.c.id == job.id, table.c.status == job.status).values(
+            status='failed', error='Import process exited unexpectedly', finished_at=datetime.utcnow()
+        )
+    )
+    db.session.commit()
+    db.session.refresh(job)
+
+
+def _launch_runner(app, job_id: str):
+    """Run the job in its own process with `flask watchlist-import --job`."""
+    backend_dir = os.path.dirname(app.root_path)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [backend_dir, os.environ.get('PYTHONPATH')])))
+    command = [sys.executable, '-m', 'flask', '--app', f"app:create_app('{app.config.get('CONFIG_NAME', 'default')}')",
+               'watchlist-import', '--job', job_id]
+    job = db.session.get(WatchlistImportJob, job_id)
+    log_path = os.path.join(os.path.dirname(job.source_path), f'import-{job_id}.log')
+    with open(log_path, 'ab') as log:
+        # A new session keeps the import running when the web worker exits
+        process = subprocess.Popen(command, env=env, stdin=subprocess.DEVNULL, stdout=log,
+                                   stderr=subprocess.STDOUT, start_new_session=True)
+    with _runners_lock:
+        _runners[job_id] = process
+
+
+def start_import_job(app, source_path: str, added_by: int, metadata: Optional[str] = None) -> Dict:
+    """
+    Queue an import and start a runner for it.
+    
+    With WATCHLIST_IMPORT_RUNNER=process (the default) each job runs in its
+    own `flask watchlist-import --job` process, so it survives web worker
+    restarts; 'thread' runs it inside this process (single-worker setups
+    and tests). A source that already has a live job returns that job.
+    
+    Args:
+        app: Flask application
+        source_path: Uploaded directory or zip archive
+        added_by: Admin user id starting the import
+        metadata: Uploaded metadata file (optional)
+    
+    Returns:
+        The job dictionary (poll it with get_import_job)
+    """
+    existing = WatchlistImportJob.query.filter(
+        WatchlistImportJob.source_path == source_path,
+        WatchlistImportJob.status.in_(['queued', 'running'])
+    ).order_by(WatchlistImportJob.created_at.desc()).first()
+    if existing:
+        if _runner_alive(existing):
+            return existing.to_dict()
+        _fail_dead_runner(existing)
+        if existing.active:
+            return existing.to_dict()
+    
+    job = WatchlistImportJob(id=uuid.uuid4().hex, status='queued', source_path=source_path,
+                             metadata_path=metadata, added_by=added_by)
+    db.session.add(job)
+    db.session.commit()
+    
+    try:
+        if app.config.get('WATCHLIST_IMPORT_RUNNER', 'process') == 'thread':
+            threading.Thread(target=run_import_job, args=(app, job.id),
+                             name=f'watchlist-import-{job.id[:8]}', daemon=True).start()
+        else:
+            _launch_runner(app, job.id)
+    except Exception as e:
+        _finish(job, 'failed', f'Could not start the import: {str(e)}')
+    return job.to_dict()
+
+
+def run_import_job(app, job_id: str) -> Optional[Dict]:
+    """
+    Run a queued import job and record its progress on the job row.
+    
+    Called by the runner (`flask watchlist-import --job <id>`). The full
+    report, with every failure, is written to <source>.report.json.
+    
+    Returns:
+        The finished job dictionary, or None if the job was not queued
+    """
+    with app.app_context():
+        try:
+            table = WatchlistImportJob.__table__
+            other = table.alias('other')
+            # Claim the job unless another import of the same source is running
+            claimed = db.session.execute(
+                table.update().where(
+                    table.c.id == job_id,
+                    table.c.status == 'queued',
+                    ~exists().where(other.c.source_path == table.c.source_path, other.c.status == 'running')
+                ).values(status='running', started_at=datetime.utcnow(), updated_at=datetime.utcnow(),
+                         runner_host=socket.gethostname(), runner_pid=os.getpid())
+            ).rowcount
+            db.session.commit()
+            job = db.session.get(WatchlistImportJob, job_id)
+            if job is None:
+                return None
+            if not claimed:
+                if job.status == 'queued':
+                    _finish(job, 'failed', 'Another import of this source is running')
+                return None
+            
+            def progress(report):
+                job.set_report(report)
+                db.session.commit()
+            
+            try:
+                importer = WatchlistImporter.from_config(app.config, job.source_path, job.added_by, job.metadata_path)
+                report = importer.run(progress=progress)
+                with open(job.source_path.rstrip('/\\') + '.report.json', 'w', encoding='utf-8') as f:
+                    json.dump(report, f, indent=2)
+                job.set_report(report)
+                _finish(job, 'completed')
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Watchlist import {job_id} failed: {str(e)}")
+                _finish(job, 'failed', str(e))
+            return job.to_dict()
+        finally:
+            db.session.remove()
+
+
+def get_import_job(job_id: str) -> Optional[Dict]:
+    """Return an import job, marking it failed if its runner has died."""
+    job = db.session.get(WatchlistImportJob, job_id)
+    if job is None:
+        return None
+    if job.active and not _runner_alive(job):
+        _fail_dead_runner(job)
+    return job.to_dict()
@@ -0,0 +1,356 @@
+"""Response caching for read-heavy JSON endpoints."""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, has_app_context, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU cache.
+    
+    Entries and tag generations are private to one process: writes
+    committed by another worker or a CLI command do not invalidate them,
+    and such entries are served until their TTL expires. Only suitable
+    for single-process servers (run.py).
+    """
+    
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Return the cached value for `key`, or None if missing/expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value, ttl):
+        """Store `value` under `key` for `ttl` seconds."""
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get_generations(self, tags):
+        """Return the current generation of each tag."""
+        with self._lock:
+            return [self._generations.get(tag, 0) for tag in tags]
+    
+    def bump_generations(self, tags):
+        """Advance tag generations, orphaning every entry keyed on them."""
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+    
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    Cache stored in a local SQLite file.
+    
+    Shared by every worker process on the host, so one worker's result (and
+    one worker's invalidation) is visible to the others.
+    """
+    
+    def __init__(self, path, max_entries=5000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache_entries '
+            '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache_generations '
+            '(tag TEXT PRIMARY KEY, generation INTEGER NOT NULL)'
+        )
+        conn.commit()
+    
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    def get(self, key):
+        """Return the cached value for `key`, or None if missing/expired."""
+        row = self._connection().execute(
+            'SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?',
+            (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def set(self, key, value, ttl):
+        """Store `value` under `key` for `ttl` seconds."""
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, json.dumps(value), now + ttl)
+        )
+        
+        self._writes += 1
+        if self._writes % 100 == 0:
+            conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (now,))
+            conn.execute(
+                'DELETE FROM cache_entries WHERE key NOT IN '
+                '(SELECT key FROM cache_entries ORDER BY expires_at DESC LIMIT ?)',
+                (self.max_entries,)
+            )
+    
+    def get_generations(self, tags):
+        """Return the current generation of each tag."""
+        if not tags:
+            return []
+        placeholders = ','.join('?' for _ in tags)
+        rows = self._connection().execute(
+            f'SELECT tag, generation FROM cache_generations WHERE tag IN ({placeholders})',
+            tuple(tags)
+        ).fetchall()
+        generations = dict(rows)
+        return [generations.get(tag, 0) for tag in tags]
+    
+    def bump_generations(self, tags):
+        """Advance tag generations, orphaning every entry keyed on them."""
+        self._connection().executemany(
+            'INSERT INTO cache_generations (tag, generation) VALUES (?, 1) '
+            'ON CONFLICT(tag) DO UPDATE SET generation = generation + 1',
+            [(tag,) for tag in tags]
+        )
+    
+    def clear(self):
+        """Drop all entries."""
+        self._connection().execute('DELETE FROM cache_entries')
+    
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+
+
+class ResponseCache:
+    """
+    TTL cache for GET endpoints whose payload is shared by all users.
+    
+    Entries are keyed on path + sorted query args + the generations of the
+    tables the endpoint reads. Committing a change to one of those tables
+    bumps its generation in the backend, orphaning the stale entries, which
+    then age out. With the sqlite backend (the default) generations are
+    shared by every process on the host, so no process serves a response
+    older than the last commit made on that host. Writes the backend never
+    sees (the memory backend in another process, other hosts, SQL run
+    outside the app) are only picked up when entries expire, so
+    RESPONSE_CACHE_DEFAULT_TTL bounds their staleness.
+    """
+    
+    def __init__(self):
+        self.backend = None
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+    
+    def init_app(self, app):
+        """Create the configured backend and register the extension."""
+        backend_name = app.config.get('RESPONSE_CACHE_BACKEND', 'sqlite')
+        max_entries = app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 512)
+        
+        if backend_name == 'sqlite':
+            self.backend = SQLiteCacheBackend(app.config['RESPONSE_CACHE_PATH'], max_entries)
+        elif backend_name == 'memory':
+            self.backend = MemoryCacheBackend(max_entries)
+        else:
+            raise ValueError(f'Unknown response cache backend: {backend_name}')
+        
+        app.extensions['response_cache'] = self
+    
+    def cached(self, ttl=None, tags=()):
+        """
+        Cache successful responses of a GET view.
+        
+        Place below the auth decorator so unauthenticated requests never
+        reach the cache.
+        
+        Args:
+            ttl: Seconds to keep a response (defaults to RESPONSE_CACHE_DEFAULT_TTL)
+            tags: Table names whose writes invalidate this endpoint
+        """
+        tags = tuple(sorted(tags))
+        
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET' or not current_app.config.get('RESPONSE_CACHE_ENABLED', True):
+                    return fn(*args, **kwargs)
+                
+                endpoint = request.endpoint
+                key = self._make_key(tags)
+                
+                try:
+                    entry = self.backend.get(key)
+                except Exception as e:
+                    logger.warning(f'Response cache read failed: {str(e)}')
+                    entry = None
+                
+                if entry is not None:
+                    self._record(endpoint, 'hits')
+                    response = current_app.response_class(
+                        entry['body'],
+                        status=entry['status'],
+                        mimetype=entry['mimetype']
+                    )
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+                
+                self._record(endpoint, 'misses')
+                response = make_response(fn(*args, **kwargs))
+                
+                if response.status_code == 200 and not response.direct_passthrough:
+                    try:
+                        self.backend.set(key, {
+                            'body': response.get_data(as_text=True),
+                            'status': response.status_code,
+                            'mimetype': response.mimetype
+                        }, ttl or current_app.config.get('RESPONSE_CACHE_DEFAULT_TTL', 30))
+                    except Exception as e:
+                        logger.warning(f'Response cache write failed: {str(e)}')
+                
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            
+            return wrapper
+        
+        return decorator
+    
+    def _make_key(self, tags):
+        args = '&'.join(
+            f'{name}={value}'
+            for name, values in sorted(request.args.lists())
+            for value in values
+        )
+        generations = ','.join(
+            f'{tag}:{generation}'
+            for tag, generation in zip(tags, self.backend.get_generations(tags))
+        )
+        return f'{request.path}?{args}|{generations}'
+    
+    def _record(self, endpoint, outcome):
+        with self._stats_lock:
+            counters = self._stats.setdefault(endpoint, {'hits': 0, 'misses': 0})
+            counters[outcome] += 1
+    
+    def invalidate(self, *tables):
+        """Invalidate every cached response tagged with one of `tables`."""
+        if self.backend is not None and tables:
+            self.backend.bump_generations(sorted(set(tables)))
+    
+    def clear(self):
+        """Drop all cached responses and reset metrics."""
+        if self.backend is not None:
+            self.backend.clear()
+        with self._stats_lock:
+            self._stats = {}
+    
+    def stats(self):
+        """
+        Get hit/miss metrics for this worker.
+        
+        Returns:
+            Dictionary with totals and per-endpoint counters
+        """
+        with self._stats_lock:
+            endpoints = {name: dict(counters) for name, counters in self._stats.items()}
+        
+        hits = sum(c['hits'] for c in endpoints.values())
+        misses = sum(c['misses'] for c in endpoints.values())
+        total = hits + misses
+        
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'entries': len(self.backend) if self.backend is not None else 0,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total * 100, 2) if total > 0 else 0,
+            'endpoints': endpoints
+        }
+
+
+response_cache = ResponseCache()
+
+
+# Invalidation: collect the tables written by a session and bump their
+# generations once the transaction commits.
+
+def _pending_tables(session):
+    return session.info.setdefault('response_cache_tables', set())
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_tables(session, flush_context):
+    tables = _pending_tables(session)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table:
+            tables.add(table)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_tables(orm_execute_state):
+    if orm_execute_state.is_select:
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    name = getattr(table, 'name', None)
+    if name:
+        _pending_tables(orm_execute_state.session).add(name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_tables(session):
+    tables = session.info.pop('response_cache_tables', None)
+    if not tables or not has_app_context():
+        return
+    cache = current_app.extensions.get('response_cache')
+    if cache is None:
+        return
+    try:
+        cache.invalidate(*tables)
+    except Exception as e:
+        logger.warning(f'Response cache invalidation failed: {str(e)}')
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_rolled_back_tables(session, previous_transaction):
+    session.info.pop('response_cache_tables', None)
@@ -0,0 +1,139 @@
+"""Keyset (cursor) pagination helpers for list endpoints."""
+
+import base64
+import json
+from datetime import datetime
+from flask import request
+from sqlalchemy import text, tuple_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(sort_value, row_id):
+    """
+    Encode the position of a row as an opaque cursor.
+    
+    Args:
+        sort_value: Value of the sort column (datetime)
+        row_id: Primary key of the row
+    
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps([sort_value.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor().
+    
+    Returns:
+        Tuple of (sort_value, row_id)
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except Exception:
+        raise InvalidCursor('Invalid pagination cursor')
+
+
+def keyset_args(default_limit=20, max_limit=100):
+    """
+    Read keyset pagination parameters from the request.
+    
+    Keyset mode is opt-in: it is enabled when the `cursor` query param is
+    present (empty for the first page) or `pagination=cursor` is passed.
+    
+    Query params:
+        cursor: Cursor from the previous page's next_cursor
+        limit / per_page: Page size
+        count: none (default), estimate or exact
+    
+    Returns:
+        Dictionary with cursor, limit and count, or None when the request
+        uses page-number pagination
+    """
+    if 'cursor' not in request.args and request.args.get('pagination') != 'cursor':
+        return None
+    
+    limit = request.args.get('limit', type=int) or request.args.get('per_page', default_limit, type=int)
+    count = request.args.get('count', 'none')
+    if count not in ('none', 'estimate', 'exact'):
+        raise InvalidCursor(f'Invalid count mode: {count}')
+    
+    return {
+        'cursor': request.args.get('cursor') or None,
+        'limit': max(1, min(limit, max_limit)),
+        'count': count
+    }
+
+
+def keyset_paginate(query, sort_column, id_column, cursor=None, limit=20, count='none'):
+    """
+    Fetch one page of `query` ordered newest first by (sort_column, id).
+    
+    Seeks past the cursor with a row comparison instead of OFFSET, so the
+    cost of a page does not grow with its depth.
+    
+    Args:
+        query: Filtered query (without ordering)
+        sort_column: Non-null timestamp column to sort on
+        id_column: Primary key column used as tie-breaker
+        cursor: Cursor returned with the previous page
+        limit: Page size
+        count: none, estimate or exact
+    
+    Returns:
+        Dictionary with items, next_cursor, has_more and total (None unless
+        a count was requested)
+    """
+    total = None
+    if count == 'exact':
+        total = query.order_by(None).count()
+    elif count == 'estimate':
+        total = estimate_count(query)
+    
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+    
+    rows = query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    
+    next_cursor = None
+    if has_more:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    
+    return {
+        'items': items,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'total': total
+    }
+
+
+def estimate_count(query):
+    """
+    Estimate the number of rows matched by `query`.
+    
+    On PostgreSQL this reads the planner's row estimate, which costs no
+    table scan. Other databases fall back to an exact count.
+    """
+    session = query.session
+    if session.get_bind().dialect.name != 'postgresql':
+        return query.order_by(None).count()
+    
+    compiled = query.order_by(None).statement.compile(
+        dialect=session.get_bind().dialect,
+        compile_kwargs={'literal_binds': True}
+    )
+    plan = session.execute(text(f'EXPLAIN (FORMAT JSON) {compiled}')).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
@@ -1,52 +1,73 @@
 """Face quality assessment utilities for Phase 3."""
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 
 
-def assess_face_quality(image_path: str, face_box: Optional[Tuple[int, int, int, int]] = None) -> Dict[str, float]:
+class QualityAssessor:
     """
-    Assess the quality of a face image based on multiple factors.
+    Single-pass face quality assessment.
     
-    Args:
-        image_path: Path to the image file
-        face_box: Optional (x, y, w, h) bounding box of the face
-        
-    Returns:
-        Dictionary with quality metrics:
-        - blur_score: 0.0-1.0 (higher is sharper)
-        - brightness_score: 0.0-1.0 (optimal around 0.5)
-        - size_score: 0.0-1.0 (larger faces score higher)
-        - frontality_score: 0.0-1.0 (frontal faces score higher)
-        - overall_score: 0.0-1.0 (weighted average)
+    The eye cascade is parsed once per thread (OpenCV classifiers must not
+    be shared between threads) instead of on every call, and the image is
+    converted to grayscale once for all metrics.
     """
-    try:
-        # Read image
-        img = cv2.imread(image_path)
-        if img is None:
-            return _default_quality_scores()
+    
+    EYE_CASCADE = 'haarcascade_eye.xml'
+    
+    def __init__(self, cascade_path: Optional[str] = None, max_workers: int = 4):
+        """
+        Args:
+            cascade_path: Eye cascade XML (default: OpenCV's bundled haarcascade_eye.xml)
+            max_workers: Threads running eye detection in assess_batch()
+        """
+        self.cascade_path = cascade_path
+        self.max_workers = max_workers
+        self._local = threading.local()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+    
+    @property
+    def eye_cascade(self):
+        """Eye cascade classifier for the current thread."""
+        cascade = getattr(self._local, 'eye_cascade', None)
+        if cascade is None:
+            cascade = cv2.CascadeClassifier(self.cascade_path or cv2.data.haarcascades + self.EYE_CASCADE)
+            self._local.eye_cascade = cascade
+        return cascade
+    
+    def assess(self, image: Union[str, np.ndarray], face_box: Optional[Tuple[int, int, int, int]] = None) -> Dict[str, float]:
+        """
+        Assess the quality of a face image based on multiple factors.
         
-        # If face box provided, crop to face region
-        if face_box:
-            x, y, w, h = face_box
-            face_img = img[y:y+h, x:x+w]
-        else:
-            face_img = img
+        Args:
+            image: Decoded BGR/grayscale image, or a path to read it from
+            face_box: Optional (x, y, w, h) bounding box of the face
         
-        # 1. Blur Assessment (Laplacian variance)
-        blur_score = assess_blur(face_img)
+        Returns:
+            Dictionary with blur, brightness, size, frontality and overall scores
+        """
+        if isinstance(image, str):
+            image = cv2.imread(image)
+        if image is None or image.size == 0:
+            return _default_quality_scores()
         
-        # 2. Brightness Assessment
-        brightness_score = assess_brightness(face_img)
+        # If face box provided, crop to face region
+        face_img = _crop(image, face_box) if face_box else image
+        if face_img.size == 0:
+            return _default_quality_scores()
         
-        # 3. Size Assessment
+        gray = _to_gray(face_img)
+        blur_score = _blur_score(gray)
+        brightness_score = _brightness_score(gray)
         size_score = assess_size(face_img)
+        frontality_score = self.frontality(gray)
         
-        # 4. Frontality Assessment (simplified - uses eye detection)
-        frontality_score = assess_frontality(face_img)
-        
-        # 5. Calculate Overall Score (weighted average)
+        # Calculate Overall Score (weighted average)
         overall_score = (
             0.30 * blur_score +        # 30% weight on sharpness
             0.20 * brightness_score +  # 20% weight on brightness
@@ -61,12 +82,212 @@ def assess_face_quality(image_path: str, face_box: Optional[Tuple[int, int, int,
             'frontality_score': round(frontality_score, 3),
             'overall_score': round(overall_score, 3)
         }
+    
+    def assess_batch(self, crops: List[np.ndarray], frontality: bool = True) -> List[Dict[str, float]]:
+        """
+        Score many face crops at once (faces of one video frame, or a batch of uploads).
+        
+        Every metric is computed on the crop at its native resolution, as in
+        assess(): the Laplacian variance behind the blur score depends on
+        scale, so resizing crops to a common size would shift blur scores
+        against the calibrated thresholds. Scores are combined as NumPy
+        arrays and eye detection runs in a thread pool.
+        
+        Args:
+            crops: Decoded BGR or grayscale face crops
+            frontality: Run eye detection (False scores frontality as 0.6, neutral)
+        
+        Returns:
+            One quality dictionary per crop, in input order
+        """
+        if not crops:
+            return []
+        
+        valid = [i for i, crop in enumerate(crops) if crop is not None and crop.size > 0]
+        results = [_default_quality_scores() for _ in crops]
+        if not valid:
+            return results
+        
+        grays = [_to_gray(crops[i]) for i in valid]
+        blur = np.array([_blur_score(gray) for gray in grays], dtype=np.float64)
+        brightness = _batch_brightness_scores(np.array([gray.mean() for gray in grays], dtype=np.float64))
+        size = _batch_size_scores(np.array([gray.shape[0] * gray.shape[1] for gray in grays], dtype=np.float64))
+        if frontality:
+            front = np.array(list(self._get_executor().map(self.frontality, grays)), dtype=np.float64)
+        else:
+            front = np.full(len(grays), 0.6)
+        
+        overall = 0.30 * blur + 0.20 * brightness + 0.25 * size + 0.25 * front
+        for row, i in enumerate(valid):
+            results[i] = {
+                'blur_score': round(float(blur[row]), 3),
+                'brightness_score': round(float(brightness[row]), 3),
+                'size_score': round(float(size[row]), 3),
+                'frontality_score': round(float(front[row]), 3),
+                'overall_score': round(float(overall[row]), 3)
+            }
+        return results
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='quality')
+            return self._executor
+    
+    def shutdown(self):
+        """Stop the eye detection thread pool."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+    
+    def frontality(self, gray: np.ndarray) -> float:
+        """
+        Assess if face is frontal using eye detection.
+        Frontal faces have both eyes visible and horizontally aligned.
+        
+        Args:
+            gray: Grayscale face image
+        
+        Returns:
+            Frontality score 0.0-1.0 (higher is better, 1.0 = frontal)
+        """
+        try:
+            eyes = self.eye_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(20, 20))
+        except Exception:
+            # If eye detection fails, return neutral score
+            return 0.6
+        
+        num_eyes = len(eyes)
+        
+        if num_eyes >= 2:
+            # Both eyes detected - likely frontal
+            # Check if eyes are horizontally aligned
+            eye1_y = eyes[0][1] + eyes[0][3] // 2
+            eye2_y = eyes[1][1] + eyes[1][3] // 2
+            vertical_diff = abs(eye1_y - eye2_y)
+            
+            # If eyes are within 20% of face height, consider frontal
+            if vertical_diff < gray.shape[0] * 0.2:
+                return 1.0  # Frontal face
+            return 0.7  # Slightly tilted
+        elif num_eyes == 1:
+            # Only one eye visible - profile view
+            return 0.5
+        # No eyes detected - could be poor quality or extreme angle
+        return 0.3
+
+
+# Shared assessor; the cascade itself is loaded lazily per thread
+quality_assessor = QualityAssessor()
+
+
+def assess_face_quality(image: Union[str, np.ndarray], face_box: Optional[Tuple[int, int, int, int]] = None) -> Dict[str, float]:
+    """
+    Assess the quality of a face image based on multiple factors.
+    
+    Args:
+        image: Decoded image array (preferred, avoids re-reading) or path to the image file
+        face_box: Optional (x, y, w, h) bounding box of the face
         
+    Returns:
+        Dictionary with quality metrics:
+        - blur_score: 0.0-1.0 (higher is sharper)
+        - brightness_score: 0.0-1.0 (optimal around 0.5)
+        - size_score: 0.0-1.0 (larger faces score higher)
+        - frontality_score: 0.0-1.0 (frontal faces score higher)
+        - overall_score: 0.0-1.0 (weighted average)
+    """
+    try:
+        return quality_assessor.assess(image, face_box)
     except Exception as e:
         print(f"Error assessing quality: {str(e)}")
         return _default_quality_scores()
 
 
+def assess_face_quality_batch(crops: List[np.ndarray], frontality: bool = True) -> List[Dict[str, float]]:
+    """
+    Assess many face crops at once. See QualityAssessor.assess_batch().
+    
+    Args:
+        crops: Decoded face crops
+        frontality: Run eye detection
+    
+    Returns:
+        One quality dictionary per crop (defaults if scoring fails)
+    """
+    try:
+        return quality_assessor.assess_batch(crops, frontality=frontality)
+    except Exception as e:
+        print(f"Error assessing batch quality: {str(e)}")
+        return [_default_quality_scores() for _ in crops]
+
+
+class QualityGate:
+    """
+    Decide which detected faces are worth an embedding call.
+    
+    Faces whose shorter side is below `min_face_size` pixels are rejected
+    from the box alone; the rest are batch-scored and rejected below
+    `min_score`. A disabled gate still scores faces but passes them all.
+    """
+    
+    def __init__(self, min_score: float = 0.45, min_face_size: int = 40, enabled: bool = True,
+                 assessor: Optional[QualityAssessor] = None):
+        """
+        Args:
+            min_score: Minimum overall quality score to embed a face
+            min_face_size: Minimum face box side in pixels
+            enabled: Gate faces (False only scores them)
+            assessor: QualityAssessor to use (default: shared instance)
+        """
+        self.min_score = min_score
+        self.min_face_size = min_face_size
+        self.enabled = enabled
+        self.assessor = assessor or quality_assessor
+    
+    @classmethod
+    def from_config(cls, config) -> 'QualityGate':
+        """Create a gate from ``Config.QUALITY_GATE_*``."""
+        return cls(
+            min_score=config.get('QUALITY_GATE_MIN_SCORE', 0.45),
+            min_face_size=config.get('QUALITY_GATE_MIN_FACE_SIZE', 40),
+            enabled=config.get('QUALITY_GATE_ENABLED', True)
+        )
+    
+    def evaluate(self, crops: List[np.ndarray], face_boxes: List[Tuple[int, int, int, int]]) -> List[Tuple[Optional[Dict[str, float]], Optional[str]]]:
+        """
+        Score face crops and decide which to embed.
+        
+        Args:
+            crops: Face crops, one per box
+            face_boxes: (x, y, w, h) detector boxes
+        
+        Returns:
+            (quality, reason) per face, in input order; reason is None for
+            faces that pass, else 'too_small' (quality None, not scored)
+            or 'low_quality'
+        """
+        results = [None] * len(crops)
+        scored = []
+        for i, (x, y, w, h) in enumerate(face_boxes):
+            if self.enabled and min(w, h) < self.min_face_size:
+                results[i] = (None, 'too_small')
+            else:
+                scored.append(i)
+        
+        try:
+            qualities = self.assessor.assess_batch([crops[i] for i in scored])
+        except Exception as e:
+            print(f"Error assessing batch quality: {str(e)}")
+            qualities = [_default_quality_scores() for _ in scored]
+        
+        for i, quality in zip(scored, qualities):
+            gated = self.enabled and quality['overall_score'] < self.min_score
+            results[i] = (quality, 'low_quality' if gated else None)
+        return results
+
+
 def assess_blur(face_img: np.ndarray) -> float:
     """
     Assess image sharpness using Laplacian variance.
@@ -78,13 +299,7 @@ def assess_blur(face_img: np.ndarray) -> float:
     Returns:
         Blur score 0.0-1.0 (higher is better)
     """
-    gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY) if len(face_img.shape) == 3 else face_img
-    laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
-    
-    # Normalize: variance typically ranges from 0-500 for faces
-    # Good quality: > 100, Poor quality: < 50
-    normalized = min(laplacian_var / 200.0, 1.0)
-    return float(normalized)
+    return _blur_score(_to_gray(face_img))
 
 
 def assess_brightness(face_img: np.ndarray) -> float:
@@ -97,26 +312,7 @@ def assess_brightness(face_img: np.ndarray) -> float:
     Returns:
         Brightness score 0.0-1.0 (higher is better)
     """
-    # Convert to grayscale
-    gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY) if len(face_img.shape) == 3 else face_img
-    
-    # Calculate mean brightness
-    mean_brightness = np.mean(gray)
-    
-    # Optimal brightness is 110-150
-    # Score based on distance from optimal range
-    optimal_min, optimal_max = 110, 150
-    
-    if optimal_min <= mean_brightness <= optimal_max:
-        score = 1.0
-    elif mean_brightness < optimal_min:
-        # Too dark
-        score = max(0.0, mean_brightness / optimal_min)
-    else:
-        # Too bright
-        score = max(0.0, 1.0 - (mean_brightness - optimal_max) / (255 - optimal_max))
-    
-    return float(score)
+    return _brightness_score(_to_gray(face_img))
 
 
 def assess_size(face_img: np.ndarray) -> float:
@@ -151,7 +347,6 @@ def assess_size(face_img: np.ndarray) -> float:
 def assess_frontality(face_img: np.ndarray) -> float:
     """
     Assess if face is frontal using eye detection.
-    Frontal faces have both eyes visible and horizontally aligned.
     
     Args:
         face_img: Face image as numpy array
@@ -159,40 +354,7 @@ def assess_frontality(face_img: np.ndarray) -> float:
     Returns:
         Frontality score 0.0-1.0 (higher is better, 1.0 = frontal)
     """
-    try:
-        gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY) if len(face_img.shape) == 3 else face_img
-        
-        # Load eye cascade classifier
-        eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
-        
-        # Detect eyes
-        eyes = eye_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(20, 20))
-        
-        num_eyes = len(eyes)
-        
-        if num_eyes >= 2:
-            # Both eyes detected - likely frontal
-            # Check if eyes are horizontally aligned
-            eye1_y = eyes[0][1] + eyes[0][3] // 2
-            eye2_y = eyes[1][1] + eyes[1][3] // 2
-            vertical_diff = abs(eye1_y - eye2_y)
-            
-            # If eyes are within 20% of face height, consider frontal
-            face_height = face_img.shape[0]
-            if vertical_diff < face_height * 0.2:
-                return 1.0  # Frontal face
-            else:
-                return 0.7  # Slightly tilted
-        elif num_eyes == 1:
-            # Only one eye visible - profile view
-            return 0.5
-        else:
-            # No eyes detected - could be poor quality or extreme angle
-            return 0.3
-            
-    except Exception as e:
-        # If eye detection fails, return neutral score
-        return 0.6
+    return quality_assessor.frontality(_to_gray(face_img))
 
 
 def determine_pose_type(frontality_score: float) -> str:
@@ -241,6 +403,58 @@ def get_adaptive_threshold(overall_quality: float, base_threshold: float = 0.40)
         return base_threshold + 0.10  # 0.50
 
 
+def _to_gray(image: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+
+
+def _crop(image: np.ndarray, face_box: Tuple[int, int, int, int]) -> np.ndarray:
+    x, y, w, h = face_box
+    # Detector boxes can extend past the image edge
+    x, y = max(int(x), 0), max(int(y), 0)
+    return image[y:y + int(h), x:x + int(w)]
+
+
+def _blur_score(gray: np.ndarray) -> float:
+    laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+    
+    # Normalize: variance typically ranges from 0-500 for faces
+    # Good quality: > 100, Poor quality: < 50
+    return float(min(laplacian_var / 200.0, 1.0))
+
+
+def _brightness_score(gray: np.ndarray) -> float:
+    mean_brightness = np.mean(gray)
+    
+    # Optimal brightness is 110-150
+    # Score based on distance from optimal range
+    optimal_min, optimal_max = 110, 150
+    
+    if optimal_min <= mean_brightness <= optimal_max:
+        score = 1.0
+    elif mean_brightness < optimal_min:
+        # Too dark
+        score = max(0.0, mean_brightness / optimal_min)
+    else:
+        # Too bright
+        score = max(0.0, 1.0 - (mean_brightness - optimal_max) / (255 - optimal_max))
+    
+    return float(score)
+
+
+def _batch_brightness_scores(mean: np.ndarray) -> np.ndarray:
+    optimal_min, optimal_max = 110, 150
+    too_dark = np.maximum(mean / optimal_min, 0.0)
+    too_bright = np.maximum(1.0 - (mean - optimal_max) / (255 - optimal_max), 0.0)
+    return np.where(mean < optimal_min, too_dark, np.where(mean > optimal_max, too_bright, 1.0))
+
+
+def _batch_size_scores(pixels: np.ndarray) -> np.ndarray:
+    optimal_pixels = 100 * 100
+    min_pixels = 50 * 50
+    ramp = 0.3 + 0.7 * (pixels - min_pixels) / (optimal_pixels - min_pixels)
+    return np.where(pixels >= optimal_pixels, 1.0, np.where(pixels < min_pixels, 0.3, ramp))
+
+
 def _default_quality_scores() -> Dict[str, float]:
     """Return default quality scores when assessment fails."""
     return {
@@ -0,0 +1,115 @@
+"""Query plan audit for dashboard and notification endpoints."""
+
+import re
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+
+# Blueprints whose GET endpoints are audited by `flask db-explain`
+AUDITED_BLUEPRINTS = ('dashboard', 'notifications')
+
+# SQLite: "SCAN detection_logs" is a full table scan, while
+# "SCAN detection_logs USING [COVERING] INDEX ..." walks an index.
+_SQLITE_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?\s*$')
+_POSTGRES_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def audited_endpoints(app):
+    """
+    List parameterless GET endpoints of the audited blueprints.
+    
+    Returns:
+        List of (endpoint, path) tuples
+    """
+    endpoints = []
+    for rule in app.url_map.iter_rules():
+        blueprint = rule.endpoint.split('.')[0]
+        if blueprint in AUDITED_BLUEPRINTS and 'GET' in rule.methods and not rule.arguments:
+            endpoints.append((rule.endpoint, rule.rule))
+    return sorted(endpoints, key=lambda item: item[1])
+
+
+def capture_queries(app, db, endpoint, path, identity='0'):
+    """
+    Run one endpoint and record the SELECT statements it issues.
+    
+    The view runs inside a request context with a freshly minted token,
+    with the response cache bypassed so every query actually executes.
+    
+    Returns:
+        List of (statement, parameters) tuples, deduplicated in order
+    """
+    captured = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            captured.append((statement, parameters))
+    
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    cache_enabled = app.config.get('RESPONSE_CACHE_ENABLED')
+    app.config['RESPONSE_CACHE_ENABLED'] = False
+    try:
+        with app.app_context():
+            token = create_access_token(identity=identity)
+        with app.test_request_context(path, headers={'Authorization': f'Bearer {token}'}):
+            app.view_functions[endpoint]()
+            db.session.rollback()
+    finally:
+        app.config['RESPONSE_CACHE_ENABLED'] = cache_enabled
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    
+    unique = []
+    seen = set()
+    for statement, parameters in captured:
+        if statement not in seen:
+            seen.add(statement)
+            unique.append((statement, parameters))
+    return unique
+
+
+def explain(db, statement, parameters):
+    """
+    Get the query plan for a statement.
+    
+    Returns:
+        Tuple of (plan lines, list of tables read with a full scan).
+        Scans of subqueries and CTEs are not reported.
+    """
+    dialect = db.engine.dialect.name
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    
+    with db.engine.connect() as conn:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+    
+    if dialect == 'sqlite':
+        # Rows are (id, parent, notused, detail)
+        lines = [row[-1] for row in rows]
+        scans = [m.group(1) for m in (_SQLITE_FULL_SCAN.match(line) for line in lines) if m]
+    else:
+        lines = [row[0] for row in rows]
+        scans = [m.group(1) for m in (_POSTGRES_SEQ_SCAN.search(line) for line in lines) if m]
+    
+    tables = db.metadata.tables
+    return lines, [name for name in scans if name in tables]
+
+
+def audit_queries(app, db, identity='0'):
+    """
+    Explain every query issued by the audited endpoints.
+    
+    Returns:
+        List of dictionaries with endpoint, path, statement, plan and
+        full_scans for each distinct statement
+    """
+    report = []
+    for endpoint, path in audited_endpoints(app):
+        for statement, parameters in capture_queries(app, db, endpoint, path, identity):
+            plan, scans = explain(db, statement, parameters)
+            report.append({
+                'endpoint': endpoint,
+                'path': path,
+                'statement': statement,
+                'plan': plan,
+                'full_scans': scans
+            })
+    return report
@@ -0,0 +1,149 @@
+"""Benchmark face detectors for speed and recall on an annotated image set.
+
+The fixture set is a folder of images plus annotations.json listing the
+ground-truth face boxes of every image:
+    
+    [{"file": "group_01.jpg", "faces": [[x, y, width, height], ...]}, ...]
+
+Any labelled set works (e.g. a few hundred images converted from the WIDER
+FACE validation split); pick images that look like your uploads or CCTV
+frames. A detection counts as found when its IoU with a ground-truth box is
+at least --iou (0.5 by default).
+
+Usage (from the backend folder):
+    python benchmark_face_detectors.py --fixtures path/to/set
+    python benchmark_face_detectors.py --fixtures path/to/set \\
+        --detector deepface --detector ssd:confidence=0.5,input_size=300 \\
+        --detector ssd:confidence=0.3,input_size=200
+
+Use the results to choose FACE_DETECTOR_UPLOAD/LIVE/VIDEO and the SSD_*
+settings.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+DEFAULT_DETECTORS = ['deepface', 'ssd:confidence=0.5,input_size=300', 'ssd:confidence=0.5,input_size=200']
+
+
+def load_fixtures(folder):
+    """
+    Read annotations.json and the images it lists.
+    
+    Returns:
+        List of (file name, BGR image, ground-truth boxes)
+    """
+    with open(os.path.join(folder, 'annotations.json')) as f:
+        annotations = json.load(f)
+    fixtures = []
+    for entry in annotations:
+        image = cv2.imread(os.path.join(folder, entry['file']))
+        if image is None:
+            print(f"Skipping unreadable {entry['file']}")
+            continue
+        fixtures.append((entry['file'], image, [tuple(box) for box in entry['faces']]))
+    return fixtures
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    overlap_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    overlap_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    overlap = overlap_w * overlap_h
+    union = aw * ah + bw * bh - overlap
+    return overlap / union if union else 0.0
+
+
+def count_matches(predicted, truth, threshold=0.5):
+    """Greedy one-to-one matching; returns the number of ground-truth faces found."""
+    pairs = sorted(((iou(p, t), i, j) for i, p in enumerate(predicted) for j, t in enumerate(truth)), reverse=True)
+    used_predicted, used_truth = set(), set()
+    for score, i, j in pairs:
+        if score < threshold:
+            break
+        if i not in used_predicted and j not in used_truth:
+            used_predicted.add(i)
+            used_truth.add(j)
+    return len(used_truth)
+
+
+def build_detector(spec):
+    """
+    Turn 'deepface' or 'ssd:confidence=0.4,input_size=240' into a detect(image) callable.
+    """
+    name, _, options = spec.partition(':')
+    settings = dict(option.split('=', 1) for option in options.split(',') if option)
+    if name == 'deepface':
+        from app.services.face_service_deepface import FaceServiceDeepFace
+        service = FaceServiceDeepFace()
+        service.warm_up()
+        return service.detect_faces
+    
+    from app.config import Config
+    from app.services.face_detectors import create_detector
+    config = {key: getattr(Config, key) for key in dir(Config) if key.startswith('SSD_')}
+    for key, value in settings.items():
+        config[f'SSD_{key.upper()}'] = float(value) if key == 'confidence' else int(value)
+    detector = create_detector(name, config)
+    detector.load()
+    return detector.detect
+
+
+def run(spec, fixtures, threshold):
+    detect = build_detector(spec)
+    detect(fixtures[0][1])  # warm-up, not timed
+    
+    found = detections = faces = 0
+    started = time.perf_counter()
+    for _, image, truth in fixtures:
+        predicted = detect(image)
+        detections += len(predicted)
+        faces += len(truth)
+        found += count_matches(predicted, truth, threshold)
+    elapsed = time.perf_counter() - started
+    
+    return {
+        'detector': spec,
+        'images_per_second': len(fixtures) / elapsed,
+        'detections_per_second': detections / elapsed,
+        'ms_per_image': 1000 * elapsed / len(fixtures),
+        'recall': found / faces if faces else 0.0,
+        'precision': found / detections if detections else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark face detectors.')
+    parser.add_argument('--fixtures', required=True, help='folder with images and annotations.json')
+    parser.add_argument('--detector', action='append', help=f'detector spec (default: {DEFAULT_DETECTORS})')
+    parser.add_argument('--iou', type=float, default=0.5, help='IoU for a detection to count as found')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+    
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        parser.error('no readable images in the fixture set')
+    print(f"{len(fixtures)} images, {sum(len(truth) for _, _, truth in fixtures)} faces")
+    
+    results = [run(spec, fixtures, args.iou) for spec in args.detector or DEFAULT_DETECTORS]
+    
+    print(f"{'detector':<40}{'img/s':>8}{'det/s':>8}{'ms/img':>9}{'recall':>8}{'precision':>10}")
+    for r in results:
+        print(f"{r['detector']:<40}{r['images_per_second']:>8.1f}{r['detections_per_second']:>8.1f}"
+              f"{r['ms_per_image']:>9.1f}{r['recall']:>8.3f}{r['precision']:>10.3f}")
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Measure per-worker memory with and without pre-fork model loading.
+
+Starts gunicorn (gunicorn.conf.py, wsgi:app) twice with the same worker
+count: once with GUNICORN_PRELOAD=false, where every worker loads its own
+encoding gallery, and once with preloading, where the master loads it
+before forking (the face model is built per worker in both runs). After /api/health/ready has answered for every worker
+it reads /proc/<pid>/smaps_rollup of the master and each worker.
+
+RSS counts shared pages in every process that maps them, so it barely moves
+with copy-on-write sharing; compare PSS (shared pages split between their
+sharers) and USS (pages private to one worker) instead. The PSS total is
+the memory the whole server actually costs the node.
+
+Usage (Linux, from the backend folder, with production settings in .env):
+    python benchmark_worker_memory.py --workers 4
+    python benchmark_worker_memory.py --workers 4 --json results.json
+
+Memory grows once workers serve traffic (TensorFlow allocates per-process
+buffers on first inference), so also run detections against both servers
+and pass --settle to measure after the load you care about.
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def read_memory(pid):
+    """RSS, PSS and USS of a process in MiB, from smaps_rollup."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields.get('Rss', 0) / 1024,
+        'pss': fields.get('Pss', 0) / 1024,
+        'uss': (fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)) / 1024
+    }
+
+
+def child_pids(pid):
+    """Direct children of a process (the gunicorn workers)."""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name may contain spaces; ppid follows its closing ')'
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def wait_until_ready(url, workers, timeout):
+    """Poll the readiness probe until enough consecutive answers are 200."""
+    needed = workers * 3
+    streak = 0
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                streak = streak + 1 if response.status == 200 else 0
+        except (urllib.error.URLError, OSError):
+            streak = 0
+        if streak >= needed:
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def run_server(preload, workers, port, timeout, settle):
+    """
+    Start gunicorn, wait for readiness and measure every process.
+    
+    Args:
+        preload: Load the gallery in the master before forking
+        workers: Number of gunicorn workers
+        port: Local port to bind
+        timeout: Seconds to wait for readiness
+        settle: Extra seconds to wait before measuring
+    
+    Returns:
+        Dict with master and per-worker memory in MiB
+    """
+    env = dict(os.environ, GUNICORN_PRELOAD='true' if preload else 'false',
+               GUNICORN_WORKERS=str(workers), GUNICORN_BIND=f'127.0.0.1:{port}')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                              cwd=BACKEND_DIR, env=env)
+    try:
+        if not wait_until_ready(f'http://127.0.0.1:{port}/api/health/ready', workers, timeout):
+            raise RuntimeError(f'Server not ready after {timeout}s (preload={preload})')
+        time.sleep(settle)
+        worker_memory = [read_memory(pid) for pid in child_pids(server.pid)]
+        return {'preload': preload, 'master': read_memory(server.pid), 'workers': worker_memory}
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+def summarize(result):
+    workers = result['workers']
+    count = len(workers) or 1
+    return {
+        'mode': 'preload' if result['preload'] else 'per-worker load',
+        'workers': len(workers),
+        'rss_per_worker': sum(w['rss'] for w in workers) / count,
+        'pss_per_worker': sum(w['pss'] for w in workers) / count,
+        'uss_per_worker': sum(w['uss'] for w in workers) / count,
+        'pss_total': result['master']['pss'] + sum(w['pss'] for w in workers)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--timeout', type=int, default=300, help='seconds to wait for readiness')
+    parser.add_argument('--settle', type=float, default=5, help='seconds to wait before measuring')
+    parser.add_argument('--json', help='also write raw measurements to this file')
+    args = parser.parse_args()
+    
+    results = [run_server(preload, args.workers, args.port, args.timeout, args.settle)
+               for preload in (False, True)]
+    
+    print(f"{'mode':<18}{'workers':>8}{'RSS/worker':>12}{'PSS/worker':>12}{'USS/worker':>12}{'PSS total':>12}")
+    for summary in map(summarize, results):
+        print(f"{summary['mode']:<18}{summary['workers']:>8}"
+              f"{summary['rss_per_worker']:>10.1f}Mi{summary['pss_per_worker']:>10.1f}Mi"
+              f"{summary['uss_per_worker']:>10.1f}Mi{summary['pss_total']:>10.1f}Mi")
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Export DeepFace's Facenet512 to ONNX for the CPU embedding backends.
+
+Needs TensorFlow, deepface and tf2onnx (pip install tf2onnx) on the machine
+that exports; the servers that use the model only need onnxruntime or
+OpenCV. The exported graph takes float32 (N, 160, 160, 3) BGR in [0, 1] -
+the tensor DeepFace feeds Facenet512 - and returns (N, 512) embeddings.
+
+Usage:
+    python export_facenet512_onnx.py [--output models/facenet512.onnx] [--opset 13]
+
+Then set EMBEDDING_BACKEND=onnxruntime (or opencv-dnn) and
+EMBEDDING_MODEL_PATH to the output file.
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export Facenet512 to ONNX.')
+    parser.add_argument('--output', default=os.path.join('models', 'facenet512.onnx'))
+    parser.add_argument('--opset', type=int, default=13)
+    args = parser.parse_args()
+    
+    import tensorflow as tf
+    import tf2onnx
+    from deepface import DeepFace
+    
+    client = DeepFace.build_model('Facenet512')
+    model = getattr(client, 'model', client)  # newer DeepFace wraps the Keras model
+    
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    signature = (tf.TensorSpec((None, 160, 160, 3), tf.float32, name='input'),)
+    tf2onnx.convert.from_keras(model, input_signature=signature, opset=args.opset, output_path=args.output)
+    print(f"✓ Exported {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+    
+    # Quick check on random input; the full parity test is
+    # QA/tests/unit/test_embedding_backends.py
+    batch = np.random.default_rng(0).random((4, 160, 160, 3), dtype=np.float32)
+    expected = model.predict(batch, verbose=0)
+    try:
+        import onnxruntime
+    except ImportError:
+        print("onnxruntime not installed; skipped the output check")
+        return
+    session = onnxruntime.InferenceSession(args.output, providers=['CPUExecutionProvider'])
+    actual = session.run(None, {session.get_inputs()[0].name: batch})[0]
+    print(f"Max abs difference vs TensorFlow: {np.abs(actual - expected).max():.2e}")
+
+
+if __name__ == '__main__':
+    main()
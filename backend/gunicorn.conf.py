@@ -0,0 +1,45 @@
+"""Gunicorn settings for wsgi:app.
+
+With preload (the default) the master imports the app, loads the encoding
+gallery once, and forks workers that share those pages copy-on-write
+instead of each loading a private copy. The face model is built in each
+worker after the fork: TensorFlow is not fork-safe. Set
+GUNICORN_PRELOAD=false to load everything per worker (kept for comparison
+by benchmark_worker_memory.py).
+
+Workers are threaded (gthread): every open /api/events/stream connection
+holds one thread for as long as the client stays connected, so size
+GUNICORN_THREADS for the expected dashboards plus regular requests. The
+worker's liveness ping runs on its main thread, so long-lived streams do
+not trip GUNICORN_TIMEOUT.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+# Event streams never finish on their own; on reload or shutdown, stop
+# waiting for them after this many seconds (clients reconnect with Last-Event-ID)
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 10))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded, before workers fork."""
+    if preload_app:
+        from app import prepare_for_fork
+        prepare_for_fork(server.app.wsgi())
+
+
+def post_worker_init(worker):
+    """Runs in each worker once it has the app."""
+    from app import init_forked_worker, start_alert_dispatcher, warm_up_face_model
+    if preload_app:
+        init_forked_worker(worker.wsgi)
+    else:
+        warm_up_face_model(worker.wsgi)
+        start_alert_dispatcher(worker.wsgi)
@@ -0,0 +1,28 @@
+"""add coalescing key to alerts
+
+Revision ID: add_alert_coalesce_key
+Revises: add_alert_outbox_columns
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_alert_coalesce_key'
+down_revision = 'add_alert_outbox_columns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('coalesce_key', sa.String(length=200), nullable=True))
+        batch_op.create_index('ix_alerts_coalesce', ['coalesce_key', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.drop_index('ix_alerts_coalesce')
+        batch_op.drop_column('coalesce_key')
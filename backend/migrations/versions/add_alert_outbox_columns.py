@@ -0,0 +1,30 @@
+"""add outbox delivery columns to alerts
+
+Revision ID: add_alert_outbox_columns
+Revises: add_hot_path_indexes
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_alert_outbox_columns'
+down_revision = 'add_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('last_error', sa.Text(), nullable=True))
+        batch_op.create_index('ix_alerts_outbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.drop_index('ix_alerts_outbox')
+        batch_op.drop_column('last_error')
+        batch_op.drop_column('next_attempt_at')
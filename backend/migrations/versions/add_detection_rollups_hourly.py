@@ -0,0 +1,59 @@
+"""add hourly detection rollups
+
+Revision ID: add_detection_rollups_hourly
+Revises: 3096460b7d80
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_detection_rollups_hourly'
+down_revision = '3096460b7d80'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('detection_rollups_hourly',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('bucket_hour', sa.DateTime(), nullable=False),
+    sa.Column('location', sa.String(length=200), nullable=True),
+    sa.Column('camera_id', sa.String(length=50), nullable=True),
+    sa.Column('criminal_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('detection_count', sa.Integer(), nullable=False),
+    sa.Column('confidence_sum', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['criminal_id'], ['criminals.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('detection_rollups_hourly', schema=None) as batch_op:
+        batch_op.create_index('ix_detection_rollups_key', ['bucket_hour', 'location', 'camera_id', 'criminal_id', 'status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_detection_rollups_hourly_criminal_id'), ['criminal_id'], unique=False)
+    
+    # Populate from existing detection logs; afterwards the rollups are
+    # maintained incrementally by the application (see `flask rollup-backfill`).
+    op.execute("""
+        INSERT INTO detection_rollups_hourly
+            (bucket_hour, location, camera_id, criminal_id, status, detection_count, confidence_sum)
+        SELECT {bucket}, location, camera_id, criminal_id, status, COUNT(id), COALESCE(SUM(confidence_score), 0)
+        FROM detection_logs
+        GROUP BY {bucket}, location, camera_id, criminal_id, status
+    """.format(bucket=_hour_bucket_sql()))
+
+
+def downgrade():
+    with op.batch_alter_table('detection_rollups_hourly', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_detection_rollups_hourly_criminal_id'))
+        batch_op.drop_index('ix_detection_rollups_key')
+    
+    op.drop_table('detection_rollups_hourly')
+
+
+def _hour_bucket_sql():
+    """SQL expression truncating detected_at to the hour for the current dialect."""
+    if op.get_bind().dialect.name == 'postgresql':
+        return "date_trunc('hour', detected_at)"
+    return "strftime('%Y-%m-%d %H:00:00.000000', detected_at)"
@@ -0,0 +1,52 @@
+"""add composite and partial indexes for hot query paths
+
+Revision ID: add_hot_path_indexes
+Revises: add_detection_rollups_hourly
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_hot_path_indexes'
+down_revision = 'add_detection_rollups_hourly'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('detection_logs', 'ix_detection_logs_detected_at_id', ['detected_at', 'id']),
+    ('detection_logs', 'ix_detection_logs_status_detected_at', ['status', 'detected_at']),
+    ('detection_logs', 'ix_detection_logs_criminal_detected_at', ['criminal_id', 'detected_at']),
+    ('detection_logs', 'ix_detection_logs_location_detected_at', ['location', 'detected_at']),
+    ('detection_logs', 'ix_detection_logs_confidence_score', ['confidence_score']),
+    ('alerts', 'ix_alerts_sent_at_id', ['sent_at', 'id']),
+    ('alerts', 'ix_alerts_status', ['status']),
+    ('video_detections', 'ix_video_detections_processing_status', ['processing_status']),
+    ('video_frame_detections', 'ix_video_frame_detections_video_frame', ['video_detection_id', 'frame_number']),
+    ('video_frame_detections', 'ix_video_frame_detections_criminal_id', ['criminal_id']),
+    ('face_encodings', 'ix_face_encodings_criminal_id', ['criminal_id']),
+    ('criminals', 'ix_criminals_added_date_id', ['added_date', 'id']),
+    ('criminals', 'ix_criminals_status', ['status']),
+]
+
+
+def upgrade():
+    for table, name, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+    
+    # Partial index: unread queries only ever look at unacknowledged alerts
+    op.create_index(
+        'ix_alerts_unread', 'alerts', ['delivery_method', 'sent_at'], unique=False,
+        postgresql_where=sa.text('acknowledged = false'),
+        sqlite_where=sa.text('acknowledged = 0')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_alerts_unread', table_name='alerts')
+    
+    for table, name, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
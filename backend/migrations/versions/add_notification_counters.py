@@ -0,0 +1,42 @@
+"""add per-user notification counters
+
+Revision ID: add_notification_counters
+Revises: add_alert_coalesce_key
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_notification_counters'
+down_revision = 'add_alert_coalesce_key'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('notification_counters',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('unread', sa.Integer(), nullable=False),
+    sa.Column('unread_in_app', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    
+    # Populate from existing alerts; afterwards the counters are maintained
+    # incrementally by the application (see `flask notification-counters-rebuild`).
+    op.execute("""
+        INSERT INTO notification_counters (user_id, total, unread, unread_in_app)
+        SELECT COALESCE(user_id, 0),
+               COUNT(id),
+               SUM(CASE WHEN acknowledged THEN 0 ELSE 1 END),
+               SUM(CASE WHEN NOT acknowledged AND delivery_method = 'in_app' THEN 1 ELSE 0 END)
+        FROM alerts
+        GROUP BY COALESCE(user_id, 0)
+    """)
+
+
+def downgrade():
+    op.drop_table('notification_counters')
@@ -0,0 +1,26 @@
+"""add faces_gated count to video detections
+
+Revision ID: add_video_faces_gated
+Revises: add_notification_counters
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_video_faces_gated'
+down_revision = 'add_notification_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('video_detections', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('faces_gated', sa.Integer(), nullable=True, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('video_detections', schema=None) as batch_op:
+        batch_op.drop_column('faces_gated')
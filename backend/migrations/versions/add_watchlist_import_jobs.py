@@ -0,0 +1,46 @@
+"""add watchlist import jobs
+
+Revision ID: add_watchlist_import_jobs
+Revises: add_video_faces_gated
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_watchlist_import_jobs'
+down_revision = 'add_video_faces_gated'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('watchlist_import_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('source_path', sa.String(length=500), nullable=False),
+    sa.Column('metadata_path', sa.String(length=500), nullable=True),
+    sa.Column('added_by', sa.Integer(), nullable=False),
+    sa.Column('runner_host', sa.String(length=255), nullable=True),
+    sa.Column('runner_pid', sa.Integer(), nullable=True),
+    sa.Column('report', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['added_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('watchlist_import_jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_watchlist_import_jobs_status', ['status'], unique=False)
+        batch_op.create_index('ix_watchlist_import_jobs_source_path', ['source_path'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('watchlist_import_jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_watchlist_import_jobs_source_path')
+        batch_op.drop_index('ix_watchlist_import_jobs_status')
+    op.drop_table('watchlist_import_jobs')
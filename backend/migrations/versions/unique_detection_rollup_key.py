@@ -0,0 +1,53 @@
+"""unique hourly detection rollup key
+
+Revision ID: unique_detection_rollup_key
+Revises: add_watchlist_import_jobs
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'unique_detection_rollup_key'
+down_revision = 'add_watchlist_import_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Concurrent update-then-insert could create the same key twice; merge
+    # those rows (and empty location/camera into NULL) before the unique index.
+    op.execute("""
+        CREATE TABLE detection_rollups_merged AS
+        SELECT bucket_hour, NULLIF(location, '') AS location, NULLIF(camera_id, '') AS camera_id,
+               criminal_id, status,
+               SUM(detection_count) AS detection_count, SUM(confidence_sum) AS confidence_sum
+        FROM detection_rollups_hourly
+        GROUP BY bucket_hour, NULLIF(location, ''), NULLIF(camera_id, ''), criminal_id, status
+    """)
+    op.execute("DELETE FROM detection_rollups_hourly")
+    op.execute("""
+        INSERT INTO detection_rollups_hourly
+            (bucket_hour, location, camera_id, criminal_id, status, detection_count, confidence_sum)
+        SELECT bucket_hour, location, camera_id, criminal_id, status, detection_count, confidence_sum
+        FROM detection_rollups_merged
+    """)
+    op.drop_table('detection_rollups_merged')
+    
+    with op.batch_alter_table('detection_rollups_hourly', schema=None) as batch_op:
+        batch_op.drop_index('ix_detection_rollups_key')
+    op.create_index('ux_detection_rollups_key', 'detection_rollups_hourly', [
+        'bucket_hour',
+        sa.text("coalesce(location, '')"),
+        sa.text("coalesce(camera_id, '')"),
+        sa.text('coalesce(criminal_id, 0)'),
+        'status'
+    ], unique=True)
+
+
+def downgrade():
+    op.drop_index('ux_detection_rollups_key', table_name='detection_rollups_hourly')
+    with op.batch_alter_table('detection_rollups_hourly', schema=None) as batch_op:
+        batch_op.create_index('ix_detection_rollups_key', ['bucket_hour', 'location', 'camera_id', 'criminal_id', 'status'], unique=False)
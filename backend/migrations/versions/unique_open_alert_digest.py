@@ -0,0 +1,39 @@
+"""unique open detection digest per coalescing key
+
+Revision ID: unique_open_alert_digest
+Revises: unique_detection_rollup_key
+Create Date: 2026-10-19 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'unique_open_alert_digest'
+down_revision = 'unique_detection_rollup_key'
+branch_labels = None
+depends_on = None
+
+OPEN_DIGEST = "alert_type = 'detection_digest' AND status = 'pending' AND retry_count = 0"
+
+
+def upgrade():
+    # Racing detections could open two digests for one key; keep collecting
+    # into the newest and deliver the others as they are.
+    op.execute(f"""
+        UPDATE alerts SET coalesce_key = NULL
+        WHERE {OPEN_DIGEST}
+          AND id NOT IN (SELECT MAX(id) FROM alerts WHERE {OPEN_DIGEST} GROUP BY coalesce_key)
+    """)
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.create_index(
+            'ux_alerts_open_digest', ['coalesce_key'], unique=True,
+            postgresql_where=sa.text(OPEN_DIGEST),
+            sqlite_where=sa.text(OPEN_DIGEST)
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.drop_index('ux_alerts_open_digest')
@@ -4,12 +4,18 @@ import sys
 # Add the parent directory to the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app import create_app, db
+from app import create_app, db, start_alert_dispatcher, warm_up_face_model
 
 # Create Flask application
 app = create_app(os.getenv('FLASK_ENV', 'development'))
 
 if __name__ == '__main__':
+    # The reloader runs the app in a child process; only that one needs the
+    # model and delivers alerts
+    if not app.config['DEBUG'] or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warm_up_face_model(app)
+        start_alert_dispatcher(app)
+    
     # Run the application
     app.run(
         host='0.0.0.0',
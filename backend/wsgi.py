@@ -0,0 +1,19 @@
+"""Production WSGI entry point.
+    
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+gunicorn.conf.py preloads the encoding gallery in the master so workers
+share it copy-on-write, and runs threaded workers so live event streams do
+not block other requests; use run.py for development.
+"""
+
+import os
+import sys
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+
+# Create Flask application
+app = create_app(os.getenv('FLASK_ENV', 'production'))
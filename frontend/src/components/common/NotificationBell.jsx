@@ -26,6 +26,7 @@ import {
 import { useNavigate } from 'react-router-dom';
 import { format } from 'date-fns';
 import api from '../../services/api';
+import { subscribeToEvents } from '../../services/events';
 
 const NotificationBell = () => {
   const navigate = useNavigate();
@@ -34,11 +35,18 @@ const NotificationBell = () => {
   const [unreadCount, setUnreadCount] = useState(0);
   const [loading, setLoading] = useState(false);
 
-  // Poll for new notifications every 30 seconds
+  // Refresh on live alert events; slow poll as a fallback if the stream drops
   useEffect(() => {
     fetchUnreadCount();
-    const interval = setInterval(fetchUnreadCount, 30000);
-    return () => clearInterval(interval);
+    const unsubscribe = subscribeToEvents({
+      categories: ['alert'],
+      onEvent: fetchUnreadCount
+    });
+    const interval = setInterval(fetchUnreadCount, 300000);
+    return () => {
+      unsubscribe();
+      clearInterval(interval);
+    };
   }, []);
 
   const fetchUnreadCount = async () => {
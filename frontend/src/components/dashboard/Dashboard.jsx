@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../../context/AuthContext';
 import API from '../../services/api';
+import { subscribeToEvents } from '../../services/events';
 import {
     Container,
     Grid,
@@ -30,6 +31,15 @@ const Dashboard = () => {
 
     useEffect(() => {
         fetchDashboardData();
+        return subscribeToEvents({
+            categories: ['detection', 'video'],
+            onEvent: (event) => {
+                // Stats only change when a video starts or finishes, not on progress ticks
+                if (event.type !== 'progress') {
+                    fetchDashboardData();
+                }
+            }
+        });
     }, []);
 
     const fetchDashboardData = async () => {
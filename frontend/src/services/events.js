@@ -0,0 +1,33 @@
+const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:5000/api';
+
+// Subscribe to the live event stream. Returns a function that closes it.
+// EventSource cannot send headers, so the access token goes in the query string.
+export const subscribeToEvents = ({ categories = [], minSeverity, onEvent }) => {
+    const token = localStorage.getItem('access_token');
+    if (!token || typeof EventSource === 'undefined') {
+        return () => {};
+    }
+
+    const params = new URLSearchParams({ jwt: token });
+    if (categories.length) {
+        params.set('categories', categories.join(','));
+    }
+    if (minSeverity) {
+        params.set('min_severity', minSeverity);
+    }
+
+    const source = new EventSource(`${API_URL}/events/stream?${params.toString()}`);
+    const handler = (message) => {
+        try {
+            onEvent(JSON.parse(message.data));
+        } catch (error) {
+            console.error('Failed to parse event:', error);
+        }
+    };
+
+    ['detection', 'alert', 'video'].forEach((category) => source.addEventListener(category, handler));
+
+    return () => source.close();
+};
+
+export default subscribeToEvents;